@@ -0,0 +1,33 @@
+"""
+Add per-merchant attribution watermarks
+
+Revision ID: add_attribution_watermarks
+Revises: add_daily_rollups
+Create Date: 2026-10-18
+
+AttributionService.sync_ledger attributes orders in one set-based query and
+only looks at orders / executed proposals changed since the merchant's
+watermark. The row doubles as the per-merchant lock for a sync run.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_attribution_watermarks'
+down_revision = 'add_daily_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'attribution_watermarks',
+        sa.Column('merchant_id', sa.String(36), sa.ForeignKey('merchants.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('attribution_watermarks')
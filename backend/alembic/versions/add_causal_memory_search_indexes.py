@@ -0,0 +1,49 @@
+"""
+Add full-text and trigram indexes for causal memory retrieval
+
+Revision ID: add_causal_memory_search_indexes
+Revises: partition_agent_thoughts_by_month
+Create Date: 2026-10-18
+
+This migration (Postgres only):
+1. Enables pg_trgm
+2. Adds a partial GIN tsvector index over summary + reasoning of causal memories
+3. Adds a partial GIN trigram index on causal memory summaries (ILIKE / similarity)
+
+The tsvector expression must stay identical to
+app.services.memory_stream.CAUSAL_SEARCH_VECTOR.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'add_causal_memory_search_indexes'
+down_revision = 'partition_agent_thoughts_by_month'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute("""
+        CREATE INDEX idx_thought_causal_fts ON agent_thoughts
+        USING GIN (to_tsvector('english', agent_thoughts.summary || ' ' || coalesce(agent_thoughts.detailed_reasoning->>'reasoning', '')))
+        WHERE thought_type = 'causal_memory'
+    """)
+    op.execute("""
+        CREATE INDEX idx_thought_causal_trgm ON agent_thoughts
+        USING GIN (summary gin_trgm_ops)
+        WHERE thought_type = 'causal_memory'
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS idx_thought_causal_trgm")
+    op.execute("DROP INDEX IF EXISTS idx_thought_causal_fts")
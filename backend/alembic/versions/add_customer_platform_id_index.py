@@ -0,0 +1,26 @@
+"""
+Add (merchant_id, shopify_customer_id) index on customers
+
+Revision ID: add_customer_platform_id_index
+Revises: add_global_brain_sketches
+Create Date: 2026-10-18
+
+Order webhooks look up the buyer by platform customer id to fold the order
+into their RFM aggregates (RFMService.apply_order).
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'add_customer_platform_id_index'
+down_revision = 'add_global_brain_sketches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_customer_merchant_platform_id', 'customers', ['merchant_id', 'shopify_customer_id'])
+
+
+def downgrade():
+    op.drop_index('idx_customer_merchant_platform_id', table_name='customers')
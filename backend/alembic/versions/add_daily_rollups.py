@@ -0,0 +1,107 @@
+"""
+Add daily merchant rollups for the dashboards
+
+Revision ID: add_daily_rollups
+Revises: add_keyset_pagination_indexes
+Create Date: 2026-10-18
+
+Analytics, ROI and CRM stats read per-merchant daily rollups instead of
+summing the fact tables on every request (app.services.rollups):
+1. daily_merchant_rollups: (merchant_id, day) -> ledger, LLM cost, engagement
+   facts and the customer gauges
+2. daily_llm_cost_rollups: (merchant_id, day, task_type) -> LLM calls / cost
+3. Postgres: backfill from existing ledger_entries, llm_usage_logs, campaigns
+   (counters attributed to their start day) and converted journeys
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_daily_rollups'
+down_revision = 'add_keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+
+def _zero():
+    return sa.text('0')
+
+
+def upgrade():
+    op.create_table(
+        'daily_merchant_rollups',
+        sa.Column('merchant_id', sa.String(36), sa.ForeignKey('merchants.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('attributed_orders', sa.Integer(), server_default=_zero(), nullable=False),
+        sa.Column('attributed_revenue', sa.Numeric(14, 2), server_default=_zero(), nullable=False),
+        sa.Column('net_margin', sa.Numeric(14, 2), server_default=_zero(), nullable=False),
+        sa.Column('agent_stake', sa.Numeric(14, 2), server_default=_zero(), nullable=False),
+        sa.Column('llm_calls', sa.Integer(), server_default=_zero(), nullable=False),
+        sa.Column('llm_cost', sa.Numeric(14, 6), server_default=_zero(), nullable=False),
+        sa.Column('emails_opened', sa.Integer(), server_default=_zero(), nullable=False),
+        sa.Column('emails_clicked', sa.Integer(), server_default=_zero(), nullable=False),
+        sa.Column('conversions', sa.Integer(), server_default=_zero(), nullable=False),
+        sa.Column('journeys_converted', sa.Integer(), server_default=_zero(), nullable=False),
+        sa.Column('customers_reachable', sa.Integer(), nullable=True),
+        sa.Column('customers_at_risk', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_table(
+        'daily_llm_cost_rollups',
+        sa.Column('merchant_id', sa.String(36), sa.ForeignKey('merchants.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('task_type', sa.String(100), primary_key=True),
+        sa.Column('calls', sa.Integer(), server_default=_zero(), nullable=False),
+        sa.Column('cost_usd', sa.Numeric(14, 6), server_default=_zero(), nullable=False),
+    )
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        INSERT INTO daily_merchant_rollups (merchant_id, day, attributed_orders, attributed_revenue, net_margin, agent_stake)
+        SELECT merchant_id, created_at::date, count(*), sum(gross_amount), sum(net_amount), sum(agent_stake)
+        FROM ledger_entries
+        GROUP BY merchant_id, created_at::date
+    """)
+    op.execute("""
+        INSERT INTO daily_llm_cost_rollups (merchant_id, day, task_type, calls, cost_usd)
+        SELECT merchant_id, created_at::date, coalesce(task_type, 'unknown'), count(*), coalesce(sum(cost_usd), 0)
+        FROM llm_usage_logs
+        WHERE merchant_id IS NOT NULL
+        GROUP BY merchant_id, created_at::date, coalesce(task_type, 'unknown')
+    """)
+    op.execute("""
+        INSERT INTO daily_merchant_rollups (merchant_id, day, llm_calls, llm_cost)
+        SELECT merchant_id, day, sum(calls), sum(cost_usd)
+        FROM daily_llm_cost_rollups
+        GROUP BY merchant_id, day
+        ON CONFLICT (merchant_id, day) DO UPDATE
+        SET llm_calls = EXCLUDED.llm_calls, llm_cost = EXCLUDED.llm_cost
+    """)
+    op.execute("""
+        INSERT INTO daily_merchant_rollups (merchant_id, day, emails_opened, emails_clicked, conversions)
+        SELECT merchant_id, coalesce(started_at, created_at)::date,
+               sum(coalesce(emails_opened, 0)), sum(coalesce(emails_clicked, 0)), sum(coalesce(conversions, 0))
+        FROM campaigns
+        GROUP BY merchant_id, coalesce(started_at, created_at)::date
+        ON CONFLICT (merchant_id, day) DO UPDATE
+        SET emails_opened = EXCLUDED.emails_opened,
+            emails_clicked = EXCLUDED.emails_clicked,
+            conversions = EXCLUDED.conversions
+    """)
+    op.execute("""
+        INSERT INTO daily_merchant_rollups (merchant_id, day, journeys_converted)
+        SELECT merchant_id, updated_at::date, count(*)
+        FROM commercial_journeys
+        WHERE status = 'converted'
+        GROUP BY merchant_id, updated_at::date
+        ON CONFLICT (merchant_id, day) DO UPDATE
+        SET journeys_converted = EXCLUDED.journeys_converted
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_llm_cost_rollups')
+    op.drop_table('daily_merchant_rollups')
@@ -0,0 +1,36 @@
+"""
+Add Global Brain conversion sketches and harvest watermark
+
+Revision ID: add_global_brain_sketches
+Revises: add_attribution_watermarks
+Create Date: 2026-10-18
+
+GlobalBrainService.harvest_patterns folds only campaigns newer than its
+watermark into per-pattern mergeable quantile sketches:
+1. global_strategy_patterns.conversion_sketch: sketch behind p50/p90
+2. global_brain_harvest_state: the watermark (row doubles as the run lock)
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_global_brain_sketches'
+down_revision = 'add_attribution_watermarks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('global_strategy_patterns', sa.Column('conversion_sketch', sa.JSON(), nullable=True))
+    op.create_table(
+        'global_brain_harvest_state',
+        sa.Column('name', sa.String(50), primary_key=True),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('global_brain_harvest_state')
+    op.drop_column('global_strategy_patterns', 'conversion_sketch')
@@ -0,0 +1,42 @@
+"""
+Add composite indexes for keyset pagination of list endpoints
+
+Revision ID: add_keyset_pagination_indexes
+Revises: add_causal_memory_search_indexes
+Create Date: 2026-10-18
+
+List endpoints page on (sort key DESC, id DESC) with opaque cursors instead of
+OFFSET (app.services.pagination). This migration adds the matching
+(merchant_id, [status,] sort key, id) indexes, scanned backwards:
+1. inbox_items: by created_at, with and without a status filter
+2. products: by velocity_score
+3. agent_thoughts: by created_at
+4. audit_logs: by created_at
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'add_keyset_pagination_indexes'
+down_revision = 'add_causal_memory_search_indexes'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('idx_inbox_merchant_created_id', 'inbox_items', ['merchant_id', 'created_at', 'id']),
+    ('idx_inbox_merchant_status_created_id', 'inbox_items', ['merchant_id', 'status', 'created_at', 'id']),
+    ('idx_product_merchant_velocity_id', 'products', ['merchant_id', 'velocity_score', 'id']),
+    ('idx_thought_merchant_created_id', 'agent_thoughts', ['merchant_id', 'created_at', 'id']),
+    ('idx_audit_merchant_created_id', 'audit_logs', ['merchant_id', 'created_at', 'id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,34 @@
+"""
+Add applied refunds
+
+Revision ID: add_refunds
+Revises: add_touch_customer_created_index
+Create Date: 2026-10-18
+
+refunds/create webhooks fold refunded units into velocity. The webhook
+dedup key expires after 48h, so a later redelivery was applied again; the
+(merchant_id, platform_refund_id) primary key now makes it a no-op.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_refunds'
+down_revision = 'add_touch_customer_created_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'refunds',
+        sa.Column('merchant_id', sa.String(36), sa.ForeignKey('merchants.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('platform_refund_id', sa.String(64), primary_key=True),
+        sa.Column('platform_order_id', sa.String(64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('refunds')
@@ -0,0 +1,59 @@
+"""
+Add product-scoped memory index to agent_thoughts
+
+Revision ID: add_thought_product_memory_index
+Revises: b85c21bf1ba9, add_audit_indexes_and_integration_credential
+Create Date: 2026-10-18
+
+This migration:
+1. Adds agent_thoughts.product_id (promoted from detailed_reasoning)
+2. Backfills it from existing detailed_reasoning->>'product_id'
+3. Adds a composite index for per-product memory recall
+4. Merges the two existing heads
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_thought_product_memory_index'
+down_revision = ('b85c21bf1ba9', 'add_audit_indexes_and_integration_credential')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # =========================================================================
+    # 1. Add product_id column
+    # =========================================================================
+    with op.batch_alter_table('agent_thoughts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('product_id', sa.String(100), nullable=True))
+
+    # =========================================================================
+    # 2. Backfill from the JSON payload (Postgres only; SQLite dev DBs start empty)
+    # =========================================================================
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            """
+            UPDATE agent_thoughts
+            SET product_id = detailed_reasoning->>'product_id'
+            WHERE product_id IS NULL
+              AND detailed_reasoning->>'product_id' IS NOT NULL
+            """
+        )
+
+    # =========================================================================
+    # 3. Composite index for recall_thoughts / recall_thoughts_for_products
+    # =========================================================================
+    op.create_index(
+        'idx_thought_merchant_product_agent_created',
+        'agent_thoughts',
+        ['merchant_id', 'product_id', 'agent_type', 'created_at']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_thought_merchant_product_agent_created', 'agent_thoughts')
+
+    with op.batch_alter_table('agent_thoughts', schema=None) as batch_op:
+        batch_op.drop_column('product_id')
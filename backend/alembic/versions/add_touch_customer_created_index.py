@@ -0,0 +1,26 @@
+"""
+Add (customer_id, created_at) index on touch_logs
+
+Revision ID: add_touch_customer_created_index
+Revises: add_customer_platform_id_index
+Create Date: 2026-10-18
+
+AudienceStream excludes customers touched within the fatigue window with a
+NOT EXISTS probe per customer; this index serves it.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'add_touch_customer_created_index'
+down_revision = 'add_customer_platform_id_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_touch_customer_created', 'touch_logs', ['customer_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_touch_customer_created', table_name='touch_logs')
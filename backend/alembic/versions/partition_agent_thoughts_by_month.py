@@ -0,0 +1,145 @@
+"""
+Partition agent_thoughts by month
+
+Revision ID: partition_agent_thoughts_by_month
+Revises: add_thought_product_memory_index
+Create Date: 2026-10-18
+
+This migration (Postgres only; other dialects are left unpartitioned):
+1. Rebuilds agent_thoughts as a RANGE (created_at) partitioned table
+2. Creates monthly partitions (agent_thoughts_pYYYY_MM) covering existing
+   rows through three months ahead, plus a DEFAULT catch-all
+3. Copies existing rows and recreates indexes on the parent
+
+Partitions for later months are created by the daily thought maintenance
+job (ThoughtRetentionService.ensure_partitions), which also drops expired ones.
+Postgres requires the partition key in the primary key, so the PK becomes
+(id, created_at) (AgentThought declares the same composite key). Columns the
+source table lacks are filled in: databases built from the initial schema
+have no agent_thoughts.updated_at, which is backfilled from created_at.
+Databases whose agent_thoughts was created by the app's create_all are
+already partitioned and are left alone.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'partition_agent_thoughts_by_month'
+down_revision = 'add_thought_product_memory_index'
+branch_labels = None
+depends_on = None
+
+
+THOUGHT_COLUMNS = (
+    "id", "merchant_id", "agent_type", "execution_id", "product_id", "thought_type", "summary",
+    "detailed_reasoning", "confidence_score", "step_number", "created_at", "updated_at",
+)
+
+# Fallback expressions for columns older schemas never created
+MISSING_COLUMN_DEFAULTS = {
+    "updated_at": "created_at",
+    "product_id": "NULL",
+}
+
+THOUGHT_INDEXES = [
+    ("idx_thought_created", "created_at"),
+    ("idx_thought_merchant_agent", "merchant_id, agent_type"),
+    ("ix_agent_thoughts_execution_id", "execution_id"),
+    ("idx_thought_execution", "execution_id"),
+    ("idx_thought_merchant_product_agent_created", "merchant_id, product_id, agent_type, created_at"),
+]
+
+
+def _create_table_sql(name, partitioned):
+    return f"""
+        CREATE TABLE {name} (
+            id VARCHAR(36) NOT NULL,
+            merchant_id VARCHAR(36) NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+            agent_type VARCHAR(50) NOT NULL,
+            execution_id VARCHAR(36),
+            product_id VARCHAR(100),
+            thought_type VARCHAR(50) NOT NULL,
+            summary TEXT NOT NULL,
+            detailed_reasoning JSON,
+            confidence_score NUMERIC(5, 2) NOT NULL,
+            step_number INTEGER NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY ({'id, created_at' if partitioned else 'id'})
+        ){' PARTITION BY RANGE (created_at)' if partitioned else ''}
+    """
+
+
+def _swap_tables(new_name, partitioned):
+    """Copies agent_thoughts into new_name, drops the old table and renames."""
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("agent_thoughts")}
+    selected = [
+        column if column in existing else f"{MISSING_COLUMN_DEFAULTS[column]} AS {column}"
+        for column in THOUGHT_COLUMNS
+    ]
+    op.execute(
+        f"INSERT INTO {new_name} ({', '.join(THOUGHT_COLUMNS)}) "
+        f"SELECT {', '.join(selected)} FROM agent_thoughts"
+    )
+    op.execute("DROP TABLE agent_thoughts")
+    op.execute(f"ALTER TABLE {new_name} RENAME TO agent_thoughts")
+    op.execute(f"ALTER INDEX {new_name}_pkey RENAME TO agent_thoughts_pkey")
+
+    for index_name, columns in THOUGHT_INDEXES:
+        op.execute(f"CREATE INDEX {index_name} ON agent_thoughts ({columns})")
+
+
+def _is_partitioned():
+    return op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'agent_thoughts'"
+    )).scalar() is not None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Databases created by the app's create_all already have the partitioned table
+    if _is_partitioned():
+        return
+
+    # =========================================================================
+    # 1. Partitioned parent
+    # =========================================================================
+    op.execute(_create_table_sql("agent_thoughts_partitioned", partitioned=True))
+
+    # =========================================================================
+    # 2. Monthly partitions from the oldest row through three months ahead
+    # =========================================================================
+    op.execute("""
+        DO $$
+        DECLARE
+            m DATE := date_trunc('month', COALESCE((SELECT min(created_at) FROM agent_thoughts), now()));
+            last_month DATE := date_trunc('month', now()) + INTERVAL '3 months';
+        BEGIN
+            WHILE m <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF agent_thoughts_partitioned FOR VALUES FROM (%L) TO (%L)',
+                    'agent_thoughts_p' || to_char(m, 'YYYY_MM'), m, (m + INTERVAL '1 month')::date
+                );
+                m := (m + INTERVAL '1 month')::date;
+            END LOOP;
+        END $$;
+    """)
+    op.execute("CREATE TABLE agent_thoughts_default PARTITION OF agent_thoughts_partitioned DEFAULT")
+
+    # =========================================================================
+    # 3. Copy rows, swap tables, recreate indexes (propagate to partitions)
+    # =========================================================================
+    _swap_tables("agent_thoughts_partitioned", partitioned=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(_create_table_sql("agent_thoughts_unpartitioned", partitioned=False))
+    # Dropping the partitioned parent also drops every partition
+    _swap_tables("agent_thoughts_unpartitioned", partitioned=False)
@@ -9,16 +9,18 @@ from sqlalchemy import select, update
 from app.database import async_session_maker
 from app.models import (
     InboxItem, Campaign, Merchant, Product, 
-    Customer, AuditLog, TouchLog
+    AuditLog, TouchLog
 )
 from app.services.safety import SafetyService
 from app.services.ciba_service import CIBAService
 from app.integrations.credentials import get_credential_provider
 from app.integrations.klaviyo import KlaviyoConnector
 from app.integrations.twilio import TwilioConnector
-from app.services.waterfall import WaterfallService
+from app.services.audience_stream import AudienceStream
+from app.services.waterfall import RateLimitedDrip, WaterfallService
 from app.services.thought_logger import ThoughtLogger
 from app.services.inbox import InboxService
+from app.services.inbox_counts import invalidate_inbox_counts
 from app.services.governance import GovernanceService
 
 logger = logging.getLogger(__name__)
@@ -149,6 +151,7 @@ async def claim_proposal_execution(merchant_id: str, proposal_id: str) -> Dict:
             return {'status': 'failed', 'reason': 'Not found'}
             
         await session.commit()
+        await invalidate_inbox_counts(merchant_id)
         return {'status': 'success', 'data': proposal.proposal_data}
 
 @activity.defn
@@ -227,46 +230,39 @@ async def send_twilio_campaign(merchant_id: str, campaign_id: str, proposal_data
     async with async_session_maker() as session:
         c_res = await session.execute(select(Campaign).where(Campaign.id == campaign_id))
         campaign = c_res.scalar_one()
-        
-        # Get Customers
-        stmt = select(Customer).where(
-            Customer.merchant_id == merchant_id, 
-            Customer.sms_optin == True, 
-            Customer.rfm_segment.in_(campaign.target_segments or [])
-        )
-        res = await session.execute(stmt)
-        customers = res.scalars().all()
-        if not customers: return {'success': False, 'reason': 'no_eligible_customers'}
-        
-        twilio = TwilioConnector(f"{creds['sid']}:{creds['token']}")
-        sms_body = proposal_data.get('copy', {}).get('sms_body', 'Deal!')
-        
-        # In a real heavy scenario, we might even split THIS into chunks or child workflows
-        # For now, we do the waterfall here. If activity crashes, it retries ALL.
-        # To make it truly granular, we'd need an activity per batch or per customer.
-        # Keeping as-is for MVP migration (still better than Celery).
-        
-        async def send_wrapper(customer):
-            try:
-                # Per-customer idempotency key
-                customer_key = f"sms_{campaign_id}_{customer.id}"
-                res = await twilio.send_transactional(customer.phone, "", sms_body, idempotency_key=customer_key)
-                if res and res.get('id'):
-                     # We need session here for TouchLog... complex in async wrapper inside activity
-                     # Ideally we just collect results
-                     return res.get('id')
-            except: pass
-            return None
 
-        batch_size = simulation.get('batch_size', 20)
-        delay = simulation.get('stagger_delay_seconds', 5)
-        
-        waterfall = WaterfallService(batch_size=batch_size, delay_seconds=delay)
-        # Note: Waterfall service might need slight adaptation if it expects session
-        # Use execute_waterfall generic
-        await waterfall.execute_waterfall(customers, send_wrapper)
-        
-        return {'success': True}
+    # Recipients are streamed (opted-in, not fatigued) as the waterfall sends, one short
+    # read per chunk: no connection is held through the send's pacing sleeps
+    recipients = AudienceStream(merchant_id).stream(campaign.target_segments or [], 'sms')
+
+    twilio = TwilioConnector(f"{creds['sid']}:{creds['token']}")
+    sms_body = proposal_data.get('copy', {}).get('sms_body', 'Deal!')
+    
+    # In a real heavy scenario, we might even split THIS into chunks or child workflows
+    # For now, we do the waterfall here. If activity crashes, it retries ALL.
+    # To make it truly granular, we'd need an activity per batch or per customer.
+    # Keeping as-is for MVP migration (still better than Celery).
+    
+    async def send_wrapper(customer):
+        try:
+            # Per-customer idempotency key
+            customer_key = f"sms_{campaign_id}_{customer.id}"
+            res = await twilio.send_transactional(customer.phone, "", sms_body, idempotency_key=customer_key)
+            if res and res.get('id'):
+                 # We need session here for TouchLog... complex in async wrapper inside activity
+                 # Ideally we just collect results
+                 return res.get('id')
+        except: pass
+        return None
+
+    # Paced by the account's shared token bucket (adapts to 429s across workers);
+    # the simulation's batch size only caps how many sends are in flight
+    drip = RateLimitedDrip('twilio', creds['sid'], campaign_id=campaign_id, concurrency=simulation.get('batch_size'))
+    waterfall = WaterfallService(policy=drip)
+    sent = await waterfall.execute_waterfall(recipients, send_wrapper)
+    if not sent: return {'success': False, 'reason': 'no_eligible_customers'}
+    
+    return {'success': True}
 
 @activity.defn
 async def verify_and_update_status(merchant_id: str, proposal_id: str, campaign_id: str, klaviyo_res: Dict, twilio_res: Dict) -> Dict:
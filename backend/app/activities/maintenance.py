@@ -0,0 +1,25 @@
+# backend/app/activities/maintenance.py
+from typing import Any, Dict, Optional
+
+from temporalio import activity
+
+from app.services.rollups import compact_rollups
+from app.services.thought_retention import ThoughtRetentionService
+
+
+@activity.defn
+async def run_thought_maintenance() -> Dict[str, Any]:
+    """
+    Partition upkeep, observation compaction and retention for agent_thoughts.
+    Safe to retry: every step is idempotent.
+    """
+    return await ThoughtRetentionService().run()
+
+
+@activity.defn
+async def run_rollup_compaction(days: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Recomputes the trailing days of the daily rollups and snapshots the
+    customer gauges. Safe to retry: compaction rewrites, it never adds.
+    """
+    return await compact_rollups(days)
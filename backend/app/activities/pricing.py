@@ -0,0 +1,50 @@
+# backend/app/activities/pricing.py
+import logging
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from temporalio import activity
+
+from app.adapters.base import PriceChange
+from app.adapters.registry import AdapterRegistry
+from app.database import async_session_maker
+from app.models import Merchant
+
+logger = logging.getLogger(__name__)
+
+
+@activity.defn
+async def revert_campaign_prices(merchant_id: str, changes: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Reverts a campaign's variants to their original prices in one bulk update.
+    PriceRevertWorkflow runs it when the campaign ends, with the prices
+    ExecutionAgent captured before the discount was applied. Safe to retry:
+    it writes absolute prices.
+
+    changes: [{"platform_product_id", "platform_variant_id", "original_price"}, ...]
+    """
+    async with async_session_maker() as session:
+        result = await session.execute(select(Merchant).where(Merchant.id == merchant_id))
+        merchant = result.scalar_one_or_none()
+
+    if not merchant:
+        logger.error(f"Merchant {merchant_id} not found during price reversion")
+        return {"reverted": 0, "failed": len(changes)}
+
+    adapter = AdapterRegistry.get_adapter(merchant.platform)
+    price_changes = [
+        PriceChange(
+            platform_product_id=change["platform_product_id"],
+            platform_variant_id=change["platform_variant_id"],
+            new_price=Decimal(str(change["original_price"])).quantize(Decimal("0.01")),
+        )
+        for change in changes
+    ]
+    results = await adapter.bulk_update_prices(merchant.platform_context or {}, price_changes)
+
+    failed = [r for r in results if not r.success]
+    for r in failed:
+        logger.error(f"Price reversion failed for {r.platform_variant_id}: {r.error_message}")
+    logger.info(f"Reverted {len(results) - len(failed)}/{len(results)} prices for merchant {merchant_id}")
+    return {"reverted": len(results) - len(failed), "failed": len(failed)}
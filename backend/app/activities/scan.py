@@ -1,6 +1,4 @@
 # backend/app/activities/scan.py
-import asyncio
-import time
 from typing import Dict, List, Optional
 from temporalio import activity
 from sqlalchemy import select
@@ -35,19 +33,19 @@ class ScanActivities:
             merchant = result.scalar_one_or_none()
             
             if not merchant:
-                broadcaster.publish_error(session_id, "Merchant not found")
+                await broadcaster.publish_error(session_id, "Merchant not found")
                 return {"status": "failed", "error": "Merchant not found"}
             
             # Fetch products from Shopify
             products = await self._fetch_shopify_products(merchant, limit=limit)
             
             if not products:
-                broadcaster.publish_error(session_id, "No products found in store")
+                await broadcaster.publish_error(session_id, "No products found in store")
                 return {"status": "completed", "dead_stock_count": 0, "products_scanned": 0}
             
             total_stuck_value = 0.0
             dead_stock_count = 0
-            dead_stock_products = []
+            finds = []  # (shopify product id, product info)
             
             # Lazy import to avoid circular dep if any
             from app.agents.observer import ObserverAgent
@@ -56,17 +54,24 @@ class ScanActivities:
             observer = ObserverAgent(merchant_id)
             strategy_agent = StrategyAgent(merchant_id)
             
-            for i, product_data in enumerate(products):
+            memories = await observer.memory.recall_thoughts_for_products(
+                [p.get('id') for p in products], agent_type=observer.agent_type
+            )
+            
+            # Analyze concurrently as fast as the LLM allows; the SSE endpoint
+            # paces the reveal for the client from the event log.
+            scanned = 0
+            async for product_data, analysis in observer.observe_products_concurrently(
+                products, session, memories, concurrency=settings.QUICK_SCAN_CONCURRENCY
+            ):
+                scanned += 1
                 # Heartbeat to keep activity alive during long processing
-                activity.heartbeat(f"Scanning product {i+1}/{len(products)}")
-                
-                # Analyze using Agent
-                analysis = await observer.observe_product(product_data, session)
+                activity.heartbeat(f"Scanned product {scanned}/{len(products)}")
                 
                 # Broadcast progress
-                broadcaster.publish_scan_progress(
+                await broadcaster.publish_scan_progress(
                     session_id,
-                    products_scanned=i + 1,
+                    products_scanned=scanned,
                     total_products=len(products)
                 )
                 
@@ -87,47 +92,50 @@ class ScanActivities:
                         "reasoning": analysis["reasoning"]
                     }
                     
-                    dead_stock_products.append(product_info)
+                    finds.append((product_data['id'], product_info))
                     
-                    # Create Proposal for top finds
-                    if dead_stock_count <= 3:
-                        try:
-                            db_product_result = await session.execute(
-                                select(Product).where(Product.shopify_product_id == product_data['id'])
-                            )
-                            db_p = db_product_result.scalar_one_or_none()
-                            if db_p:
-                                await strategy_agent.plan_clearance(db_p.id)
-                        except Exception as e:
-                            print(f"⚠️ Failed to generate strategy: {e}")
-                            
                     # Broadcast find
-                    broadcaster.publish_dead_stock_found(
+                    await broadcaster.publish_dead_stock_found(
                         session_id,
                         product=product_info,
                         running_total={
                             "dead_stock_count": dead_stock_count,
                             "total_stuck_value": round(total_stuck_value, 2),
-                            "products_scanned": i + 1,
+                            "products_scanned": scanned,
                             "total_products": len(products)
                         }
                     )
-                    
-                    # Artificial delay for drama
-                    await asyncio.sleep(0.5)
+
+            # Create Proposals for the top finds (largest stuck value first)
+            finds.sort(key=lambda find: find[1]["stuck_value"], reverse=True)
+            for shopify_product_id, _ in finds[:3]:
+                try:
+                    db_product_result = await session.execute(
+                        select(Product).where(
+                            Product.merchant_id == merchant_id,
+                            Product.shopify_product_id == shopify_product_id
+                        )
+                    )
+                    db_p = db_product_result.scalar_one_or_none()
+                    if db_p:
+                        await strategy_agent.plan_clearance(db_p.id)
+                except Exception as e:
+                    print(f"⚠️ Failed to generate strategy: {e}")
 
             # Generate Inbox Items for top proposals (if not already handled by strategy agent above? logic in original task was slightly duplicated)
             # The original task had `_generate_quick_proposals` which wrote to InboxItem.
             # `strategy_agent.plan_clearance` also writes to InboxItem.
             # We will rely on strategy_agent.plan_clearance as it is the "proper" way.
             # If we need the manual fallback:
-            if dead_stock_products and dead_stock_count > 0:
-                 await self._generate_quick_proposals_fallback(merchant_id, dead_stock_products[:3], session)
+            if finds:
+                 await self._generate_quick_proposals_fallback(
+                     merchant_id, [product_info for _, product_info in finds[:3]], session
+                 )
 
             await session.commit()
             
             # Broadcast Complete
-            broadcaster.publish_quick_scan_complete(
+            await broadcaster.publish_quick_scan_complete(
                 session_id,
                 summary={
                     "dead_stock_count": dead_stock_count,
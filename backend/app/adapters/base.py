@@ -10,7 +10,7 @@ This is the single contract that makes Cephly platform-agnostic.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Sequence, TypeVar
 from decimal import Decimal
 from dataclasses import dataclass
 from datetime import datetime
@@ -58,6 +58,38 @@ class PriceUpdateResult:
     error_message: Optional[str] = None
 
 
+@dataclass
+class PriceChange:
+    """One variant's new price, as passed to bulk_update_prices()."""
+    platform_product_id: str
+    platform_variant_id: str
+    new_price: Decimal
+
+
+T = TypeVar("T")
+
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    """Consecutive slices of at most `size` items (batch endpoints cap request sizes)."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def price_update_result(change: PriceChange, error_message: Optional[str] = None) -> PriceUpdateResult:
+    return PriceUpdateResult(
+        success=error_message is None,
+        platform_product_id=change.platform_product_id,
+        platform_variant_id=change.platform_variant_id,
+        new_price=change.new_price,
+        updated_at=datetime.utcnow(),
+        error_message=error_message,
+    )
+
+
+def price_update_failed(change: PriceChange, error_message: str) -> PriceUpdateResult:
+    return price_update_result(change, error_message or "Unknown error")
+
+
 @dataclass
 class WebhookEvent:
     """A normalized event from any platform. Adapters translate raw
@@ -165,6 +197,34 @@ class BasePlatformAdapter(ABC):
         """
         pass
 
+    async def bulk_update_prices(
+        self,
+        merchant_context: Dict,
+        changes: List[PriceChange],
+    ) -> List[PriceUpdateResult]:
+        """
+        Write many prices with as few platform calls as possible.
+
+        Returns one PriceUpdateResult per change, in the same order. Partial
+        failure is normal: each result carries its own success flag and
+        error_message. Like update_price, this must not raise.
+
+        Adapters override this with the platform's batch API; the default
+        falls back to one update_price call per change.
+        """
+        results = []
+        for change in changes:
+            try:
+                results.append(await self.update_price(
+                    merchant_context,
+                    change.platform_product_id,
+                    change.platform_variant_id,
+                    change.new_price,
+                ))
+            except Exception as e:
+                results.append(price_update_failed(change, str(e)))
+        return results
+
     # --- Webhooks ---
 
     @abstractmethod
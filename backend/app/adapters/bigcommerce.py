@@ -1,6 +1,5 @@
 
 import logging
-import httpx
 from typing import Dict, List, Optional
 from decimal import Decimal
 from datetime import datetime
@@ -9,10 +8,15 @@ from app.adapters.base import (
     BasePlatformAdapter,
     PlatformProduct,
     PlatformCustomer,
+    PriceChange,
     PriceUpdateResult,
     WebhookEvent,
+    chunked,
+    price_update_failed,
+    price_update_result,
 )
 from app.config import get_settings
+from app.services.http_clients import HttpClientView, http_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -22,11 +26,15 @@ class BigCommercePlatformAdapter(BasePlatformAdapter):
     Adapter for BigCommerce (V3 API).
     """
 
+    # Batch endpoint limits: catalog/variants takes 50 variants, catalog/products 10 products
+    VARIANT_BATCH_LIMIT = 50
+    PRODUCT_BATCH_LIMIT = 10
+
     @property
     def platform_name(self) -> str:
         return "bigcommerce"
 
-    def _get_client(self, context: Dict) -> httpx.AsyncClient:
+    def _get_client(self, context: Dict) -> HttpClientView:
         store_hash = context.get("store_hash")
         token = context.get("access_token")
         
@@ -35,14 +43,12 @@ class BigCommercePlatformAdapter(BasePlatformAdapter):
             
         base_url = f"https://api.bigcommerce.com/stores/{store_hash}/v3/"
         
-        return httpx.AsyncClient(
+        return http_client(
             base_url=base_url,
             headers={
                 "X-Auth-Token": token,
                 "Content-Type": "application/json",
-                "User-Agent": "Cephly/1.0"
             },
-            timeout=30.0
         )
 
     async def authenticate(self, auth_payload: Dict) -> Dict:
@@ -60,7 +66,7 @@ class BigCommercePlatformAdapter(BasePlatformAdapter):
         # helper to extract hash from "stores/xyz"
         store_hash = context.split('/')[-1]
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.post(
                 "https://login.bigcommerce.com/oauth2/token",
                 json={
@@ -188,6 +194,46 @@ class BigCommercePlatformAdapter(BasePlatformAdapter):
                 error_message=error
             )
 
+    async def bulk_update_prices(self, merchant_context: Dict, changes: List[PriceChange]) -> List[PriceUpdateResult]:
+        """
+        Variants go through the batch variants endpoint (PUT catalog/variants);
+        products synced without variants (variant id == product id) through
+        PUT catalog/products.
+        """
+        variant_indexes = [i for i, c in enumerate(changes) if c.platform_variant_id != c.platform_product_id]
+        product_indexes = [i for i, c in enumerate(changes) if c.platform_variant_id == c.platform_product_id]
+        batches = [
+            *[("catalog/variants", indexes) for indexes in chunked(variant_indexes, self.VARIANT_BATCH_LIMIT)],
+            *[("catalog/products", indexes) for indexes in chunked(product_indexes, self.PRODUCT_BATCH_LIMIT)],
+        ]
+
+        results: List[Optional[PriceUpdateResult]] = [None] * len(changes)
+        async with self._get_client(merchant_context) as client:
+            for endpoint, indexes in batches:
+                payload = [
+                    {"id": int(changes[i].platform_variant_id), "price": float(changes[i].new_price)}
+                    for i in indexes
+                ]
+                try:
+                    resp = await client.put(endpoint, json=payload)
+                    if resp.status_code in (200, 207):
+                        # 207 Multi-Status: only the objects returned in "data" were updated
+                        body = resp.json()
+                        updated = {str(item["id"]) for item in body.get("data", [])}
+                        error = str(body.get("errors") or "Not updated")
+                    else:
+                        updated, error = set(), f"{resp.status_code}: {resp.text}"
+                except Exception as e:
+                    updated, error = set(), str(e)
+
+                for i in indexes:
+                    change = changes[i]
+                    if str(change.platform_variant_id) in updated:
+                        results[i] = price_update_result(change)
+                    else:
+                        results[i] = price_update_failed(change, error)
+        return results
+
     async def register_webhook(self, merchant_context: Dict, event_type: str, callback_url: str) -> bool:
         # Map events
         # store/order/created
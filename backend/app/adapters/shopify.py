@@ -13,18 +13,23 @@ and resolves the correct adapter at runtime via the AdapterRegistry.
 
 import hashlib
 import hmac
-import httpx
 from decimal import Decimal
 from datetime import datetime
+from collections import defaultdict
 from typing import Dict, List, Optional, Any
 
 from app.adapters.base import (
     BasePlatformAdapter,
     PlatformProduct,
     PlatformCustomer,
+    PriceChange,
     PriceUpdateResult,
     WebhookEvent,
+    chunked,
+    price_update_failed,
+    price_update_result,
 )
+from app.services.http_clients import http_client
 
 
 class ShopifyPlatformAdapter(BasePlatformAdapter):
@@ -32,6 +37,11 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
     SHOPIFY_API_VERSION = "2024-01"
     REQUIRED_SCOPES = "read_products,write_products,read_orders,read_customers"
 
+    # productVariantsBulkUpdate takes one product's variants; several products
+    # are sent per GraphQL document as aliased mutations (10 cost points each)
+    BULK_PRODUCTS_PER_REQUEST = 25
+    BULK_VARIANTS_PER_PRODUCT = 250
+
     @property
     def platform_name(self) -> str:
         return "shopify"
@@ -49,7 +59,7 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
         client_secret = auth_payload["client_secret"]
 
         url = f"https://{shop}/admin/oauth/access_token"
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.post(url, json={
                 "client_id": client_id,
                 "client_secret": client_secret,
@@ -75,7 +85,7 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
         products = []
         page_info = None
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             while True:
                 url = f"https://{shop}/admin/api/{self.SHOPIFY_API_VERSION}/products.json"
                 params = {"limit": 250}
@@ -121,7 +131,7 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
         token = merchant_context["access_token"]
         customers = []
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             url = f"https://{shop}/admin/api/{self.SHOPIFY_API_VERSION}/customers.json"
             response = await client.get(
                 url,
@@ -154,7 +164,7 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
         shop = merchant_context["shop_id"]
         token = merchant_context["access_token"]
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             url = (
                 f"https://{shop}/admin/api/{self.SHOPIFY_API_VERSION}"
                 f"/products/{platform_product_id}/variants/{platform_variant_id}.json"
@@ -197,7 +207,7 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
             f"/products/{platform_product_id}/variants/{platform_variant_id}.json"
         )
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.put(
                 url,
                 json={"variant": {"id": platform_variant_id, "price": str(new_price)}},
@@ -225,6 +235,94 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
             updated_at=datetime.utcnow(),
         )
 
+    async def bulk_update_prices(
+        self,
+        merchant_context: Dict,
+        changes: List[PriceChange],
+    ) -> List[PriceUpdateResult]:
+        """
+        Write many variant prices through GraphQL productVariantsBulkUpdate:
+        one aliased mutation per product, BULK_PRODUCTS_PER_REQUEST products
+        per HTTP call.
+        """
+        shop = merchant_context["shop_id"]
+        token = merchant_context["access_token"]
+        url = f"https://{shop}/admin/api/{self.SHOPIFY_API_VERSION}/graphql.json"
+
+        by_product: Dict[str, List[int]] = defaultdict(list)
+        for index, change in enumerate(changes):
+            by_product[str(change.platform_product_id)].append(index)
+        groups = [
+            (product_id, indexes)
+            for product_id, product_indexes in by_product.items()
+            for indexes in chunked(product_indexes, self.BULK_VARIANTS_PER_PRODUCT)
+        ]
+
+        results: List[Optional[PriceUpdateResult]] = [None] * len(changes)
+        async with http_client() as client:
+            for batch in chunked(groups, self.BULK_PRODUCTS_PER_REQUEST):
+                mutations, variables = [], {}
+                for n, (product_id, indexes) in enumerate(batch):
+                    variables[f"p{n}"] = f"gid://shopify/Product/{product_id}"
+                    variables[f"v{n}"] = [
+                        {
+                            "id": f"gid://shopify/ProductVariant/{changes[i].platform_variant_id}",
+                            "price": str(changes[i].new_price),
+                        }
+                        for i in indexes
+                    ]
+                    mutations.append(
+                        f"u{n}: productVariantsBulkUpdate(productId: $p{n}, variants: $v{n}) "
+                        "{ productVariants { id } userErrors { field message } }"
+                    )
+                signature = ", ".join(
+                    f"$p{n}: ID!, $v{n}: [ProductVariantsBulkInput!]!" for n in range(len(batch))
+                )
+                query = f"mutation BulkPrices({signature}) {{ {' '.join(mutations)} }}"
+
+                try:
+                    response = await client.post(
+                        url,
+                        json={"query": query, "variables": variables},
+                        headers={"X-Shopify-Access-Token": token},
+                    )
+                    body = response.json() if response.status_code == 200 else {}
+                except Exception as e:
+                    response, body = None, {"errors": [{"message": str(e)}]}
+
+                if response is not None and response.status_code != 200:
+                    body = {"errors": [{"message": f"Shopify returned {response.status_code}: {response.text}"}]}
+                data = body.get("data") or {}
+
+                for n, (product_id, indexes) in enumerate(batch):
+                    payload = data.get(f"u{n}")
+                    if not payload:
+                        error = "; ".join(e.get("message", "") for e in body.get("errors") or []) or "No result"
+                        for i in indexes:
+                            results[i] = price_update_failed(changes[i], error)
+                        continue
+
+                    updated = {v["id"].rsplit("/", 1)[-1] for v in payload.get("productVariants") or []}
+                    # userErrors point at a variant by position: field = ["variants", "<index>", ...]
+                    errors_by_position: Dict[int, str] = {}
+                    general_errors = []
+                    for error in payload.get("userErrors") or []:
+                        field = error.get("field") or []
+                        if len(field) > 1 and field[0] == "variants" and str(field[1]).isdigit():
+                            errors_by_position[int(field[1])] = error.get("message", "")
+                        else:
+                            general_errors.append(error.get("message", ""))
+
+                    for position, i in enumerate(indexes):
+                        change = changes[i]
+                        if str(change.platform_variant_id) in updated:
+                            results[i] = price_update_result(change)
+                        else:
+                            results[i] = price_update_failed(
+                                change, errors_by_position.get(position) or "; ".join(general_errors)
+                            )
+        return results
+
     # --- Webhooks ---
 
     async def register_webhook(
@@ -243,6 +341,7 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
             "order.updated": "orders/update",
             "product.updated": "products/update",
             "product.deleted": "products/destroy",
+            "refund.created": "refunds/create",
         }
 
         topic = SHOPIFY_TOPIC_MAP.get(event_type)
@@ -250,7 +349,7 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
             return False
 
         url = f"https://{shop}/admin/api/{self.SHOPIFY_API_VERSION}/webhooks.json"
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.post(
                 url,
                 json={"webhook": {"topic": topic, "address": callback_url, "format": "json"}},
@@ -291,13 +390,16 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
              pass
 
         # Normalize the event type
-        shopify_topic = headers.get("X-Shopify-Webhook-Id-Topic", "")
+        lowered_headers = {k.lower(): v for k, v in headers.items()}
+        shopify_topic = lowered_headers.get("x-shopify-topic") or lowered_headers.get("x-shopify-webhook-id-topic", "")
         TOPIC_MAP = {
             "orders/create": "order.created",
             "orders/update": "order.updated",
             "products/update": "product.updated",
             "products/destroy": "product.deleted",
+            "refunds/create": "refund.created",
         }
+        event_type = TOPIC_MAP.get(shopify_topic, shopify_topic)
 
         # Normalize the payload
         normalized_payload = {}
@@ -324,10 +426,31 @@ class ShopifyPlatformAdapter(BasePlatformAdapter):
                 "id": str(raw_payload.get("id")),
                 "order_number": str(raw_payload.get("order_number")),
                 "total_price": raw_payload.get("total_price"),
+                "subtotal_price": raw_payload.get("subtotal_price"),
+                "created_at": raw_payload.get("created_at"),
                 "customer": {
                     "id": str(raw_payload.get("customer", {}).get("id")) if raw_payload.get("customer") else None,
                     "email": raw_payload.get("customer", {}).get("email") if raw_payload.get("customer") else None
-                }
+                },
+                "line_items": [
+                    {
+                        "product_id": str(li.get("product_id")) if li.get("product_id") else None,
+                        "quantity": li.get("quantity", 0),
+                        "price": li.get("price"),
+                    } for li in raw_payload.get("line_items", [])
+                ]
+            }
+        elif event_type.startswith("refund"):
+            normalized_payload = {
+                "id": str(raw_payload.get("id")),
+                "order_id": str(raw_payload.get("order_id")),
+                "line_items": [
+                    {
+                        "product_id": str(rli.get("line_item", {}).get("product_id")) if rli.get("line_item", {}).get("product_id") else None,
+                        "quantity": rli.get("quantity", 0),
+                        "price": rli.get("line_item", {}).get("price"),
+                    } for rli in raw_payload.get("refund_line_items", [])
+                ]
             }
         elif event_type.startswith("customer"):
             normalized_payload = {
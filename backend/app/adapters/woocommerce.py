@@ -3,6 +3,7 @@ import logging
 import hmac
 import hashlib
 import base64
+from collections import defaultdict
 from typing import Dict, List, Optional
 from decimal import Decimal
 from datetime import datetime
@@ -12,9 +13,14 @@ from app.adapters.base import (
     BasePlatformAdapter,
     PlatformProduct,
     PlatformCustomer,
+    PriceChange,
     PriceUpdateResult,
     WebhookEvent,
+    chunked,
+    price_update_failed,
+    price_update_result,
 )
+from app.services.http_clients import HttpClientView, http_client
 
 logger = logging.getLogger(__name__)
 
@@ -23,12 +29,14 @@ class WooCommercePlatformAdapter(BasePlatformAdapter):
     Adapter for WooCommerce (REST API V3).
     """
 
+    BATCH_LIMIT = 100  # Objects per products/batch or variations/batch request
+
     @property
     def platform_name(self) -> str:
         return "woocommerce"
 
-    def _get_client(self, context: Dict) -> httpx.AsyncClient:
-        """Helper to create an authenticated client."""
+    def _get_client(self, context: Dict) -> HttpClientView:
+        """Helper to borrow an authenticated view on the store's pooled client."""
         url = context.get("url")
         key = context.get("consumer_key")
         secret = context.get("consumer_secret")
@@ -39,11 +47,10 @@ class WooCommercePlatformAdapter(BasePlatformAdapter):
         # Ensure trailing slash
         base_url = f"{url.rstrip('/')}/wp-json/wc/v3/"
         
-        return httpx.AsyncClient(
+        return http_client(
             base_url=base_url,
             auth=(key, secret),
-            timeout=30.0,
-            headers={"Content-Type": "application/json", "User-Agent": "Cephly/1.0"}
+            headers={"Content-Type": "application/json"}
         )
 
     async def authenticate(self, auth_payload: Dict) -> Dict:
@@ -198,6 +205,49 @@ class WooCommercePlatformAdapter(BasePlatformAdapter):
                 error_message=err_msg
             )
 
+    async def bulk_update_prices(self, merchant_context: Dict, changes: List[PriceChange]) -> List[PriceUpdateResult]:
+        """
+        Simple products go through products/batch; variations through
+        products/{id}/variations/batch, one parent at a time. BATCH_LIMIT
+        objects per request.
+        """
+        # endpoint -> indexes of the changes it updates
+        endpoints: Dict[str, List[int]] = defaultdict(list)
+        for index, change in enumerate(changes):
+            product_id, variant_id = change.platform_product_id, change.platform_variant_id
+            if product_id == variant_id:
+                endpoints["products/batch"].append(index)
+            else:
+                endpoints[f"products/{product_id}/variations/batch"].append(index)
+
+        results: List[Optional[PriceUpdateResult]] = [None] * len(changes)
+        async with self._get_client(merchant_context) as client:
+            for endpoint, endpoint_indexes in endpoints.items():
+                for indexes in chunked(endpoint_indexes, self.BATCH_LIMIT):
+                    payload = {"update": [
+                        {"id": int(changes[i].platform_variant_id), "regular_price": str(changes[i].new_price)}
+                        for i in indexes
+                    ]}
+                    try:
+                        resp = await client.post(endpoint, json=payload)
+                        error = None if resp.status_code == 200 else f"{resp.status_code}: {resp.text}"
+                        updated = resp.json().get("update", []) if error is None else []
+                    except Exception as e:
+                        error, updated = str(e), []
+
+                    # Items come back in request order; failed ones carry an "error" object (and id 0)
+                    for position, i in enumerate(indexes):
+                        item = updated[position] if position < len(updated) else None
+                        if error is not None:
+                            results[i] = price_update_failed(changes[i], error)
+                        elif item is None:
+                            results[i] = price_update_failed(changes[i], "Not updated")
+                        elif item.get("error"):
+                            results[i] = price_update_failed(changes[i], item["error"].get("message", "Update failed"))
+                        else:
+                            results[i] = price_update_result(changes[i])
+        return results
+
     async def register_webhook(self, merchant_context: Dict, event_type: str, callback_url: str) -> bool:
         # Map Cephly event types to Woo topics
         # e.g. "product.updated" -> "product.update"
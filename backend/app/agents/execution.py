@@ -15,23 +15,27 @@ import os
 import asyncio
 import logging
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Dict, Any, List, Callable, Optional
 
 from sqlalchemy import select
 from app.database import async_session_maker
 from app.models import (
     InboxItem, Campaign, Merchant, Product, 
-    Customer, AuditLog, TouchLog
+    AuditLog, TouchLog
 )
 
 from app.integrations.klaviyo import KlaviyoConnector
 from app.integrations.twilio import TwilioConnector
-from app.services.waterfall import WaterfallService
+from app.services.audience_stream import AudienceStream
+from app.services.waterfall import RateLimitedDrip, WaterfallService
 from app.integrations.credentials import get_credential_provider
 from app.services.governance import GovernanceService
 from app.services.inbox import InboxService
 from app.services.safety import SafetyService
+from app.services.thought_sink import create_thought_sink
+from app.services.internal_api_client import get_internal_api_client
 
 from app.adapters.registry import AdapterRegistry  # [REFACTOR] New Adapter Registry
 
@@ -47,6 +51,11 @@ class TokenExpiredError(RetryableError): pass
 class PermanentError(Exception): pass
 class MaxRetriesExceededError(Exception): pass
 
+
+def discounted_price(price, discount_percent: float) -> Decimal:
+    """Price after the discount, rounded to cents (platforms reject long decimal strings)."""
+    return (Decimal(str(price)) * (Decimal("1") - Decimal(str(discount_percent)))).quantize(Decimal("0.01"))
+
 class ExecutionAgent:
     """
     World-Class Execution Agent.
@@ -58,57 +67,14 @@ class ExecutionAgent:
     def __init__(self, merchant_id: str):
         self.merchant_id = merchant_id
         self.agent_type = "execution"
-        self._api_token = None
+        self.api = get_internal_api_client()
+        self.thought_sink = create_thought_sink(merchant_id, self.agent_type)
         self.client_id = f"agent_{self.agent_type}_88b1" # Deterministic ID
         
     async def _log_thought(self, **kwargs):
-        """Helper to log thoughts via Internal API."""
-        if not self._api_token: await self._authenticate()
-        
-        import aiohttp
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        
-        # Map kwargs to API schema
-        payload = {
-            "agent_type": self.agent_type,
-            "thought_type": kwargs.get("thought_type", "info"),
-            "summary": kwargs.get("summary", ""),
-            "detailed_reasoning": kwargs.get("detailed_reasoning", {}),
-            "confidence_score": float(kwargs.get("confidence_score", 1.0)),
-            "step_number": kwargs.get("step_number", 1),
-            "execution_id": kwargs.get("execution_id"),
-            "product_id": kwargs.get("detailed_reasoning", {}).get("product_id")
-        }
-        
-        try:
-            async with aiohttp.ClientSession() as http:
-                await http.post(
-                    "http://localhost:8000/internal/agents/thoughts",
-                    json=payload,
-                    headers=headers
-                )
-        except Exception as e:
-            logger.error(f"Failed to log thought via API: {e}")
+        """Helper to queue thoughts on the agent's buffered thought sink."""
+        await self.thought_sink.emit(**kwargs)
         
-    async def _authenticate(self):
-        """[HARDENING] Authenticates with Internal API using Vaulted Credentials."""
-        if self._api_token: return
-        import aiohttp
-        from app.services.identity import IdentityService
-        from app.database import async_session_maker
-        async with async_session_maker() as db:
-            identity_service = IdentityService(db, self.merchant_id)
-            creds = await identity_service.get_agent_credentials("execution")
-        if not creds:
-             logger.error("Failed to fetch Execution credentials")
-             return
-        async with aiohttp.ClientSession() as http:
-            async with http.post("http://localhost:8000/internal/agents/auth", json=creds) as resp:
-                if resp.status == 200:
-                     self._api_token = (await resp.json())['access_token']
-                else:
-                     logger.error(f"Execution Agent Auth Failed: {await resp.text()}")
-
     async def execute_campaign(self, proposal_id: str) -> dict:
         """
         Executes an approved proposal with reasoning-based resilience.
@@ -161,19 +127,14 @@ class ExecutionAgent:
 
     async def _execute_campaign_internal(self, proposal_id: str, simulation: Dict, retry_count: int = 0) -> dict:
         """Internal execution logic using Internal API for locking."""
-        if not self._api_token: await self._authenticate()
-        import aiohttp
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        
-        async with aiohttp.ClientSession() as http:
-            async with http.post("http://localhost:8000/internal/agents/campaigns/lock", json={"proposal_id": proposal_id}, headers=headers) as resp:
-                if resp.status != 200:
-                    err = await resp.json()
-                    if "already in status" in str(err): return {'status': 'already_executed', 'proposal_id': proposal_id}
-                    raise PermanentError(f"Failed to lock proposal: {err}")
-                lock_data = await resp.json()
-                proposal_data = lock_data['proposal']
-                origin_execution_id = lock_data.get('origin_id')
+        resp = await self.api.post("/internal/agents/campaigns/lock", self.merchant_id, self.agent_type, json={"proposal_id": proposal_id})
+        if resp.status != 200:
+            err = resp.data
+            if "already in status" in str(err): return {'status': 'already_executed', 'proposal_id': proposal_id}
+            raise PermanentError(f"Failed to lock proposal: {err}")
+        lock_data = resp.data
+        proposal_data = lock_data['proposal']
+        origin_execution_id = lock_data.get('origin_id')
         
         # [REFACTOR] Platform Agnostic Pricing Update
         from decimal import Decimal
@@ -216,14 +177,16 @@ class ExecutionAgent:
                 "duration_days": 7 # Default
             }
             # Calculate price if not already done
+            variants, variant = [], None
             if product and discount_percent > 0:
-                 # Fetch one variant to update (simplification for single-variant products common in clearance)
+                # Every variant of the product is discounted, in one bulk update
                 from app.models import ProductVariant
                 var_res = await session.execute(select(ProductVariant).where(ProductVariant.product_id == product.id))
-                variant = var_res.scalars().first()
+                variants = var_res.scalars().all()
+                variant = variants[0] if variants else None
                 if variant:
                     original_price = Decimal(variant.price)
-                    new_price = original_price * Decimal(1 - discount_percent)
+                    new_price = discounted_price(original_price, discount_percent)
                     proposal_dict["proposed_price"] = new_price
             
             # Normalize product dict for router
@@ -248,19 +211,48 @@ class ExecutionAgent:
                     adapter = AdapterRegistry.get_adapter(merchant.platform)
                     merchant_context = merchant.platform_context or {}
                     
-                    # Update price on store
-                    res = await adapter.update_price(
-                        merchant_context=merchant_context,
-                        platform_product_id=product.shopify_product_id,
-                        platform_variant_id=variant.shopify_variant_id, 
-                        new_price=new_price
-                    )
-                    
-                    if not res.success:
-                         await self._report_completion(proposal_id, 'failed', {'failure_reason': f"Store update failed: {res.error_message}"})
-                         return {'status': 'failed', 'reason': 'store_update_failed'}
-                         
-                    results["store"] = {"success": True}
+                    # Update prices on store
+                    from app.adapters.base import PriceChange
+                    changes = [
+                        PriceChange(product.shopify_product_id, v.shopify_variant_id, discounted_price(v.price, discount_percent))
+                        for v in variants
+                    ]
+
+                    # Original prices go into the revert workflow before anything changes, so a
+                    # crash after the update still restores them when the campaign ends
+                    original_prices = {v.shopify_variant_id: Decimal(v.price) for v in variants}
+                    duration = timedelta(days=proposal_dict["duration_days"])
+                    revert_handle = await self._schedule_price_revert(proposal_id, [
+                        {
+                            "platform_product_id": change.platform_product_id,
+                            "platform_variant_id": change.platform_variant_id,
+                            "original_price": str(original_prices[change.platform_variant_id]),
+                        }
+                        for change in changes
+                    ], duration)
+
+                    price_results = await adapter.bulk_update_prices(merchant_context, changes)
+                    failed = [r for r in price_results if not r.success]
+
+                    if failed:
+                        # All or nothing: put back the variants that did change
+                        if revert_handle is not None:
+                            await revert_handle.cancel()
+                        reverted = [
+                            PriceChange(r.platform_product_id, r.platform_variant_id, original_prices[r.platform_variant_id])
+                            for r in price_results if r.success
+                        ]
+                        if reverted:
+                            await adapter.bulk_update_prices(merchant_context, reverted)
+                        errors = "; ".join(f"{r.platform_variant_id}: {r.error_message}" for r in failed)
+                        await self._report_completion(proposal_id, 'failed', {'failure_reason': f"Store update failed: {errors}"})
+                        return {'status': 'failed', 'reason': 'store_update_failed'}
+
+                    results["store"] = {
+                        "success": True,
+                        "variants_updated": len(price_results),
+                        "revert_at": (datetime.utcnow() + duration).isoformat() if revert_handle else None,
+                    }
                     
                     await self._log_thought(
                         thought_type="action", 
@@ -330,10 +322,10 @@ class ExecutionAgent:
                 # For now, we will add 'cleanup_needed' flag to campaign creation metadata
 
             # 3. Create Campaign Record
-            async with aiohttp.ClientSession() as http:
-                 async with http.post("http://localhost:8000/internal/agents/campaigns/create", json={"name": f"Clearance: {product_title}", "type": strategy_name, "product_ids": [product_id] if product_id else [], "target_segments": audience.get('segments', []), "content_snapshot": copy_data, "origin_execution_id": origin_execution_id, "status": 'active'}, headers=headers) as resp:
-                     if resp.status == 200:
-                          campaign_id = (await resp.json())['id']
+            campaign_id = None
+            resp = await self.api.post("/internal/agents/campaigns/create", self.merchant_id, self.agent_type, json={"name": f"Clearance: {product_title}", "type": strategy_name, "product_ids": [product_id] if product_id else [], "target_segments": audience.get('segments', []), "content_snapshot": copy_data, "origin_execution_id": origin_execution_id, "status": 'active'})
+            if resp.status == 200:
+                campaign_id = resp.data['id']
             
             from types import SimpleNamespace
             campaign = SimpleNamespace(id=campaign_id, name=f"Clearance: {product_title}", target_segments=audience.get('segments', []))
@@ -351,13 +343,37 @@ class ExecutionAgent:
             
             return {'status': 'success' if (klaviyo_success or twilio_success) else 'partial_failure', 'campaign_id': campaign.id, 'klaviyo': klaviyo_success, 'twilio': twilio_success, 'verification': verification}
 
+    async def _schedule_price_revert(self, proposal_id: str, changes: List[Dict[str, str]], after: timedelta):
+        """
+        Starts a PriceRevertWorkflow that restores `changes` once `after` has elapsed.
+        Returns its handle, or None if Temporal is unreachable: the discount still
+        goes out, but nothing will restore it automatically.
+        """
+        from app.orchestration import get_temporal_client
+        from app.workflows.pricing import PriceRevertWorkflow
+        try:
+            client = await get_temporal_client()
+            return await client.start_workflow(
+                PriceRevertWorkflow.run,
+                {
+                    "merchant_id": self.merchant_id,
+                    "changes": changes,
+                    "revert_after_seconds": int(after.total_seconds()),
+                },
+                id=f"price-revert-{proposal_id}",
+                task_queue="execution-agent-queue",
+            )
+        except Exception as e:
+            logger.error(f"Could not schedule price reversion for proposal {proposal_id}: {e}")
+            await self._log_thought(
+                thought_type="error",
+                summary=f"Price reversion not scheduled for proposal {proposal_id}; restore prices manually",
+            )
+            return None
+
     async def _report_completion(self, proposal_id, status, details):
         """Reports execution results to the Internal API."""
-        if not self._api_token: await self._authenticate()
-        import aiohttp
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        async with aiohttp.ClientSession() as http:
-            await http.post("http://localhost:8000/internal/agents/campaigns/complete", json={"proposal_id": proposal_id, "status": status, "details": details}, headers=headers)
+        await self.api.post("/internal/agents/campaigns/complete", self.merchant_id, self.agent_type, json={"proposal_id": proposal_id, "status": status, "details": details})
 
     async def _simulate_execution(self, proposal_id: str) -> Dict:
         """Predictive execution simulation."""
@@ -382,10 +398,7 @@ class ExecutionAgent:
         try:
             klaviyo = KlaviyoConnector(creds['api_key'])
             res = await klaviyo.create_campaign(name=campaign.name, subject=copy.get('email_subject', f'Deal: {title}'), body_html=copy.get('email_body', f'Check out {title}'), target_segment_ids=campaign.target_segments or ["DEAL_HUNTERS"], idempotency_key=idempotency_key)
-            if not self._api_token: await self._authenticate()
-            headers = {"Authorization": f"Bearer {self._api_token}"}
-            async with aiohttp.ClientSession() as http:
-                await http.post("http://localhost:8000/internal/agents/campaigns/log", json={"campaign_id": campaign.id, "channel": "email", "external_id": res.get('id'), "status": "sent"}, headers=headers)
+            await self.api.post("/internal/agents/campaigns/log", self.merchant_id, self.agent_type, json={"campaign_id": campaign.id, "channel": "email", "external_id": res.get('id'), "status": "sent"})
             return {'success': True}
         except Exception as e: return {'success': False, 'reason': str(e)}
 
@@ -394,21 +407,19 @@ class ExecutionAgent:
         creds = await provider.get_credentials(self.merchant_id, 'twilio')
         if not creds: return {'success': False, 'reason': 'missing_credentials'}
         try:
-            stmt = select(Customer).where(Customer.merchant_id == self.merchant_id, Customer.sms_optin == True, Customer.rfm_segment.in_(campaign.target_segments or []))
-            customers = (await session.execute(stmt)).scalars().all()
-            if not customers: return {'success': False, 'reason': 'no_eligible_customers'}
+            recipients = AudienceStream(self.merchant_id).stream(campaign.target_segments or [], 'sms')
             twilio = TwilioConnector(f"{creds['sid']}:{creds['token']}")
             sms_body = copy.get('sms_body', f'Deal on {title}!')
             async def send_wrapper(customer):
                 try: 
                     res = await twilio.send_transactional(customer.phone, "", sms_body, idempotency_key=f"{proposal_id}:{customer.id}:{retry_count}")
                     if res and res.get('id'):
-                        if not self._api_token: await self._authenticate()
-                        headers = {"Authorization": f"Bearer {self._api_token}"}
-                        async with aiohttp.ClientSession() as http:
-                            await http.post("http://localhost:8000/internal/agents/campaigns/log", json={"campaign_id": campaign.id, "channel": "sms", "external_id": res.get('id'), "status": "sent", "customer_id": customer.id}, headers=headers)
+                        await self.api.post("/internal/agents/campaigns/log", self.merchant_id, self.agent_type, json={"campaign_id": campaign.id, "channel": "sms", "external_id": res.get('id'), "status": "sent", "customer_id": customer.id})
                 except: pass
-            await WaterfallService(batch_size=simulation.get('batch_size', 20), delay_seconds=simulation.get('stagger_delay_seconds', 5)).execute_waterfall(customers, send_wrapper)
+            # Paced by the account's shared token bucket; the simulation only caps concurrency
+            drip = RateLimitedDrip('twilio', creds['sid'], campaign_id=campaign.id, concurrency=simulation.get('batch_size'))
+            sent = await WaterfallService(policy=drip).execute_waterfall(recipients, send_wrapper)
+            if not sent: return {'success': False, 'reason': 'no_eligible_customers'}
             return {'success': True}
         except Exception as e: return {'success': False, 'reason': str(e)}
 
@@ -427,10 +438,7 @@ class ExecutionAgent:
         await self._notify_merchant_failure(proposal_id, reason)
 
     async def _notify_merchant_failure(self, proposal_id: str, reason: str):
-        if not self._api_token: await self._authenticate()
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        async with aiohttp.ClientSession() as http:
-             await http.post("http://localhost:8000/internal/agents/notifications/failure", json={"reason": reason, "details": "Execution Agent Failure"}, headers=headers)
+        await self.api.post("/internal/agents/notifications/failure", self.merchant_id, self.agent_type, json={"reason": reason, "details": "Execution Agent Failure"})
 
     async def _requires_async_auth(self, proposal_id: str, simulation: Dict) -> bool:
         """
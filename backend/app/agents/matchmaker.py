@@ -14,15 +14,16 @@ Implements world-class patterns:
 
 import json
 import logging
-from datetime import datetime
 from typing import Dict, Any, List, Optional
 from decimal import Decimal
 
-from sqlalchemy import select, desc, func
+from sqlalchemy import desc
 from app.database import async_session_maker
-from app.models import Customer, AgentThought, Campaign
+from app.models import AgentThought, Campaign
 from app.services.memory import MemoryService
 # from app.services.thought_logger import ThoughtLogger # Removed direct dependency
+from app.services.thought_sink import create_thought_sink
+from app.services.internal_api_client import get_internal_api_client
 from app.services.llm_router import LLMRouter
 
 logger = logging.getLogger(__name__)
@@ -37,36 +38,12 @@ class MatchmakerAgent:
         self.memory = MemoryService(merchant_id)
         self.router = LLMRouter()
         self.agent_type = "matchmaker"
-        self._api_token = None
+        self.api = get_internal_api_client()
+        self.thought_sink = create_thought_sink(merchant_id, self.agent_type)
 
     async def _log_thought(self, **kwargs):
-        """Helper to log thoughts via Internal API."""
-        if not self._api_token: await self._authenticate()
-        
-        import aiohttp
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        
-        # Map kwargs to API schema
-        payload = {
-            "agent_type": self.agent_type,
-            "thought_type": kwargs.get("thought_type", "info"),
-            "summary": kwargs.get("summary", ""),
-            "detailed_reasoning": kwargs.get("detailed_reasoning", {}),
-            "confidence_score": float(kwargs.get("confidence_score", 1.0)),
-            "step_number": kwargs.get("step_number", 1),
-            "execution_id": kwargs.get("execution_id"),
-            "product_id": kwargs.get("detailed_reasoning", {}).get("product_id") or kwargs.get("product_id")
-        }
-        
-        try:
-            async with aiohttp.ClientSession() as http:
-                await http.post(
-                    "http://localhost:8000/internal/agents/thoughts",
-                    json=payload,
-                    headers=headers
-                )
-        except Exception as e:
-            logger.error(f"Failed to log thought via API: {e}")
+        """Helper to queue thoughts on the agent's buffered thought sink."""
+        await self.thought_sink.emit(**kwargs)
 
     async def get_optimal_audience(
         self, 
@@ -123,36 +100,14 @@ class MatchmakerAgent:
 
     async def _get_segment_stats(self, session) -> Dict[str, int]:
         """Fetch current count of active, non-fatigued customers in each RFM segment."""
-        from datetime import timedelta
-        from app.models import TouchLog
-        
-        fatigue_cutoff = datetime.utcnow() - timedelta(days=5)
-        counts = {}
-        
-        # 1. Get totals per segment in a single query
-        total_stmt = select(Customer.rfm_segment, func.count(Customer.id)).where(
-            Customer.merchant_id == self.merchant_id
-        ).group_by(Customer.rfm_segment)
-        total_res = await session.execute(total_stmt)
-        totals = {row[0]: row[1] for row in total_res.all()}
-        
-        # 2. Get fatigue counts per segment in a single query
-        fatigue_stmt = select(Customer.rfm_segment, func.count(func.distinct(Customer.id))).join(
-            TouchLog, TouchLog.customer_id == Customer.id
-        ).where(
-            Customer.merchant_id == self.merchant_id,
-            TouchLog.created_at >= fatigue_cutoff
-        ).group_by(Customer.rfm_segment)
-        fatigue_res = await session.execute(fatigue_stmt)
-        fatigue_counts = {row[0]: row[1] for row in fatigue_res.all()}
-        
-        counts = {}
-        for segment in ["champions", "loyal", "at_risk", "lapsed", "lost", "potential"]:
-            total = totals.get(segment, 0)
-            fatigued = fatigue_counts.get(segment, 0)
-            counts[segment] = max(0, total - fatigued)
-            
-        return counts
+        from app.services.audience_index import get_audience_index
+
+        index = await get_audience_index(self.merchant_id, session)
+        non_fatigued = index.segment_counts(exclude_fatigued=True)
+        return {
+            segment: non_fatigued.get(segment, 0)
+            for segment in ["champions", "loyal", "at_risk", "lapsed", "lost", "potential"]
+        }
 
     async def _reason_about_matching(
         self, 
@@ -215,25 +170,6 @@ Respond with JSON:
                 "audience_description": f"Targeting {', '.join(fallback_segments)} based on standard RFM mapping."
             }
             
-    async def _authenticate(self):
-        """[HARDENING] Authenticates with Internal API using Vaulted Credentials."""
-        if self._api_token: return
-        import aiohttp
-        from app.services.identity import IdentityService
-        from app.database import async_session_maker
-        async with async_session_maker() as db:
-            identity_service = IdentityService(db, self.merchant_id)
-            creds = await identity_service.get_agent_credentials("matchmaker")
-        if not creds:
-             logger.error("Failed to fetch Matchmaker credentials")
-             return
-        async with aiohttp.ClientSession() as http:
-            async with http.post("http://localhost:8000/internal/agents/auth", json=creds) as resp:
-                if resp.status == 200:
-                     self._api_token = (await resp.json())['access_token']
-                else:
-                     logger.error(f"Matchmaker Auth Failed: {await resp.text()}")
-
     async def run_daily_segmentation(self):
         """
         Analyzes customer base and pushes segment stats to the central brain.
@@ -257,15 +193,11 @@ Respond with JSON:
                 reasoning = "Automated segment tracking."
 
             # 3. Push to Internal API (Write via API)
-            await self._authenticate()
-            if self._api_token:
-                import aiohttp
-                headers = {"Authorization": f"Bearer {self._api_token}"}
-                async with aiohttp.ClientSession() as http:
-                    await http.post(
-                        "http://localhost:8000/internal/agents/matchmaker/segments",
-                        json={"segment_counts": stats, "reasoning": reasoning},
-                        headers=headers
-                    )
+            await self.api.post(
+                "/internal/agents/matchmaker/segments",
+                self.merchant_id,
+                self.agent_type,
+                json={"segment_counts": stats, "reasoning": reasoning}
+            )
             
             return stats
@@ -12,22 +12,25 @@ Implements world-class patterns:
 3. Latent Risk Detection (LLM-driven trend analysis)
 """
 
+import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from decimal import Decimal
 
-from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from app.database import async_session_maker
 from app.models import Product, AgentThought, OrderItem
 from app.services.memory import MemoryService
 from app.services.thought_logger import ThoughtLogger
+from app.services.thought_sink import create_thought_sink
+from app.services.internal_api_client import get_internal_api_client
 from app.services.llm_router import LLMRouter
 from app.services.clustering import InventoryClusteringService
 from app.services.memory_stream import MemoryStreamService
+from app.services.merchant_context import get_merchant_context
+from app.services.velocity import velocity_metrics, base_severity as deterministic_severity
 
 logger = logging.getLogger(__name__)
 
@@ -44,67 +47,18 @@ class ObserverAgent:
         self.clustering = InventoryClusteringService(merchant_id)
         self.causal_memory = MemoryStreamService(merchant_id)
         self.agent_type = "observer"
-        self._api_token = None
+        self.api = get_internal_api_client()
+        self.thought_sink = create_thought_sink(merchant_id, self.agent_type)
         self.client_id = f"agent_{self.agent_type}_99c2"
 
-    async def _authenticate(self):
-        """[HARDENING] Authenticates with Internal API using Vaulted Credentials."""
-        if self._api_token: return
-        import aiohttp
-        from app.services.identity import IdentityService
-        from app.database import async_session_maker
-        async with async_session_maker() as db:
-            identity_service = IdentityService(db, self.merchant_id)
-            creds = await identity_service.get_agent_credentials("observer")
-        if not creds:
-             logger.error("Failed to fetch Observer credentials")
-             return
-        async with aiohttp.ClientSession() as http:
-            async with http.post("http://localhost:8000/internal/agents/auth", json=creds) as resp:
-                if resp.status == 200:
-                     self._api_token = (await resp.json())['access_token']
-                else:
-                     logger.error(f"Observer Agent Auth Failed: {await resp.text()}")
-
     async def _log_thought(self, **kwargs):
-        """Helper to log thoughts via Internal API."""
-        if not self._api_token: await self._authenticate()
-        
-        import aiohttp
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        
-        # Map kwargs to API schema
-        payload = {
-            "agent_type": self.agent_type,
-            "thought_type": kwargs.get("thought_type", "info"),
-            "summary": kwargs.get("summary", ""),
-            "detailed_reasoning": kwargs.get("detailed_reasoning", {}),
-            "confidence_score": float(kwargs.get("confidence_score", 1.0)),
-            "step_number": kwargs.get("step_number", 1),
-            "execution_id": kwargs.get("execution_id"),
-            "product_id": kwargs.get("detailed_reasoning", {}).get("product_id")
-        }
-        
-        try:
-            async with aiohttp.ClientSession() as http:
-                await http.post(
-                    "http://localhost:8000/internal/agents/thoughts",
-                    json=payload,
-                    headers=headers
-                )
-        except Exception as e:
-            logger.error(f"Failed to log thought via API: {e}")
+        """Helper to queue thoughts on the agent's buffered thought sink."""
+        await self.thought_sink.emit(**kwargs)
 
     async def batch_update_status(self, analysis_results: List[Dict[str, Any]]):
         """
         Push analysis results to the Internal API.
         """
-        if not self._api_token:
-            await self._authenticate()
-            
-        import aiohttp
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        
         updates = []
         for res in analysis_results:
             # We need product_id. observe_inventory logic might need to pass it through better.
@@ -123,14 +77,14 @@ class ObserverAgent:
         if not updates:
             return
             
-        async with aiohttp.ClientSession() as http:
-            async with http.post(
-                "http://localhost:8000/internal/agents/inventory/status", 
-                json={"updates": updates},
-                headers=headers
-            ) as resp:
-                if resp.status != 200:
-                    logger.error(f"Failed to push inventory updates: {await resp.text()}")
+        resp = await self.api.post(
+            "/internal/agents/inventory/status",
+            self.merchant_id,
+            self.agent_type,
+            json={"updates": updates}
+        )
+        if resp.status != 200:
+            logger.error(f"Failed to push inventory updates: {resp.data}")
 
     async def observe_inventory(self, products: List[Dict[str, Any]], session) -> List[Dict[str, Any]]:
         """
@@ -177,44 +131,56 @@ Respond with a strategic summary for the dashboard."""
         except Exception as e:
             logger.error(f"Bulk cluster analysis failed: {e}")
 
+        # Prefetch product memories for the whole batch in one query
+        memories = await self.memory.recall_thoughts_for_products(
+            [p.get('id') for p in products],
+            agent_type=self.agent_type,
+            limit_per_product=2
+        )
+
         # Fallback to individual observation for each product (existing logic)
         results = []
         for p in products:
-            res = await self.observe_product(p, session)
+            res = await self.observe_product(
+                p, session, past_thoughts=memories.get(str(p.get('id')), [])
+            )
             results.append(res)
+
+        await self.thought_sink.flush()
         return results
 
-    async def observe_product(self, product_data: Dict[str, Any], session) -> Dict[str, Any]:
+    async def observe_product(
+        self,
+        product_data: Dict[str, Any],
+        session,
+        past_thoughts: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
         """
         Analyze a single product for risks.
         Combines deterministic velocity scores with LLM reasoning.
+
+        past_thoughts may be supplied by batch callers that prefetched memories
+        via MemoryService.recall_thoughts_for_products.
         """
         # 1. GATHER: Deterministic Base Metrics
         metrics = self._calculate_base_metrics(product_data)
         
         # 2. RECALL: Past observations for this product
-        past_thoughts = await self.memory.recall_thoughts(
-            agent_type=self.agent_type,
-            product_id=product_data.get('id'),
-            limit=2
-        )
+        if past_thoughts is None:
+            past_thoughts = await self.memory.recall_thoughts(
+                agent_type=self.agent_type,
+                product_id=product_data.get('id'),
+                limit=2
+            )
         
         # 3. REASON: LLM-driven latent risk detection
         reasoning = await self._reason_about_risk(product_data, metrics, past_thoughts)
         
         # 4. DECIDE: Final classification
         # Check if store is "fresh" (< 7 days) to prevent Day 0 false positives
-        is_new_store = False
-        if session:
-            # We use session.get() if available, or a quick select
-            # Note: In a high-perf scenario, cache this result
-            from app.models import Merchant
-            result = await session.execute(select(Merchant).where(Merchant.id == self.merchant_id))
-            merchant = result.scalar_one_or_none()
-            if merchant:
-                delta = datetime.utcnow() - merchant.created_at
-                if delta.days < 7:
-                    is_new_store = True
+        # Run-scoped merchant context: loaded once per run, not once per product
+        merchant_ctx = await get_merchant_context(self.merchant_id, session)
+        is_new_store = merchant_ctx.is_new_store if merchant_ctx else False
 
         # [FIX] Check product age to prevent new products from being flagged as dead stock
         product_created_at = product_data.get('created_at')
@@ -255,6 +221,40 @@ Respond with a strategic summary for the dashboard."""
             "is_dead_stock": classification["severity"] != "none"
         }
 
+    async def observe_products_concurrently(
+        self,
+        products: List[Dict[str, Any]],
+        session,
+        memories: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        concurrency: int = 10
+    ) -> AsyncIterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        observe_product over a batch with at most `concurrency` analyses in
+        flight, yielding (product_data, analysis) in completion order.
+
+        The merchant context is pinned up front with `session`; the concurrent
+        analyses never use it (an AsyncSession can't be shared between tasks).
+        """
+        memories = memories or {}
+        await get_merchant_context(self.merchant_id, session)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def observe(product_data):
+            async with semaphore:
+                analysis = await self.observe_product(
+                    product_data, None, past_thoughts=memories.get(str(product_data.get('id')), [])
+                )
+                return product_data, analysis
+
+        tasks = [asyncio.ensure_future(observe(p)) for p in products]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.thought_sink.flush()
+
     def _calculate_base_metrics(self, data: Dict) -> Dict:
         """Calculate deterministic velocity and turnover metrics."""
         variants = data.get("variants", [])
@@ -273,22 +273,15 @@ Respond with a strategic summary for the dashboard."""
         refunds_30d = data.get("units_refunded_30d", 0)
         net_units_30d = max(0, gross_units_30d - refunds_30d)
         
-        # Core velocity math
-        avg_inventory = max(inventory, 1)
-        turnover_rate = (net_units_30d / avg_inventory) * 12
-        
-        # Performance normalized (0-100)
-        turnover_norm = min(turnover_rate / 12, 1.0) * 100
-        recency_norm = max(0, (180 - days_since_sale) / 180) * 100
-        
-        velocity_score = (turnover_norm * 0.6) + (recency_norm * 0.4)
+        # Core velocity math (shared with the incremental order-driven path)
+        velocity = velocity_metrics(net_units_30d, inventory, days_since_sale)
         
         return {
             "price": price,
             "inventory": inventory,
             "stuck_value": price * inventory,
-            "velocity_score": round(velocity_score, 1),
-            "turnover_rate": round(turnover_rate, 2),
+            "velocity_score": velocity["velocity_score"],
+            "turnover_rate": velocity["turnover_rate"],
             "days_since_last_sale": days_since_sale
         }
 
@@ -349,16 +342,7 @@ Respond with JSON:
         bonus = reasoning.get('severity_bonus', 0)
         
         # Base classification logic (Deterministic)
-        if score < 20 and days >= 90:
-            base_severity = "critical"
-        elif score < 35:
-            base_severity = "high"
-        elif score < 50:
-            base_severity = "moderate"
-        elif score < 65:
-            base_severity = "low"
-        else:
-            base_severity = "none"
+        base_severity = deterministic_severity(score, days)
             
         # Apply AI Bonus (The "Reflex" upgrade)
         severities = ["none", "low", "moderate", "high", "critical"]
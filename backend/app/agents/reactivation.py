@@ -19,6 +19,8 @@ logger = logging.getLogger(__name__)
 
 from app.services.memory import MemoryService
 # from app.services.thought_logger import ThoughtLogger # Removed direct dependency
+from app.services.thought_sink import create_thought_sink
+from app.services.internal_api_client import get_internal_api_client
 
 class ReactivationAgent:
     """
@@ -34,58 +36,15 @@ class ReactivationAgent:
         self.memory = MemoryService(merchant_id)
         self.agent_type = "reactivation"
         self.client_id = f"agent_{self.agent_type}_{merchant_id[:4]}"
-        self._api_token = None
-
-    async def _authenticate(self):
-        """[HARDENING] Authenticates with Internal API using Vaulted Credentials."""
-        if self._api_token: return
-        import aiohttp
-        from app.services.identity import IdentityService
-        from app.database import async_session_maker
-        async with async_session_maker() as db:
-            identity_service = IdentityService(db, self.merchant_id)
-            creds = await identity_service.get_agent_credentials("reactivation")
-        if not creds:
-             logger.error("Failed to fetch Reactivation credentials")
-             return
-        async with aiohttp.ClientSession() as http:
-            async with http.post("http://localhost:8000/internal/agents/auth", json=creds) as resp:
-                if resp.status == 200:
-                     self._api_token = (await resp.json())['access_token']
-                else:
-                     logger.error(f"Reactivation Auth Failed: {await resp.text()}")
+        self.api = get_internal_api_client()
+        self.thought_sink = create_thought_sink(merchant_id, self.agent_type)
 
     async def _log_thought(self, **kwargs):
-        """Helper to log thoughts via Internal API."""
-        if not self._api_token: await self._authenticate()
-        
-        import aiohttp
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        
-        # Map kwargs to API schema
-        payload = {
-            "agent_type": self.agent_type,
-            "thought_type": kwargs.get("thought_type", "info"),
-            "summary": kwargs.get("summary", ""),
-            "detailed_reasoning": kwargs.get("detailed_reasoning", {}),
-            "confidence_score": float(kwargs.get("confidence_score", 1.0)),
-            "step_number": kwargs.get("step_number", 1),
-            "execution_id": kwargs.get("execution_id"),
-            "product_id": kwargs.get("detailed_reasoning", {}).get("product_id") or kwargs.get("product_id")
-        }
+        """Helper to queue thoughts on the agent's buffered thought sink."""
         # Add customer_id to detailed reasoning if standalone (legacy compat)
         if kwargs.get("customer_id"):
-             payload["detailed_reasoning"]["customer_id"] = kwargs.get("customer_id")
-        
-        try:
-            async with aiohttp.ClientSession() as http:
-                await http.post(
-                    "http://localhost:8000/internal/agents/thoughts",
-                    json=payload,
-                    headers=headers
-                )
-        except Exception as e:
-            logger.error(f"Failed to log thought via API: {e}")
+            kwargs["detailed_reasoning"] = {**(kwargs.get("detailed_reasoning") or {}), "customer_id": kwargs.pop("customer_id")}
+        await self.thought_sink.emit(**kwargs)
 
     async def scan_for_dormant_customers(self):
         """
@@ -118,6 +77,7 @@ class ReactivationAgent:
                 .where(CommercialJourney.created_at > cooldown_start)
             )
             cooldown_ids = {row[0] for row in cooldown_res.all()}
+            new_journeys = 0
             
             for customer in candidates:
                 if customer.id in cooldown_ids:
@@ -128,21 +88,18 @@ class ReactivationAgent:
                 
                 if should_reactivate['approved']:
                     # [SECURE REFACTOR] Use Internal API to start journey
-                    await self._authenticate()
-                    if self._api_token:
-                         import aiohttp
-                         headers = {"Authorization": f"Bearer {self._api_token}"}
-                         async with aiohttp.ClientSession() as http:
-                            await http.post(
-                                "http://localhost:8000/internal/agents/reactivation/journey/start",
-                                json={
-                                    "customer_id": customer.id, 
-                                    "reason": should_reactivate['reason'],
-                                    "journey_type": 'reactivation'
-                                },
-                                headers=headers
-                            )
-                            new_journeys += 1
+                    resp = await self.api.post(
+                        "/internal/agents/reactivation/journey/start",
+                        self.merchant_id,
+                        self.agent_type,
+                        json={
+                            "customer_id": customer.id, 
+                            "reason": should_reactivate['reason'],
+                            "journey_type": 'reactivation'
+                        }
+                    )
+                    if resp.ok:
+                        new_journeys += 1
                     
                     await self._log_thought(
                         thought_type="trigger",
@@ -300,6 +257,7 @@ Respond with JSON:
         from app.integrations.credentials import get_credential_provider
         from app.integrations.klaviyo import KlaviyoConnector
         from app.integrations.twilio import TwilioConnector
+        from app.services.send_rate import account_key, get_send_rate_controller
 
         provider = get_credential_provider()
         channel = plan['channel']
@@ -308,31 +266,30 @@ Respond with JSON:
         if channel == 'sms' and customer.sms_optin:
             creds = await provider.get_credentials(self.merchant_id, 'twilio')
             if creds:
+                # 1:1 journey touches go ahead of bulk campaign sends on the same account
+                await get_send_rate_controller().acquire('twilio', creds['sid'], priority='high')
                 twilio = TwilioConnector(f"{creds['sid']}:{creds['token']}")
                 success = await twilio.send_transactional(customer.phone, "", plan['body'])
         
         elif channel == 'email' and customer.email_optin:
             creds = await provider.get_credentials(self.merchant_id, 'klaviyo')
             if creds:
+                await get_send_rate_controller().acquire('klaviyo', account_key(creds['api_key']), priority='high')
                 klaviyo = KlaviyoConnector(creds['api_key'])
                 success = await klaviyo.send_transactional(customer.email, plan['subject'], plan['body'])
 
         # [SECURE REFACTOR] Report result to Internal API
-        await self._authenticate()
-        if self._api_token:
-             import aiohttp
-             headers = {"Authorization": f"Bearer {self._api_token}"}
-             async with aiohttp.ClientSession() as http:
-                await http.post(
-                    "http://localhost:8000/internal/agents/reactivation/journey/touch",
-                    json={
-                        "journey_id": journey.id,
-                        "channel": channel,
-                        "content": plan['body'],
-                        "status": 'sent' if success else 'failed'
-                    },
-                    headers=headers
-                )
+        await self.api.post(
+            "/internal/agents/reactivation/journey/touch",
+            self.merchant_id,
+            self.agent_type,
+            json={
+                "journey_id": journey.id,
+                "channel": channel,
+                "content": plan['body'],
+                "status": 'sent' if success else 'failed'
+            }
+        )
 
         await self._log_thought(
             thought_type="execution",
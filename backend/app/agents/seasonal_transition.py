@@ -30,6 +30,8 @@ from app.models import Product, Merchant, InboxItem, Order, OrderItem, StoreDNA
 from app.services.seasonal_analyzer import SeasonalAnalyzer, SeasonalRisk, Season
 from app.services.memory import MemoryService
 # from app.services.thought_logger import ThoughtLogger # Removed direct dependency
+from app.services.thought_sink import create_thought_sink
+from app.services.internal_api_client import get_internal_api_client
 from app.services.llm_router import LLMRouter
 from app.services.governor import GovernorService, AutonomyDecision
 from app.agents.strategy import STRATEGIES
@@ -50,57 +52,14 @@ class SeasonalTransitionAgent:
         self.memory = MemoryService(merchant_id)
         self.router = LLMRouter()
         self.agent_type = "seasonal"
-        self._api_token = None
+        self.api = get_internal_api_client()
+        self.thought_sink = create_thought_sink(merchant_id, self.agent_type)
         self.client_id = f"agent_{self.agent_type}_season_v1"
 
     async def _log_thought(self, **kwargs):
-        """Helper to log thoughts via Internal API."""
-        if not self._api_token: await self._authenticate()
-        
-        import aiohttp
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        
-        # Map kwargs to API schema
-        payload = {
-            "agent_type": self.agent_type,
-            "thought_type": kwargs.get("thought_type", "info"),
-            "summary": kwargs.get("summary", ""),
-            "detailed_reasoning": kwargs.get("detailed_reasoning", {}),
-            "confidence_score": float(kwargs.get("confidence_score", 1.0)),
-            "step_number": kwargs.get("step_number", 1),
-            "execution_id": kwargs.get("execution_id"),
-            "product_id": kwargs.get("detailed_reasoning", {}).get("product_id") or kwargs.get("product_id")
-        }
-        
-        try:
-            async with aiohttp.ClientSession() as http:
-                await http.post(
-                    "http://localhost:8000/internal/agents/thoughts",
-                    json=payload,
-                    headers=headers
-                )
-        except Exception as e:
-            logger.error(f"Failed to log thought via API: {e}")
+        """Helper to queue thoughts on the agent's buffered thought sink."""
+        await self.thought_sink.emit(**kwargs)
 
-    async def _authenticate(self):
-        """[HARDENING] Authenticates with Internal API using Vaulted Credentials."""
-        if self._api_token: return
-        import aiohttp
-        from app.services.identity import IdentityService
-        from app.database import async_session_maker
-        async with async_session_maker() as db:
-            identity_service = IdentityService(db, self.merchant_id)
-            creds = await identity_service.get_agent_credentials("seasonal")
-        if not creds:
-             logger.error("Failed to fetch Seasonal credentials")
-             return
-        async with aiohttp.ClientSession() as http:
-            async with http.post("http://localhost:8000/internal/agents/auth", json=creds) as resp:
-                if resp.status == 200:
-                     self._api_token = (await resp.json())['access_token']
-                else:
-                     logger.error(f"Seasonal Auth Failed: {await resp.text()}")
-    
     async def scan_seasonal_risks(
         self,
         progress_callback: Optional[callable] = None
@@ -620,11 +579,7 @@ Respond with JSON:
         """Create InboxItem proposal for merchant approval."""
         
         # [SECURE REFACTOR] Use Internal API
-        await self._authenticate()
-        if self._api_token:
-            import aiohttp
-            headers = {"Authorization": f"Bearer {self._api_token}"}
-            
+        if await self.api.get_token(self.merchant_id, self.agent_type):
             payload = {
                 "title": f"Seasonal Clearance: {product.title}",
                 "description": f"Risk Level: {risk.risk_level}",
@@ -655,24 +610,23 @@ Respond with JSON:
                 }
             }
             
-            async with aiohttp.ClientSession() as http:
-                async with http.post(
-                    "http://localhost:8000/internal/agents/proposals",
-                    json=payload,
-                    headers=headers
-                ) as resp:
-                    if resp.status == 200:
-                        res_data = await resp.json()
-                        from types import SimpleNamespace
-                        return SimpleNamespace(
-                            id=res_data['id'],
-                            discount_percent=pricing['discount_percent'],
-                            projected_revenue=projections['projected_revenue'],
-                            copy_data=payload['copy_data']
-                        )
-                    else:
-                        logger.error(f"Failed to create proposal: {await resp.text()}")
-                        raise Exception("API Proposal Creation Failed")
+            resp = await self.api.post(
+                "/internal/agents/proposals",
+                self.merchant_id,
+                self.agent_type,
+                json=payload
+            )
+            if resp.status == 200:
+                from types import SimpleNamespace
+                return SimpleNamespace(
+                    id=resp.data['id'],
+                    discount_percent=pricing['discount_percent'],
+                    projected_revenue=projections['projected_revenue'],
+                    copy_data=payload['copy_data']
+                )
+            else:
+                logger.error(f"Failed to create proposal: {resp.data}")
+                raise Exception("API Proposal Creation Failed")
 
         # Fallback if logic fails (should not happen in prod if enforced)
         # But for type hints/flow, we might arguably error out.
@@ -22,12 +22,14 @@ from sqlalchemy.orm import selectinload
 
 from app.database import async_session_maker
 from app.orchestration import background_task, registry
-from app.models import Merchant, Product, ProductVariant, Customer, InboxItem
+from app.models import Product, ProductVariant, InboxItem
 from app.services.claude_api import claude
 from app.services.dna import DNAService
 from app.services.thought_logger import ThoughtLogger
 from app.services.clustering import InventoryClusteringService
 from app.services.memory_stream import MemoryStreamService
+from app.services.internal_api_client import get_internal_api_client
+from app.services.merchant_context import MerchantContext, get_merchant_context, merchant_context_scope
 from uuid import uuid4
 import logging
 
@@ -101,39 +103,16 @@ class StrategyAgent:
     Takes dead stock products and creates clearance proposals.
     """
     
-    async def _authenticate(self):
-        """[HARDENING] Authenticates with Internal API using Vaulted Credentials."""
-        if self._api_token: return
-        import aiohttp
-        from app.services.identity import IdentityService
-        from app.database import async_session_maker
-        async with async_session_maker() as db:
-            identity_service = IdentityService(db, self.merchant_id)
-            creds = await identity_service.get_agent_credentials("strategy")
-        if not creds:
-             logger.error("Failed to fetch Strategy credentials")
-             return
-        async with aiohttp.ClientSession() as http:
-            async with http.post("http://localhost:8000/internal/agents/auth", json=creds) as resp:
-                if resp.status == 200:
-                     self._api_token = (await resp.json())['access_token']
-                     logger.info("✅ Strategy Agent Authenticated")
-                else:
-                     logger.error(f"❌ Strategy Auth Failed: {await resp.text()}")
-
     def __init__(self, merchant_id: str):
         self.merchant_id = merchant_id
         self.clustering = InventoryClusteringService(merchant_id)
         self.causal_memory = MemoryStreamService(merchant_id)
-        self.merchant: Optional[Merchant] = None
-        # Load merchant config immediately
-        import asyncio
-        # In a real async init pattern we'd await this, but for now we'll load on demand or assume pre-loaded
-        # This is a refactor limitation. We'll handle it in the plan_clearance method by reloading.
+        # Run-scoped merchant settings, resolved in plan_clearance via the shared MerchantContext
+        self.merchant: Optional[MerchantContext] = None
         
         # Identity Context
         self.agent_type = "strategy"
-        self._api_token = None
+        self.api = get_internal_api_client()
         # We need to discover our client_id or have it passed in. 
         # For simplicity in this refactor, we assume a deterministic one based on type
         # In full prod, this is injected via ENV
@@ -196,14 +175,14 @@ class StrategyAgent:
                 return {"status": "skipped", "reason": "Resource locked by another agent"}
             
             try:
-                # Reload merchant to get latest feature flags
-                self.merchant = await session.get(Merchant, self.merchant_id)
+                # Latest feature flags (reloaded only if settings were invalidated)
+                self.merchant = await get_merchant_context(self.merchant_id, session)
                 
                 print(f"[Strategy] Planning clearance for: {product.title}")
                 
                 # 2. Select strategy (Multi-Plan Decision Engine #4)
                 # Feature Flag Check: Use multi-plan only if enabled (expensive)
-                if self.merchant.enable_multi_plan_strategy:
+                if self.merchant and self.merchant.enable_multi_plan_strategy:
                     plans = await self._select_multi_plan_strategy(product, session)
                     strategy_name = plans['recommended_strategy']
                 else:
@@ -299,7 +278,8 @@ class StrategyAgent:
                     
                     from app.agents.execution import ExecutionAgent
                     exec_agent = ExecutionAgent(self.merchant_id)
-                    await exec_agent.execute_campaign(proposal.id)
+                    async with exec_agent.thought_sink:
+                        await exec_agent.execute_campaign(proposal.id)
                     executed = True
                 
                 await session.commit()
@@ -696,9 +676,8 @@ Respond with JSON:
              return {'approved': False, 'alternative': 'proceed', 'concerns': ['Floor price violation detected']}
 
         # B. Governor Limit Check
-        from app.models import Merchant
-        merchant = await session.get(Merchant, self.merchant_id)
-        max_discount = float(merchant.max_auto_discount) if merchant and merchant.max_auto_discount else 0.40
+        merchant = await get_merchant_context(self.merchant_id, session)
+        max_discount = merchant.discount_cap(0.40) if merchant else 0.40
         
         if pricing['discount_percent'] > (max_discount * 100):
             # If strategy requires 60% off but merchant capped at 40%, we must pivot
@@ -795,12 +774,15 @@ Respond with JSON:
         # where we sell expensive variants based on cheap variants' floor pricing.
         original_price = float(max(v.price for v in product.variants))
         
-        # Check if merchant has floor pricing defined
+        # Check if merchant has floor pricing defined (the run's merchant context
+        # knows which products have floor records, so most products skip the lookups)
+        merchant = await get_merchant_context(self.merchant_id, session)
+        has_floor_record = merchant.has_floor_pricing(product.id) if merchant else True
         floor_service = FloorPricingService(self.merchant_id)
-        floor_price_from_merchant = await floor_service.get_floor_price(product.id)
+        floor_price_from_merchant = await floor_service.get_floor_price(product.id) if has_floor_record else None
         
         # [HARDENING] Staleness and Logical Validation
-        floor_record = await floor_service.get_floor_record(product.id, session=session)
+        floor_record = await floor_service.get_floor_record(product.id, session=session) if has_floor_record else None
         if floor_record:
             # 1. Staleness Check
             if floor_record.updated_at < datetime.utcnow() - timedelta(days=30):
@@ -812,7 +794,7 @@ Respond with JSON:
                  # Auto-correct constraint for this calculation
                  floor_price_from_merchant = Decimal(original_price)
 
-        can_liquidate = await floor_service.can_liquidate(product.id)
+        can_liquidate = merchant.can_liquidate(product.id) if merchant else await floor_service.can_liquidate(product.id)
 
         # [FINTECH FIX]: Cost Integrity Lock. Stop guessing margins.
         # If COGS is missing in Shopify AND no manual Floor Pricing exists, we ABORT.
@@ -832,10 +814,7 @@ Respond with JSON:
         
         # [FIX] Enforce max discount cap from merchant settings
         # Prevents strategies from exceeding merchant's configured maximum auto-discount
-        from app.models import Merchant
-        async with async_session_maker() as session:
-            merchant = await session.get(Merchant, self.merchant_id)
-            max_auto_discount = float(merchant.max_auto_discount) if merchant and merchant.max_auto_discount else 0.40
+        max_auto_discount = merchant.discount_cap(0.40) if merchant else 0.40
         
         # Cap discount to merchant's limit
         discount_percent = min(strategy_discount, max_auto_discount)
@@ -1006,23 +985,17 @@ Format as JSON:
             "suggested_discount": getattr(product, 'suggested_discount', None)
         }
         
-        matching = await matchmaker.get_optimal_audience(
-            product_data=product_data,
-            strategy=strategy_name,
-            session=session
-        )
-        
-        # Count customers in the selected segments
-        from sqlalchemy import func
-        result = await session.execute(
-            select(func.count(Customer.id))
-            .where(
-                Customer.merchant_id == self.merchant_id,
-                Customer.rfm_segment.in_(matching["target_segments"]),
-                Customer.email_optin == True
+        async with matchmaker.thought_sink:
+            matching = await matchmaker.get_optimal_audience(
+                product_data=product_data,
+                strategy=strategy_name,
+                session=session
             )
-        )
-        total = result.scalar() or 0
+        
+        # Count email-reachable customers in the selected segments
+        from app.services.audience_index import get_audience_index
+        index = await get_audience_index(self.merchant_id, session)
+        total = index.count(matching["target_segments"], channel="email")
         
         return {
             'segments': matching["target_segments"],
@@ -1067,11 +1040,6 @@ Format as JSON:
         """
         Create proposal via Internal API (Identity-Secured).
         """
-        if not self._api_token:
-            await self._authenticate()
-            
-        import aiohttp
-        
         # Transform data to API schema
         payload = {
             "title": f"Clearance for {data['product'].title}",
@@ -1085,22 +1053,18 @@ Format as JSON:
             "product_title": data['product'].title
         }
         
-        headers = {"Authorization": f"Bearer {self._api_token}"}
-        
-        async with aiohttp.ClientSession() as http:
-            async with http.post("http://localhost:8000/internal/agents/proposals", json=payload, headers=headers) as resp:
-                if resp.status == 200:
-                    res_data = await resp.json()
-                    # Return a mock/partial InboxItem so the calling function doesn't break
-                    # The calling function (plan_clearance) expects an ID to track
-                    item = InboxItem()
-                    item.id = res_data.get('id')
-                    item.status = "created"
-                    return item
-                else:
-                    err = await resp.text()
-                    logger.error(f"❌ API Proposal Failed: {err}")
-                    raise Exception(f"Failed to create proposal: {err}")
+        resp = await self.api.post("/internal/agents/proposals", self.merchant_id, self.agent_type, json=payload)
+        if resp.status == 200:
+            # Return a mock/partial InboxItem so the calling function doesn't break
+            # The calling function (plan_clearance) expects an ID to track
+            item = InboxItem()
+            item.id = resp.data.get('id')
+            item.status = "created"
+            return item
+        else:
+            err = resp.data
+            logger.error(f"❌ API Proposal Failed: {err}")
+            raise Exception(f"Failed to create proposal: {err}")
     
     def _requires_merchant_approval(
         self, 
@@ -1116,7 +1080,7 @@ Format as JSON:
             return True
         
         discount = pricing["discount_percent"] / 100
-        max_auto_discount = float(self.merchant.max_auto_discount)
+        max_auto_discount = self.merchant.max_auto_discount
         
         # Approval needed if:
         # 1. Discount exceeds merchant threshold
@@ -1246,6 +1210,12 @@ async def _plan_all_dead_stock(merchant_id: str):
 
     print(f"[Strategy] Planning clearance for {len(products)} products using Clustering...")
     
+    async with merchant_context_scope(merchant_id):
+        await _plan_clusters(merchant_id, products)
+
+
+async def _plan_clusters(merchant_id: str, products: List[Dict[str, Any]]):
+    """Plans each inventory cluster; runs inside the caller's merchant context scope."""
     agent = StrategyAgent(merchant_id)
     # 1. Cluster the products
     summaries = await agent.clustering.cluster_inventory(products)
@@ -6,7 +6,6 @@ Requires the merchant to have an Amazon Seller account and authorize
 Cephly as a selling partner application.
 """
 
-import httpx
 from decimal import Decimal
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -18,6 +17,7 @@ from app.channels.base import (
     ListingResult,
     SyncedSale,
 )
+from app.services.http_clients import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +35,7 @@ class AmazonChannel(BaseExternalChannel):
         Merchant authorizes via Amazon's consent flow.
         Cephly exchanges the code for access + refresh tokens.
         """
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.post(
                 "https://api.amazon.com/auth/o2/token",
                 data={
@@ -97,7 +97,7 @@ class AmazonChannel(BaseExternalChannel):
             "User-Agent": "Cephly/1.0"
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             # Step 1: Create or update inventory
             inventory_payload = {
                 "sku": sku,
@@ -193,7 +193,7 @@ class AmazonChannel(BaseExternalChannel):
             "User-Agent": "Cephly/1.0"
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.get(
                 f"{self.SP_API_BASE}/listings/2021-08-01/items/{seller_id}/{external_listing_id}",
                 params={"marketplaceIds": marketplace_id, "includedData": "summaries,offers,fulfillmentAvailability"},
@@ -230,7 +230,7 @@ class AmazonChannel(BaseExternalChannel):
             "User-Agent": "Cephly/1.0"
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.delete(
                 f"{self.SP_API_BASE}/listings/2021-08-01/items/{seller_id}/{external_listing_id}",
                 params={"marketplaceIds": marketplace_id},
@@ -250,7 +250,7 @@ class AmazonChannel(BaseExternalChannel):
             "User-Agent": "Cephly/1.0"
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.get(
                 f"{self.SP_API_BASE}/orders/v0/orders",
                 params={
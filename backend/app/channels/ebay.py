@@ -6,7 +6,6 @@ and cancel listings. All product data is normalized from Cephly's
 internal format into eBay's listing requirements.
 """
 
-import httpx
 from decimal import Decimal
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -18,6 +17,7 @@ from app.channels.base import (
     ListingResult,
     SyncedSale,
 )
+from app.services.http_clients import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +36,7 @@ class eBayChannel(BaseExternalChannel):
         Cephly via eBay's OAuth consent flow.
         """
         # Exchange authorization code for access token
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.post(
                 "https://api.ebay.com/identity/v1/oauth2/token",
                 data={
@@ -113,7 +113,7 @@ class eBayChannel(BaseExternalChannel):
         vid = product.get('platform_variant_id', 'unknown')
         sku = f"cephly_{pid}_{vid}"
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             headers = {
                 "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json",
@@ -191,7 +191,7 @@ class eBayChannel(BaseExternalChannel):
         """Check current state of an eBay listing."""
         token = channel_context["access_token"]
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.get(
                 f"{self.EBAY_API_BASE}/offer/{external_listing_id}",
                 headers={"Authorization": f"Bearer {token}"},
@@ -226,7 +226,7 @@ class eBayChannel(BaseExternalChannel):
         """Cancel an active eBay listing."""
         token = channel_context["access_token"]
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.post(
                 f"{self.EBAY_API_BASE}/offer/{external_listing_id}/withdraw",
                 headers={"Authorization": f"Bearer {token}"},
@@ -239,7 +239,7 @@ class eBayChannel(BaseExternalChannel):
         token = channel_context["access_token"]
         sales = []
 
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             # Note: Fulfillment API needed for orders
             resp = await client.get(
                 "https://api.ebay.com/sell/fulfillment/v1/order",
@@ -48,7 +48,112 @@ class Settings(BaseSettings):
     # REQUIRED in production - generate with: python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
     TOKEN_ENCRYPTION_KEY: str | None = None
     USE_TOKEN_VAULT: bool = True  # Default to secure storage
-    
+
+    # Internal Agent API
+    INTERNAL_API_URL: str = "http://localhost:8000"
+    INTERNAL_API_POOL_SIZE: int = 50
+    INTERNAL_API_TIMEOUT_SECONDS: float = 10.0
+    INTERNAL_API_TOKEN_REFRESH_MARGIN_SECONDS: int = 300  # Refresh agent JWTs this long before expiry
+
+    # Agent Thought Sink ("inprocess" writes straight to the DB, "http" batches to the Internal API)
+    THOUGHT_SINK_TRANSPORT: str = "inprocess"
+    THOUGHT_SINK_BATCH_SIZE: int = 100
+    THOUGHT_SINK_FLUSH_INTERVAL_SECONDS: float = 2.0
+
+    # Agent Thought Retention (agent_thoughts is range-partitioned by month on Postgres)
+    THOUGHT_HOT_WINDOW_DAYS: int = 90  # Memory recall only reads thoughts this recent
+    THOUGHT_COMPACTION_AFTER_DAYS: int = 30  # Older per-product observations roll up into monthly summaries
+    THOUGHT_PARTITION_MONTHS_AHEAD: int = 3
+    THOUGHT_RETENTION_DAYS: dict[str, int] = {
+        "observation": 90,
+        "cluster_analysis": 90,
+        "observation_summary": 730,
+        "causal_memory": 365,
+        "default": 180,
+    }
+
+    # Run-scoped merchant context (flags, DNA, governor policy) reused across products
+    MERCHANT_CONTEXT_TTL_SECONDS: int = 300
+
+    # Merchant lookup cache for webhook / auth hot paths (invalidated via Redis pub/sub)
+    MERCHANT_CACHE_MAX_SIZE: int = 10000
+    MERCHANT_CACHE_TTL_SECONDS: int = 60
+
+    # Inbox badge counters (Redis hash per merchant, recounted in the DB when older than this)
+    INBOX_COUNTS_RECONCILE_SECONDS: int = 300
+
+    # Daily dashboard rollups (nightly compaction recomputes this many trailing days from the fact tables)
+    ROLLUP_COMPACTION_DAYS: int = 3
+
+    # Revenue attribution (orders this recent can be claimed; re-scan this much before the watermark)
+    ATTRIBUTION_WINDOW_DAYS: int = 30
+    ATTRIBUTION_WATERMARK_OVERLAP_SECONDS: int = 300
+
+    # Global Brain harvest (campaigns are folded into pattern sketches once they are this old)
+    GLOBAL_BRAIN_HARVEST_DELAY_DAYS: int = 7
+
+    # In-memory audience bitmaps (segment / opt-in / fatigue) per merchant
+    AUDIENCE_FATIGUE_DAYS: int = 5  # Touched this recently = fatigued
+    AUDIENCE_INDEX_TTL_SECONDS: int = 300
+    AUDIENCE_INDEX_MAX_MERCHANTS: int = 32
+    AUDIENCE_INDEX_MAX_BYTES: int = 256 * 1024 * 1024  # Per process, ids + bitsets of every cached index
+    AUDIENCE_STREAM_BATCH_SIZE: int = 1000  # Rows per server-side cursor fetch during sends
+
+    # Pooled outbound HTTP clients (one keep-alive pool per upstream host)
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = True  # Used when the h2 package is installed
+    HTTP_CLIENT_MAX_HOSTS: int = 512  # Idle pools beyond this are closed, least recently used first
+    HTTP_CLIENT_USER_AGENT: str = "Cephly/1.0"
+    HTTP_CLIENT_HOST_OVERRIDES: dict[str, dict[str, float]] = {
+        "api.twilio.com": {"max_connections": 50, "max_keepalive_connections": 50, "timeout": 10.0},
+        "a.klaviyo.com": {"max_connections": 20, "timeout": 30.0},
+        "hooks.slack.com": {"max_connections": 2, "timeout": 5.0},
+    }
+
+    # Outbound send pacing: AIMD token bucket per (provider, account), shared in Redis (msg/s)
+    SEND_RATE_LIMITS: dict[str, dict[str, float]] = {
+        "twilio": {"initial": 10.0, "min": 1.0, "max": 100.0},
+        "klaviyo": {"initial": 10.0, "min": 1.0, "max": 75.0},
+        "default": {"initial": 5.0, "min": 0.5, "max": 50.0},
+    }
+    SEND_RATE_BURST_SECONDS: float = 2.0  # Bucket holds this many seconds of sends
+    SEND_RATE_INCREASE: float = 1.0  # Additive increase (msg/s per second of clean sending)
+    SEND_RATE_DECREASE: float = 0.5  # Multiplicative decrease on 429 / 5xx / slow responses
+    SEND_RATE_DECREASE_COOLDOWN_SECONDS: float = 1.0
+    SEND_RATE_LATENCY_TARGET_MS: int = 2000
+    SEND_RATE_CONCURRENCY: int = 20  # In-flight sends per paced waterfall
+    SEND_RATE_STATE_TTL_SECONDS: int = 86400
+
+    # RFM monetary breakpoints from the nightly segmentation, reused for per-order re-scoring
+    RFM_BREAKPOINTS_TTL_SECONDS: int = 172800
+
+    # Webhook ingestion queue ("redis" = Redis Streams, "memory" = single-process stand-in)
+    WEBHOOK_QUEUE_BACKEND: str = "redis"
+    WEBHOOK_QUEUE_SHARDS: int = 8  # Events of one merchant always share a shard, preserving order
+    WEBHOOK_QUEUE_MAXLEN: int = 100000
+    WEBHOOK_CONSUMER_ENABLED: bool = True
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    WEBHOOK_RETRY_BACKOFF_SECONDS: float = 0.5  # Doubles on every retry
+    WEBHOOK_SHARD_LEASE_SECONDS: int = 30
+    WEBHOOK_DEDUP_TTL_SECONDS: int = 172800  # Shopify keeps redelivering for up to 48h
+    WEBHOOK_COALESCE_WINDOW_SECONDS: float = 1.0  # Hold a batch open this long to collapse per-entity bursts
+    WEBHOOK_COALESCE_MAX_BATCH: int = 100
+
+    # SSE fan-out: one pattern subscription per process, bounded queue per client
+    SSE_SUBSCRIBER_QUEUE_SIZE: int = 100  # Oldest messages are dropped beyond this
+    SSE_HEARTBEAT_SECONDS: int = 15
+
+    # Onboarding scan event log (Redis Stream per scan session)
+    SCAN_STREAM_MAXLEN: int = 1000
+    SCAN_STREAM_TTL_SECONDS: int = 3600  # Abandoned scans expire after this
+    SCAN_STREAM_RETENTION_SECONDS: int = 300  # Kept this long after completion for late joiners
+    QUICK_SCAN_CONCURRENCY: int = 10  # Products analyzed in parallel
+    SCAN_REVEAL_INTERVAL_SECONDS: float = 0.5  # SSE pacing after each dead_stock_found (presentation only)
+    SCAN_PROGRESS_INTERVAL_SECONDS: float = 0.1  # SSE pacing after each scan_progress
+
     def validate_production_settings(self):
         """Validate critical settings for production deployment."""
         if not self.DEBUG and not self.TOKEN_ENCRYPTION_KEY:
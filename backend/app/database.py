@@ -28,6 +28,18 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Keep the per-status inbox counters in step with every session that writes InboxItems
+from app.services.inbox_counts import register_inbox_count_hooks  # noqa: E402
+register_inbox_count_hooks()
+
+# Fold new ledger / LLM-usage / engagement facts into the daily dashboard rollups
+from app.services.rollups import register_rollup_hooks  # noqa: E402
+register_rollup_hooks()
+
+# Mark freshly touched customers as fatigued in this process's audience index
+from app.services.audience_index import register_audience_index_hooks  # noqa: E402
+register_audience_index_hooks()
+
 
 async def get_db() -> AsyncSession:
     """Dependency for FastAPI routes to get database session."""
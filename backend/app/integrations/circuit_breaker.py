@@ -14,13 +14,13 @@ States:
 from enum import Enum
 from datetime import datetime, timedelta
 import logging
-import httpx
 import json
 import asyncio
 from typing import Callable, Any, Optional, Dict
 
 from app.redis import get_redis_client
 from app.config import get_settings
+from app.services.http_clients import http_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -102,8 +102,8 @@ class CircuitBreaker:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                await client.post(settings.SLACK_WEBHOOK_URL, json=payload, timeout=5.0)
+            async with http_client() as client:
+                await client.post(settings.SLACK_WEBHOOK_URL, json=payload)
         except Exception as e:
             logger.error(f"Failed to send Slack alert: {e}")
     
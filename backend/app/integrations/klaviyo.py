@@ -1,24 +1,27 @@
-import requests
+import httpx
 import logging
+import time
 from typing import List, Dict, Any, Optional
 
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception, before_sleep_log
 
 from app.integrations.base import BaseConnector
 from app.integrations.circuit_breaker import get_klaviyo_circuit_breaker, CircuitBreakerOpenError
+from app.services.http_clients import http_client
+from app.services.send_rate import account_key, get_send_rate_controller, retry_after_seconds
 
 logger = logging.getLogger(__name__)
 
 def is_retryable_error(exception):
     """Return True if exception is a retryable HTTP error (429, 5xx)."""
-    if isinstance(exception, requests.exceptions.HTTPError):
+    if isinstance(exception, httpx.HTTPStatusError):
         status = exception.response.status_code
         return status == 429 or status >= 500
     return False
 
 class KlaviyoConnector(BaseConnector):
     """
-    Klaviyo Adapter using raw HTTP requests.
+    Klaviyo Adapter using raw HTTP requests (pooled client, see http_clients).
     """
     BASE_URL = "https://a.klaviyo.com/api"
 
@@ -80,11 +83,13 @@ class KlaviyoConnector(BaseConnector):
         }
         
         async def _execute():
-            # Note: Cephly used requests.post synchronously. I'll stick to it or wrap in executor.
-            # Given it's a connector, async is better. I'll use httpx if available or just wrap.
-            import asyncio
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, lambda: requests.post(url, json=payload, headers=self._headers(idempotency_key), timeout=30))
+            async with http_client() as client:
+                started = time.monotonic()
+                response = await client.post(url, json=payload, headers=self._headers(idempotency_key))
+            await get_send_rate_controller().observe(
+                "klaviyo", account_key(self.api_key), response.status_code, time.monotonic() - started,
+                retry_after_seconds(response.headers) if response.status_code == 429 else None,
+            )
 
             response.raise_for_status()
             data = response.json()
@@ -153,9 +158,13 @@ class KlaviyoConnector(BaseConnector):
         }
         
         async def _execute():
-            import asyncio
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, lambda: requests.post(url, json=payload, headers=self._headers(idempotency_key), timeout=30))
+            async with http_client() as client:
+                started = time.monotonic()
+                response = await client.post(url, json=payload, headers=self._headers(idempotency_key))
+            await get_send_rate_controller().observe(
+                "klaviyo", account_key(self.api_key), response.status_code, time.monotonic() - started,
+                retry_after_seconds(response.headers) if response.status_code == 429 else None,
+            )
 
             # Klaviyo returns 202 Accepted for events
             if response.status_code in [201, 202]:
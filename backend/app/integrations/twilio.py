@@ -1,9 +1,12 @@
 import httpx
 import logging
+import time
 from typing import List, Dict, Any, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception, before_sleep_log
 from app.integrations.base import BaseConnector
 from app.integrations.circuit_breaker import get_twilio_circuit_breaker, CircuitBreakerOpenError
+from app.services.http_clients import http_client
+from app.services.send_rate import get_send_rate_controller, retry_after_seconds
 
 logger = logging.getLogger(__name__)
 
@@ -76,8 +79,14 @@ class TwilioConnector(BaseConnector):
 
         async def _execute():
             try:
-                async with httpx.AsyncClient(auth=(sid, token), timeout=10.0) as client:
+                async with http_client(auth=(sid, token)) as client:
+                    started = time.monotonic()
                     response = await client.post(url, data=payload, headers=headers)
+                    # Feed the account's shared send rate (429 / latency backoff)
+                    await get_send_rate_controller().observe(
+                        "twilio", sid, response.status_code, time.monotonic() - started,
+                        retry_after_seconds(response.headers) if response.status_code == 429 else None,
+                    )
 
                     response.raise_for_status()
                     res_data = response.json()
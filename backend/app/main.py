@@ -25,10 +25,32 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     print("Database tables created")
+
+    # On Postgres agent_thoughts is created as a partitioned parent; it only
+    # accepts rows once its partitions exist (no-op elsewhere / if present)
+    from app.services.thought_retention import ThoughtRetentionService
+    await ThoughtRetentionService().ensure_partitions()
+
+    from app.services.merchant_cache import start_invalidation_listener
+    start_invalidation_listener()
+
+    if settings.WEBHOOK_CONSUMER_ENABLED:
+        from app.services.webhook_queue import start_webhook_consumer
+        start_webhook_consumer(webhooks.dispatch_webhook_event)
     
     yield
     
     # Shutdown: Cleanup
+    from app.services.webhook_queue import stop_webhook_consumer
+    await stop_webhook_consumer()
+    from app.services.merchant_cache import stop_invalidation_listener
+    await stop_invalidation_listener()
+    from app.services.pubsub_hub import stop_pubsub_hubs
+    await stop_pubsub_hubs()
+    from app.services.internal_api_client import get_internal_api_client
+    await get_internal_api_client().close()
+    from app.services.http_clients import close_http_clients
+    await close_http_clients()
     await engine.dispose()
     print("Database connection closed")
 
@@ -148,6 +170,30 @@ async def health_check(db=Depends(get_db)):
         raise HTTPException(status_code=503, detail="Database disconnected")
 
 
+@app.get("/health/webhooks")
+async def webhook_queue_health():
+    """Webhook queue depth, lag and retry / dead-letter counts."""
+    from app.services.webhook_queue import get_webhook_consumer
+    consumer = get_webhook_consumer()
+    if consumer is None:
+        return {"running": False}
+    return await consumer.metrics()
+
+
+@app.get("/health/streams")
+async def stream_health():
+    """SSE fan-out: subscribers, delivered / dropped messages and Redis reconnects."""
+    from app.services.pubsub_hub import get_inbox_hub
+    return {"inbox": get_inbox_hub().metrics()}
+
+
+@app.get("/health/http")
+async def http_client_health():
+    """Pooled outbound HTTP clients: per-host requests, errors, latency and pool saturation."""
+    from app.services.http_clients import get_http_clients
+    return {"hosts": get_http_clients().stats()}
+
+
 @app.get("/")
 async def root():
     """Root endpoint with system info."""
@@ -6,9 +6,9 @@ This package is organized by domain:
 - merchant.py: Merchant/store models
 - product.py: Product, variant, and pricing models
 - customer.py: Customer and RFM models
-- order.py: Order and line item models
+- order.py: Order, line item and applied refund models
 - inbox.py: Inbox items and notifications
-- campaign.py: Campaigns, LLM usage, and ledger
+- campaign.py: Campaigns, LLM usage, ledger (+ attribution watermark), and daily rollups
 - journey.py: Customer and merchant journeys
 - audit.py: Audit logging and reversals
 - dna.py: Store DNA and strategy templates
@@ -27,11 +27,13 @@ from app.models.base import Base, UUIDMixin, TimestampMixin, SoftDeleteMixin, Ve
 from app.models.merchant import Merchant
 from app.models.product import Product, ProductVariant, FloorPricing
 from app.models.customer import Customer
-from app.models.order import Order, OrderItem
+from app.models.order import Order, OrderItem, Refund
 
 # Inbox and campaigns
 from app.models.inbox import InboxItem, PendingNotification
-from app.models.campaign import Campaign, LLMUsageLog, Ledger
+from app.models.campaign import (
+    Campaign, LLMUsageLog, Ledger, AttributionWatermark, DailyMerchantRollup, DailyLLMCostRollup,
+)
 
 # Journeys
 from app.models.journey import CommercialJourney, MerchantJourney, TouchLog
@@ -58,7 +60,7 @@ from app.models.agent import AgentThought
 from app.models.governor import RiskPolicy
 
 # Global learning
-from app.models.global_brain import GlobalStrategyPattern
+from app.models.global_brain import GlobalStrategyPattern, GlobalBrainHarvestState
 
 
 __all__ = [
@@ -77,6 +79,7 @@ __all__ = [
     "Customer",
     "Order",
     "OrderItem",
+    "Refund",
 
     # Inbox and campaigns
     "InboxItem",
@@ -84,6 +87,9 @@ __all__ = [
     "Campaign",
     "LLMUsageLog",
     "Ledger",
+    "AttributionWatermark",
+    "DailyMerchantRollup",
+    "DailyLLMCostRollup",
 
     # Journeys
     "CommercialJourney",
@@ -113,4 +119,5 @@ __all__ = [
 
     # Global Brain
     "GlobalStrategyPattern",
+    "GlobalBrainHarvestState",
 ]
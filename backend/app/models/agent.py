@@ -6,7 +6,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import String, DateTime, ForeignKey, Index, Text, Numeric, JSON
+from sqlalchemy import String, DateTime, ForeignKey, Index, Text, Numeric, JSON, PrimaryKeyConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, UUIDMixin, TimestampMixin
@@ -19,10 +19,16 @@ class AgentThought(Base, UUIDMixin, TimestampMixin):
     """
     __tablename__ = "agent_thoughts"
 
+    # Part of the primary key: the table is range-partitioned by created_at on
+    # Postgres (postgresql_partition_by below; partition_agent_thoughts_by_month
+    # converts existing tables), which requires it.
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow)
+
     merchant_id: Mapped[str] = mapped_column(ForeignKey("merchants.id", ondelete="CASCADE"), nullable=False)
 
     agent_type: Mapped[str] = mapped_column(String(50), nullable=False)  # observer, strategy, matchmaker, etc.
     execution_id: Mapped[Optional[str]] = mapped_column(String(36), index=True)
+    product_id: Mapped[Optional[str]] = mapped_column(String(100))  # Product the thought is about (memory recall key)
 
     thought_type: Mapped[str] = mapped_column(String(50))  # analysis, decision, calculation, warning
     summary: Mapped[str] = mapped_column(Text, nullable=False)
@@ -35,6 +41,11 @@ class AgentThought(Base, UUIDMixin, TimestampMixin):
     merchant: Mapped["Merchant"] = relationship("Merchant", back_populates="thoughts")
 
     __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at"),
         Index("idx_thought_merchant_agent", "merchant_id", "agent_type"),
         Index("idx_thought_created", "created_at"),
+        Index("idx_thought_merchant_product_agent_created", "merchant_id", "product_id", "agent_type", "created_at"),
+        Index("idx_thought_merchant_created_id", "merchant_id", "created_at", "id"),  # Keyset pagination
+        # Partitions are created by ThoughtRetentionService.ensure_partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
@@ -49,6 +49,7 @@ class AuditLog(Base, UUIDMixin, TimestampMixin):
         Index("idx_audit_execution", "execution_id"),  # Forensic tracing
         Index("idx_audit_actor", "actor_type", "actor_agent_type"),  # Find actions by specific actors
         Index("idx_audit_created", "created_at"),  # Time-based cleanup/archival
+        Index("idx_audit_merchant_created_id", "merchant_id", "created_at", "id"),  # Keyset pagination
     )
 
 
@@ -2,11 +2,11 @@
 Campaign models - execution tracking and performance metrics.
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Optional, List
 
-from sqlalchemy import String, DateTime, Numeric, ForeignKey, Index, Integer, JSON, Text, Boolean
+from sqlalchemy import String, Date, DateTime, Numeric, ForeignKey, Index, Integer, JSON, Text, Boolean
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, UUIDMixin, TimestampMixin
@@ -82,3 +82,61 @@ class Ledger(Base, UUIDMixin, TimestampMixin):
     attribution_source: Mapped[str] = mapped_column(String(255))
     currency: Mapped[str] = mapped_column(String(10), default="USD")
     raw_data: Mapped[dict] = mapped_column(JSON, nullable=True)
+
+
+class AttributionWatermark(Base):
+    """
+    How far AttributionService.sync_ledger has looked at orders and executed
+    proposals for a merchant. The row is also locked for the run, so
+    concurrent syncs of one merchant serialize.
+    """
+    __tablename__ = "attribution_watermarks"
+
+    merchant_id: Mapped[str] = mapped_column(ForeignKey("merchants.id", ondelete="CASCADE"), primary_key=True)
+    watermark: Mapped[Optional[datetime]] = mapped_column(DateTime)  # None = never ran
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DailyMerchantRollup(Base):
+    """
+    Per-merchant daily facts for the analytics / ROI / CRM dashboards.
+    Maintained incrementally by app.services.rollups as source rows are
+    flushed and recomputed by the nightly compaction job.
+    """
+    __tablename__ = "daily_merchant_rollups"
+
+    merchant_id: Mapped[str] = mapped_column(ForeignKey("merchants.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)  # UTC
+
+    # Attribution (Ledger)
+    attributed_orders: Mapped[int] = mapped_column(Integer, default=0)
+    attributed_revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0.00"))
+    net_margin: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0.00"))
+    agent_stake: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0.00"))
+
+    # Agent cost (LLMUsageLog; per task type in DailyLLMCostRollup)
+    llm_calls: Mapped[int] = mapped_column(Integer, default=0)
+    llm_cost: Mapped[Decimal] = mapped_column(Numeric(14, 6), default=Decimal("0.000000"))
+
+    # Engagement (Campaign counters, CommercialJourney conversions)
+    emails_opened: Mapped[int] = mapped_column(Integer, default=0)
+    emails_clicked: Mapped[int] = mapped_column(Integer, default=0)
+    conversions: Mapped[int] = mapped_column(Integer, default=0)
+    journeys_converted: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Gauges snapshotted by compaction (None until the first run)
+    customers_reachable: Mapped[Optional[int]] = mapped_column(Integer)
+    customers_at_risk: Mapped[Optional[int]] = mapped_column(Integer)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DailyLLMCostRollup(Base):
+    """Per-merchant daily LLM spend by task type."""
+    __tablename__ = "daily_llm_cost_rollups"
+
+    merchant_id: Mapped[str] = mapped_column(ForeignKey("merchants.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    task_type: Mapped[str] = mapped_column(String(100), primary_key=True)
+    calls: Mapped[int] = mapped_column(Integer, default=0)
+    cost_usd: Mapped[Decimal] = mapped_column(Numeric(14, 6), default=Decimal("0.000000"))
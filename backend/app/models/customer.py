@@ -51,4 +51,5 @@ class Customer(Base, UUIDMixin, TimestampMixin):
     __table_args__ = (
         Index("idx_customer_merchant_segment", "merchant_id", "rfm_segment"),
         Index("idx_customer_last_order", "last_order_date"),
+        Index("idx_customer_merchant_platform_id", "merchant_id", "shopify_customer_id"),
     )
@@ -4,6 +4,7 @@ Global Brain models - cross-tenant learning and pattern recognition.
 
 from datetime import datetime
 from decimal import Decimal
+from typing import Optional
 
 from sqlalchemy import String, DateTime, Index, Numeric, Float, JSON
 from sqlalchemy.orm import Mapped, mapped_column
@@ -30,3 +31,18 @@ class GlobalStrategyPattern(Base, UUIDMixin, TimestampMixin):
     sample_count: Mapped[int] = mapped_column(default=0)  # Minimum N>=100 for validity
     context_criteria: Mapped[dict] = mapped_column(JSON)
     last_updated: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    # Mergeable conversion-rate sketch (app.services.quantile_sketch) behind p50/p90
+    conversion_sketch: Mapped[Optional[dict]] = mapped_column(JSON)
+
+
+class GlobalBrainHarvestState(Base):
+    """
+    Harvest watermark: campaigns created up to `watermark` are already in the
+    pattern sketches. The row is locked for a run, so harvests serialize.
+    """
+    __tablename__ = "global_brain_harvest_state"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    watermark: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -71,6 +71,9 @@ class InboxItem(Base, UUIDMixin, TimestampMixin, VersionMixin):
     __table_args__ = (
         Index("idx_inbox_merchant_status", "merchant_id", "status"),
         Index("idx_inbox_created", "created_at"),
+        # Keyset pagination of the inbox list (newest first, optionally by status)
+        Index("idx_inbox_merchant_created_id", "merchant_id", "created_at", "id"),
+        Index("idx_inbox_merchant_status_created_id", "merchant_id", "status", "created_at", "id"),
     )
 
 
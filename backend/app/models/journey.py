@@ -75,3 +75,7 @@ class TouchLog(Base, UUIDMixin, TimestampMixin):
 
     # Relationships
     journey: Mapped["CommercialJourney"] = relationship("CommercialJourney", back_populates="logs")
+
+    __table_args__ = (
+        Index("idx_touch_customer_created", "customer_id", "created_at"),
+    )
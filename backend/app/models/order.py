@@ -56,3 +56,17 @@ class OrderItem(Base, UUIDMixin, TimestampMixin):
         Index("idx_orderitem_order", "order_id"),
         Index("idx_orderitem_product", "product_id"),
     )
+
+
+class Refund(Base):
+    """
+    A platform refund whose line items were folded into velocity. The
+    primary key makes applying it idempotent, however late a webhook is
+    redelivered.
+    """
+    __tablename__ = "refunds"
+
+    merchant_id: Mapped[str] = mapped_column(ForeignKey("merchants.id", ondelete="CASCADE"), primary_key=True)
+    platform_refund_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    platform_order_id: Mapped[Optional[str]] = mapped_column(String(64))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
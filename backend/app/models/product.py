@@ -74,6 +74,7 @@ class Product(Base, UUIDMixin, TimestampMixin, VersionMixin):
         Index("idx_product_merchant_dead", "merchant_id", "is_dead_stock"),
         Index("idx_product_velocity", "velocity_score"),
         Index("idx_product_last_sale", "last_sale_date"),
+        Index("idx_product_merchant_velocity_id", "merchant_id", "velocity_score", "id"),  # Keyset pagination
     )
 
 
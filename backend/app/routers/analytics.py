@@ -1,60 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.database import async_session_maker
-from app.models import Ledger, LLMUsageLog, Campaign
+from app.services.rollups import RollupService
 from app.auth_middleware import get_current_tenant
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+HISTORY_DAYS = 30
+MAX_TIMESERIES_DAYS = 366
+
 @router.get("/stats")
-async def get_analytics_stats(merchant_id: str = Depends(get_current_tenant)) -> Dict[str, Any]:
+async def get_analytics_stats(
+    start: Optional[date] = Query(None, description="First day of the history window (default: 30 days ago)"),
+    end: Optional[date] = Query(None, description="Last day of the history window (default: today)"),
+    merchant_id: str = Depends(get_current_tenant)
+) -> Dict[str, Any]:
     """
     Aggregated performance data for the Analytics dashboard.
+    Served from the daily rollups rather than scanning the fact tables.
     """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=HISTORY_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+
+    rollups = RollupService(merchant_id)
+    async with async_session_maker() as session:
+        totals = await rollups.totals(session)
+        series = await rollups.series(session, start, end)
+
+    # 1. Revenue & ROI (Highlander Rule Ledger)
+    total_revenue = Decimal(totals["attributed_revenue"] or 0)
+    # 2. Agent Cost (LLM Usage)
+    total_cost = Decimal(totals["llm_cost"] or 0) or Decimal("0.01")
+
+    roi = float(total_revenue / total_cost) if total_cost > 0 else 0
+
+    # 3. Campaign Performance (Aggregate)
+    opens = int(totals["emails_opened"] or 0)
+    clicks = int(totals["emails_clicked"] or 0)
+
+    # 4. Neural Gain (Mock for premium feel, could be trend analysis)
+    neural_gain = 92.4 # Placeholder for agent performance delta
+
+    return {
+        "total_recovered_revenue": float(total_revenue),
+        "total_llm_cost": float(total_cost),
+        "roi_multiplier": round(roi, 2),
+        "agent_contribution": f"{neural_gain}%",
+        "ltv_lift": "+28.5%", # Hardcoded for demo/premium UI
+        "metrics": {
+            "total_opens": opens,
+            "total_clicks": clicks,
+            "conversion_rate": round(clicks / opens * 100, 2) if opens > 0 else 0
+        },
+        "history": [
+            {"date": point["date"], "revenue": point["attributed_revenue"]}
+            for point in series
+        ]
+    }
+
+
+@router.get("/timeseries")
+async def get_analytics_timeseries(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    merchant_id: str = Depends(get_current_tenant)
+) -> Dict[str, Any]:
+    """Daily facts (revenue, margin, LLM cost, engagement) for charting."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=HISTORY_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    if (end - start).days >= MAX_TIMESERIES_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_TIMESERIES_DAYS} days")
+
+    rollups = RollupService(merchant_id)
     async with async_session_maker() as session:
-        # 1. Revenue & ROI (Highlander Rule Ledger)
-        revenue_stmt = select(func.sum(Ledger.gross_amount)).where(Ledger.merchant_id == merchant_id)
-        total_revenue = (await session.execute(revenue_stmt)).scalar() or Decimal("0.00")
-        
-        # 2. Agent Cost (LLM Usage)
-        cost_stmt = select(func.sum(LLMUsageLog.cost_usd)).where(LLMUsageLog.merchant_id == merchant_id)
-        total_cost = (await session.execute(cost_stmt)).scalar() or Decimal("0.01")
-        
-        roi = float(total_revenue / total_cost) if total_cost > 0 else 0
-        
-        # 3. Campaign Performance (Aggregate)
-        campaigns_stmt = select(
-            func.sum(Campaign.emails_opened).label('opens'),
-            func.sum(Campaign.emails_clicked).label('clicks')
-        ).where(Campaign.merchant_id == merchant_id)
-        metrics = (await session.execute(campaigns_stmt)).one_or_none()
-        
-        # 4. Neural Gain (Mock for premium feel, could be trend analysis)
-        neural_gain = 92.4 # Placeholder for agent performance delta
-        
-        return {
-            "total_recovered_revenue": float(total_revenue),
-            "total_llm_cost": float(total_cost),
-            "roi_multiplier": round(roi, 2),
-            "agent_contribution": f"{neural_gain}%",
-            "ltv_lift": "+28.5%", # Hardcoded for demo/premium UI
-            "metrics": {
-                "total_opens": metrics.opens or 0,
-                "total_clicks": metrics.clicks or 0,
-                "conversion_rate": round(float(metrics.clicks / metrics.opens * 100), 2) if metrics.opens and metrics.opens > 0 else 0
-            },
-            "history": [
-                # Mock time-series for the charts
-                {"date": "2024-01-14", "revenue": 1200},
-                {"date": "2024-01-15", "revenue": 1800},
-                {"date": "2024-01-16", "revenue": 1500},
-                {"date": "2024-01-17", "revenue": 2400},
-                {"date": "2024-01-18", "revenue": 3100},
-                {"date": "2024-01-19", "revenue": 2800},
-                {"date": "2024-01-20", "revenue": 3500},
-            ]
-        }
+        series = await rollups.series(session, start, end)
+        llm_cost_by_task = await rollups.llm_cost_by_task(session, start, end)
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": series,
+        "llm_cost_by_task": llm_cost_by_task,
+    }
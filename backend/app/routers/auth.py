@@ -22,6 +22,7 @@ from app.config import get_settings
 from app.database import async_session_maker
 from app.models import Merchant
 from app.adapters.registry import AdapterRegistry
+from app.services.merchant_cache import invalidate_merchant
 
 router = APIRouter()
 settings = get_settings()
@@ -274,8 +275,10 @@ async def callback(
         await session.refresh(merchant)
         merchant_id = merchant.id
 
+    await invalidate_merchant(merchant_id)
+
     # --- Register Webhooks ---
-    webhooks = ["product.updated", "order.created"]
+    webhooks = ["product.updated", "order.created", "refund.created"]
     base_webhook_url = f"{settings.HOST}/api/webhooks/{platform}" 
     
     # We try/except webhook registration because it might fail on dev/localhost without tunnel
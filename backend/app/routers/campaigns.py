@@ -17,6 +17,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import Campaign, Merchant
 from app.auth_middleware import get_current_tenant
+from app.services.send_rate import get_send_rate_controller
 
 router = APIRouter(tags=["Campaigns"])
 
@@ -124,6 +125,25 @@ async def get_campaign(
     return CampaignResponse.model_validate(campaign)
 
 
+@router.get("/{campaign_id}/send-rate")
+async def get_campaign_send_rate(
+    campaign_id: str,
+    merchant_id: str = Depends(get_current_tenant),
+    db: AsyncSession = Depends(get_db),
+):
+    """Achieved send rate of a campaign's paced sends."""
+    result = await db.execute(
+        select(Campaign.id).where(
+            Campaign.id == campaign_id,
+            Campaign.merchant_id == merchant_id
+        )
+    )
+    if not result.scalar_one_or_none():
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    return await get_send_rate_controller().campaign_rate(campaign_id)
+
+
 @router.post("/{campaign_id}/pause")
 async def pause_campaign(
     campaign_id: str,
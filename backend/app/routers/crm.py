@@ -3,8 +3,10 @@ from sqlalchemy import select, func
 from app.database import get_db
 from app.models import Customer, CommercialJourney, TouchLog
 from app.auth_middleware import get_current_tenant
+from app.services.rollups import AT_RISK_AFTER_DAYS, RollupService
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
+from datetime import datetime, timedelta
 
 router = APIRouter()
 
@@ -48,26 +50,28 @@ async def get_crm_stats(
     """
     Aggregate CRM and Retention stats.
     """
-    # 1. Reachable Customers
-    reachable_stmt = select(func.count(Customer.id)).where(Customer.merchant_id == merchant_id)
-    reachable = (await db.execute(reachable_stmt)).scalar() or 0
-    
-    # 2. At Risk (Simplified logic: no order in 60 days)
-    from datetime import datetime, timedelta
-    at_risk_date = datetime.utcnow() - timedelta(days=60)
-    at_risk_stmt = select(func.count(Customer.id)).where(
-        Customer.merchant_id == merchant_id,
-        Customer.last_order_date < at_risk_date
-    )
-    at_risk = (await db.execute(at_risk_stmt)).scalar() or 0
-    
+    rollups = RollupService(merchant_id)
+
+    # 1-2. Reachable / At Risk (no order in 60 days): nightly gauge snapshot,
+    # counted live only until the first compaction has run
+    gauges = await rollups.latest_gauges(db)
+    if gauges is not None:
+        reachable = gauges["customers_reachable"]
+        at_risk = gauges["customers_at_risk"] or 0
+    else:
+        reachable_stmt = select(func.count(Customer.id)).where(Customer.merchant_id == merchant_id)
+        reachable = (await db.execute(reachable_stmt)).scalar() or 0
+
+        at_risk_date = datetime.utcnow() - timedelta(days=AT_RISK_AFTER_DAYS)
+        at_risk_stmt = select(func.count(Customer.id)).where(
+            Customer.merchant_id == merchant_id,
+            Customer.last_order_date < at_risk_date
+        )
+        at_risk = (await db.execute(at_risk_stmt)).scalar() or 0
+
     # 3. Recovered (Converted Journeys)
-    recovered_stmt = select(func.count(CommercialJourney.id)).where(
-        CommercialJourney.merchant_id == merchant_id,
-        CommercialJourney.status == 'converted'
-    )
-    recovered = (await db.execute(recovered_stmt)).scalar() or 0
-    
+    recovered = int((await rollups.totals(db))["journeys_converted"] or 0)
+
     return {
         "total_reachable": reachable,
         "at_risk_count": at_risk,
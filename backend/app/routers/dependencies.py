@@ -6,12 +6,12 @@ Shared FastAPI dependencies for router authentication and authorization.
 """
 
 from fastapi import Depends, HTTPException
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth_middleware import get_current_tenant
 from app.database import get_db
 from app.models import Merchant
+from app.services.merchant_cache import get_merchant_cache
 
 
 async def require_merchant(
@@ -22,6 +22,8 @@ async def require_merchant(
     Dependency that validates JWT and returns the full Merchant object.
     
     Use when you need access to the full merchant record, not just the ID.
+    The record comes from the merchant cache and is attached to `db`
+    either way; call invalidate_merchant() after committing changes to it.
     
     Returns:
         Merchant: The authenticated merchant's database record.
@@ -30,10 +32,7 @@ async def require_merchant(
         HTTPException(401): If JWT is invalid.
         HTTPException(404): If merchant not found in database.
     """
-    result = await db.execute(
-        select(Merchant).where(Merchant.id == merchant_id)
-    )
-    merchant = result.scalar_one_or_none()
+    merchant = await get_merchant_cache().get_by_id(merchant_id, session=db)
     
     if not merchant:
         raise HTTPException(status_code=404, detail="Merchant not found")
@@ -14,15 +14,15 @@ from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
 from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
-import asyncio
 import json
-from redis.asyncio import from_url
 
 from app.database import get_db
 from app.models import InboxItem, Merchant
 from app.auth_middleware import get_current_tenant
 from app.config import get_settings
 from app.services.inbox import InboxService
+from app.services.pagination import InvalidCursor
+from app.services.pubsub_hub import get_inbox_hub
 from app.middleware.idempotency import get_idempotency_middleware, IdempotencyError
 
 router = APIRouter()
@@ -36,15 +36,14 @@ async def stream_inbox_updates(
     """
     Server-Sent Events endpoint for real-time inbox updates.
     Frontend connects to this to get instant "pings" when agents act.
+
+    Messages come from the process-wide pub/sub hub, so an open stream costs
+    an in-memory queue rather than a Redis connection.
     """
+    hub = get_inbox_hub()
+
     async def event_generator():
-        redis = await from_url(settings.REDIS_URL, decode_responses=True)
-        pubsub = redis.pubsub()
-        channel = f"inbox_updates:{merchant_id}"
-        await pubsub.subscribe(channel)
-        
-        logger = InboxService.logger if hasattr(InboxService, 'logger') else None
-        
+        subscription = hub.subscribe(f"inbox_updates:{merchant_id}")
         try:
             # Send initial "connected" event
             yield {
@@ -53,26 +52,21 @@ async def stream_inbox_updates(
             }
             
             while True:
-                # Check for client disconnect
-                if await request.is_disconnected():
-                    break
-                
-                # Wait for message with timeout to allow checking disconnect
-                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if message:
-                    yield {
-                        "event": "update",
-                        "data": message["data"]
-                    }
-                
-                # Small sleep to prevent tight loop if no messages
-                await asyncio.sleep(0.1)
+                message = await subscription.get(timeout=settings.SSE_HEARTBEAT_SECONDS)
+                if message is None:
+                    # Quiet period: check for client disconnect (sse-starlette sends the pings)
+                    if await request.is_disconnected():
+                        break
+                    continue
+                yield {
+                    "event": "update",
+                    "data": message
+                }
         
         finally:
-            await pubsub.unsubscribe(channel)
-            await redis.close()
+            hub.unsubscribe(subscription)
 
-    return EventSourceResponse(event_generator())
+    return EventSourceResponse(event_generator(), ping=settings.SSE_HEARTBEAT_SECONDS)
 
 class InboxItemResponse(BaseModel):
     """Response model for inbox items."""
@@ -100,26 +94,51 @@ class InboxListResponse(BaseModel):
     """Response model for inbox list."""
     items: List[InboxItemResponse]
     pending_count: int
+    next_cursor: Optional[str] = None
 
 
 @router.get("", response_model=InboxListResponse)
 async def list_inbox_items(
     merchant_id: str = Depends(get_current_tenant),
     status: Optional[str] = Query(None),
-    limit: int = Query(50, le=100),
-    offset: int = Query(0),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: str = Query("full", pattern="^(full|summary)$"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all inbox items for a merchant."""
+    """List inbox items for a merchant, newest first, keyset-paginated."""
     service = InboxService(db, merchant_id)
-    items, pending_count = await service.list_proposals(status=status, limit=limit, offset=offset)
+    try:
+        items, pending_count, next_cursor = await service.list_proposals(
+            status=status, limit=limit, offset=offset, cursor=cursor, view=view
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return InboxListResponse(
         items=[InboxItemResponse.model_validate(item) for item in items],
-        pending_count=pending_count
+        pending_count=pending_count,
+        next_cursor=next_cursor,
     )
 
 
+class InboxCountsResponse(BaseModel):
+    """Per-status counts for badges and polling clients."""
+    counts: dict
+    pending_count: int
+
+
+@router.get("/counts", response_model=InboxCountsResponse)
+async def get_inbox_counts(
+    merchant_id: str = Depends(get_current_tenant),
+    db: AsyncSession = Depends(get_db),
+):
+    """Lightweight badge counts; no proposal rows are loaded."""
+    counts = await InboxService(db, merchant_id).get_counts()
+    return InboxCountsResponse(counts=counts, pending_count=counts.get("pending", 0))
+
+
 @router.get("/{item_id}", response_model=InboxItemResponse)
 async def get_inbox_item(
     item_id: str,
@@ -11,6 +11,7 @@ from app.database import get_db
 from app.auth_middleware import get_current_agent, create_agent_token
 from app.services.identity import IdentityService
 from app.models import InboxItem
+from app.services.inbox_counts import invalidate_inbox_counts
 
 router = APIRouter(
     prefix="/internal/agents",
@@ -178,6 +179,7 @@ async def lock_campaign_execution(
         raise HTTPException(status_code=404, detail="Proposal not found")
         
     await db.commit()
+    await invalidate_inbox_counts(current_agent['merchant_id'])
     return {"status": "locked", "proposal": proposal.proposal_data, "origin_id": proposal.origin_execution_id}
 
 class ExecutionResultRequest(BaseModel):
@@ -210,6 +212,7 @@ async def complete_campaign_execution(
         )
     )
     await db.commit()
+    await invalidate_inbox_counts(current_agent['merchant_id'])
     return {"status": "updated"}
 
 
@@ -352,6 +355,27 @@ async def log_agent_thought(
     )
     return {"status": "logged"}
 
+class ThoughtBatchRequest(BaseModel):
+    thoughts: list[ThoughtLogRequest]
+
+@router.post("/thoughts/batch")
+async def log_agent_thoughts_batch(
+    request: ThoughtBatchRequest,
+    current_agent: dict = Depends(get_current_agent)
+):
+    """
+    Log a batch of thoughts in a single transaction.
+    Identity is enforced per batch; agent_type in the payload is ignored.
+    """
+    from app.services.thought_logger import ThoughtLogger
+
+    count = await ThoughtLogger.log_thoughts_bulk(
+        merchant_id=current_agent['merchant_id'],
+        agent_type=current_agent['agent_type'], # Enforce identity
+        thoughts=[t.dict(exclude={"agent_type"}) for t in request.thoughts]
+    )
+    return {"status": "logged", "count": count}
+
 
 # -----------------------------------------------------------------------------
 # 4. INVENTORY OBSERVATION (Observer Agent Only)
@@ -14,6 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import Merchant
 from app.auth_middleware import get_current_tenant
+from app.services.merchant_cache import get_merchant_cache, invalidate_merchant
 
 router = APIRouter()
 
@@ -45,10 +46,7 @@ async def get_merchant(
     db: AsyncSession = Depends(get_db),
 ):
     """Get current merchant details."""
-    result = await db.execute(
-        select(Merchant).where(Merchant.id == merchant_id)
-    )
-    merchant = result.scalar_one_or_none()
+    merchant = await get_merchant_cache().get_by_id(merchant_id, session=db)
     
     if not merchant:
         raise HTTPException(status_code=404, detail="Merchant not found")
@@ -88,6 +86,7 @@ async def update_merchant_settings(
         merchant.max_auto_ad_spend = settings.max_auto_ad_spend
     
     await db.commit()
+    await invalidate_merchant(merchant_id)
     
     return {"status": "updated", "merchant_id": merchant_id}
 
@@ -7,15 +7,16 @@ Provides endpoints for querying products with dead stock filtering.
 from typing import List, Optional
 from decimal import Decimal
 
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends
 from pydantic import BaseModel
-from sqlalchemy import select, desc, func
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models import Product
 from app.auth_middleware import get_current_tenant
 from app.limiter import limiter
+from app.services.pagination import InvalidCursor, keyset_desc, next_page
 from fastapi import Request
 
 router = APIRouter()
@@ -50,6 +51,17 @@ class ProductListResponse(BaseModel):
     products: List[ProductResponse]
     total: int
     dead_stock_count: int
+    next_cursor: Optional[str] = None
+
+
+# Columns the list view needs; everything else stays on the detail paths
+PRODUCT_LIST_COLUMNS = (
+    Product.id, Product.shopify_product_id, Product.title, Product.handle,
+    Product.product_type, Product.vendor, Product.status, Product.total_inventory,
+    Product.variant_count, Product.velocity_score, Product.is_dead_stock,
+    Product.dead_stock_severity, Product.days_since_last_sale, Product.units_sold_30d,
+    Product.units_sold_90d, Product.revenue_30d, Product.cost_per_unit,
+)
 
 
 @router.get("", response_model=ProductListResponse)
@@ -59,15 +71,17 @@ async def list_products(
     merchant_id: str = Depends(get_current_tenant),
     is_dead_stock: Optional[bool] = Query(None),
     severity: Optional[str] = Query(None),
-    limit: int = Query(50, le=200),
-    offset: int = Query(0),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    List products with high-performance optimized queries.
+    List products by velocity score (slowest movers last), keyset-paginated
+    on (velocity_score, id) and projected to the list columns.
     """
     # 1. Main Data Query
-    query = select(Product).where(Product.merchant_id == merchant_id)
+    query = select(*PRODUCT_LIST_COLUMNS).where(Product.merchant_id == merchant_id)
     
     if is_dead_stock is not None:
         query = query.where(Product.is_dead_stock == is_dead_stock)
@@ -75,12 +89,18 @@ async def list_products(
     if severity:
         query = query.where(Product.dead_stock_severity == severity)
     
-    # Eager load variants only if needed for list display, usually count is enough
-    # If list relies on variant fields, add options(selectinload(Product.variants))
-    query = query.order_by(desc(Product.velocity_score)).limit(limit).offset(offset)
+    try:
+        query = keyset_desc(query, Product.velocity_score, Product.id, cursor, nullable=True)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if offset and not cursor:
+        query = query.offset(offset)
     
-    result = await db.execute(query)
-    products = result.scalars().all()
+    rows, next_cursor = next_page((await db.execute(query.limit(limit + 1))).all(), limit, "velocity_score")
+    products = [
+        {**row._mapping, "inventory_value": float(row.cost_per_unit or 0) * (row.total_inventory or 0)}
+        for row in rows
+    ]
     
     # 2. Optimized COUNT Queries (Database-side)
     # Get total count
@@ -98,6 +118,7 @@ async def list_products(
         products=[ProductResponse.model_validate(p) for p in products],
         total=total,
         dead_stock_count=dead_count,
+        next_cursor=next_cursor,
     )
 
 
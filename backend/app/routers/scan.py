@@ -12,18 +12,27 @@ import json
 from uuid import uuid4
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Header, Query, Depends
 from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 
 from app.database import async_session_maker
 from app.models import Merchant
-from app.services.scan_broadcaster import get_broadcaster
+from app.config import get_settings
+from app.services.scan_broadcaster import TERMINAL_EVENTS, get_broadcaster
 from app.tasks.quick_scan import start_quick_scan
 from app.auth_middleware import get_current_tenant
 from sqlalchemy import select
 
 router = APIRouter()
+settings = get_settings()
+
+# Presentation cadence: the scan itself finishes as fast as it can and the
+# stream endpoint reveals its log at this pace (seconds after each event type)
+REVEAL_PACING = {
+    "scan_progress": settings.SCAN_PROGRESS_INTERVAL_SECONDS,
+    "dead_stock_found": settings.SCAN_REVEAL_INTERVAL_SECONDS,
+}
 
 
 class ScanStartResponse(BaseModel):
@@ -88,10 +97,17 @@ async def start_scan(merchant_id: str = Depends(get_current_tenant)):
 
 
 @router.get("/stream/{session_id}")
-async def stream_scan_events(session_id: str):
+async def stream_scan_events(
+    session_id: str,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
     """
     Server-Sent Events endpoint for live scan updates.
     
+    Replays the session's event log from the start (or from Last-Event-ID
+    when the browser reconnects), then follows it live, pacing finds for
+    the reveal animation (REVEAL_PACING).
+    
     Events:
     - scan_progress: {products_scanned, total_products}
     - dead_stock_found: {product, running_total}
@@ -101,40 +117,30 @@ async def stream_scan_events(session_id: str):
     
     async def event_generator():
         broadcaster = get_broadcaster()
-        pubsub = broadcaster.get_pubsub(session_id)
+        cursor = last_event_id or "0-0"
         
         # Send initial connected event
         yield f"event: connected\ndata: {json.dumps({'session_id': session_id})}\n\n"
         
-        try:
-            while True:
-                # Non-blocking message check
-                message = pubsub.get_message(timeout=0.5)
-                
-                if message and message["type"] == "message":
-                    data = message["data"]
-                    if isinstance(data, bytes):
-                        data = data.decode("utf-8")
-                    
-                    # Parse to get event type
-                    try:
-                        parsed = json.loads(data)
-                        event_type = parsed.get("type", "message")
-                        
-                        yield f"event: {event_type}\ndata: {data}\n\n"
-                        
-                        # End stream on completion or error
-                        if event_type in ("quick_scan_complete", "error"):
-                            break
-                    except json.JSONDecodeError:
-                        yield f"event: message\ndata: {data}\n\n"
+        while True:
+            events = await broadcaster.read(
+                session_id, cursor, block_ms=settings.SSE_HEARTBEAT_SECONDS * 1000
+            )
+            if not events:
+                # Keep proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+            
+            for event_id, event in events:
+                cursor = event_id
+                event_type = event.get("type", "message")
+                yield f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(event)}\n\n"
                 
-                # Small delay to prevent CPU spinning
-                await asyncio.sleep(0.1)
-        
-        finally:
-            pubsub.unsubscribe()
-            pubsub.close()
+                # End stream on completion or error
+                if event_type in TERMINAL_EVENTS:
+                    return
+                if event_type in REVEAL_PACING:
+                    await asyncio.sleep(REVEAL_PACING[event_type])
     
     return StreamingResponse(
         event_generator(),
@@ -152,17 +158,21 @@ async def get_scan_status(session_id: str):
     """
     Polling fallback for scan status.
     
-    Returns latest status from Redis if SSE not available.
+    Derived from the latest event in the session's log if SSE not available.
     """
-    broadcaster = get_broadcaster()
-    redis = broadcaster.redis
-    
-    # Check for completion status
-    status_key = f"scan_status:{session_id}"
-    status = redis.get(status_key)
-    
-    if status:
-        return json.loads(status)
+    event = await get_broadcaster().last_event(session_id)
+    
+    if event and event.get("type") == "quick_scan_complete":
+        return {"status": "completed", "summary": event["summary"]}
+    if event and event.get("type") == "error":
+        return {"status": "failed", "error": event["error"]}
+    if event and event.get("type") in ("scan_progress", "dead_stock_found"):
+        progress = event.get("running_total", event)
+        return {
+            "status": "in_progress",
+            "products_scanned": progress["products_scanned"],
+            "total_products": progress["total_products"],
+        }
     
     return {
         "status": "in_progress",
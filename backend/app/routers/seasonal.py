@@ -24,6 +24,7 @@ from app.routers.dependencies import get_session, require_merchant
 from app.models import Product, InboxItem, Campaign, AgentThought, Merchant
 from app.agents.seasonal_transition import SeasonalTransitionAgent
 from app.services.seasonal_analyzer import SeasonalAnalyzer, Season
+from app.services.thought_retention import hot_window_start
 
 logger = logging.getLogger(__name__)
 
@@ -179,7 +180,8 @@ async def trigger_seasonal_scan(
         # Run synchronously (blocking)
         try:
             agent = SeasonalTransitionAgent(merchant.id)
-            risks = await agent.scan_seasonal_risks()
+            async with agent.thought_sink:
+                risks = await agent.scan_seasonal_risks()
             
             return ScanTriggerResponse(
                 status="completed",
@@ -292,6 +294,7 @@ async def get_seasonal_agent_thoughts(
         select(AgentThought)
         .where(AgentThought.merchant_id == merchant.id)
         .where(AgentThought.agent_type == 'seasonal')
+        .where(AgentThought.created_at >= hot_window_start())
         .order_by(desc(AgentThought.created_at))
         .limit(limit)
     )
@@ -1,43 +1,73 @@
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, desc
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import select
 from typing import List, Optional
 from app.database import async_session_maker
 from app.models import AgentThought
 from app.config import Settings, get_settings
 from app.auth_middleware import get_current_tenant
+from app.services.pagination import InvalidCursor, keyset_desc, next_page
+from app.services.thought_retention import hot_window_start
 
 router = APIRouter(tags=["Thoughts"])
 
-@router.get("", response_model=List[dict])
+
+class ThoughtListResponse(BaseModel):
+    """Response model for the thought list."""
+    items: List[dict]
+    next_cursor: Optional[str] = None
+
+
+@router.get("", response_model=ThoughtListResponse)
 async def get_thoughts(
     merchant_id: str = Depends(get_current_tenant),
     execution_id: Optional[str] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_reasoning: bool = True,
     settings: Settings = Depends(get_settings)
 ):
     """
     Retrieve agent thoughts for the current merchant.
     Optionally filter by execution_id for a specific process.
+
+    Keyset-paginated on (created_at, id): pass the returned next_cursor to
+    get the following page. include_reasoning=false leaves the
+    detailed_reasoning JSON out of the query entirely.
     """
+    columns = [
+        AgentThought.id, AgentThought.agent_type, AgentThought.thought_type, AgentThought.summary,
+        AgentThought.execution_id, AgentThought.confidence_score, AgentThought.step_number,
+        AgentThought.created_at,
+    ]
+    if include_reasoning:
+        columns.append(AgentThought.detailed_reasoning)
+
     async with async_session_maker() as session:
-        query = select(AgentThought).where(AgentThought.merchant_id == merchant_id)
+        query = select(*columns).where(
+            AgentThought.merchant_id == merchant_id,
+            AgentThought.created_at >= hot_window_start()
+        )
         
         if execution_id:
             query = query.where(AgentThought.execution_id == execution_id)
             
-        query = query.order_by(desc(AgentThought.created_at)).limit(limit)
+        try:
+            query = keyset_desc(query, AgentThought.created_at, AgentThought.id, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        result = await session.execute(query)
-        thoughts = result.scalars().all()
+        result = await session.execute(query.limit(limit + 1))
+        thoughts, next_cursor = next_page(result.all(), limit, "created_at")
         
-        return [
+        items = [
             {
                 "id": t.id,
                 "agent_type": t.agent_type,
                 "thought_type": t.thought_type,
                 "summary": t.summary,
-                "detailed_reasoning": t.detailed_reasoning,
+                "detailed_reasoning": t.detailed_reasoning if include_reasoning else None,
                 "execution_id": t.execution_id,
                 "confidence_score": float(t.confidence_score),
                 "step_number": t.step_number,
@@ -45,5 +75,6 @@ async def get_thoughts(
             }
             for t in thoughts
         ]
+        return ThoughtListResponse(items=items, next_cursor=next_cursor)
 
 # TODO: Add WebSocket endpoint for real-time streaming
@@ -8,11 +8,16 @@ The router:
 1. Resolves the correct PlatformAdapter
 2. Verifies the webhook signature (via adapter)
 3. Normalizes the event (via adapter)
-4. Dispatches to the correct internal handler (Product, Order, etc.)
+4. Enqueues it and acknowledges immediately
+
+Webhook consumers (started in the app lifespan) then call
+dispatch_webhook_event(), which resolves the merchant and runs the correct
+internal handler (Product, Order, etc.) with per-merchant ordering.
 """
 
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from decimal import Decimal
 
 from fastapi import APIRouter, Request, HTTPException, Header, Path
 from sqlalchemy import select
@@ -21,6 +26,11 @@ from app.database import async_session_maker
 from app.models import Merchant, Product, ProductVariant, Customer, Order, OrderItem
 from app.adapters.registry import AdapterRegistry
 from app.adapters.base import WebhookEvent
+from app.services.audience_index import reassign_audience_segment
+from app.services.merchant_cache import get_merchant_cache, invalidate_merchant
+from app.services.rfm import RFMService
+from app.services.velocity import VelocityService
+from app.services.webhook_queue import QueuedWebhook, get_webhook_queue
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -30,17 +40,28 @@ async def get_merchant(platform: str, platform_merchant_id: str) -> Merchant | N
     """
     Fetch merchant by platform and their platform-specific ID.
     For Shopify, platform_merchant_id is the myshopify.com domain.
+    Served from the merchant cache; only misses hit the DB.
     """
-    async with async_session_maker() as session:
-        # We use 'shopify_domain' as the generic unique identifier column for now
-        # (Mapped to Store URL for Woo, Store Hash for BigC, etc.)
-        stmt = select(Merchant).where(
-            Merchant.platform == platform,
-            Merchant.shopify_domain == platform_merchant_id
-        )
-            
-        result = await session.execute(stmt)
-        return result.scalar_one_or_none()
+    return await get_merchant_cache().get_by_platform(platform, platform_merchant_id)
+
+
+# Per-delivery ids: the same id is re-sent when a platform retries a webhook
+WEBHOOK_ID_HEADERS = {
+    "shopify": "x-shopify-webhook-id",
+    "woocommerce": "x-wc-webhook-delivery-id",
+}
+
+
+def get_webhook_id(platform: str, headers: dict, raw_payload: dict) -> str | None:
+    """Platform delivery id used to drop duplicate deliveries, if the platform sends one."""
+    header = WEBHOOK_ID_HEADERS.get(platform)
+    if header:
+        for key, value in headers.items():
+            if key.lower() == header:
+                return value
+    if platform == "bigcommerce":
+        return raw_payload.get("hash")
+    return None
 
 
 @router.post("/{platform}/{topic}")
@@ -51,6 +72,10 @@ async def handle_webhook(
 ):
     """
     Universal generic webhook entry point.
+
+    Only verifies and enqueues; the DB work happens in the webhook consumers
+    (see app/services/webhook_queue.py) so platforms get their 200 well
+    within their delivery timeout.
     """
     # 1. Resolve Adapter
     try:
@@ -78,31 +103,53 @@ async def handle_webhook(
         logger.error(f"Webhook verification failed: {e}")
         raise HTTPException(status_code=401, detail="Invalid webhook signature or format")
 
-    # 3. Fetch Merchant context
-    merchant = await get_merchant(platform, event.merchant_id)
+    if event.event_type not in EVENT_HANDLERS:
+        return {"status": "ignored", "reason": "unhandled_topic"}
+
+    # 3. Enqueue for the consumers (dropping redeliveries of the same webhook id)
+    try:
+        message_id = await get_webhook_queue().enqueue_once(QueuedWebhook(
+            platform=platform,
+            topic=topic,
+            event_type=event.event_type,
+            merchant_key=event.merchant_id,
+            payload=event.payload,
+            raw_payload=event.raw_payload,
+            webhook_id=get_webhook_id(platform, headers, raw_payload),
+        ))
+    except Exception as e:
+        # Not acked: let the platform redeliver rather than lose the event
+        logger.error(f"Failed to enqueue {platform} webhook {event.event_type}: {e}")
+        raise HTTPException(status_code=503, detail="Webhook queue unavailable")
+
+    if message_id is None:
+        return {"status": "duplicate", "event": event.event_type}
+    return {"status": "queued", "event": event.event_type}
+
+
+async def dispatch_webhook_event(queued: QueuedWebhook):
+    """
+    Consumer-side processing of a queued webhook: resolves the merchant and
+    runs the matching handler. Exceptions propagate so the consumer retries.
+    """
+    handler = EVENT_HANDLERS.get(queued.event_type)
+    if not handler:
+        return
+
+    merchant = await get_merchant(queued.platform, queued.merchant_key)
     if not merchant:
         # Merchant might have uninstalled or not found
-        return {"status": "merchant_not_found"}
-
-    # 4. Dispatch to Handlers
-    # Event type is normalized e.g. "product.updated"
-    handlers = {
-        "product.created": process_product_update,
-        "product.updated": process_product_update,
-        "product.deleted": process_product_delete,
-        "order.created": process_order_create,
-        "order.updated": process_order_update,
-        "customer.created": process_customer_update,
-        "customer.updated": process_customer_update,
-        "app.uninstalled": process_app_uninstall,
-    }
-    
-    handler = handlers.get(event.event_type)
-    if handler:
-        await handler(merchant, event)
-        return {"status": "processed", "event": event.event_type}
-    
-    return {"status": "ignored", "reason": "unhandled_topic"}
+        logger.info(f"Dropping {queued.event_type} webhook for unknown merchant {queued.merchant_key}")
+        return
+
+    event = WebhookEvent(
+        event_type=queued.event_type,
+        merchant_id=queued.merchant_key,
+        payload=queued.payload,
+        raw_payload=queued.raw_payload,
+        received_at=datetime.utcfromtimestamp(queued.received_at),
+    )
+    await handler(merchant, event)
 
 
 # ============================================================================
@@ -148,14 +195,20 @@ async def process_product_update(merchant: Merchant, event: WebhookEvent):
             )
             session.add(product)
         
-        await session.commit()
-        await session.refresh(product)
+        await session.flush()
         
         # Sync variants (Simplified for brevity - assumes full replace or update)
+        variant_ids = [v.get("id") for v in variants if v.get("id")]
+        existing_variants = {}
+        if variant_ids:
+            v_result = await session.execute(
+                select(ProductVariant).where(ProductVariant.shopify_variant_id.in_(variant_ids))
+            )
+            existing_variants = {v.shopify_variant_id: v for v in v_result.scalars().all()}
+
         for v_data in variants:
             v_id = v_data.get("id")
-            v_result = await session.execute(select(ProductVariant).where(ProductVariant.shopify_variant_id == v_id))
-            variant = v_result.scalar_one_or_none()
+            variant = existing_variants.get(v_id)
             
             if not variant:
                 variant = ProductVariant(
@@ -197,19 +250,113 @@ async def process_product_delete(merchant: Merchant, event: WebhookEvent):
 
 
 async def process_order_create(merchant: Merchant, event: WebhookEvent):
-    """Handle new order."""
+    """
+    Handle new order: store it with its line items, fold the sale into the
+    affected products' velocity (see VelocityService) and the buyer's RFM
+    aggregates and segment (see RFMService.apply_order).
+    """
     payload = event.payload
+    platform_order_id = int(payload["id"]) if str(payload.get("id") or "").isdigit() else payload.get("id")
+    platform_customer_id = (payload.get("customer") or {}).get("id")
+    platform_customer_id = int(platform_customer_id) if str(platform_customer_id or "").isdigit() else None
     async with async_session_maker() as session:
+        existing = await session.execute(
+            select(Order.id).where(Order.shopify_order_id == platform_order_id)
+        )
+        if existing.scalar_one_or_none():
+            return  # Already recorded (initial sync or an earlier delivery)
+
+        created_at = _parse_timestamp(payload.get("created_at")) or event.received_at
         order = Order(
-            shopify_order_id=payload.get("id"),
+            shopify_order_id=platform_order_id,
             merchant_id=merchant.id,
             order_number=payload.get("order_number"),
             total_price=float(payload.get("total_price") or 0),
-            created_at=datetime.utcnow() 
+            subtotal_price=float(payload.get("subtotal_price") or payload.get("total_price") or 0),
+            created_at=created_at
         )
         session.add(order)
-        # Note: Linking customer/items omitted for brevity/safety in refactor
+        await session.flush()
+
+        line_items = await _resolve_line_items(session, merchant.id, payload.get("line_items", []))
+        for product_id, quantity, price in line_items:
+            session.add(OrderItem(order_id=order.id, product_id=product_id, quantity=quantity, price=price))
+
+        update = await VelocityService(merchant.id).apply_sale(
+            session, [item for item in line_items if item[0]], sold_at=created_at
+        )
+
+        segment_change = None
+        if platform_customer_id is not None:
+            segment_change = await RFMService(merchant.id).apply_order(
+                session, platform_customer_id, Decimal(str(order.total_price)), created_at
+            )
+            if segment_change:
+                order.customer_id = segment_change.customer_id
+        await session.commit()
+
+        if segment_change:
+            reassign_audience_segment(merchant.id, *segment_change)
+        await _broadcast_revisions(session, merchant.id, update)
+
+
+async def process_refund_create(merchant: Merchant, event: WebhookEvent):
+    """Handle refund: refunded units stop counting toward velocity (once per refund id)."""
+    refund_id = event.payload.get("id")
+    async with async_session_maker() as session:
+        velocity = VelocityService(merchant.id)
+        if refund_id and refund_id != "None":
+            if not await velocity.claim_refund(session, refund_id, event.payload.get("order_id")):
+                return  # Already applied (a redelivery outside the webhook dedup window)
+        else:
+            logger.warning(f"Refund webhook for {merchant.id} has no refund id; applying without a replay guard")
+        line_items = await _resolve_line_items(session, merchant.id, event.payload.get("line_items", []))
+        update = await velocity.apply_refund(
+            session, [item for item in line_items if item[0]]
+        )
         await session.commit()
+        await _broadcast_revisions(session, merchant.id, update)
+
+
+async def _resolve_line_items(session, merchant_id: str, line_items: list) -> list:
+    """Maps platform line items to (product_id | None, quantity, price) with one product lookup."""
+    platform_ids = {int(li["product_id"]) for li in line_items if str(li.get("product_id") or "").isdigit()}
+    product_ids = {}
+    if platform_ids:
+        result = await session.execute(
+            select(Product.shopify_product_id, Product.id).where(
+                Product.merchant_id == merchant_id,
+                Product.shopify_product_id.in_(platform_ids)
+            )
+        )
+        product_ids = {str(platform_id): product_id for platform_id, product_id in result.all()}
+
+    return [
+        (product_ids.get(str(li.get("product_id"))), int(li.get("quantity") or 0), float(li.get("price") or 0))
+        for li in line_items
+    ]
+
+
+async def _broadcast_revisions(session, merchant_id: str, update):
+    """Tells inbox clients about proposals withdrawn / downgraded by new sales."""
+    if not update.revised_proposals:
+        return
+    from app.services.inbox import InboxService
+    inbox = InboxService(session, merchant_id)
+    for item_id, action in update.revised_proposals:
+        await inbox.notify_update(item_id, action)
+
+
+def _parse_timestamp(value) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
 
 
 async def process_order_update(merchant: Merchant, event: WebhookEvent):
@@ -248,3 +395,18 @@ async def process_app_uninstall(merchant: Merchant, event: WebhookEvent):
             merch.is_active = False
             merch.access_token = ""
             await session.commit()
+    await invalidate_merchant(merchant.id)
+
+
+# Event type is normalized e.g. "product.updated"
+EVENT_HANDLERS = {
+    "product.created": process_product_update,
+    "product.updated": process_product_update,
+    "product.deleted": process_product_delete,
+    "order.created": process_order_create,
+    "order.updated": process_order_update,
+    "refund.created": process_refund_create,
+    "customer.created": process_customer_update,
+    "customer.updated": process_customer_update,
+    "app.uninstalled": process_app_uninstall,
+}
@@ -1,6 +1,7 @@
 import asyncio
 from temporalio.client import Client, Schedule, ScheduleActionStartWorkflow, ScheduleSpec, ScheduleIntervalSpec, ScheduleCalendarSpec
 from app.workflows.scan import SeasonalScanWorkflow
+from app.workflows.maintenance import ThoughtMaintenanceWorkflow, RollupCompactionWorkflow
 
 async def main():
     client = await Client.connect("localhost:7233")
@@ -27,5 +28,45 @@ async def main():
     except Exception as e:
         print(f"⚠️ Failed to create schedule (might exist): {e}")
 
+    # Run agent_thoughts maintenance every day at 3 AM
+    try:
+        await client.create_schedule(
+            "daily-thought-maintenance-schedule",
+            Schedule(
+                action=ScheduleActionStartWorkflow(
+                    ThoughtMaintenanceWorkflow.run,
+                    {},
+                    id="thought-maintenance-job",
+                    task_queue="execution-agent-queue",
+                ),
+                spec=ScheduleSpec(
+                    calendars=[ScheduleCalendarSpec(hour=[3])],
+                ),
+            ),
+        )
+        print("✅ Schedule 'daily-thought-maintenance-schedule' created.")
+    except Exception as e:
+        print(f"⚠️ Failed to create schedule (might exist): {e}")
+
+    # Compact the daily dashboard rollups every day at 1 AM (UTC day boundary has passed)
+    try:
+        await client.create_schedule(
+            "daily-rollup-compaction-schedule",
+            Schedule(
+                action=ScheduleActionStartWorkflow(
+                    RollupCompactionWorkflow.run,
+                    {},
+                    id="rollup-compaction-job",
+                    task_queue="execution-agent-queue",
+                ),
+                spec=ScheduleSpec(
+                    calendars=[ScheduleCalendarSpec(hour=[1])],
+                ),
+            ),
+        )
+        print("✅ Schedule 'daily-rollup-compaction-schedule' created.")
+    except Exception as e:
+        print(f"⚠️ Failed to create schedule (might exist): {e}")
+
 if __name__ == "__main__":
     asyncio.run(main())
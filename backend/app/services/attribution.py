@@ -11,12 +11,15 @@ import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
-from sqlalchemy import select, func
+from sqlalchemy import String, cast, func, or_, select, update
+from app.config import get_settings
 from app.database import async_session_maker
-from app.models import InboxItem, Ledger, Merchant, Order
+from app.models import AttributionWatermark, InboxItem, Ledger, Merchant, Order, OrderItem, Product
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 class AttributionService:
     """
     Manages financial attribution logic.
@@ -25,151 +28,143 @@ class AttributionService:
     def __init__(self, merchant_id: str):
         self.merchant_id = merchant_id
 
-    async def sync_ledger(self):
+    async def sync_ledger(self) -> int:
         """
         De-duplicates revenue and updates the financial ledger.
         [THE HIGHLANDER RULE]: Only one action can claim an order.
+
+        One set-based pass: orders inside the attribution window that contain a
+        product promoted by an executed proposal and are not in the ledger yet,
+        with their COGS summed in the same query. Only orders or proposals that
+        changed since the merchant's watermark are considered. Returns the
+        number of new ledger entries.
         """
+        run_started = datetime.utcnow()
+
         async with async_session_maker() as session:
-            # 1. Fetch attributed candidate orders
-            # (In Multi, we'll look for orders with discount codes from proposals)
-            proposals_result = await session.execute(
-                select(InboxItem).where(
+            watermark = await self._lock_watermark(session)
+
+            # Executed proposals and the product each one promoted
+            promoted_product_id = InboxItem.proposal_data['product_id'].as_string()
+            promoted = (
+                select(
+                    promoted_product_id.label("product_id"),
+                    InboxItem.agent_type,
+                    InboxItem.updated_at,
+                )
+                .where(
                     InboxItem.merchant_id == self.merchant_id,
-                    InboxItem.status == 'executed'
+                    InboxItem.status == 'executed',
+                    promoted_product_id.is_not(None),
                 )
+                .subquery("promoted")
             )
-            proposals = proposals_result.scalars().all()
-            
-            # Map of discount_code -> proposal
-            code_map = {}
-            for p in proposals:
-                # Assuming copy generation stored a code or we can match by product
-                data = p.proposal_data
-                # For demo, we match by product_id if price drop, or code if flash sale
-                code = data.get('copy', {}).get('discount_code')
-                if code:
-                    code_map[code] = p
-
-            # 2. Fetch recent orders
-            orders_result = await session.execute(
-                select(Order).where(
+
+            # Unclaimed orders with at least one promoted line item
+            attributed = (
+                select(Order.id.label("order_id"), func.min(promoted.c.agent_type).label("agent_type"))
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .join(promoted, promoted.c.product_id == OrderItem.product_id)
+                .where(
                     Order.merchant_id == self.merchant_id,
-                    Order.created_at >= datetime.utcnow() - timedelta(days=30)
+                    Order.created_at >= run_started - timedelta(days=settings.ATTRIBUTION_WINDOW_DAYS),
+                    ~select(Ledger.id).where(Ledger.order_id == cast(Order.shopify_order_id, String)).exists(),
                 )
+                .group_by(Order.id)
             )
-            orders = orders_result.scalars().all()
+            if watermark is not None:
+                since = watermark - timedelta(seconds=settings.ATTRIBUTION_WATERMARK_OVERLAP_SECONDS)
+                attributed = attributed.where(or_(Order.updated_at >= since, promoted.c.updated_at >= since))
+            attributed = attributed.subquery("attributed")
 
-            new_ledger_entries = []
-            for order in orders:
-                # Check if already in ledger
-                existing = await session.execute(
-                    select(Ledger).where(Ledger.order_id == str(order.shopify_order_id))
+            # COGS over every line item of those orders (missing cost = 0: merchant takes the hit, we don't profit)
+            rows = (await session.execute(
+                select(
+                    Order.shopify_order_id, Order.total_price, Order.created_at, attributed.c.agent_type,
+                    func.coalesce(func.sum(Product.cost_per_unit * OrderItem.quantity), 0).label("cogs"),
                 )
-                if existing.scalar_one_or_none():
-                    continue
-
-                # [ENGINE #7]: World-Class Attribution Matching
-                # Match by line items against promoted products
-                from app.models import OrderItem
-                from sqlalchemy.orm import selectinload
-                items_stmt = select(OrderItem).where(OrderItem.order_id == order.id).options(selectinload(OrderItem.product))
-                line_items = (await session.execute(items_stmt)).scalars().all()
-                
-                is_attributed = False
-                source = "Direct"
-                
-                for item in line_items:
-                    # Check if this product was promoted in an executed proposal
-                    promoted_stmt = select(InboxItem).where(
-                        InboxItem.merchant_id == self.merchant_id,
-                        InboxItem.status == 'executed',
-                        InboxItem.product_id == item.product_id
-                    ).limit(1)
-                    promo = (await session.execute(promoted_stmt)).scalar_one_or_none()
-                    
-                    if promo:
-                        is_attributed = True
-                        source = f"Agent ({promo.agent_type})"
-                        break
-                
-                if is_attributed:
-                    # [FINTECH FIX]: Calculate Total Cost for Net Margin Attribution
-                    total_order_cost = Decimal("0.00")
-                    for item in line_items:
-                        # Fetch item cost (fallback to 0 if missing - merchant takes hit, we don't profit)
-                        if item.product and item.product.cost_per_unit:
-                            total_order_cost += item.product.cost_per_unit * item.quantity
-                    
-                    # Recovered Margin = Total Price - Total COGS
-                    recovered_margin = order.total_price - total_order_cost
-                    
-                    # [INCENTIVE ALIGNMENT]: 25% of Recovered Margin, 0 if loss.
-                    # This ensures Cephly only profits if the merchant profits.
-                    agent_stake = max(Decimal("0.00"), recovered_margin * Decimal("0.25"))
-
-                    entry = Ledger(
-                        merchant_id=self.merchant_id,
-                        order_id=str(order.shopify_order_id),
-                        gross_amount=order.total_price,
-                        net_amount=order.total_price - total_order_cost, # Store actual profit
-                        agent_stake=agent_stake,
-                        attribution_source=source,
-                        created_at=order.created_at
-                    )
-                    new_ledger_entries.append(entry)
-                    
-                    # Also update Journey progress if applicable
-                    from app.services.journey_engine import JourneyService
-                    journey_service = JourneyService(self.merchant_id)
-                    await journey_service.update_progress()
-
-            if new_ledger_entries:
-                session.add_all(new_ledger_entries)
-                await session.commit()
-                logger.info(f"✅ Attributed {len(new_ledger_entries)} orders to ledger")
+                .join(attributed, attributed.c.order_id == Order.id)
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .outerjoin(Product, Product.id == OrderItem.product_id)
+                .group_by(Order.id, Order.shopify_order_id, Order.total_price, Order.created_at, attributed.c.agent_type)
+            )).all()
+
+            new_ledger_entries = []
+            for shopify_order_id, total_price, created_at, agent_type, cogs in rows:
+                # [FINTECH FIX]: Recovered Margin = Total Price - Total COGS
+                recovered_margin = total_price - Decimal(str(cogs))
+
+                # [INCENTIVE ALIGNMENT]: 25% of Recovered Margin, 0 if loss.
+                # This ensures Cephly only profits if the merchant profits.
+                agent_stake = max(Decimal("0.00"), recovered_margin * Decimal("0.25"))
+
+                new_ledger_entries.append(Ledger(
+                    merchant_id=self.merchant_id,
+                    order_id=str(shopify_order_id),
+                    gross_amount=total_price,
+                    net_amount=recovered_margin, # Store actual profit
+                    agent_stake=agent_stake,
+                    attribution_source=f"Agent ({agent_type})",
+                    created_at=created_at
+                ))
+
+            # One flush: a single batched INSERT (the rollup hooks still see the rows)
+            session.add_all(new_ledger_entries)
+            await session.execute(
+                update(AttributionWatermark)
+                .where(AttributionWatermark.merchant_id == self.merchant_id)
+                .values(watermark=run_started)
+            )
+            await session.commit()
+
+        if new_ledger_entries:
+            logger.info(f"✅ Attributed {len(new_ledger_entries)} orders to ledger")
+
+            # Journey progress aggregates the ledger, so once per run is enough
+            from app.services.journey_engine import JourneyService
+            await JourneyService(self.merchant_id).update_progress()
+
+        return len(new_ledger_entries)
+
+    async def _lock_watermark(self, session) -> Optional[datetime]:
+        """Creates the merchant's watermark row if needed and locks it for this run."""
+        dialect = session.bind.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        await session.execute(
+            insert(AttributionWatermark)
+            .values(merchant_id=self.merchant_id, watermark=None)
+            .on_conflict_do_nothing(index_elements=["merchant_id"])
+        )
+        return (await session.execute(
+            select(AttributionWatermark.watermark)
+            .where(AttributionWatermark.merchant_id == self.merchant_id)
+            .with_for_update()
+        )).scalar_one()
 
     async def get_roi_stats(self) -> dict:
         """
-        Returns high-level ROI stats for the dashboard.
+        Returns high-level ROI stats for the dashboard (from the daily rollups).
         """
+        from app.services.rollups import RollupService
+
         async with async_session_maker() as session:
-            # Sum attributed gross revenue
-            revenue_result = await session.execute(
-                select(func.sum(Ledger.gross_amount))
-                .where(Ledger.merchant_id == self.merchant_id)
-            )
-            total_revenue = revenue_result.scalar() or Decimal("0.00")
-            
-            # Sum attributed recovered margin (net_amount in Ledger)
-            margin_result = await session.execute(
-                select(func.sum(Ledger.net_amount))
-                .where(Ledger.merchant_id == self.merchant_id)
-            )
-            total_margin = margin_result.scalar() or Decimal("0.00")
+            totals = await RollupService(self.merchant_id).totals(session)
 
-            # Sum agent stake (what we actually earned)
-            stake_result = await session.execute(
-                select(func.sum(Ledger.agent_stake))
-                .where(Ledger.merchant_id == self.merchant_id)
-            )
-            total_stake = stake_result.scalar() or Decimal("0.00")
-            
-            # Sum LLM costs
-            from app.models import LLMUsageLog
-            cost_result = await session.execute(
-                select(func.sum(LLMUsageLog.cost_usd))
-                .where(LLMUsageLog.merchant_id == self.merchant_id)
-            )
-            total_llm_cost = cost_result.scalar() or Decimal("0.01")  # Floor
-            
-            # ROI = Total Revenue / Total LLM Cost
-            roi = total_revenue / total_llm_cost if total_llm_cost > 0 else 0
-            
-            return {
-                "total_recovered_revenue": float(total_revenue),
-                "total_recovered_margin": float(total_margin),
-                "total_agent_earnings": float(total_stake),
-                "total_llm_cost": float(total_llm_cost),
-                "roi_multiplier": round(float(roi), 2)
-            }
+        total_revenue = Decimal(totals["attributed_revenue"] or 0)
+        total_margin = Decimal(totals["net_margin"] or 0)
+        total_stake = Decimal(totals["agent_stake"] or 0)
+        total_llm_cost = Decimal(totals["llm_cost"] or 0) or Decimal("0.01")  # Floor
+
+        # ROI = Total Revenue / Total LLM Cost
+        roi = total_revenue / total_llm_cost if total_llm_cost > 0 else 0
+
+        return {
+            "total_recovered_revenue": float(total_revenue),
+            "total_recovered_margin": float(total_margin),
+            "total_agent_earnings": float(total_stake),
+            "total_llm_cost": float(total_llm_cost),
+            "roi_multiplier": round(float(roi), 2)
+        }
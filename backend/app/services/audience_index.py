@@ -0,0 +1,415 @@
+# app/services/audience_index.py
+"""
+Audience Index
+==============
+Process-local bitmap index of a merchant's customers for segment counts and
+audience sizing.
+
+Matchmaker segment stats (GROUP BY + a TouchLog join for fatigue) and the
+Strategy agent's opt-in audience COUNT ran for every product being planned,
+so a dead-stock sweep over 300 products repeated ~900 aggregates over data
+that only changes nightly. The index answers them from memory instead:
+
+- a customer's ordinal is the rank of its id; the sorted ids are packed
+  into one fixed-width bytes blob (16 bytes per UUID, ~8 MB per 500k
+  customers) and looked up by binary search,
+- per segment, per opt-in channel and for "touched within
+  AUDIENCE_FATIGUE_DAYS" there is one bitset (a Python int, ~62 KB per 500k
+  customers), so counts are popcounts and audiences are ANDs / ORs of bitsets,
+- built with two streaming queries on first use, kept in an LRU bounded by
+  AUDIENCE_INDEX_MAX_MERCHANTS and AUDIENCE_INDEX_MAX_BYTES for
+  AUDIENCE_INDEX_TTL_SECONDS,
+- dropped after segmentation rewrites the segments, in every process:
+  invalidation bumps a per-merchant version in Redis and each lookup
+  rebuilds an index whose version is no longer current (if Redis is
+  unreachable, the TTL bounds staleness); single customers re-segmented by
+  an order move between segment bitsets,
+- new TouchLogs set the fatigue bit once their transaction commits (session
+  hooks, as for the inbox counters); other processes catch up via the TTL,
+  which also ages fatigue out.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Customer, TouchLog
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+CHANNELS = ("email", "sms")
+
+_TOUCHED = "audience_touched_customers"
+
+_client = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def version_key(merchant_id: str) -> str:
+    return f"audience_index:version:{merchant_id}"
+
+
+def _redis():
+    """One client per event loop (Celery tasks each run their own loop)."""
+    global _client, _client_loop
+    from redis.asyncio import from_url
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = from_url(settings.REDIS_URL, decode_responses=True, socket_timeout=1, socket_connect_timeout=1)
+        _client_loop = loop
+    return _client
+
+
+async def _current_version(merchant_id: str) -> Optional[str]:
+    """The merchant's invalidation counter; raises if Redis is unreachable."""
+    return await _redis().get(version_key(merchant_id))
+
+
+def _set_bit(bits: bytearray, ordinal: int):
+    byte = ordinal >> 3
+    if byte >= len(bits):
+        bits.extend(bytes(byte + 1 - len(bits)))
+    bits[byte] |= 1 << (ordinal & 7)
+
+
+def _to_int(bits: bytearray) -> int:
+    return int.from_bytes(bits, "little")
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        return str(uuid.UUID(value)) == value
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+class CustomerOrdinals:
+    """
+    Sorted customer ids packed into one fixed-width bytes blob; an id's
+    ordinal is its position. Canonical UUIDs take 16 bytes (their sort order
+    matches the string's), anything else its NUL-padded UTF-8 encoding.
+    """
+
+    def __init__(self, sorted_ids: List[str]):
+        self.uuid_keys = all(_is_uuid(customer_id) for customer_id in sorted_ids)
+        self.width = 16 if self.uuid_keys else max((len(i.encode()) for i in sorted_ids), default=1)
+        self._blob = b"".join(self._key(customer_id) for customer_id in sorted_ids)
+        self._size = len(sorted_ids)
+
+    def _key(self, customer_id: str) -> Optional[bytes]:
+        if self.uuid_keys:
+            try:
+                return uuid.UUID(customer_id).bytes
+            except (TypeError, ValueError, AttributeError):
+                return None
+        encoded = customer_id.encode()
+        if len(encoded) > self.width:
+            return None
+        return encoded.ljust(self.width, b"\0")
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, position: int) -> bytes:
+        # Sequence protocol for bisect
+        return self._blob[position * self.width:(position + 1) * self.width]
+
+    def get(self, customer_id: str) -> Optional[int]:
+        key = self._key(customer_id)
+        if key is None:
+            return None
+        position = bisect.bisect_left(self, key)
+        if position < self._size and self[position] == key:
+            return position
+        return None
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._blob)
+
+
+class AudienceIndex:
+    """Bitsets over one merchant's customers."""
+
+    def __init__(self, merchant_id: str, fatigue_days: int, version: Optional[str] = None):
+        self.merchant_id = merchant_id
+        self.fatigue_days = fatigue_days
+        self.version = version
+        self.built_at = time.monotonic()
+        self.ordinals = CustomerOrdinals([])
+        self.segments: Dict[Optional[str], int] = {}
+        self.optin: Dict[str, int] = {channel: 0 for channel in CHANNELS}
+        self.fatigued = 0
+        self.all = 0
+
+    @classmethod
+    async def build(cls, session, merchant_id: str, fatigue_days: Optional[int] = None,
+                    version: Optional[str] = None) -> "AudienceIndex":
+        index = cls(merchant_id, settings.AUDIENCE_FATIGUE_DAYS if fatigue_days is None else fatigue_days, version)
+
+        # Rows are buffered compactly and ranked by id here rather than with
+        # ORDER BY, whose collation needn't match the byte order of the lookup
+        ids: List[str] = []
+        segment_codes = array("H")
+        segment_names: Dict[Optional[str], int] = {}
+        optin_flags = bytearray()
+        customers = await session.stream(
+            select(Customer.id, Customer.rfm_segment, Customer.email_optin, Customer.sms_optin)
+            .where(Customer.merchant_id == merchant_id)
+            .execution_options(yield_per=10000)
+        )
+        async for customer_id, segment, email_optin, sms_optin in customers:
+            ids.append(customer_id)
+            segment_codes.append(segment_names.setdefault(segment, len(segment_names)))
+            optin_flags.append((1 if email_optin else 0) | (2 if sms_optin else 0))
+
+        ranked = sorted(range(len(ids)), key=ids.__getitem__)
+        index.ordinals = CustomerOrdinals([ids[row] for row in ranked])
+        del ids
+
+        # Bits are set in bytearrays and converted once: OR-ing into a growing int per row would be quadratic
+        segment_bits = [bytearray() for _ in segment_names]
+        optin_bits = {channel: bytearray() for channel in CHANNELS}
+        for ordinal, row in enumerate(ranked):
+            _set_bit(segment_bits[segment_codes[row]], ordinal)
+            if optin_flags[row] & 1:
+                _set_bit(optin_bits["email"], ordinal)
+            if optin_flags[row] & 2:
+                _set_bit(optin_bits["sms"], ordinal)
+
+        index.segments = {segment: _to_int(segment_bits[code]) for segment, code in segment_names.items()}
+        index.optin = {channel: _to_int(bits) for channel, bits in optin_bits.items()}
+        index.all = (1 << len(index.ordinals)) - 1
+
+        touched = await session.execute(
+            select(TouchLog.customer_id).distinct().where(
+                TouchLog.merchant_id == merchant_id,
+                TouchLog.customer_id.is_not(None),
+                TouchLog.created_at >= datetime.utcnow() - timedelta(days=index.fatigue_days),
+            )
+        )
+        fatigued = bytearray()
+        for customer_id, in touched:
+            ordinal = index.ordinals.get(customer_id)
+            if ordinal is not None:
+                _set_bit(fatigued, ordinal)
+        index.fatigued = _to_int(fatigued)
+        return index
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size: packed ids plus every bitset."""
+        bitsets = [self.all, self.fatigued, *self.segments.values(), *self.optin.values()]
+        return self.ordinals.nbytes + sum((bits.bit_length() + 7) // 8 for bits in bitsets)
+
+    def mark_touched(self, customer_ids: Iterable[str]):
+        """Sets the fatigue bit of a few customers (new touches)."""
+        for customer_id in customer_ids:
+            ordinal = self.ordinals.get(customer_id)
+            if ordinal is not None:
+                self.fatigued |= 1 << ordinal
+
+    def reassign(self, customer_id: str, old_segment: Optional[str], new_segment: Optional[str]):
+        """Moves one customer between segment bitsets (incremental RFM update)."""
+        ordinal = self.ordinals.get(customer_id)
+        if ordinal is None or old_segment == new_segment:
+            return
+        bit = 1 << ordinal
+        self.segments[old_segment] = self.segments.get(old_segment, 0) & ~bit
+        self.segments[new_segment] = self.segments.get(new_segment, 0) | bit
+
+    def audience(
+        self,
+        segments: Optional[Iterable[str]] = None,
+        channel: Optional[str] = None,
+        exclude_fatigued: bool = False,
+    ) -> int:
+        """Bitset of customers in any of `segments`, opted in to `channel`, optionally not fatigued."""
+        bits = self.all
+        if segments is not None:
+            bits = 0
+            for segment in segments:
+                bits |= self.segments.get(segment, 0)
+        if channel is not None:
+            bits &= self.optin.get(channel, 0)
+        if exclude_fatigued:
+            bits &= ~self.fatigued
+        return bits
+
+    def count(self, segments: Optional[Iterable[str]] = None, channel: Optional[str] = None,
+              exclude_fatigued: bool = False) -> int:
+        return self.audience(segments, channel, exclude_fatigued).bit_count()
+
+    def segment_counts(self, exclude_fatigued: bool = True) -> Dict[str, int]:
+        """Customers per segment (non-fatigued by default)."""
+        mask = ~self.fatigued if exclude_fatigued else self.all
+        return {
+            segment: (bits & mask).bit_count()
+            for segment, bits in self.segments.items()
+            if segment is not None
+        }
+
+
+class AudienceIndexCache:
+    """LRU of per-merchant indexes with a TTL, bounded by count and by bytes."""
+
+    def __init__(self, max_merchants: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        self.max_merchants = max_merchants or settings.AUDIENCE_INDEX_MAX_MERCHANTS
+        self.ttl_seconds = settings.AUDIENCE_INDEX_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_bytes = max_bytes or settings.AUDIENCE_INDEX_MAX_BYTES
+        self._indexes: "OrderedDict[str, AudienceIndex]" = OrderedDict()
+        self.builds = 0
+        self.hits = 0
+        self.evictions = 0
+
+    async def get(self, merchant_id: str, session=None) -> AudienceIndex:
+        try:
+            version = await _current_version(merchant_id)
+        except Exception as e:
+            logger.debug(f"Audience index version unavailable for {merchant_id}: {e}")
+            version = None
+            index = self.peek(merchant_id)
+        else:
+            index = self.peek(merchant_id)
+            if index is not None and index.version != version:
+                # Invalidated by another process
+                self.invalidate(merchant_id)
+                index = None
+
+        if index is not None:
+            self.hits += 1
+            return index
+
+        if session is None:
+            from app.database import async_session_maker
+            async with async_session_maker() as session:
+                index = await AudienceIndex.build(session, merchant_id, version=version)
+        else:
+            index = await AudienceIndex.build(session, merchant_id, version=version)
+        self.builds += 1
+
+        self._indexes[merchant_id] = index
+        self._indexes.move_to_end(merchant_id)
+        self._enforce_limits()
+        return index
+
+    def _enforce_limits(self):
+        """Evicts least recently used indexes; the newest is always kept."""
+        size = sum(index.nbytes for index in self._indexes.values())
+        while len(self._indexes) > 1 and (len(self._indexes) > self.max_merchants or size > self.max_bytes):
+            _, evicted = self._indexes.popitem(last=False)
+            size -= evicted.nbytes
+            self.evictions += 1
+        if size > self.max_bytes:
+            logger.warning(f"Audience index of one merchant ({size} bytes) exceeds AUDIENCE_INDEX_MAX_BYTES")
+
+    def peek(self, merchant_id: str) -> Optional[AudienceIndex]:
+        """Cached, unexpired index of a merchant, if any (never builds)."""
+        index = self._indexes.get(merchant_id)
+        if index is None:
+            return None
+        if time.monotonic() - index.built_at >= self.ttl_seconds:
+            del self._indexes[merchant_id]
+            return None
+        self._indexes.move_to_end(merchant_id)
+        return index
+
+    def invalidate(self, merchant_id: str):
+        self._indexes.pop(merchant_id, None)
+
+    def clear(self):
+        self._indexes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "merchants": len(self._indexes),
+            "bytes": sum(index.nbytes for index in self._indexes.values()),
+            "builds": self.builds,
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
+
+
+_cache: Optional[AudienceIndexCache] = None
+
+
+def get_audience_index_cache() -> AudienceIndexCache:
+    global _cache
+    if _cache is None:
+        _cache = AudienceIndexCache()
+    return _cache
+
+
+async def get_audience_index(merchant_id: str, session=None) -> AudienceIndex:
+    return await get_audience_index_cache().get(merchant_id, session)
+
+
+def reassign_audience_segment(merchant_id: str, customer_id: str, old_segment: Optional[str],
+                              new_segment: Optional[str]):
+    """Call after committing a single customer's new segment."""
+    index = get_audience_index_cache().peek(merchant_id)
+    if index is not None:
+        index.reassign(customer_id, old_segment, new_segment)
+
+
+async def invalidate_audience_index(merchant_id: str):
+    """Call after rewriting a merchant's segments or opt-ins (drops the index in every process)."""
+    get_audience_index_cache().invalidate(merchant_id)
+    try:
+        await _redis().incr(version_key(merchant_id))
+    except Exception as e:
+        # Other processes fall back to the TTL
+        logger.warning(f"Failed to publish audience index invalidation for {merchant_id}: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Touch hooks
+# ---------------------------------------------------------------------------
+
+def _record_touches(session: Session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, TouchLog) and obj.customer_id:
+            touched: Dict[str, Set[str]] = session.info.setdefault(_TOUCHED, {})
+            touched.setdefault(obj.merchant_id, set()).add(obj.customer_id)
+
+
+def _apply_touches(session: Session):
+    touched = session.info.pop(_TOUCHED, None)
+    if not touched:
+        return
+    cache = get_audience_index_cache()
+    for merchant_id, customer_ids in touched.items():
+        index = cache.peek(merchant_id)
+        if index is not None:
+            index.mark_touched(customer_ids)
+
+
+def _discard_touches(session: Session):
+    session.info.pop(_TOUCHED, None)
+
+
+_registered = False
+
+
+def register_audience_index_hooks():
+    """Installs the session hooks (idempotent)."""
+    global _registered
+    if _registered:
+        return
+    event.listen(Session, "after_flush", _record_touches)
+    event.listen(Session, "after_commit", _apply_touches)
+    event.listen(Session, "after_rollback", _discard_touches)
+    _registered = True
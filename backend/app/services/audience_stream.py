@@ -0,0 +1,112 @@
+# app/services/audience_stream.py
+"""
+Audience Stream
+===============
+Streams the recipients of a campaign send straight from the database.
+
+Sends used to load every matching Customer ORM object into a list before the
+waterfall sliced it into batches, so memory grew with the audience and the
+first message only went out after the whole list was materialized. Instead:
+
+- keyset-paginated SELECTs (Customer.id > last id, ORDER BY id, LIMIT
+  batch_size) project only what a send needs (id, email, phone, opt-ins),
+- fatigued customers (touched within AUDIENCE_FATIGUE_DAYS) and suppressed
+  ones (not opted in to the channel, or no address for it) are filtered out
+  in SQL,
+- rows come out of an async generator that WaterfallService consumes batch
+  by batch, so memory stays flat and the first batch starts immediately.
+
+Each chunk is read in its own short-lived session, so no connection or
+transaction stays open while the waterfall sleeps between sends.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, NamedTuple, Optional
+
+from sqlalchemy import and_, exists, select
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import Customer, TouchLog
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Opt-in flag and address column per channel
+CHANNEL_COLUMNS = {
+    "email": (Customer.email_optin, Customer.email),
+    "sms": (Customer.sms_optin, Customer.phone),
+}
+
+
+class Recipient(NamedTuple):
+    id: str
+    email: Optional[str]
+    phone: Optional[str]
+    email_optin: bool
+    sms_optin: bool
+
+
+class AudienceStream:
+    """Recipients of one merchant's segments, streamed for a send."""
+
+    def __init__(self, merchant_id: str, batch_size: Optional[int] = None):
+        self.merchant_id = merchant_id
+        self.batch_size = batch_size or settings.AUDIENCE_STREAM_BATCH_SIZE
+
+    def query(
+        self,
+        segments: Optional[Iterable[str]],
+        channel: str,
+        exclude_fatigued: bool = True,
+        fatigue_days: Optional[int] = None,
+    ):
+        optin, address = CHANNEL_COLUMNS[channel]
+        stmt = (
+            select(Customer.id, Customer.email, Customer.phone, Customer.email_optin, Customer.sms_optin)
+            .where(
+                Customer.merchant_id == self.merchant_id,
+                optin.is_(True),
+                address.is_not(None),
+                address != "",
+            )
+        )
+        if segments is not None:
+            stmt = stmt.where(Customer.rfm_segment.in_(list(segments)))
+        if exclude_fatigued:
+            days = settings.AUDIENCE_FATIGUE_DAYS if fatigue_days is None else fatigue_days
+            stmt = stmt.where(~exists().where(and_(
+                TouchLog.customer_id == Customer.id,
+                TouchLog.created_at >= datetime.utcnow() - timedelta(days=days),
+            )))
+        # Keyset order: stable, so a retried send walks the audience the same way
+        return stmt.order_by(Customer.id).limit(self.batch_size)
+
+    async def stream(
+        self,
+        segments: Optional[Iterable[str]],
+        channel: str,
+        exclude_fatigued: bool = True,
+        fatigue_days: Optional[int] = None,
+        session_maker=None,
+    ) -> AsyncIterator[Recipient]:
+        session_maker = session_maker or async_session_maker
+        stmt = self.query(segments, channel, exclude_fatigued, fatigue_days)
+        last_id = None
+        streamed = 0
+        try:
+            while True:
+                chunk = stmt if last_id is None else stmt.where(Customer.id > last_id)
+                # One short transaction per chunk, closed before any recipient is sent to
+                async with session_maker() as session:
+                    rows = (await session.execute(chunk)).all()
+                for row in rows:
+                    streamed += 1
+                    yield Recipient(*row)
+                if len(rows) < self.batch_size:
+                    return
+                last_id = rows[-1].id
+        finally:
+            logger.debug(f"Streamed {streamed} {channel} recipients for merchant {self.merchant_id}")
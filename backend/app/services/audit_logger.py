@@ -38,8 +38,10 @@ from typing import Optional, Any
 from contextvars import ContextVar
 
 from sqlalchemy import select
+from sqlalchemy.orm import defer
 from app.database import async_session_maker
 from app.models import AuditLog, ActionReversal
+from app.services.pagination import keyset_desc
 
 logger = logging.getLogger(__name__)
 
@@ -254,16 +256,28 @@ class AuditLogger:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_metadata: bool = True
     ) -> list[AuditLog]:
         """
-        Query audit logs with filters.
+        Query audit logs with filters, newest first.
+
+        Pages are keyset-paginated on (created_at, id): for the next page pass
+        encode_cursor(last.created_at, last.id) of the last returned entry as
+        `cursor` (`offset` is only honoured without one). With
+        include_metadata=False the JSON columns are not loaded at all.
 
         Returns:
             List of AuditLog entries matching the filters
         """
         async with async_session_maker() as session:
             query = select(AuditLog).where(AuditLog.merchant_id == merchant_id)
+            if not include_metadata:
+                query = query.options(
+                    defer(AuditLog.metadata_json, raiseload=True),
+                    defer(AuditLog.scopes_used, raiseload=True),
+                )
 
             if entity_type:
                 query = query.where(AuditLog.entity_type == entity_type)
@@ -278,7 +292,10 @@ class AuditLogger:
             if end_date:
                 query = query.where(AuditLog.created_at <= end_date)
 
-            query = query.order_by(AuditLog.created_at.desc()).offset(offset).limit(limit)
+            query = keyset_desc(query, AuditLog.created_at, AuditLog.id, cursor)
+            if offset and not cursor:
+                query = query.offset(offset)
+            query = query.limit(limit)
 
             result = await session.execute(query)
             return result.scalars().all()
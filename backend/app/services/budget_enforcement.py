@@ -22,6 +22,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Merchant, LLMUsageLog, InboxItem
 from app.config import get_settings
+from app.services.merchant_cache import invalidate_merchant
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -233,6 +234,7 @@ class BudgetEnforcementService:
         merchant.current_llm_spend = Decimal("0.00")
         merchant.budget_reset_date = datetime.utcnow()
         await self.session.commit()
+        await invalidate_merchant(merchant_id)
         
         logger.info(f"Budget reset for merchant {merchant_id}")
         return True
@@ -19,6 +19,8 @@ from sqlalchemy import select, func
 from app.database import async_session_maker
 from app.models import Merchant, StoreDNA, Product, Order
 from app.services.llm_router import LLMRouter
+from app.services.merchant_cache import invalidate_merchant
+from app.services.merchant_context import invalidate_merchant_context
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +52,7 @@ class DNAService:
             
             merchant.dna_status = "analyzing"
             await session.commit()
+            await invalidate_merchant(self.merchant_id)
 
             try:
                 # 1. Financial DNA (Last 30 days)
@@ -136,6 +139,7 @@ class DNAService:
                 
                 merchant.dna_status = "completed"
                 await session.commit()
+                await invalidate_merchant(self.merchant_id)
                 
                 logger.info(f"✅ DNA Analysis Complete for {self.merchant_id}")
                 return {
@@ -148,6 +152,7 @@ class DNAService:
                 logger.error(f"DNA Analysis Error: {e}")
                 merchant.dna_status = "failed"
                 await session.commit()
+                await invalidate_merchant(self.merchant_id)
                 return {"status": "FAILED", "error": str(e)}
 
     @staticmethod
@@ -247,6 +252,7 @@ If a section is not present in the guide, use null for that field."""
                     dna.brand_values = brand_signals["brand_values"]
             
             await session.commit()
+        invalidate_merchant_context(self.merchant_id)
         
         logger.info(f"✅ DNA enriched from scrape for {self.merchant_id}")
         return {
@@ -19,6 +19,7 @@ from sqlalchemy.orm import selectinload
 
 from app.database import async_session_maker
 from app.models import FloorPricing, Product, ProductVariant
+from app.services.merchant_context import invalidate_merchant_context
 
 logger = logging.getLogger(__name__)
 
@@ -258,6 +259,7 @@ class FloorPricingService:
                         errors.append(f"Row {row_num}: {str(e)}")
                 
                 await session.commit()
+            invalidate_merchant_context(self.merchant_id)
             
             logger.info(f"✅ Floor pricing import complete: {records_created} created, {len(errors)} errors")
             
@@ -7,60 +7,132 @@ transforms them into platform-wide Strategy Patterns.
 """
 
 import logging
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
-from sqlalchemy import select, func, and_
+from sqlalchemy import Float, and_, case, cast, func, insert, or_, select, update
+from app.config import get_settings
 from app.database import async_session_maker
-from app.models import Campaign, GlobalStrategyPattern, Merchant, StoreDNA
+from app.models import Campaign, GlobalBrainHarvestState, GlobalStrategyPattern, Merchant, StoreDNA
+from app.services.quantile_sketch import QuantileSketch, bucket_key_sql
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
+HARVEST_STATE = "campaign_harvest"
+
+
 class GlobalBrainService:
     @staticmethod
-    async def harvest_patterns():
+    async def harvest_patterns() -> Dict[str, int]:
         """
         Background task to harvest high-performing patterns.
         Anonymizes Store A successful campaigns for Store B.
+
+        Incremental: each run folds in only campaigns created since the
+        watermark (and at least GLOBAL_BRAIN_HARVEST_DELAY_DAYS ago, so their
+        conversions have settled), so every campaign is counted exactly once.
+        Conversion rates are bucketed in SQL, merged into each pattern's
+        quantile sketch, and P50/P90 are read off the sketch.
         """
+        cutoff = datetime.utcnow() - timedelta(days=settings.GLOBAL_BRAIN_HARVEST_DELAY_DAYS)
+
         async with async_session_maker() as session:
-            # 1. Fetch campaigns with high conversion (>5%)
-            stmt = select(Campaign).where(Campaign.conversions > 0)
-            result = await session.execute(stmt)
-            campaigns = result.scalars().all()
-            
-            for campaign in campaigns:
-                # Anonymize: Get Industry from StoreDNA
-                dna_stmt = select(StoreDNA).where(StoreDNA.merchant_id == campaign.merchant_id)
-                dna_res = await session.execute(dna_stmt)
-                dna = dna_res.scalar_one_or_none()
-                
-                industry = dna.industry_type if dna else "Unknown"
-                
-                # Check for existing pattern
-                pattern_key = f"{industry}_{campaign.strategy_key}"
-                
-                # Update or Create Global Pattern
-                pat_stmt = select(GlobalStrategyPattern).where(GlobalStrategyPattern.pattern_key == pattern_key)
-                pat_res = await session.execute(pat_stmt)
-                pattern = pat_res.scalar_one_or_none()
-                
-                if not pattern:
-                    pattern = GlobalStrategyPattern(
-                        pattern_key=pattern_key,
-                        industry_type=industry,
-                        strategy_key=campaign.strategy_key,
-                        context_criteria={"auto_min_margin": 10} # Placeholder
-                    )
-                    session.add(pattern)
-                
-                # Update rolling P50/P90 (Simplified for demo)
-                conv_rate = Decimal(campaign.conversions) / Decimal(max(campaign.emails_sent, 1))
-                pattern.p50_conversion = (pattern.p50_conversion + conv_rate) / 2
-                pattern.recommendation_score += 1
-                pattern.sample_count += 1  # Track sample size for statistical validity
-                
+            watermark = await _lock_harvest_state(session)
+            if watermark is not None and watermark >= cutoff:
+                return {"campaigns": 0, "patterns": 0}
+
+            # 1. One grouped pass: (industry, strategy, rate bucket) -> campaigns, successes
+            industry = func.coalesce(StoreDNA.industry_type, "Unknown").label("industry")
+            conv_rate = cast(Campaign.conversions, Float) / case(
+                (Campaign.emails_sent > 0, Campaign.emails_sent), else_=1
+            )
+            bucket = bucket_key_sql(conv_rate).label("bucket")
+            stmt = (
+                select(
+                    industry,
+                    Campaign.type.label("strategy_key"),
+                    bucket,
+                    func.count(Campaign.id).label("campaigns"),
+                    func.sum(case((Campaign.conversions > 0, 1), else_=0)).label("successes"),
+                )
+                .outerjoin(StoreDNA, StoreDNA.merchant_id == Campaign.merchant_id)
+                .where(
+                    Campaign.created_at <= cutoff,
+                    or_(Campaign.emails_sent > 0, Campaign.conversions > 0),
+                )
+                .group_by(industry, Campaign.type, bucket)
+            )
+            if watermark is not None:
+                stmt = stmt.where(Campaign.created_at > watermark)
+            rows = (await session.execute(stmt)).all()
+
+            # 2. Per-pattern deltas (Anonymize: only industry + strategy survive)
+            deltas: Dict[str, Dict[str, Any]] = {}
+            for row in rows:
+                pattern_key = f"{row.industry}_{row.strategy_key}"
+                delta = deltas.setdefault(pattern_key, {
+                    "industry_type": row.industry,
+                    "strategy_key": row.strategy_key,
+                    "sketch": QuantileSketch(),
+                    "campaigns": 0,
+                    "successes": 0,
+                })
+                delta["sketch"].add_bucket(None if row.bucket is None else int(row.bucket), row.campaigns)
+                delta["campaigns"] += row.campaigns
+                delta["successes"] += int(row.successes or 0)
+
+            # 3. Merge into existing patterns and write back in bulk
+            existing = {}
+            if deltas:
+                patterns = (await session.execute(
+                    select(GlobalStrategyPattern)
+                    .where(GlobalStrategyPattern.pattern_key.in_(list(deltas)))
+                    .order_by(GlobalStrategyPattern.last_updated.desc())
+                )).scalars().all()
+                for pattern in patterns:
+                    existing.setdefault(pattern.pattern_key, pattern)
+
+            now = datetime.utcnow()
+            inserts, updates = [], []
+            for pattern_key, delta in deltas.items():
+                pattern = existing.get(pattern_key)
+                sketch = QuantileSketch.from_dict(pattern.conversion_sketch if pattern else None)
+                sketch.merge(delta["sketch"])
+                values = {
+                    "p50_conversion": Decimal(str(round(sketch.quantile(0.5), 4))),
+                    "p90_conversion": Decimal(str(round(sketch.quantile(0.9), 4))),
+                    "conversion_sketch": sketch.to_dict(),
+                    "recommendation_score": (pattern.recommendation_score if pattern else 0) + delta["successes"],
+                    "sample_count": sketch.count,  # Track sample size for statistical validity
+                    "last_updated": now,
+                }
+                if pattern:
+                    updates.append({"id": pattern.id, **values})
+                else:
+                    inserts.append({
+                        "pattern_key": pattern_key,
+                        "industry_type": delta["industry_type"],
+                        "strategy_key": delta["strategy_key"],
+                        "context_criteria": {"auto_min_margin": 10}, # Placeholder
+                        **values,
+                    })
+
+            if updates:
+                await session.execute(update(GlobalStrategyPattern), updates)
+            if inserts:
+                await session.execute(insert(GlobalStrategyPattern), inserts)
+            await session.execute(
+                update(GlobalBrainHarvestState)
+                .where(GlobalBrainHarvestState.name == HARVEST_STATE)
+                .values(watermark=cutoff)
+            )
             await session.commit()
-            logger.info("🧠 Global Brain: Harvested successful patterns.")
+
+        harvested = sum(delta["campaigns"] for delta in deltas.values())
+        logger.info(f"🧠 Global Brain: Harvested {harvested} campaigns into {len(deltas)} patterns.")
+        return {"campaigns": harvested, "patterns": len(deltas)}
 
     @staticmethod
     async def get_applicable_patterns(
@@ -101,6 +173,24 @@ class GlobalBrainService:
             ]
 
 
+async def _lock_harvest_state(session) -> Optional[datetime]:
+    """Creates the harvest state row if needed and locks it for this run."""
+    if session.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    await session.execute(
+        upsert(GlobalBrainHarvestState)
+        .values(name=HARVEST_STATE, watermark=None)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    return (await session.execute(
+        select(GlobalBrainHarvestState.watermark)
+        .where(GlobalBrainHarvestState.name == HARVEST_STATE)
+        .with_for_update()
+    )).scalar_one()
+
+
 def _calculate_confidence(sample_count: int, recommendation_score: int) -> str:
     """Calculate confidence level based on sample size and success rate."""
     if sample_count >= 1000 and recommendation_score > 50:
@@ -11,7 +11,8 @@ import logging
 from typing import Dict, Any, Optional, Tuple
 from sqlalchemy import select, func
 from app.database import async_session_maker
-from app.models import InboxItem, Merchant
+from app.models import InboxItem
+from app.services.merchant_context import get_merchant_context
 
 logger = logging.getLogger(__name__)
 
@@ -37,22 +38,13 @@ class GovernorService:
         [ENGINE #1]: Autonomous Governor with Risk Matrix.
         """
         async with async_session_maker() as session:
-            # 1. NEW: Check Risk Matrix Policy
-            from app.models import RiskPolicy
-            policy_stmt = select(RiskPolicy).where(
-                RiskPolicy.agent_type == skill_name,
-                RiskPolicy.risk_level == risk_level
-            )
-            policy = (await session.execute(policy_stmt)).scalars().first()
+            # 1 + 2. Merchant settings and Risk Matrix policy from the run's merchant context
+            merchant = await get_merchant_context(self.merchant_id, session)
+            policy = merchant.risk_policy(skill_name, risk_level) if merchant else None
             
-            if policy and policy.requires_approval:
+            if policy and policy["requires_approval"]:
                 return AutonomyDecision.REQUIRE_APPROVAL
 
-            # 2. Fetch merchant settings
-            merchant = (await session.execute(
-                select(Merchant).where(Merchant.id == self.merchant_id)
-            )).scalars().first()
-            
             # 3. Critical risk check (Hardcoded safety)
             if risk_level == 'critical':
                 return AutonomyDecision.REQUIRE_APPROVAL
@@ -67,7 +59,7 @@ class GovernorService:
             )
             total_approvals = count_result.scalar() or 0
             
-            calibration_threshold = merchant.governor_calibration_threshold or 50
+            calibration_threshold = merchant.governor_calibration_threshold if merchant else 50
             if total_approvals < calibration_threshold:
                 return AutonomyDecision.REQUIRE_APPROVAL
             
@@ -89,8 +81,8 @@ class GovernorService:
             trust_score = approved_count / total_count if total_count > 0 else 0
             
             # 6. Final Decision using Policy or Defaults
-            min_confidence = policy.min_confidence if policy else 0.95
-            min_trust = policy.min_trust_score if policy else 0.92
+            min_confidence = policy["min_confidence"] if policy else 0.95
+            min_trust = policy["min_trust_score"] if policy else 0.92
             
             if confidence and confidence >= min_confidence and trust_score >= min_trust:
                 return AutonomyDecision.AUTO_APPROVE
@@ -101,7 +93,7 @@ class GovernorService:
         """ Returns status for UI components. """
         # Implementation similar to evaluate_autonomy but returns metadata
         async with async_session_maker() as session:
-            merchant = (await session.execute(select(Merchant).where(Merchant.id == self.merchant_id))).scalars().first()
+            merchant = await get_merchant_context(self.merchant_id, session)
             
             count_result = await session.execute(
                 select(func.count(InboxItem.id))
@@ -109,7 +101,7 @@ class GovernorService:
             )
             total_approvals = count_result.scalar() or 0
             
-            target = merchant.governor_calibration_threshold or 50
+            target = merchant.governor_calibration_threshold if merchant else 50
             
             return {
                 "is_calibrated": total_approvals >= target,
@@ -0,0 +1,307 @@
+# app/services/http_clients.py
+"""
+HTTP Client Registry
+====================
+Process-wide pooled HTTP clients for platform adapters, sales channels and
+integrations.
+
+Adapters and connectors used to open a fresh httpx.AsyncClient per method
+call, so every price update, SMS and token refresh paid DNS + TCP + TLS
+setup. The registry keeps one httpx.AsyncClient per upstream host
+(scheme://host:port) instead:
+
+- keep-alive pools with per-host connection limits and timeouts from config
+  (HTTP_CLIENT_* defaults, HTTP_CLIENT_HOST_OVERRIDES per host), HTTP/2 when
+  the `h2` package is installed,
+- clients belong to the event loop that created them: they are closed when
+  that loop shuts down (asyncio.run() cancels the registry's watcher task)
+  or by the FastAPI lifespan / Temporal worker, and recreated on the next
+  loop (one asyncio.run() per Celery task),
+- pooled clients never store cookies: one client serves every merchant of a
+  host, so a Set-Cookie from one tenant's response must not ride along on
+  another tenant's requests,
+- idle hosts beyond HTTP_CLIENT_MAX_HOSTS (one per merchant shop) are closed
+  least-recently-used first,
+- per-host request counts, errors, p50/p95 latency and pool saturation
+  (in-flight requests vs. the connection limit) via stats().
+
+Callers borrow a view that routes every request to the pooled client of its
+URL's host and carries per-merchant defaults (base_url, auth, headers):
+
+    async with http_client(base_url=store_url, auth=(key, secret)) as client:
+        resp = await client.get("products")
+
+Leaving the block does not close anything.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.config import get_settings
+from app.services.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def host_key(url) -> str:
+    url = httpx.URL(url)
+    port = f":{url.port}" if url.port else ""
+    return f"{url.scheme}://{url.host}{port}"
+
+
+class HostStats:
+    """Request metrics of one upstream host."""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated = 0  # Requests that found every connection busy
+        self.latency_ms = QuantileSketch()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_connections": self.max_connections,
+            "saturation": round(self.in_flight / self.max_connections, 3),
+            "saturated_requests": self.saturated,
+            "p50_latency_ms": round(self.latency_ms.quantile(0.5), 1) if self.latency_ms.count else None,
+            "p95_latency_ms": round(self.latency_ms.quantile(0.95), 1) if self.latency_ms.count else None,
+        }
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled transport to time requests and track pool pressure."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, stats: HostStats):
+        self._transport = transport
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self._stats
+        stats.requests += 1
+        if stats.in_flight >= stats.max_connections:
+            stats.saturated += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        started = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.latency_ms.add(max((time.monotonic() - started) * 1000, 0.001))
+        if response.status_code >= 500:
+            stats.errors += 1
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _no_cookies() -> CookieJar:
+    """A jar that refuses every cookie (no allowed domains)."""
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+async def _close_quietly(client: httpx.AsyncClient):
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.warning(f"Failed to close HTTP client: {e}")
+
+
+class HttpClientRegistry:
+    """One pooled httpx.AsyncClient per upstream host."""
+
+    def __init__(self, max_hosts: Optional[int] = None, transport_factory=None):
+        self.max_hosts = max_hosts or settings.HTTP_CLIENT_MAX_HOSTS
+        # Tests inject a transport (e.g. httpx.MockTransport) per host
+        self._transport_factory = transport_factory
+        self._clients: "OrderedDict[str, httpx.AsyncClient]" = OrderedDict()
+        self._stats: Dict[str, HostStats] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watcher: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def host_config(host: str) -> Dict[str, Any]:
+        config = {
+            "max_connections": settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+            "timeout": settings.HTTP_CLIENT_TIMEOUT_SECONDS,
+            "http2": settings.HTTP_CLIENT_HTTP2,
+        }
+        config.update(settings.HTTP_CLIENT_HOST_OVERRIDES.get(httpx.URL(host).host, {}))
+        for limit in ("max_connections", "max_keepalive_connections"):
+            config[limit] = int(config[limit])
+        return config
+
+    def _bind_loop(self):
+        """Pooled connections cannot be shared across event loops."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._loop is loop:
+            return
+
+        stale, self._clients = self._clients, OrderedDict()
+        self._loop = loop
+        if loop is None:
+            return
+        # Clients left over from a loop that ended without shutting down cleanly
+        for client in stale.values():
+            asyncio.ensure_future(_close_quietly(client))
+        self._watcher = loop.create_task(self._close_at_loop_shutdown(self._clients))
+
+    async def _close_at_loop_shutdown(self, clients: "OrderedDict[str, httpx.AsyncClient]"):
+        """Parks until cancelled (asyncio.run() cancels pending tasks before closing its loop)."""
+        try:
+            await asyncio.get_running_loop().create_future()
+        except asyncio.CancelledError:
+            for client in list(clients.values()):
+                await _close_quietly(client)
+            clients.clear()
+            raise
+
+    def client(self, url) -> httpx.AsyncClient:
+        """Pooled client for the host of `url` (created on first use)."""
+        self._bind_loop()
+        key = host_key(url)
+        client = self._clients.get(key)
+        if client is not None and not client.is_closed:
+            self._clients.move_to_end(key)
+            return client
+
+        config = self.host_config(key)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = HostStats(config["max_connections"])
+        limits = httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        )
+        if self._transport_factory is not None:
+            transport = self._transport_factory(key)
+        else:
+            transport = httpx.AsyncHTTPTransport(limits=limits, http2=config["http2"] and HTTP2_AVAILABLE)
+        client = httpx.AsyncClient(
+            transport=_MeteredTransport(transport, stats),
+            timeout=config["timeout"],
+            headers={"User-Agent": settings.HTTP_CLIENT_USER_AGENT},
+            cookies=_no_cookies(),
+        )
+        self._clients[key] = client
+        self._evict_idle()
+        return client
+
+    def _evict_idle(self):
+        for key in list(self._clients)[:-1]:
+            if len(self._clients) <= self.max_hosts:
+                return
+            if self._stats[key].in_flight == 0:
+                client = self._clients.pop(key)
+                task = asyncio.ensure_future(client.aclose())
+                task.add_done_callback(lambda t: t.exception())
+
+    async def close(self):
+        """Closes every pooled client. Metrics are kept."""
+        clients, self._clients = list(self._clients.values()), OrderedDict()
+        for client in clients:
+            await _close_quietly(client)
+        if self._watcher is not None and self._watcher is not asyncio.current_task():
+            self._watcher.cancel()
+        self._watcher = None
+        self._loop = None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: stats.to_dict() for key, stats in self._stats.items()}
+
+
+class HttpClientView:
+    """
+    Borrowed handle on the registry: resolves relative URLs against `base_url`,
+    applies default auth / headers, and sends through the host's pooled client.
+    """
+
+    def __init__(
+        self,
+        registry: HttpClientRegistry,
+        base_url: Optional[str] = None,
+        auth=None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.registry = registry
+        self.base_url = httpx.URL(base_url) if base_url else None
+        self.auth = auth
+        self.headers = headers or {}
+
+    async def __aenter__(self) -> "HttpClientView":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def request(self, method: str, url, **kwargs) -> httpx.Response:
+        url = httpx.URL(url)
+        if self.base_url is not None and url.is_relative_url:
+            url = self.base_url.join(url)
+        if self.headers:
+            kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        if self.auth is not None:
+            kwargs.setdefault("auth", self.auth)
+        return await self.registry.client(url).request(method, url, **kwargs)
+
+    async def get(self, url, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+
+_registry: Optional[HttpClientRegistry] = None
+
+
+def get_http_clients() -> HttpClientRegistry:
+    global _registry
+    if _registry is None:
+        _registry = HttpClientRegistry()
+    return _registry
+
+
+def http_client(base_url: Optional[str] = None, auth=None, headers: Optional[Dict[str, str]] = None) -> HttpClientView:
+    return HttpClientView(get_http_clients(), base_url=base_url, auth=auth, headers=headers)
+
+
+async def close_http_clients():
+    if _registry is not None:
+        await _registry.close()
@@ -1,9 +1,11 @@
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import select, update, desc
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import InboxItem, AuditLog, Merchant
 from app.services.identity import AgentContext
+from app.services.inbox_counts import get_inbox_counts
+from app.services.pagination import keyset_desc, next_page
 import logging
 import json
 from redis.asyncio import from_url
@@ -13,6 +15,15 @@ logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+# Light columns returned by list views (proposal_data / chat_history are opt-in)
+INBOX_LIST_COLUMNS = (
+    "id", "type", "status", "agent_type", "confidence",
+    "viewed_at", "decided_at", "executed_at", "created_at",
+)
+
+# proposal_data keys the list cards render in the "summary" view
+PROPOSAL_SUMMARY_KEYS = ("title", "description", "preview_headline", "product_id", "dead_stock_severity")
+
 class InboxService:
     """
     Core service for the HITL Decision Inbox.
@@ -66,45 +77,71 @@ class InboxService:
         except Exception as e:
             logger.error(f"Failed to broadcast update: {e}")
 
-    async def list_proposals(self, status: Optional[str] = None, limit: int = 50, offset: int = 0):
-        """Fetch proposals for the current merchant with tenant isolation."""
+    async def list_proposals(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        view: str = "full",
+    ):
+        """
+        Fetch a page of proposals for the current merchant with tenant isolation.
+
+        Pages are keyset-paginated on (created_at, id); pass the returned
+        cursor back for the next page (`offset` is only honoured without one).
+        view="summary" leaves out chat_history and reduces proposal_data to
+        PROPOSAL_SUMMARY_KEYS; the detail endpoint always returns everything.
+        """
         from app.models import AsyncAuthorizationRequest
-        
+
+        columns = [getattr(InboxItem, name) for name in INBOX_LIST_COLUMNS]
+        if view == "summary":
+            columns += [InboxItem.proposal_data[key].label(f"summary_{key}") for key in PROPOSAL_SUMMARY_KEYS]
+        else:
+            columns += [InboxItem.proposal_data, InboxItem.chat_history]
+
         # Outer join to get CIBA status
         query = (
-            select(InboxItem, AsyncAuthorizationRequest)
+            select(*columns, AsyncAuthorizationRequest.status.label("auth_status"))
             .outerjoin(AsyncAuthorizationRequest, InboxItem.id == AsyncAuthorizationRequest.inbox_item_id)
             .where(InboxItem.merchant_id == self.merchant_id)
         )
-        
+
         if status:
             query = query.where(InboxItem.status == status)
-        
-        query = query.order_by(desc(InboxItem.created_at)).limit(limit).offset(offset)
-        
-        result = await self.db.execute(query)
-        rows = result.all()
-        
+
+        query = keyset_desc(query, InboxItem.created_at, InboxItem.id, cursor)
+        if offset and not cursor:
+            query = query.offset(offset)
+
+        rows, next_cursor = next_page((await self.db.execute(query.limit(limit + 1))).all(), limit, "created_at")
+
         items = []
-        for item, auth_req in rows:
-            # Attach CIBA status to the item object for the Pydantic model
-            if auth_req:
-                item.waiting_for_mobile_auth = (auth_req.status == 'pending')
-                item.mobile_auth_status = auth_req.status
+        for row in rows:
+            item = {name: getattr(row, name) for name in INBOX_LIST_COLUMNS}
+            if view == "summary":
+                item["proposal_data"] = {
+                    key: getattr(row, f"summary_{key}")
+                    for key in PROPOSAL_SUMMARY_KEYS
+                    if getattr(row, f"summary_{key}") is not None
+                }
             else:
-                item.waiting_for_mobile_auth = False
-                item.mobile_auth_status = None
+                item["proposal_data"] = row.proposal_data
+                item["chat_history"] = row.chat_history
+            # CIBA status for the Pydantic model
+            item["waiting_for_mobile_auth"] = row.auth_status == 'pending'
+            item["mobile_auth_status"] = row.auth_status
             items.append(item)
+
+        # Get pending count for badge (O(1) counter, see inbox_counts)
+        pending_count = (await self.get_counts()).get("pending", 0)
         
-        # Get pending count for badge
-        pending_query = select(InboxItem).where(
-            InboxItem.merchant_id == self.merchant_id,
-            InboxItem.status == "pending"
-        )
-        pending_result = await self.db.execute(pending_query)
-        pending_count = len(pending_result.scalars().all())
-        
-        return items, pending_count
+        return items, pending_count, next_cursor
+
+    async def get_counts(self) -> dict:
+        """Per-status item counts for badges."""
+        return await get_inbox_counts(self.db, self.merchant_id)
 
     async def get_proposal(self, item_id: str):
         """Fetch a specific proposal and log the view action."""
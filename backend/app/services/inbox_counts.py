@@ -0,0 +1,247 @@
+# app/services/inbox_counts.py
+"""
+Inbox Counts
+============
+Per-merchant, per-status InboxItem counters for badges and polling clients.
+
+The inbox used to load every pending row (proposal_data blobs included) just
+to len() it on each page view. Counts now live in a Redis hash per merchant
+(`inbox_counts:{merchant_id}`):
+
+- Session hooks record status transitions of InboxItems (create, approve,
+  reject, execute, withdraw, delete) during flush and apply them as HINCRBYs
+  once the transaction commits; rolled-back work is discarded. On an
+  AsyncSession the HINCRBYs are awaited inside commit(), so they cannot be
+  lost when a short-lived event loop (one asyncio.run() per task) ends.
+- Writers that bypass the ORM unit of work (bulk UPDATE ... RETURNING claims)
+  call invalidate_inbox_counts() instead.
+- Reads reconcile against a grouped COUNT(*) (index-only on
+  idx_inbox_merchant_status) when the hash is missing or older than
+  INBOX_COUNTS_RECONCILE_SECONDS, and fall back to that query if Redis is down.
+  The reconcile snapshots the hash just before counting and, in one script,
+  writes the DB counts plus every delta applied since the snapshot, so
+  concurrent commits are not overwritten.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+from app.config import get_settings
+from app.models import InboxItem
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Hash fields starting with "_" are bookkeeping, not statuses
+RECONCILED_AT = "_reconciled_at"
+RECONCILE_TOKEN = "_reconcile_token"
+COUNTS_TTL_SECONDS = 86400
+_DELTAS = "inbox_count_deltas"
+
+# Only touch hashes that exist: a missing hash is rebuilt from the DB on read
+_APPLY_DELTAS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+# Creates the hash if needed (so deltas committed during the count accumulate),
+# tags it with this reconcile's token and returns the pre-count snapshot
+_BEGIN_RECONCILE = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], ARGV[2], 0)
+end
+redis.call('HSET', KEYS[1], ARGV[3], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# ARGV: token, DB counts (JSON), snapshot (JSON), now, ttl, RECONCILED_AT, RECONCILE_TOKEN.
+# Skipped (nil) if the hash was invalidated or another reconcile started meanwhile.
+_FINISH_RECONCILE = """
+if redis.call('HGET', KEYS[1], ARGV[7]) ~= ARGV[1] then return nil end
+local counts = cjson.decode(ARGV[2])
+local snapshot = cjson.decode(ARGV[3])
+local current = redis.call('HGETALL', KEYS[1])
+for i = 1, #current, 2 do
+    local field = current[i]
+    if string.sub(field, 1, 1) ~= '_' then
+        local since = tonumber(current[i + 1]) - (tonumber(snapshot[field]) or 0)
+        counts[field] = (tonumber(counts[field]) or 0) + since
+    end
+end
+redis.call('DEL', KEYS[1])
+local fields = {ARGV[6], ARGV[4]}
+for status, count in pairs(counts) do
+    table.insert(fields, status)
+    table.insert(fields, count)
+end
+redis.call('HSET', KEYS[1], unpack(fields))
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return cjson.encode(counts)
+"""
+
+_client = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def counts_key(merchant_id: str) -> str:
+    return f"inbox_counts:{merchant_id}"
+
+
+def _redis():
+    """Shared client (one connection pool), recreated if the event loop changes."""
+    global _client, _client_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _client is None or _client_loop is not loop:
+        from redis.asyncio import from_url
+        _client = from_url(settings.REDIS_URL, decode_responses=True, socket_timeout=1, socket_connect_timeout=1)
+        _client_loop = loop
+    return _client
+
+
+def _statuses(raw: Dict[str, str]) -> Dict[str, int]:
+    return {field: int(value) for field, value in raw.items() if not field.startswith("_")}
+
+
+async def count_from_db(db, merchant_id: str) -> Dict[str, int]:
+    """Authoritative per-status counts."""
+    result = await db.execute(
+        select(InboxItem.status, func.count())
+        .where(InboxItem.merchant_id == merchant_id)
+        .group_by(InboxItem.status)
+    )
+    return {status: int(count) for status, count in result.all()}
+
+
+async def get_inbox_counts(db, merchant_id: str) -> Dict[str, int]:
+    """Per-status counts from Redis, reconciled against the DB when stale."""
+    try:
+        raw = await _redis().hgetall(counts_key(merchant_id))
+        reconciled_at = float(raw.get(RECONCILED_AT, 0) or 0)
+        if reconciled_at and time.time() - reconciled_at < settings.INBOX_COUNTS_RECONCILE_SECONDS:
+            return {status: count for status, count in _statuses(raw).items() if count > 0}
+        return await reconcile(db, merchant_id)
+    except Exception as e:
+        logger.warning(f"Inbox counters unavailable for {merchant_id}, counting in DB: {e}")
+        return await count_from_db(db, merchant_id)
+
+
+async def reconcile(db, merchant_id: str) -> Dict[str, int]:
+    """Rebuilds the hash from the DB without losing deltas committed while counting."""
+    redis = _redis()
+    key = counts_key(merchant_id)
+    token = uuid.uuid4().hex
+    flat = await redis.eval(
+        _BEGIN_RECONCILE, 1, key, token, RECONCILED_AT, RECONCILE_TOKEN, COUNTS_TTL_SECONDS
+    )
+    snapshot = _statuses(dict(zip(flat[::2], flat[1::2])))
+
+    counts = await count_from_db(db, merchant_id)
+    result = await redis.eval(
+        _FINISH_RECONCILE, 1, key,
+        token, json.dumps(counts), json.dumps(snapshot), time.time(), COUNTS_TTL_SECONDS,
+        RECONCILED_AT, RECONCILE_TOKEN,
+    )
+    if result is None:
+        # Invalidated (or superseded) while counting: leave it to the next read
+        return counts
+    return {status: int(count) for status, count in json.loads(result).items() if int(count) > 0}
+
+
+async def invalidate_inbox_counts(merchant_id: str):
+    """Forces the next read to recount. For writes that bypass the ORM session."""
+    try:
+        await _redis().delete(counts_key(merchant_id))
+    except Exception as e:
+        logger.warning(f"Failed to invalidate inbox counts for {merchant_id}: {e}")
+
+
+async def apply_deltas(deltas: Dict[str, Counter]):
+    redis = _redis()
+    try:
+        for merchant_id, counter in deltas.items():
+            args = []
+            for status, delta in counter.items():
+                if delta:
+                    args += [status, delta]
+            if args:
+                await redis.eval(_APPLY_DELTAS, 1, counts_key(merchant_id), *args)
+    except Exception as e:
+        # Drift is repaired by the next reconciliation; drop the hashes to force it now
+        logger.warning(f"Failed to apply inbox count deltas: {e}")
+        try:
+            await redis.delete(*[counts_key(m) for m in deltas])
+        except Exception:
+            pass
+
+
+def _record_deltas(session: Session, flush_context):
+    """after_flush: new / dirty / deleted still show the pre-flush state here."""
+    deltas = session.info.setdefault(_DELTAS, defaultdict(Counter))
+
+    for obj in session.new:
+        if isinstance(obj, InboxItem):
+            deltas[obj.merchant_id][obj.status or "pending"] += 1
+
+    for obj in session.dirty:
+        if isinstance(obj, InboxItem):
+            history = inspect(obj).attrs.status.history
+            if history.deleted and history.added and history.deleted[0] != history.added[0]:
+                deltas[obj.merchant_id][history.deleted[0]] -= 1
+                deltas[obj.merchant_id][history.added[0]] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, InboxItem):
+            deltas[obj.merchant_id][obj.status] -= 1
+
+
+def _publish_deltas(session: Session):
+    deltas = session.info.pop(_DELTAS, None)
+    if not deltas:
+        return
+    if in_greenlet():
+        # AsyncSession: commit() runs this hook in its greenlet, so the HINCRBYs are
+        # awaited before commit() returns (apply_deltas never raises)
+        await_only(apply_deltas(deltas))
+        return
+    # Sync contexts (scripts, migrations): drop the hashes so the next read recounts
+    try:
+        from app.redis import get_redis_client
+        get_redis_client().delete(*[counts_key(m) for m in deltas])
+    except Exception:
+        pass
+
+
+def _discard_deltas(session: Session):
+    session.info.pop(_DELTAS, None)
+
+
+_registered = False
+
+
+def register_inbox_count_hooks():
+    """Installs the session hooks (idempotent)."""
+    global _registered
+    if _registered:
+        return
+    event.listen(Session, "after_flush", _record_deltas)
+    event.listen(Session, "after_commit", _publish_deltas)
+    event.listen(Session, "after_rollback", _discard_deltas)
+    _registered = True
@@ -0,0 +1,278 @@
+# app/services/internal_api_client.py
+"""
+Internal API Client
+===================
+Process-wide client for agent -> Internal API calls.
+
+Replaces the per-agent pattern of looking up vaulted credentials in the DB,
+POSTing to /internal/agents/auth and opening a fresh aiohttp session for every
+hop. One client per process provides:
+
+- A keep-alive connection pool (recreated if the event loop changes, e.g. one
+  asyncio.run() per Celery task).
+- A token cache keyed by (merchant_id, agent_type) that refreshes ahead of expiry.
+- Single-flight authentication: concurrent agents of the same identity share
+  one credential lookup and one /auth round trip.
+- Per-endpoint request counts, errors and latency (see stats()).
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+AgentKey = Tuple[str, str]  # (merchant_id, agent_type)
+
+
+@dataclass
+class InternalAPIResponse:
+    """Status plus decoded body (JSON when available, text otherwise)."""
+    status: int
+    data: Any = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+@dataclass
+class _CachedToken:
+    access_token: str
+    expires_at: float  # time.monotonic() deadline
+
+
+class InternalAPIClient:
+    """
+    Pooled, authenticated client for the Internal Agent API.
+
+    Usage:
+        api = get_internal_api_client()
+        resp = await api.post("/internal/agents/proposals", merchant_id, "strategy", json=payload)
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        refresh_margin_seconds: Optional[int] = None,
+    ):
+        self.base_url = (base_url or settings.INTERNAL_API_URL).rstrip("/")
+        self.pool_size = pool_size or settings.INTERNAL_API_POOL_SIZE
+        self.timeout_seconds = timeout_seconds or settings.INTERNAL_API_TIMEOUT_SECONDS
+        self.refresh_margin = (
+            settings.INTERNAL_API_TOKEN_REFRESH_MARGIN_SECONDS
+            if refresh_margin_seconds is None else refresh_margin_seconds
+        )
+
+        self._session = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tokens: Dict[AgentKey, _CachedToken] = {}
+        self._credentials: Dict[AgentKey, Dict[str, str]] = {}
+        self._auth_locks: Dict[AgentKey, asyncio.Lock] = {}
+
+        self._metrics: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "errors": 0, "total_latency_ms": 0.0, "max_latency_ms": 0.0}
+        )
+        self._token_stats = {"hits": 0, "authentications": 0, "auth_failures": 0}
+
+    # =========================================================================
+    # CONNECTION POOL
+    # =========================================================================
+
+    def _bind_loop(self):
+        """A session and its locks cannot be shared across event loops."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._auth_locks = {}
+            self._session = None
+            self._loop = loop
+
+    async def _get_session(self):
+        import aiohttp
+
+        self._bind_loop()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+            )
+        return self._session
+
+    async def close(self):
+        """Closes the pooled session. Cached tokens are kept."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    # =========================================================================
+    # TOKEN CACHE
+    # =========================================================================
+
+    async def get_token(self, merchant_id: str, agent_type: str) -> Optional[str]:
+        """
+        Returns a valid bearer token for the agent identity, authenticating
+        at most once per identity no matter how many callers are waiting.
+        """
+        key = (merchant_id, agent_type)
+        cached = self._fresh_token(key)
+        if cached:
+            self._token_stats["hits"] += 1
+            return cached
+
+        self._bind_loop()
+        lock = self._auth_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self._fresh_token(key)
+            if cached:
+                self._token_stats["hits"] += 1
+                return cached
+            return await self._authenticate(key)
+
+    def invalidate(self, merchant_id: str, agent_type: str):
+        """Drops the cached token and credentials (e.g. after a secret rotation)."""
+        key = (merchant_id, agent_type)
+        self._tokens.pop(key, None)
+        self._credentials.pop(key, None)
+
+    def _fresh_token(self, key: AgentKey) -> Optional[str]:
+        cached = self._tokens.get(key)
+        if cached and cached.expires_at - self.refresh_margin > time.monotonic():
+            return cached.access_token
+        return None
+
+    async def _load_credentials(self, key: AgentKey) -> Optional[Dict[str, str]]:
+        from app.database import async_session_maker
+        from app.services.identity import IdentityService
+
+        merchant_id, agent_type = key
+        async with async_session_maker() as db:
+            return await IdentityService(db, merchant_id).get_agent_credentials(agent_type)
+
+    async def _authenticate(self, key: AgentKey) -> Optional[str]:
+        merchant_id, agent_type = key
+        creds = self._credentials.get(key) or await self._load_credentials(key)
+        if not creds:
+            logger.error(f"Failed to fetch {agent_type} credentials for merchant {merchant_id}")
+            return None
+        self._credentials[key] = creds
+
+        self._token_stats["authentications"] += 1
+        resp = await self._send("POST", "/internal/agents/auth", json=creds)
+        if resp.status != 200:
+            self._token_stats["auth_failures"] += 1
+            # Credentials may have been rotated; re-read them next time
+            self._credentials.pop(key, None)
+            logger.error(f"{agent_type.title()} Agent Auth Failed: {resp.data}")
+            return None
+
+        token = resp.data["access_token"]
+        expires_in = int(resp.data.get("expires_in", 3600))
+        self._tokens[key] = _CachedToken(token, time.monotonic() + expires_in)
+        return token
+
+    # =========================================================================
+    # REQUESTS
+    # =========================================================================
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        merchant_id: str,
+        agent_type: str,
+        json: Optional[Any] = None,
+    ) -> InternalAPIResponse:
+        """
+        Sends an authenticated request. A 401 drops the cached token and the
+        request is retried once with a fresh one.
+        """
+        token = await self.get_token(merchant_id, agent_type)
+        if not token:
+            return InternalAPIResponse(401, "Agent authentication failed")
+
+        resp = await self._send(method, path, json=json, token=token)
+        if resp.status == 401:
+            self._tokens.pop((merchant_id, agent_type), None)
+            token = await self.get_token(merchant_id, agent_type)
+            if token:
+                resp = await self._send(method, path, json=json, token=token)
+        return resp
+
+    async def post(
+        self,
+        path: str,
+        merchant_id: str,
+        agent_type: str,
+        json: Optional[Any] = None,
+    ) -> InternalAPIResponse:
+        return await self.request("POST", path, merchant_id, agent_type, json=json)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        json: Optional[Any] = None,
+        token: Optional[str] = None,
+    ) -> InternalAPIResponse:
+        session = await self._get_session()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        metric = self._metrics[path]
+        started = time.perf_counter()
+
+        try:
+            async with session.request(method, f"{self.base_url}{path}", json=json, headers=headers) as resp:
+                if resp.content_type == "application/json":
+                    data = await resp.json()
+                else:
+                    data = await resp.text()
+                if resp.status >= 400:
+                    metric["errors"] += 1
+                return InternalAPIResponse(resp.status, data)
+        except Exception:
+            metric["errors"] += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metric["requests"] += 1
+            metric["total_latency_ms"] += elapsed_ms
+            metric["max_latency_ms"] = max(metric["max_latency_ms"], elapsed_ms)
+
+    # =========================================================================
+    # METRICS
+    # =========================================================================
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint request/latency counters and token cache effectiveness."""
+        endpoints = {
+            path: {
+                "requests": int(m["requests"]),
+                "errors": int(m["errors"]),
+                "avg_latency_ms": round(m["total_latency_ms"] / m["requests"], 2) if m["requests"] else 0.0,
+                "max_latency_ms": round(m["max_latency_ms"], 2),
+            }
+            for path, m in self._metrics.items()
+        }
+        return {
+            "endpoints": endpoints,
+            "tokens": {**self._token_stats, "cached_identities": len(self._tokens)},
+        }
+
+
+# Singleton for easy access
+_client: Optional[InternalAPIClient] = None
+
+def get_internal_api_client() -> InternalAPIClient:
+    global _client
+    if _client is None:
+        _client = InternalAPIClient()
+    return _client
@@ -17,7 +17,9 @@ from sqlalchemy import select, func, desc
 from sqlalchemy.orm import selectinload
 
 from app.database import async_session_maker
-from app.models import Campaign, Merchant, StoreDNA, AgentThought, TouchLog
+from app.models import Campaign, AgentThought, TouchLog
+from app.services.thought_retention import hot_window_start
+from app.services.merchant_context import get_merchant_context
 
 logger = logging.getLogger(__name__)
 
@@ -142,40 +144,12 @@ class MemoryService:
         - max_auto_discount: Their risk tolerance
         - preferred_strategies: Explicit strategy preferences (if any)
         """
-        async with async_session_maker() as session:
-            # Fetch Merchant
-            merchant_result = await session.execute(
-                select(Merchant).where(Merchant.id == self.merchant_id)
-            )
-            merchant = merchant_result.scalar_one_or_none()
-            
-            if not merchant:
-                return self._default_preferences()
-            
-            # Fetch StoreDNA
-            dna_result = await session.execute(
-                select(StoreDNA).where(StoreDNA.merchant_id == self.merchant_id)
-            )
-            dna = dna_result.scalar_one_or_none()
-            
-            preferences = {
-                'brand_tone': dna.brand_tone if dna else 'professional',
-                'industry_type': dna.industry_type if dna else 'general_retail',
-                'max_auto_discount': float(merchant.max_auto_discount) if merchant.max_auto_discount else 0.25,
-                'autonomy_enabled': merchant.governor_aggressive_mode if merchant else False,
-                'store_name': merchant.store_name,
-            }
-            
-            # Check for explicit strategy preferences in DNA (stored in brand_values)
-            if dna and dna.brand_values:
-                preferences['preferred_strategies'] = dna.brand_values
-                preferences['avoided_strategies'] = []
-            else:
-                preferences['preferred_strategies'] = []
-                preferences['avoided_strategies'] = []
-            
-            logger.info(f"🧠 Memory: Retrieved preferences for {merchant.store_name}")
-            return preferences
+        context = await get_merchant_context(self.merchant_id)
+        if not context:
+            return self._default_preferences()
+
+        logger.info(f"🧠 Memory: Retrieved preferences for {context.store_name}")
+        return context.preferences()
 
     def _default_preferences(self) -> Dict[str, Any]:
         """Returns default preferences when merchant data is unavailable."""
@@ -209,6 +183,7 @@ class MemoryService:
             query = (
                 select(AgentThought)
                 .where(AgentThought.merchant_id == self.merchant_id)
+                .where(AgentThought.created_at >= hot_window_start())  # Hot partitions only
                 .order_by(desc(AgentThought.created_at))
                 .limit(limit)
             )
@@ -217,25 +192,76 @@ class MemoryService:
                 query = query.where(AgentThought.agent_type == agent_type)
             
             if product_id:
-                # Filter by product_id in detailed_reasoning JSON
-                # This requires the product_id to be stored in reasoning
-                # FIXME: astext not available in this SQLAlchemy version
-                # query = query.where(
-                #     AgentThought.detailed_reasoning['product_id'].astext == product_id
-                # )
-                pass  # Skip product_id filtering for now
+                # Served by idx_thought_merchant_product_agent_created
+                query = query.where(AgentThought.product_id == str(product_id))
 
-            
             result = await session.execute(query)
             thoughts = result.scalars().all()
             
-            return [
-                {
-                    'agent': t.agent_type,
-                    'type': t.thought_type,
-                    'summary': t.summary,
-                    'reasoning': t.detailed_reasoning,
-                    'created_at': t.created_at.isoformat() if t.created_at else None,
-                }
-                for t in thoughts
+            return [self._thought_to_memory(t) for t in thoughts]
+
+    async def recall_thoughts_for_products(
+        self,
+        product_ids: List[str],
+        agent_type: Optional[str] = None,
+        limit_per_product: int = 2
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Batched version of recall_thoughts(product_id=...).
+
+        Fetches the latest `limit_per_product` thoughts for every product in a
+        single query, ranking each product's thoughts with a window function.
+
+        Returns:
+            {product_id: [memory, ...]} with an entry (possibly empty) for every
+            requested product, most recent first.
+        """
+        ids = list({str(pid) for pid in product_ids if pid})
+        memories: Dict[str, List[Dict[str, Any]]] = {pid: [] for pid in ids}
+        if not ids:
+            return memories
+
+        async with async_session_maker() as session:
+            filters = [
+                AgentThought.merchant_id == self.merchant_id,
+                AgentThought.product_id.in_(ids),
+                AgentThought.created_at >= hot_window_start(),
             ]
+            if agent_type:
+                filters.append(AgentThought.agent_type == agent_type)
+
+            ranked = (
+                select(
+                    AgentThought.id,
+                    func.row_number().over(
+                        partition_by=AgentThought.product_id,
+                        order_by=desc(AgentThought.created_at)
+                    ).label('rank')
+                )
+                .where(*filters)
+                .subquery()
+            )
+
+            query = (
+                select(AgentThought)
+                .join(ranked, ranked.c.id == AgentThought.id)
+                .where(ranked.c.rank <= limit_per_product)
+                .order_by(AgentThought.product_id, desc(AgentThought.created_at))
+            )
+
+            result = await session.execute(query)
+            for t in result.scalars().all():
+                memories[t.product_id].append(self._thought_to_memory(t))
+
+        logger.info(f"🧠 Memory: Recalled thoughts for {len(ids)} products for merchant {self.merchant_id}")
+        return memories
+
+    @staticmethod
+    def _thought_to_memory(t: AgentThought) -> Dict[str, Any]:
+        return {
+            'agent': t.agent_type,
+            'type': t.thought_type,
+            'summary': t.summary,
+            'reasoning': t.detailed_reasoning,
+            'created_at': t.created_at.isoformat() if t.created_at else None,
+        }
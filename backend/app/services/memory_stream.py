@@ -1,19 +1,36 @@
 # app/services/memory_stream.py
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import reduce
 from typing import List, Dict, Any, Optional
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_, func, literal, literal_column, desc, DateTime
 from app.database import async_session_maker
 from app.models import AgentThought
+from app.services.thought_retention import hot_window_start
 
 logger = logging.getLogger(__name__)
 
+# Must match the expression of idx_thought_causal_fts exactly for the GIN index to be used
+CAUSAL_SEARCH_VECTOR = (
+    "to_tsvector('english', agent_thoughts.summary || ' ' || "
+    "coalesce(agent_thoughts.detailed_reasoning->>'reasoning', ''))"
+)
+
+# Older memories fade: a week-old match scores half of an identical fresh one
+RECENCY_HALF_LIFE_DAYS = 7
+
+
+def escape_like(value: str) -> str:
+    """Escapes LIKE wildcards so a theme matches literally (use with escape="\\")."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 class MemoryStreamService:
     """
     Tracks 'Causal History' of agent decisions.
     Provides the 'Brain' layer to prevent repetitive logic failures.
     """
-    
+
     def __init__(self, merchant_id: str):
         self.merchant_id = merchant_id
 
@@ -41,33 +58,74 @@ class MemoryStreamService:
         """
         Retrieves past decisions that share themes with current clusters.
         Prevents recommending things the merchant already rejected or that failed.
+
+        Themes are matched in SQL against the whole hot window: full-text over
+        summary + reasoning and substring matches on the summary (pg_trgm
+        indexed on Postgres), ranked by relevance decayed by age.
         """
         async with async_session_maker() as session:
-            # Query last 30 days of causal memory
-            stmt = select(AgentThought).where(
-                and_(
-                    AgentThought.merchant_id == self.merchant_id,
-                    AgentThought.thought_type == "causal_memory",
-                    AgentThought.created_at >= datetime.utcnow() - timedelta(days=30)
-                )
-            ).order_by(AgentThought.created_at.desc()).limit(limit)
-            
+            stmt = self._build_history_query(
+                [t for t in cluster_themes if t and t.strip()],
+                limit,
+                session.bind.dialect.name
+            )
             result = await session.execute(stmt)
             thoughts = result.scalars().all()
-            
+
             if not thoughts:
                 return "No relevant causal history found."
 
-            history_lines = ["## Relevant Causal History (Last 30 Days)"]
+            history_lines = ["## Relevant Causal History"]
             for t in thoughts:
                 data = t.detailed_reasoning or {}
-                # Basic fuzzy matching on themes if provided
-                is_relevant = any(theme.lower() in t.summary.lower() for theme in cluster_themes) if cluster_themes else True
-                
-                if is_relevant:
-                    history_lines.append(
-                        f"- [{t.created_at.strftime('%Y-%m-%d')}] {t.summary}: {data.get('reasoning', '')} "
-                        f"(Feedback: {data.get('feedback', 'None')})"
-                    )
-            
+                history_lines.append(
+                    f"- [{t.created_at.strftime('%Y-%m-%d')}] {t.summary}: {data.get('reasoning', '')} "
+                    f"(Feedback: {data.get('feedback', 'None')})"
+                )
+
             return "\n".join(history_lines)
+
+    def _build_history_query(self, themes: List[str], limit: int, dialect: str):
+        """
+        Builds the causal history lookup.
+
+        Postgres: tsvector @@ tsquery OR summary ILIKE theme, both served by
+        partial GIN indexes on causal_memory rows, ordered by
+        (ts_rank_cd + trigram similarity) / (1 + age / half-life).
+        Other dialects: the same substring filter, newest first.
+        """
+        stmt = select(AgentThought).where(
+            and_(
+                AgentThought.merchant_id == self.merchant_id,
+                AgentThought.thought_type == "causal_memory",
+                AgentThought.created_at >= hot_window_start()
+            )
+        )
+
+        if not themes:
+            return stmt.order_by(desc(AgentThought.created_at)).limit(limit)
+
+        substring_match = or_(*[
+            AgentThought.summary.ilike(f"%{escape_like(theme)}%", escape="\\") for theme in themes
+        ])
+
+        if dialect != "postgresql":
+            return stmt.where(substring_match).order_by(desc(AgentThought.created_at)).limit(limit)
+
+        vector = literal_column(CAUSAL_SEARCH_VECTOR)
+        tsquery = reduce(
+            lambda a, b: a.op("||")(b),
+            [func.plainto_tsquery("english", theme) for theme in themes]
+        )
+        relevance = func.ts_rank_cd(vector, tsquery) + reduce(
+            lambda a, b: a + b,
+            [func.similarity(AgentThought.summary, theme) for theme in themes]
+        )
+        age_days = func.extract("epoch", literal(datetime.utcnow(), DateTime) - AgentThought.created_at) / 86400.0
+        score = relevance / (1 + age_days / RECENCY_HALF_LIFE_DAYS)
+
+        return (
+            stmt.where(or_(vector.op("@@")(tsquery), substring_match))
+            .order_by(desc(score), desc(AgentThought.created_at))
+            .limit(limit)
+        )
@@ -0,0 +1,246 @@
+# app/services/merchant_cache.py
+"""
+Merchant Cache
+==============
+Process-local LRU + TTL cache for merchant resolution on hot paths.
+
+Every webhook resolved its merchant by (platform, external id) and every
+tenant-authenticated request re-read the Merchant row by id. Both lookups now
+go through this cache:
+
+    merchant = await get_merchant_cache().get_by_platform("shopify", "x.myshopify.com")
+    merchant = await get_merchant_cache().get_by_id(merchant_id, session=db)
+
+Entries hold a column snapshot; each hit builds a fresh Merchant from it, so
+callers can't leak mutations into the cache. Hits and misses return the same
+shape: attached to the caller's session when one is passed (merged with
+load=False, so no extra SELECT), otherwise detached.
+Only found merchants are cached (a store installing right now must not be
+shadowed by a cached miss).
+
+Writers call `await invalidate_merchant(merchant_id)` after committing. It
+drops the local entries and publishes on MERCHANT_INVALIDATION_CHANNEL; every
+API process runs a listener (started in the app lifespan) that drops its own
+entries and the pinned MerchantContext. The TTL bounds staleness if an
+invalidation message is lost.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+MERCHANT_INVALIDATION_CHANNEL = "merchant_cache:invalidate"
+
+CacheKey = Tuple[str, ...]
+
+
+class MerchantCache:
+    """Bounded LRU of merchant snapshots keyed by id and by (platform, external id)."""
+
+    def __init__(self, max_size: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size or settings.MERCHANT_CACHE_MAX_SIZE
+        self.ttl_seconds = settings.MERCHANT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._keys_by_merchant: Dict[str, Set[CacheKey]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_by_id(self, merchant_id: str, session=None):
+        """Merchant by primary key, or None."""
+        from app.models import Merchant
+        return await self._get(
+            ("id", str(merchant_id)),
+            select(Merchant).where(Merchant.id == merchant_id),
+            session,
+        )
+
+    async def get_by_platform(self, platform: str, external_id: str, session=None):
+        """
+        Merchant by platform and platform-specific id (shop domain, store hash,
+        store URL; stored in shopify_domain for every platform), or None.
+        """
+        from app.models import Merchant
+        return await self._get(
+            ("platform", platform, str(external_id)),
+            select(Merchant).where(
+                Merchant.platform == platform,
+                Merchant.shopify_domain == external_id
+            ),
+            session,
+        )
+
+    async def _get(self, key: CacheKey, stmt, session):
+        columns = self._lookup(key)
+        if columns is not None:
+            self.hits += 1
+            return await self._materialize(columns, session)
+
+        self.misses += 1
+        generation = self.invalidations
+        if session is None:
+            from app.database import async_session_maker
+            async with async_session_maker() as session:
+                merchant = (await session.execute(stmt)).scalar_one_or_none()
+        else:
+            merchant = (await session.execute(stmt)).scalar_one_or_none()
+
+        if merchant is None:
+            return None
+
+        # Don't cache a row read while an invalidation was in flight
+        if generation == self.invalidations:
+            columns = {attr.key: getattr(merchant, attr.key) for attr in inspect(type(merchant)).column_attrs}
+            self._store(columns)
+        return merchant
+
+    def _lookup(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, columns = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key)
+            self._forget_key(key, str(columns["id"]))
+            return None
+        self._entries.move_to_end(key)
+        return columns
+
+    def _store(self, columns: Dict[str, Any]):
+        merchant_id = str(columns["id"])
+        keys = [("id", merchant_id)]
+        if columns.get("platform") and columns.get("shopify_domain"):
+            keys.append(("platform", columns["platform"], str(columns["shopify_domain"])))
+
+        expires_at = time.monotonic() + self.ttl_seconds
+        for key in keys:
+            self._entries[key] = (expires_at, columns)
+            self._entries.move_to_end(key)
+            self._keys_by_merchant.setdefault(merchant_id, set()).add(key)
+
+        while len(self._entries) > self.max_size:
+            key, (_, evicted) = self._entries.popitem(last=False)
+            self._forget_key(key, str(evicted["id"]))
+            self.evictions += 1
+
+    @staticmethod
+    async def _materialize(columns: Dict[str, Any], session):
+        from app.models import Merchant
+        merchant = Merchant(**columns)
+        make_transient_to_detached(merchant)
+        if session is not None:
+            merchant = await session.merge(merchant, load=False)
+        return merchant
+
+    def _forget_key(self, key: CacheKey, merchant_id: str):
+        keys = self._keys_by_merchant.get(merchant_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_merchant[merchant_id]
+
+    def invalidate(self, merchant_id: str):
+        """Drops every cached entry of a merchant in this process."""
+        for key in self._keys_by_merchant.pop(str(merchant_id), set()):
+            self._entries.pop(key, None)
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_merchant.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+_cache: Optional[MerchantCache] = None
+_listener: Optional[asyncio.Task] = None
+
+
+def get_merchant_cache() -> MerchantCache:
+    global _cache
+    if _cache is None:
+        _cache = MerchantCache()
+    return _cache
+
+
+def _invalidate_locally(merchant_id: str):
+    from app.services.merchant_context import invalidate_merchant_context
+    get_merchant_cache().invalidate(merchant_id)
+    invalidate_merchant_context(merchant_id)
+
+
+async def invalidate_merchant(merchant_id: str):
+    """
+    Drops cached merchant data here and, via Redis pub/sub, in every other
+    process. Call after committing changes to the Merchant row.
+    """
+    _invalidate_locally(merchant_id)
+    try:
+        from redis.asyncio import from_url
+        redis = from_url(settings.REDIS_URL, decode_responses=True)
+        try:
+            await redis.publish(MERCHANT_INVALIDATION_CHANNEL, str(merchant_id))
+        finally:
+            await redis.close()
+    except Exception as e:
+        # Other processes fall back to the TTL
+        logger.warning(f"Failed to publish merchant invalidation for {merchant_id}: {e}")
+
+
+async def _listen_for_invalidations():
+    from redis.asyncio import from_url
+    while True:
+        try:
+            redis = from_url(settings.REDIS_URL, decode_responses=True)
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(MERCHANT_INVALIDATION_CHANNEL)
+            # Anything published while we were disconnected is lost
+            get_merchant_cache().clear()
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        _invalidate_locally(message["data"])
+            finally:
+                await pubsub.close()
+                await redis.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Merchant invalidation listener disconnected: {e}")
+            await asyncio.sleep(5)
+
+
+def start_invalidation_listener():
+    """Subscribes this process to merchant invalidations (idempotent)."""
+    global _listener
+    if _listener is None or _listener.done():
+        _listener = asyncio.create_task(_listen_for_invalidations(), name="merchant-cache-invalidation")
+
+
+async def stop_invalidation_listener():
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        await asyncio.gather(_listener, return_exceptions=True)
+        _listener = None
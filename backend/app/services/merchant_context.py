@@ -0,0 +1,199 @@
+# app/services/merchant_context.py
+"""
+Merchant Context
+================
+Run-scoped snapshot of the merchant settings agents consult on every product:
+feature flags, governor policy, Store DNA / preferences and a floor-pricing
+summary.
+
+Agent runs used to re-read the Merchant row (and StoreDNA, RiskPolicy,
+FloorPricing) once per product. A MerchantContext is loaded once per run or
+request and carried in a contextvar, so a 10k-product run does a constant
+number of merchant lookups:
+
+    async with merchant_context_scope(merchant_id):
+        for product in products:
+            ctx = await get_merchant_context(merchant_id)   # no query
+
+Outside a scope, get_merchant_context() loads and pins the context for the
+current task. Settings writers call invalidate_merchant_context(), which
+makes every pinned context for that merchant reload on next access; contexts
+also expire after MERCHANT_CONTEXT_TTL_SECONDS.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+_current_context: ContextVar[Optional["MerchantContext"]] = ContextVar("merchant_context", default=None)
+_versions: Dict[str, int] = defaultdict(int)
+
+
+@dataclass(frozen=True)
+class MerchantContext:
+    """Immutable per-run view of a merchant's agent-relevant settings."""
+    merchant_id: str
+    store_name: str
+    platform: str
+    created_at: Optional[datetime]
+    is_active: bool
+    is_paused: bool
+    max_auto_discount: Optional[float]
+    governor_aggressive_mode: bool
+    governor_calibration_threshold: int
+    governor_trust_threshold: float
+    enable_multi_plan_strategy: bool
+    external_channels_enabled: bool
+    dna: Dict[str, Any] = field(default_factory=dict)
+    risk_policies: Dict[Tuple[str, str], Dict[str, Any]] = field(default_factory=dict)
+    floor_priced_products: FrozenSet[str] = frozenset()
+    liquidation_products: FrozenSet[str] = frozenset()
+    version: int = 0
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def is_new_store(self) -> bool:
+        """Stores younger than a week are exempt from dead-stock flags."""
+        if not self.created_at:
+            return False
+        return (datetime.utcnow() - self.created_at).days < 7
+
+    @property
+    def is_stale(self) -> bool:
+        return (
+            self.version != _versions[self.merchant_id]
+            or time.monotonic() - self.loaded_at > settings.MERCHANT_CONTEXT_TTL_SECONDS
+        )
+
+    def has_floor_pricing(self, product_id: str) -> bool:
+        return str(product_id) in self.floor_priced_products
+
+    def can_liquidate(self, product_id: str) -> bool:
+        return str(product_id) in self.liquidation_products
+
+    def risk_policy(self, agent_type: str, risk_level: str) -> Optional[Dict[str, Any]]:
+        return self.risk_policies.get((agent_type, risk_level))
+
+    def discount_cap(self, default: float) -> float:
+        """max_auto_discount, or the caller's default when unset or 0."""
+        return self.max_auto_discount or default
+
+    def preferences(self) -> Dict[str, Any]:
+        """Same shape as MemoryService.get_merchant_preferences()."""
+        brand_values = self.dna.get("brand_values")
+        return {
+            'brand_tone': self.dna.get("brand_tone") or 'professional',
+            'industry_type': self.dna.get("industry_type") or 'general_retail',
+            'max_auto_discount': self.discount_cap(0.25),
+            'autonomy_enabled': self.governor_aggressive_mode,
+            'store_name': self.store_name,
+            'preferred_strategies': brand_values or [],
+            'avoided_strategies': [],
+        }
+
+
+async def load_merchant_context(merchant_id: str, session=None) -> Optional[MerchantContext]:
+    """Reads the merchant snapshot from the database. Returns None if the merchant doesn't exist."""
+    if session is None:
+        from app.database import async_session_maker
+        async with async_session_maker() as session:
+            return await load_merchant_context(merchant_id, session)
+
+    from app.models import Merchant, StoreDNA, RiskPolicy, FloorPricing
+
+    version = _versions[merchant_id]
+    merchant = (await session.execute(
+        select(Merchant).where(Merchant.id == merchant_id)
+    )).scalar_one_or_none()
+    if not merchant:
+        return None
+
+    dna = (await session.execute(
+        select(StoreDNA).where(StoreDNA.merchant_id == merchant_id)
+    )).scalar_one_or_none()
+
+    policies = (await session.execute(
+        select(RiskPolicy).where(RiskPolicy.merchant_id == merchant_id)
+    )).scalars().all()
+
+    floors = (await session.execute(
+        select(FloorPricing.product_id, FloorPricing.liquidation_mode).where(
+            FloorPricing.merchant_id == merchant_id,
+            FloorPricing.product_id.isnot(None)
+        )
+    )).all()
+
+    logger.debug(f"Loaded merchant context for {merchant_id} (v{version})")
+    return MerchantContext(
+        merchant_id=merchant_id,
+        store_name=merchant.store_name,
+        platform=merchant.platform,
+        created_at=merchant.created_at,
+        is_active=bool(merchant.is_active),
+        is_paused=bool(merchant.is_paused),
+        max_auto_discount=float(merchant.max_auto_discount) if merchant.max_auto_discount is not None else None,
+        governor_aggressive_mode=bool(merchant.governor_aggressive_mode),
+        governor_calibration_threshold=merchant.governor_calibration_threshold or 50,
+        governor_trust_threshold=float(merchant.governor_trust_threshold or 0.95),
+        enable_multi_plan_strategy=bool(merchant.enable_multi_plan_strategy),
+        external_channels_enabled=bool(merchant.external_channels_enabled),
+        dna={
+            "brand_tone": dna.brand_tone,
+            "industry_type": dna.industry_type,
+            "brand_values": dna.brand_values,
+        } if dna else {},
+        risk_policies={
+            (p.agent_type, p.risk_level): {
+                "requires_approval": p.requires_approval,
+                "min_confidence": p.min_confidence,
+                "min_trust_score": p.min_trust_score,
+            }
+            for p in policies
+        },
+        floor_priced_products=frozenset(str(pid) for pid, _ in floors),
+        liquidation_products=frozenset(str(pid) for pid, liquidation in floors if liquidation),
+        version=version,
+    )
+
+
+async def get_merchant_context(merchant_id: str, session=None) -> Optional[MerchantContext]:
+    """
+    Returns the current run's context for merchant_id, loading (and pinning it
+    to the current task) if there is none or it was invalidated.
+    """
+    current = _current_context.get()
+    if current is not None and current.merchant_id == merchant_id and not current.is_stale:
+        return current
+
+    context = await load_merchant_context(merchant_id, session)
+    if context is not None:
+        _current_context.set(context)
+    return context
+
+
+@asynccontextmanager
+async def merchant_context_scope(merchant_id: str, session=None) -> AsyncIterator[Optional[MerchantContext]]:
+    """Loads the merchant context once for the duration of an agent run."""
+    token = _current_context.set(await load_merchant_context(merchant_id, session))
+    try:
+        yield _current_context.get()
+    finally:
+        _current_context.reset(token)
+
+
+def invalidate_merchant_context(merchant_id: str):
+    """Forces every pinned context of this merchant to reload on next access."""
+    _versions[merchant_id] += 1
@@ -0,0 +1,99 @@
+# app/services/pagination.py
+"""
+Keyset Pagination
+=================
+Opaque cursors for list endpoints ordered by (sort key DESC, id DESC).
+
+OFFSET pagination makes page N read and discard N * limit rows, so deep pages
+get linearly slower. A cursor instead encodes the last row's (sort value, id);
+the next page seeks past it on a (merchant_id, sort key, id) index and reads
+only `limit + 1` rows whatever the depth.
+
+Cursors are base64url JSON and are only meant to be echoed back by clients.
+"""
+
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that we did not issue."""
+
+
+def _encode_value(value: Any) -> list:
+    if value is None:
+        return ["n", None]
+    if isinstance(value, datetime):
+        return ["t", value.isoformat()]
+    if isinstance(value, Decimal):
+        return ["d", str(value)]
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TypeError(f"Unsupported cursor value: {value!r}")
+    return ["v", value]
+
+
+def _decode_value(kind: str, raw: Any) -> Any:
+    if kind == "n":
+        return None
+    if kind == "t":
+        return datetime.fromisoformat(raw)
+    if kind == "d":
+        return Decimal(raw)
+    if kind == "v":
+        return raw
+    raise InvalidCursor(f"Unknown cursor value kind: {kind}")
+
+
+def encode_cursor(sort_value: Any, row_id: str) -> str:
+    payload = json.dumps([*_encode_value(sort_value), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        kind, raw, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _decode_value(kind, raw), str(row_id)
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        raise InvalidCursor(f"Malformed cursor: {e}") from e
+
+
+def keyset_desc(query, sort_col, id_col, cursor: Optional[str] = None, nullable: bool = False):
+    """
+    Orders `query` by (sort_col DESC, id DESC) and, given a cursor, seeks past it.
+
+    Nullable sort keys put NULLs first (Postgres' default for DESC), so a plain
+    ascending (merchant_id, sort key, id) index serves the order backwards.
+    """
+    sort_order = sort_col.desc().nullsfirst() if nullable else sort_col.desc()
+    query = query.order_by(sort_order, id_col.desc())
+    if not cursor:
+        return query
+
+    value, last_id = decode_cursor(cursor)
+    if value is None:
+        if not nullable:
+            raise InvalidCursor("Cursor does not match this listing")
+        return query.where(or_(and_(sort_col.is_(None), id_col < last_id), sort_col.is_not(None)))
+
+    return query.where(or_(sort_col < value, and_(sort_col == value, id_col < last_id)))
+
+
+def next_page(rows: Sequence, limit: int, sort_attr: str, id_attr: str = "id") -> Tuple[List, Optional[str]]:
+    """
+    Trims a `limit + 1` fetch to `limit` rows and returns the cursor for the
+    following page (None on the last page).
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
@@ -0,0 +1,176 @@
+# app/services/pubsub_hub.py
+"""
+Pub/Sub Hub
+===========
+One Redis pattern subscription per process, fanned out to SSE clients.
+
+Each /inbox/stream connection used to open its own Redis connection and
+pubsub and poll it every 100 ms, so Redis connections per pod grew with open
+dashboards. The hub instead holds a single `PSUBSCRIBE inbox_updates:*` and
+routes every message to in-memory subscriptions of that channel:
+
+- each subscription has a bounded asyncio.Queue; when a slow client falls
+  behind the oldest message is dropped and counted (inbox messages only tell
+  the client to refetch, so the newest one is what matters),
+- an idle Redis connection is PINGed every SSE_HEARTBEAT_SECONDS so a dead
+  socket is noticed and reconnected,
+- after a reconnect every subscriber gets a "resync" message, since anything
+  published while disconnected is lost.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+INBOX_UPDATES_PATTERN = "inbox_updates:*"
+
+RESYNC_MESSAGE = json.dumps({"action": "resync"})
+
+
+class Subscription:
+    """One SSE client's view of a channel."""
+
+    def __init__(self, channel: str, max_queue: int):
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def put(self, data: str) -> bool:
+        """Enqueues without blocking; drops the oldest message when full."""
+        dropped = False
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            dropped = True
+        self.queue.put_nowait(data)
+        return dropped
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next message, or None after `timeout` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class PubSubHub:
+    """Shares one Redis pattern subscription between all local subscribers."""
+
+    def __init__(self, pattern: str, max_queue: int = 100, heartbeat_seconds: float = 15):
+        self.pattern = pattern
+        self.max_queue = max_queue
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.reconnects = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, channel: str) -> Subscription:
+        self.start()
+        subscription = Subscription(channel, self.max_queue)
+        self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+
+    def dispatch(self, channel: str, data: str):
+        for subscription in list(self._subscribers.get(channel, ())):
+            if subscription.put(data):
+                self.dropped += 1
+            self.delivered += 1
+
+    def _broadcast(self, data: str):
+        for channel in list(self._subscribers):
+            self.dispatch(channel, data)
+
+    def start(self):
+        """Starts the listener on the running loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"pubsub-hub:{self.pattern}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.connected = False
+
+    async def _run(self):
+        from redis.asyncio import from_url
+        first = True
+        while True:
+            try:
+                redis = from_url(settings.REDIS_URL, decode_responses=True)
+                pubsub = redis.pubsub()
+                try:
+                    await pubsub.psubscribe(self.pattern)
+                    self.connected = True
+                    if not first:
+                        self.reconnects += 1
+                        self._broadcast(RESYNC_MESSAGE)
+                    first = False
+                    await self._listen(pubsub)
+                finally:
+                    self.connected = False
+                    await pubsub.close()
+                    await redis.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Pub/sub hub for {self.pattern} disconnected: {e}")
+                await asyncio.sleep(1)
+
+    async def _listen(self, pubsub):
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=self.heartbeat_seconds)
+            if message is None:
+                # Idle: make sure the connection is still alive
+                await pubsub.ping()
+                continue
+            if message["type"] == "pmessage":
+                self.dispatch(message["channel"], message["data"])
+
+    def metrics(self) -> dict:
+        return {
+            "pattern": self.pattern,
+            "connected": self.connected,
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+
+
+_inbox_hub: Optional[PubSubHub] = None
+
+
+def get_inbox_hub() -> PubSubHub:
+    global _inbox_hub
+    if _inbox_hub is None:
+        _inbox_hub = PubSubHub(
+            INBOX_UPDATES_PATTERN,
+            max_queue=settings.SSE_SUBSCRIBER_QUEUE_SIZE,
+            heartbeat_seconds=settings.SSE_HEARTBEAT_SECONDS,
+        )
+    return _inbox_hub
+
+
+async def stop_pubsub_hubs():
+    if _inbox_hub is not None:
+        await _inbox_hub.stop()
@@ -0,0 +1,108 @@
+# app/services/quantile_sketch.py
+"""
+Quantile Sketch
+===============
+Small mergeable quantile sketch (DDSketch-style log buckets) for benchmarks
+that are accumulated incrementally, e.g. Global Brain conversion rates.
+
+Values are counted in buckets whose bounds grow geometrically by
+gamma = (1 + a) / (1 - a), so any quantile is returned within relative error
+`a` of the true value. Two sketches merge by adding bucket counts, which
+makes them exact to combine across harvest runs and cheap to store as JSON.
+Bucket keys are a pure function of the value, so they can also be computed
+in SQL (see bucket_key_sql) and only the counts shipped to Python.
+"""
+
+import math
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, func
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with relative-error guarantees."""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0  # Values <= 0 (e.g. campaigns without a conversion)
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def key(self, value: float) -> Optional[int]:
+        """Bucket of a value; None for the zero bucket."""
+        if value <= 0:
+            return None
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float, count: int = 1):
+        self.add_bucket(self.key(value), count)
+
+    def add_bucket(self, key: Optional[int], count: int = 1):
+        if key is None:
+            self.zero_count += count
+        else:
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def update(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.zero_count += other.zero_count
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), or None for an empty sketch."""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be in [0, 1]")
+        total = self.count
+        if total == 0:
+            return None
+
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Midpoint of the bucket (gamma^(k-1), gamma^k] in relative terms
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "buckets": {str(key): count for key, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "QuantileSketch":
+        if not data:
+            return cls()
+        sketch = cls(data.get("relative_accuracy", DEFAULT_RELATIVE_ACCURACY))
+        sketch.zero_count = int(data.get("zero_count", 0))
+        sketch.buckets = {int(key): int(count) for key, count in data.get("buckets", {}).items()}
+        return sketch
+
+
+def bucket_key_sql(value, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+    """SQL expression for QuantileSketch.key(value); NULL for the zero bucket."""
+    gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+    return case(
+        (value > 0, func.ceil(func.ln(value) / math.log(gamma))),
+        else_=None,
+    )
@@ -0,0 +1,303 @@
+# app/services/rfm.py
+"""
+RFM Segmentation
+================
+Recency / Frequency / Monetary scoring and segment assignment for customers.
+
+The Matchmaker used to load every customer (with their orders) into memory
+and score them one ORM object at a time. Scoring now runs in the database:
+
+- monetary breakpoints (20/40/60/80th percentile of total_spent) come from
+  one window-function query,
+- one UPDATE writes recency / frequency / monetary scores and the segment for
+  every customer of the merchant, with the rules below compiled to CASE
+  expressions,
+- per-segment counts come back from the same statement on Postgres
+  (UPDATE ... RETURNING inside a CTE), or a GROUP BY elsewhere.
+
+The Python scorers mirror the SQL ones for single-customer updates: each
+new order re-scores just its customer (apply_order) against the merchant's
+breakpoints, cached in Redis by the nightly run, so segments follow orders
+within seconds at constant cost per event.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, case, func, select, update
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import Customer
+from app.services.audience_index import invalidate_audience_index
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+SEGMENTS = ("champions", "loyal", "at_risk", "lapsed", "lost", "new_customers", "potential")
+
+# Recency: score 5..2 when the last order is at most this many days old, else 1
+RECENCY_DAYS = ((5, 30), (4, 60), (3, 90), (2, 180))
+# Frequency: score 5..2 from this many orders, else 1
+FREQUENCY_ORDERS = ((5, 10), (4, 5), (3, 3), (2, 2))
+# Monetary: percentile breakpoints (score 2..5 from the 20/40/60/80th percentile)
+MONETARY_PERCENTILES = (20, 40, 60, 80)
+DEFAULT_BREAKPOINTS = (Decimal("100"), Decimal("250"), Decimal("500"), Decimal("1000"))
+MIN_CUSTOMERS_FOR_PERCENTILES = 5
+
+Breakpoints = Tuple[Decimal, Decimal, Decimal, Decimal]
+
+
+class SegmentChange(NamedTuple):
+    customer_id: str
+    old_segment: Optional[str]
+    new_segment: str
+
+
+def recency_score(last_order_date: Optional[datetime], now: Optional[datetime] = None) -> int:
+    if not last_order_date:
+        return 1
+    days_ago = ((now or datetime.utcnow()) - last_order_date).days
+    for score, days in RECENCY_DAYS:
+        if days_ago <= days:
+            return score
+    return 1
+
+
+def frequency_score(total_orders: Optional[int]) -> int:
+    orders = total_orders or 0
+    for score, minimum in FREQUENCY_ORDERS:
+        if orders >= minimum:
+            return score
+    return 1
+
+
+def monetary_score(total_spent: Optional[Decimal], breakpoints: Breakpoints) -> int:
+    spent = Decimal(total_spent or 0)
+    for score, breakpoint in zip((5, 4, 3, 2), reversed(breakpoints)):
+        if spent >= breakpoint:
+            return score
+    return 1
+
+
+def assign_segment(r: int, f: int, m: int) -> str:
+    """
+    Segments:
+    - champions: High R, F, M (best customers)
+    - loyal: Regular buyers
+    - at_risk: Good customers going quiet
+    - lapsed: Haven't bought in a while
+    - new_customers: Recent first purchase
+    - lost: Inactive for 180+ days
+    - potential: Everyone else
+    """
+    if r >= 4 and f >= 4 and m >= 4:
+        return "champions"
+    if r >= 3 and f >= 3:
+        return "loyal"
+    if r <= 2 and f >= 3 and m >= 3:
+        return "at_risk"
+    if r == 1 and f >= 2:
+        return "lapsed"
+    if r >= 4 and f == 1:
+        return "new_customers"
+    if r == 1 and f == 1:
+        return "lost"
+    return "potential"
+
+
+# ---------------------------------------------------------------------------
+# SQL counterparts
+# ---------------------------------------------------------------------------
+
+def _recency_sql(now: datetime):
+    # days_ago <= N  <=>  last_order_date > now - (N + 1) days
+    return case(
+        *[(Customer.last_order_date > now - timedelta(days=days + 1), score) for score, days in RECENCY_DAYS],
+        else_=1,
+    )
+
+
+def _frequency_sql():
+    orders = func.coalesce(Customer.total_orders, 0)
+    return case(*[(orders >= minimum, score) for score, minimum in FREQUENCY_ORDERS], else_=1)
+
+
+def _monetary_sql(breakpoints: Breakpoints):
+    spent = func.coalesce(Customer.total_spent, 0)
+    return case(
+        *[(spent >= breakpoint, score) for score, breakpoint in zip((5, 4, 3, 2), reversed(breakpoints))],
+        else_=1,
+    )
+
+
+def _segment_sql(r, f, m):
+    return case(
+        (and_(r >= 4, f >= 4, m >= 4), "champions"),
+        (and_(r >= 3, f >= 3), "loyal"),
+        (and_(r <= 2, f >= 3, m >= 3), "at_risk"),
+        (and_(r == 1, f >= 2), "lapsed"),
+        (and_(r >= 4, f == 1), "new_customers"),
+        (and_(r == 1, f == 1), "lost"),
+        else_="potential",
+    )
+
+
+class RFMService:
+    """Set-based RFM segmentation for one merchant."""
+
+    def __init__(self, merchant_id: str):
+        self.merchant_id = merchant_id
+
+    async def monetary_breakpoints(self, session) -> Breakpoints:
+        """20/40/60/80th percentile of total_spent over customers who spent anything."""
+        ranked = (
+            select(
+                Customer.total_spent.label("spent"),
+                (func.row_number().over(order_by=Customer.total_spent) - 1).label("idx"),
+                func.count().over().label("n"),
+            )
+            .where(Customer.merchant_id == self.merchant_id, Customer.total_spent > 0)
+            .subquery()
+        )
+        row = (await session.execute(select(
+            func.max(ranked.c.n),
+            *[func.max(case((ranked.c.idx == (ranked.c.n * p) // 100, ranked.c.spent)))
+              for p in MONETARY_PERCENTILES],
+        ))).one()
+        n, *values = row
+        if not n or n <= MIN_CUSTOMERS_FOR_PERCENTILES:
+            return DEFAULT_BREAKPOINTS
+        return tuple(Decimal(str(value)) for value in values)
+
+    async def segment_all(self) -> Dict:
+        """Scores and segments every customer of the merchant in one UPDATE."""
+        now = datetime.utcnow()
+        async with async_session_maker() as session:
+            breakpoints = await self.monetary_breakpoints(session)
+
+            r, f, m = _recency_sql(now), _frequency_sql(), _monetary_sql(breakpoints)
+            stmt = (
+                update(Customer)
+                .where(Customer.merchant_id == self.merchant_id)
+                .values(
+                    recency_score=r,
+                    frequency_score=f,
+                    monetary_score=m,
+                    rfm_segment=_segment_sql(r, f, m),
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+            if session.bind.dialect.name == "postgresql":
+                updated = stmt.returning(Customer.rfm_segment).cte("updated")
+                counts_stmt = select(updated.c.rfm_segment, func.count()).group_by(updated.c.rfm_segment)
+                rows = (await session.execute(counts_stmt)).all()
+            else:
+                await session.execute(stmt)
+                rows = (await session.execute(
+                    select(Customer.rfm_segment, func.count(Customer.id))
+                    .where(Customer.merchant_id == self.merchant_id)
+                    .group_by(Customer.rfm_segment)
+                )).all()
+            await session.commit()
+
+        # Segments changed: the audience bitmaps are rebuilt on next use
+        await invalidate_audience_index(self.merchant_id)
+        await cache_breakpoints(self.merchant_id, breakpoints)
+
+        segment_counts = {segment: 0 for segment in SEGMENTS}
+        segment_counts.update({segment: count for segment, count in rows})
+        total = sum(segment_counts.values())
+        if not total:
+            return {"status": "no_customers"}
+
+        logger.info(f"👥 RFM segmented {total} customers for merchant {self.merchant_id}: {segment_counts}")
+        return {
+            "status": "completed",
+            "total_customers": total,
+            "segments": segment_counts,
+            "breakpoints": [float(b) for b in breakpoints],
+        }
+
+    async def apply_order(
+        self,
+        session,
+        platform_customer_id,
+        order_total: Decimal,
+        ordered_at: datetime,
+    ) -> Optional[SegmentChange]:
+        """
+        Folds one new order into its customer's aggregates and re-scores them
+        against the cached breakpoints. Runs in the caller's transaction;
+        returns None if the customer isn't known yet.
+        """
+        customer = (await session.execute(
+            select(Customer)
+            .where(Customer.merchant_id == self.merchant_id, Customer.shopify_customer_id == platform_customer_id)
+            .with_for_update()
+        )).scalar_one_or_none()
+        if customer is None:
+            return None
+
+        customer.total_orders = (customer.total_orders or 0) + 1
+        customer.total_spent = Decimal(customer.total_spent or 0) + Decimal(str(order_total))
+        customer.avg_order_value = (customer.total_spent / customer.total_orders).quantize(Decimal("0.01"))
+        if customer.last_order_date is None or ordered_at > customer.last_order_date:
+            customer.last_order_date = ordered_at
+
+        breakpoints = await get_breakpoints(self.merchant_id, session)
+        old_segment = customer.rfm_segment
+        customer.recency_score = recency_score(customer.last_order_date)
+        customer.frequency_score = frequency_score(customer.total_orders)
+        customer.monetary_score = monetary_score(customer.total_spent, breakpoints)
+        customer.rfm_segment = assign_segment(customer.recency_score, customer.frequency_score, customer.monetary_score)
+        return SegmentChange(customer.id, old_segment, customer.rfm_segment)
+
+
+# ---------------------------------------------------------------------------
+# Breakpoint cache
+# ---------------------------------------------------------------------------
+
+def breakpoints_key(merchant_id: str) -> str:
+    return f"rfm_breakpoints:{merchant_id}"
+
+
+def _redis():
+    from redis.asyncio import from_url
+    return from_url(settings.REDIS_URL, decode_responses=True, socket_timeout=1, socket_connect_timeout=1)
+
+
+async def cache_breakpoints(merchant_id: str, breakpoints: Breakpoints):
+    redis = _redis()
+    try:
+        await redis.set(
+            breakpoints_key(merchant_id),
+            json.dumps([str(b) for b in breakpoints]),
+            ex=settings.RFM_BREAKPOINTS_TTL_SECONDS,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to cache RFM breakpoints for {merchant_id}: {e}")
+    finally:
+        await redis.close()
+
+
+async def get_breakpoints(merchant_id: str, session) -> Breakpoints:
+    """Breakpoints from the last segmentation run; computed (and cached) if missing."""
+    redis = _redis()
+    try:
+        raw = await redis.get(breakpoints_key(merchant_id))
+        if raw:
+            return tuple(Decimal(b) for b in json.loads(raw))
+    except Exception as e:
+        logger.warning(f"RFM breakpoint cache unavailable for {merchant_id}: {e}")
+    finally:
+        await redis.close()
+
+    breakpoints = await RFMService(merchant_id).monetary_breakpoints(session)
+    await cache_breakpoints(merchant_id, breakpoints)
+    return breakpoints
@@ -0,0 +1,321 @@
+# app/services/rollups.py
+"""
+Daily Rollups
+=============
+Per-merchant daily facts behind the analytics, ROI and CRM dashboards.
+
+Dashboards used to SUM the whole Ledger / LLMUsageLog / Campaign tables on
+every page view. Facts now land in daily_merchant_rollups (plus
+daily_llm_cost_rollups by task type), keyed by (merchant_id, UTC day):
+
+- Incremental: an after_flush session hook turns new Ledger and LLMUsageLog
+  rows, Campaign open / click / conversion counter bumps and journeys moving
+  to 'converted' into additive upserts on the flushing connection, so the
+  rollups commit or roll back together with the facts.
+- Compaction: compact_rollups() (nightly) recomputes the timestamped facts
+  (ledger, LLM cost) of the last ROLLUP_COMPACTION_DAYS from their source
+  tables, repairing drift from writers that bypass the ORM, and snapshots the
+  customer gauges. Campaign counters and journey transitions carry no
+  per-event time, so those stay incremental-only.
+- Reads are index range scans over one row per day.
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, update, delete
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import (
+    Campaign, CommercialJourney, Customer, DailyLLMCostRollup, DailyMerchantRollup, Ledger, LLMUsageLog,
+)
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+LEDGER_FACTS = ("attributed_orders", "attributed_revenue", "net_margin", "agent_stake")
+LLM_FACTS = ("llm_calls", "llm_cost")
+ENGAGEMENT_FACTS = ("emails_opened", "emails_clicked", "conversions", "journeys_converted")
+MERCHANT_FACTS = LEDGER_FACTS + LLM_FACTS + ENGAGEMENT_FACTS
+
+# Campaign counter -> rollup column
+_CAMPAIGN_COUNTERS = {
+    "emails_opened": "emails_opened",
+    "emails_clicked": "emails_clicked",
+    "conversions": "conversions",
+}
+
+AT_RISK_AFTER_DAYS = 60
+
+
+def _insert(conn):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _as_date(value) -> date:
+    """func.date() returns a date on Postgres and an ISO string on SQLite."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _day_of(value: Optional[datetime]) -> date:
+    return (value or datetime.utcnow()).date()
+
+
+def _upsert(conn, table, keys: Dict[str, Any], values: Dict[str, Any], additive: bool = True):
+    insert = _insert(conn)
+    stmt = insert(table).values(**keys, **values)
+    set_ = {
+        column: (table.c[column] + stmt.excluded[column]) if additive else stmt.excluded[column]
+        for column in values
+    }
+    if table is DailyMerchantRollup.__table__:
+        set_["updated_at"] = datetime.utcnow()
+    conn.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=set_))
+
+
+# ---------------------------------------------------------------------------
+# Incremental maintenance
+# ---------------------------------------------------------------------------
+
+def _collect_deltas(session: Session) -> Tuple[Dict, Dict]:
+    """Fact deltas of this flush; new / dirty still show pre-flush state in after_flush."""
+    merchant_deltas: Dict[Tuple[str, date], Counter] = defaultdict(Counter)
+    llm_deltas: Dict[Tuple[str, date, str], Counter] = defaultdict(Counter)
+
+    for obj in session.new:
+        if isinstance(obj, Ledger):
+            facts = merchant_deltas[(obj.merchant_id, _day_of(obj.created_at))]
+            facts["attributed_orders"] += 1
+            facts["attributed_revenue"] += obj.gross_amount or Decimal("0")
+            facts["net_margin"] += obj.net_amount or Decimal("0")
+            facts["agent_stake"] += obj.agent_stake or Decimal("0")
+        elif isinstance(obj, LLMUsageLog) and obj.merchant_id:
+            day = _day_of(obj.created_at)
+            cost = obj.cost_usd or Decimal("0")
+            merchant_deltas[(obj.merchant_id, day)]["llm_calls"] += 1
+            merchant_deltas[(obj.merchant_id, day)]["llm_cost"] += cost
+            llm_deltas[(obj.merchant_id, day, obj.task_type or "unknown")]["calls"] += 1
+            llm_deltas[(obj.merchant_id, day, obj.task_type or "unknown")]["cost_usd"] += cost
+
+    today = datetime.utcnow().date()
+    for obj in session.dirty:
+        if isinstance(obj, Campaign):
+            state = inspect(obj)
+            for attr, column in _CAMPAIGN_COUNTERS.items():
+                history = state.attrs[attr].history
+                if history.added and history.deleted:
+                    new, old = history.added[0] or 0, history.deleted[0] or 0
+                    # SQL-expression increments are not countable here; compaction can't recover them either
+                    delta = new - old if isinstance(new, int) and isinstance(old, int) else 0
+                    if delta:
+                        merchant_deltas[(obj.merchant_id, today)][column] += delta
+        elif isinstance(obj, CommercialJourney):
+            history = inspect(obj).attrs.status.history
+            if history.added and history.added[0] == "converted" and history.deleted and history.deleted[0] != "converted":
+                merchant_deltas[(obj.merchant_id, today)]["journeys_converted"] += 1
+
+    return merchant_deltas, llm_deltas
+
+
+def _apply_deltas(session: Session, flush_context):
+    """after_flush: adds this flush's facts to the rollups inside the same transaction."""
+    merchant_deltas, llm_deltas = _collect_deltas(session)
+    if not merchant_deltas and not llm_deltas:
+        return
+
+    conn = session.connection()
+    for (merchant_id, day), facts in merchant_deltas.items():
+        values = {column: value for column, value in facts.items() if value}
+        if values:
+            _upsert(conn, DailyMerchantRollup.__table__, {"merchant_id": merchant_id, "day": day}, values)
+    for (merchant_id, day, task_type), facts in llm_deltas.items():
+        _upsert(
+            conn, DailyLLMCostRollup.__table__,
+            {"merchant_id": merchant_id, "day": day, "task_type": task_type}, dict(facts)
+        )
+
+
+_registered = False
+
+
+def register_rollup_hooks():
+    """Installs the session hook (idempotent)."""
+    global _registered
+    if _registered:
+        return
+    event.listen(Session, "after_flush", _apply_deltas)
+    _registered = True
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+
+async def compact_rollups(days: Optional[int] = None, merchant_id: Optional[str] = None) -> Dict[str, int]:
+    """
+    Recomputes ledger and LLM facts of the last `days` days (all history when
+    days=0) from the source tables and snapshots today's customer gauges.
+    Idempotent.
+    """
+    from app.database import async_session_maker
+
+    days = settings.ROLLUP_COMPACTION_DAYS if days is None else days
+    since = datetime.utcnow().date() - timedelta(days=days - 1) if days else None
+
+    def scoped(query, merchant_col, time_col=None):
+        if merchant_id:
+            query = query.where(merchant_col == merchant_id)
+        if since is not None and time_col is not None:
+            query = query.where(time_col >= datetime.combine(since, datetime.min.time()))
+        return query
+
+    def in_range(query, table):
+        if merchant_id:
+            query = query.where(table.c.merchant_id == merchant_id)
+        if since is not None:
+            query = query.where(table.c.day >= since)
+        return query
+
+    async with async_session_maker() as session:
+        ledger_day = func.date(Ledger.created_at)
+        ledger_rows = (await session.execute(scoped(
+            select(
+                Ledger.merchant_id, ledger_day.label("day"), func.count(Ledger.id),
+                func.sum(Ledger.gross_amount), func.sum(Ledger.net_amount), func.sum(Ledger.agent_stake),
+            ).group_by(Ledger.merchant_id, ledger_day),
+            Ledger.merchant_id, Ledger.created_at
+        ))).all()
+
+        llm_day = func.date(LLMUsageLog.created_at)
+        llm_rows = (await session.execute(scoped(
+            select(
+                LLMUsageLog.merchant_id, llm_day.label("day"), LLMUsageLog.task_type,
+                func.count(LLMUsageLog.id), func.sum(LLMUsageLog.cost_usd),
+            ).where(LLMUsageLog.merchant_id.is_not(None))
+            .group_by(LLMUsageLog.merchant_id, llm_day, LLMUsageLog.task_type),
+            LLMUsageLog.merchant_id, LLMUsageLog.created_at
+        ))).all()
+
+        at_risk_before = datetime.utcnow() - timedelta(days=AT_RISK_AFTER_DAYS)
+        gauge_rows = (await session.execute(scoped(
+            select(
+                Customer.merchant_id, func.count(Customer.id),
+                func.count(Customer.id).filter(Customer.last_order_date < at_risk_before),
+            ).group_by(Customer.merchant_id),
+            Customer.merchant_id
+        ))).all()
+
+        def rewrite(sync_session):
+            conn = sync_session.connection()
+            rollups = DailyMerchantRollup.__table__
+            zeroes = {column: 0 for column in LEDGER_FACTS + LLM_FACTS}
+            conn.execute(in_range(update(rollups), rollups).values(**zeroes))
+            conn.execute(in_range(delete(DailyLLMCostRollup.__table__), DailyLLMCostRollup.__table__))
+
+            for mid, day, orders, gross, net, stake in ledger_rows:
+                _upsert(conn, rollups, {"merchant_id": mid, "day": _as_date(day)}, {
+                    "attributed_orders": orders, "attributed_revenue": gross or 0,
+                    "net_margin": net or 0, "agent_stake": stake or 0,
+                }, additive=False)
+
+            llm_totals: Dict[Tuple[str, date], List] = defaultdict(lambda: [0, Decimal("0")])
+            for mid, day, task_type, calls, cost in llm_rows:
+                day = _as_date(day)
+                _upsert(conn, DailyLLMCostRollup.__table__,
+                        {"merchant_id": mid, "day": day, "task_type": task_type or "unknown"},
+                        {"calls": calls, "cost_usd": cost or 0}, additive=True)
+                llm_totals[(mid, day)][0] += calls
+                llm_totals[(mid, day)][1] += Decimal(str(cost or 0))
+            for (mid, day), (calls, cost) in llm_totals.items():
+                _upsert(conn, rollups, {"merchant_id": mid, "day": day},
+                        {"llm_calls": calls, "llm_cost": cost}, additive=False)
+
+            today = datetime.utcnow().date()
+            for mid, reachable, at_risk in gauge_rows:
+                _upsert(conn, rollups, {"merchant_id": mid, "day": today},
+                        {"customers_reachable": reachable, "customers_at_risk": at_risk}, additive=False)
+
+        await session.run_sync(rewrite)
+        await session.commit()
+
+    stats = {"ledger_days": len(ledger_rows), "llm_cost_rows": len(llm_rows), "gauges": len(gauge_rows)}
+    logger.info(f"Compacted rollups since {since or 'the beginning'}: {stats}")
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+class RollupService:
+    """Dashboard reads over one merchant's daily rollups."""
+
+    def __init__(self, merchant_id: str):
+        self.merchant_id = merchant_id
+
+    def _range(self, query, model, start: Optional[date], end: Optional[date]):
+        query = query.where(model.merchant_id == self.merchant_id)
+        if start:
+            query = query.where(model.day >= start)
+        if end:
+            query = query.where(model.day <= end)
+        return query
+
+    async def totals(self, session, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+        """Summed facts over [start, end] (all history by default)."""
+        row = (await session.execute(self._range(
+            select(*[func.coalesce(func.sum(getattr(DailyMerchantRollup, f)), 0).label(f) for f in MERCHANT_FACTS]),
+            DailyMerchantRollup, start, end
+        ))).one()
+        return dict(row._mapping)
+
+    async def series(self, session, start: date, end: date) -> List[Dict[str, Any]]:
+        """One point per day in [start, end]; days without activity are zero."""
+        rows = (await session.execute(self._range(
+            select(DailyMerchantRollup.day, *[getattr(DailyMerchantRollup, f) for f in MERCHANT_FACTS]),
+            DailyMerchantRollup, start, end
+        ).order_by(DailyMerchantRollup.day))).all()
+        by_day = {row.day: row for row in rows}
+
+        points = []
+        day = start
+        while day <= end:
+            row = by_day.get(day)
+            point = {"date": day.isoformat()}
+            for fact in MERCHANT_FACTS:
+                value = getattr(row, fact) if row is not None else 0
+                point[fact] = float(value) if isinstance(value, Decimal) else (value or 0)
+            points.append(point)
+            day += timedelta(days=1)
+        return points
+
+    async def llm_cost_by_task(self, session, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, float]:
+        rows = (await session.execute(self._range(
+            select(DailyLLMCostRollup.task_type, func.sum(DailyLLMCostRollup.cost_usd)),
+            DailyLLMCostRollup, start, end
+        ).group_by(DailyLLMCostRollup.task_type))).all()
+        return {task_type: float(cost or 0) for task_type, cost in rows}
+
+    async def latest_gauges(self, session) -> Optional[Dict[str, int]]:
+        """Customer gauges from the most recent compaction, if any ran."""
+        row = (await session.execute(
+            select(DailyMerchantRollup.customers_reachable, DailyMerchantRollup.customers_at_risk)
+            .where(
+                DailyMerchantRollup.merchant_id == self.merchant_id,
+                DailyMerchantRollup.customers_reachable.is_not(None),
+            )
+            .order_by(DailyMerchantRollup.day.desc())
+            .limit(1)
+        )).one_or_none()
+        if row is None:
+            return None
+        return {"customers_reachable": row.customers_reachable, "customers_at_risk": row.customers_at_risk}
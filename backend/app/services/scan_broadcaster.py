@@ -1,56 +1,84 @@
 """
-Scan Broadcaster Service - Redis Pub/Sub for Live Scan Updates.
+Scan Broadcaster Service - Redis Streams for Live Scan Updates.
 
-Enables real-time communication between Celery background tasks
-and SSE endpoints for the onboarding scanning experience.
+Enables real-time communication between scan workers and SSE endpoints
+for the onboarding scanning experience.
+
+Every scan session is an append-only Redis Stream (`scan_events:{session_id}`):
+- publishers XADD events, so nothing is lost if the browser connects late,
+- the SSE endpoint XREADs with a blocking read on the async client (the event
+  loop is never blocked) and tags every event with its stream id, so a
+  reconnecting EventSource resumes from `Last-Event-ID`,
+- once a terminal event (quick_scan_complete / error) is written the stream
+  only lives SCAN_STREAM_RETENTION_SECONDS more for late joiners and status
+  polls, then expires.
 """
 
 import json
 import logging
-from typing import Dict, Any, Optional
-from app.redis import get_redis_client
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
+TERMINAL_EVENTS = ("quick_scan_complete", "error")
+
 
 class ScanBroadcaster:
     """
-    Redis pub/sub broadcaster for live scan updates.
-    
+    Redis Streams broadcaster for live scan updates.
+
     Usage:
-    - Celery task publishes: broadcaster.publish_dead_stock_found(session_id, data)
-    - SSE endpoint subscribes: async for event in broadcaster.subscribe(session_id)
+    - Scan worker publishes: await broadcaster.publish_dead_stock_found(session_id, ...)
+    - SSE endpoint reads:   await broadcaster.read(session_id, last_id, block_ms=...)
     """
-    
-    CHANNEL_PREFIX = "scan_session:"
-    
+
+    STREAM_PREFIX = "scan_events:"
+
     def __init__(self):
-        self.redis = get_redis_client()
-    
-    def _get_channel(self, session_id: str) -> str:
-        return f"{self.CHANNEL_PREFIX}{session_id}"
-    
-    def publish_dead_stock_found(
-        self, 
-        session_id: str, 
+        from redis.asyncio import from_url
+        self.redis = from_url(settings.REDIS_URL, decode_responses=True)
+
+    def _get_stream(self, session_id: str) -> str:
+        return f"{self.STREAM_PREFIX}{session_id}"
+
+    async def publish(self, session_id: str, message: Dict[str, Any]) -> str:
+        """Appends an event to the session's stream. Returns its stream id."""
+        stream = self._get_stream(session_id)
+        ttl = (
+            settings.SCAN_STREAM_RETENTION_SECONDS
+            if message.get("type") in TERMINAL_EVENTS
+            else settings.SCAN_STREAM_TTL_SECONDS
+        )
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(stream, {"data": json.dumps(message)}, maxlen=settings.SCAN_STREAM_MAXLEN, approximate=True)
+            pipe.expire(stream, ttl)
+            event_id, _ = await pipe.execute()
+        return event_id
+
+    async def publish_dead_stock_found(
+        self,
+        session_id: str,
         product: Dict[str, Any],
         running_total: Dict[str, Any]
     ):
         """
         Publish when a dead stock product is found.
-        Called from quick_scan Celery task.
+        Called from the quick scan.
         """
         message = {
             "type": "dead_stock_found",
             "product": product,
             "running_total": running_total
         }
-        channel = self._get_channel(session_id)
-        self.redis.publish(channel, json.dumps(message))
-        logger.info(f"📡 Published dead_stock_found to {channel}")
-    
-    def publish_scan_progress(
-        self, 
+        await self.publish(session_id, message)
+        logger.info(f"📡 Published dead_stock_found to {self._get_stream(session_id)}")
+
+    async def publish_scan_progress(
+        self,
         session_id: str,
         products_scanned: int,
         total_products: int
@@ -61,10 +89,10 @@ class ScanBroadcaster:
             "products_scanned": products_scanned,
             "total_products": total_products
         }
-        self.redis.publish(self._get_channel(session_id), json.dumps(message))
-    
-    def publish_quick_scan_complete(
-        self, 
+        await self.publish(session_id, message)
+
+    async def publish_quick_scan_complete(
+        self,
         session_id: str,
         summary: Dict[str, Any]
     ):
@@ -76,25 +104,41 @@ class ScanBroadcaster:
             "type": "quick_scan_complete",
             "summary": summary
         }
-        self.redis.publish(self._get_channel(session_id), json.dumps(message))
+        await self.publish(session_id, message)
         logger.info(f"✅ Published quick_scan_complete to {session_id}")
-    
-    def publish_error(self, session_id: str, error: str):
+
+    async def publish_error(self, session_id: str, error: str):
         """Publish error event."""
         message = {
             "type": "error",
             "error": error
         }
-        self.redis.publish(self._get_channel(session_id), json.dumps(message))
-    
-    def get_pubsub(self, session_id: str):
+        await self.publish(session_id, message)
+
+    async def read(
+        self,
+        session_id: str,
+        last_id: str = "0-0",
+        block_ms: Optional[int] = None,
+        count: int = 100
+    ) -> List[Tuple[str, Dict[str, Any]]]:
         """
-        Get a pubsub object for subscribing to scan events.
-        Used by SSE endpoint.
+        Events after `last_id` ("0-0" = from the start), waiting up to
+        `block_ms` for new ones. Returns [(stream id, event)].
         """
-        pubsub = self.redis.pubsub()
-        pubsub.subscribe(self._get_channel(session_id))
-        return pubsub
+        response = await self.redis.xread({self._get_stream(session_id): last_id}, count=count, block=block_ms)
+        events = []
+        for _, entries in response or []:
+            for event_id, fields in entries:
+                events.append((event_id, json.loads(fields["data"])))
+        return events
+
+    async def last_event(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent event of a session, if its stream still exists."""
+        entries = await self.redis.xrevrange(self._get_stream(session_id), count=1)
+        if not entries:
+            return None
+        return json.loads(entries[0][1]["data"])
 
 
 # Singleton for easy access
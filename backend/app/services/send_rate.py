@@ -0,0 +1,237 @@
+# app/services/send_rate.py
+"""
+Send Rate Controller
+====================
+Shared, adaptive pacing of outbound sends per (provider, provider account).
+
+The waterfall used to send fixed batches of 20 every 120 seconds, whatever
+the provider allowed: far below Twilio / Klaviyo limits for most accounts,
+yet two workers sending for the same account doubled the rate and tripped
+429s. Pacing now comes from one token bucket per account, kept in Redis
+(`send_rate:{provider}:{account}`) so every worker draws from the same one:
+
+- acquire() takes a token atomically (Lua; Redis TIME is the clock) or
+  returns how long to wait for one,
+- the refill rate is AIMD: each success adds SEND_RATE_INCREASE / rate
+  (about +SEND_RATE_INCREASE msg/s per second of sending); a 429 halves it
+  and blocks the bucket for Retry-After, a response slower than
+  SEND_RATE_LATENCY_TARGET_MS cuts it by the same factor (at most once per
+  SEND_RATE_DECREASE_COOLDOWN_SECONDS so a burst of in-flight failures
+  counts once),
+- priorities keep a reserve: lower priorities leave a fraction of the burst
+  to higher ones (never more than the bucket can hold, so a small bucket at
+  the floor rate still serves every priority),
+- per-campaign counters (`send_stats:{campaign_id}`) give the achieved rate.
+
+Connectors report every response through observe(); WaterfallService paces
+with RateLimitedDrip. If Redis is down, sends fall back to the provider's
+minimum rate locally.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Fraction of the burst a priority must leave in the bucket
+PRIORITY_RESERVE = {"high": 0.0, "normal": 0.2, "low": 0.5}
+
+# Never sleep longer than this between re-checks (other workers may return tokens by backing off)
+MAX_WAIT_SECONDS = 5.0
+
+_ACQUIRE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost, reserve = tonumber(ARGV[1]), tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'rate', 'tokens', 'ts', 'blocked_until')
+local rate = tonumber(state[1]) or tonumber(ARGV[3])
+local burst = math.max(rate * tonumber(ARGV[4]), cost)
+local tokens = tonumber(state[2]) or burst
+local ts = tonumber(state[3]) or now
+local blocked = tonumber(state[4]) or 0
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if now < blocked then
+    wait = blocked - now
+else
+    -- Tokens are capped at burst: a larger requirement could never be met
+    local need = math.min(cost + reserve * burst, burst)
+    if tokens >= need then
+        tokens = tokens - cost
+    else
+        wait = (need - tokens) / rate
+    end
+end
+redis.call('HSET', KEYS[1], 'rate', rate, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return tostring(wait)
+"""
+
+# ARGV: kind (ok | slow | throttled), retry_after, initial, min, max, increase, decrease, cooldown, ttl
+_OBSERVE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local kind = ARGV[1]
+local state = redis.call('HMGET', KEYS[1], 'rate', 'decreased_at', 'blocked_until')
+local rate = tonumber(state[1]) or tonumber(ARGV[3])
+local decreased_at = tonumber(state[2]) or 0
+local min_rate, max_rate = tonumber(ARGV[4]), tonumber(ARGV[5])
+if kind == 'ok' then
+    rate = math.min(max_rate, rate + tonumber(ARGV[6]) / rate)
+elseif now - decreased_at >= tonumber(ARGV[8]) then
+    rate = math.max(min_rate, rate * tonumber(ARGV[7]))
+    redis.call('HSET', KEYS[1], 'decreased_at', now)
+end
+if kind == 'throttled' then
+    local blocked = math.max(tonumber(state[3]) or 0, now + tonumber(ARGV[2]))
+    redis.call('HSET', KEYS[1], 'blocked_until', blocked, 'tokens', 0, 'ts', now)
+end
+redis.call('HSET', KEYS[1], 'rate', rate)
+redis.call('EXPIRE', KEYS[1], ARGV[9])
+return tostring(rate)
+"""
+
+
+def bucket_key(provider: str, account: str) -> str:
+    return f"send_rate:{provider}:{account}"
+
+
+def stats_key(campaign_id: str) -> str:
+    return f"send_stats:{campaign_id}"
+
+
+def account_key(secret: str) -> str:
+    """Stable bucket id for accounts identified by an API key (never put the key itself in Redis)."""
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+def retry_after_seconds(headers, default: float = 1.0) -> float:
+    try:
+        return max(float(headers.get("Retry-After")), 0.0)
+    except (TypeError, ValueError, AttributeError):
+        return default
+
+
+def _redis():
+    from redis.asyncio import from_url
+    return from_url(settings.REDIS_URL, decode_responses=True, socket_timeout=1, socket_connect_timeout=1)
+
+
+class SendRateController:
+    """Token buckets per (provider, account) with AIMD refill rates, shared through Redis."""
+
+    def __init__(self, redis=None):
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = _redis()
+        return self._redis
+
+    @staticmethod
+    def limits(provider: str) -> Dict[str, float]:
+        return settings.SEND_RATE_LIMITS.get(provider) or settings.SEND_RATE_LIMITS["default"]
+
+    async def acquire(self, provider: str, account: str, priority: str = "normal", cost: float = 1) -> float:
+        """Waits until a send may go out; returns the seconds spent waiting."""
+        limits = self.limits(provider)
+        reserve = PRIORITY_RESERVE.get(priority, PRIORITY_RESERVE["normal"])
+        waited = 0.0
+        while True:
+            try:
+                wait = float(await self.redis.eval(
+                    _ACQUIRE, 1, bucket_key(provider, account),
+                    cost, reserve, limits["initial"], settings.SEND_RATE_BURST_SECONDS,
+                    settings.SEND_RATE_STATE_TTL_SECONDS,
+                ))
+            except Exception as e:
+                # Redis unavailable: pace this process at the provider's floor rate
+                logger.warning(f"Send rate controller unavailable, using minimum rate for {provider}: {e}")
+                wait = cost / limits["min"]
+                await asyncio.sleep(wait)
+                return waited + wait
+            if wait <= 0:
+                return waited
+            wait = min(wait, MAX_WAIT_SECONDS)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    async def observe(
+        self,
+        provider: str,
+        account: str,
+        status_code: Optional[int],
+        latency: Optional[float] = None,
+        retry_after: Optional[float] = None,
+    ) -> Optional[float]:
+        """Feeds one provider response back into the account's rate; returns the new rate."""
+        if status_code == 429:
+            kind = "throttled"
+        elif status_code is not None and status_code >= 500:
+            kind = "slow"
+        elif latency is not None and latency * 1000 > settings.SEND_RATE_LATENCY_TARGET_MS:
+            kind = "slow"
+        else:
+            kind = "ok"
+
+        limits = self.limits(provider)
+        try:
+            rate = float(await self.redis.eval(
+                _OBSERVE, 1, bucket_key(provider, account),
+                kind, retry_after if retry_after is not None else 1.0,
+                limits["initial"], limits["min"], limits["max"],
+                settings.SEND_RATE_INCREASE, settings.SEND_RATE_DECREASE,
+                settings.SEND_RATE_DECREASE_COOLDOWN_SECONDS, settings.SEND_RATE_STATE_TTL_SECONDS,
+            ))
+        except Exception as e:
+            logger.warning(f"Failed to record {provider} response for rate control: {e}")
+            return None
+        if kind != "ok":
+            logger.info(f"📉 {provider} send rate for {account} now {rate:.2f}/s ({kind})")
+        return rate
+
+    async def record_send(self, campaign_id: str, waited: float = 0.0):
+        """Counts one paced send toward the campaign's achieved rate."""
+        now = time.time()
+        try:
+            key = stats_key(campaign_id)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, "sent", 1)
+                pipe.hincrbyfloat(key, "waited", waited)
+                pipe.hsetnx(key, "first", now)
+                pipe.hset(key, "last", now)
+                pipe.expire(key, settings.SEND_RATE_STATE_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to record send for campaign {campaign_id}: {e}")
+
+    async def campaign_rate(self, campaign_id: str) -> Dict:
+        """Achieved send rate of a campaign (sends per second between its first and last send)."""
+        stats = await self.redis.hgetall(stats_key(campaign_id))
+        sent = int(stats.get("sent", 0))
+        elapsed = float(stats["last"]) - float(stats["first"]) if sent else 0.0
+        return {
+            "campaign_id": campaign_id,
+            "sent": sent,
+            "elapsed_seconds": round(elapsed, 3),
+            "sends_per_second": round(sent / elapsed, 3) if elapsed > 0 else None,
+            "waited_seconds": round(float(stats.get("waited", 0)), 3),
+        }
+
+
+_controller: Optional[SendRateController] = None
+
+
+def get_send_rate_controller() -> SendRateController:
+    global _controller
+    if _controller is None:
+        _controller = SendRateController()
+    return _controller
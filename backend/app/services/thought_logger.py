@@ -7,6 +7,7 @@ from typing import Optional, Any, Dict, List
 from sqlalchemy import select, desc
 from app.database import async_session_maker
 from app.models import AgentThought
+from app.services.thought_retention import hot_window_start
 
 logger = logging.getLogger(__name__)
 
@@ -44,27 +45,21 @@ class ThoughtLogger:
             confidence_score: 0-1 score indicating agent certainty.
             step_number: Sequence number of the thought within a larger process.
         """
-        # Merge evidence/product_id into detailed_reasoning if provided
-        detailed_reasoning = detailed_reasoning or {}
-        if evidence:
-            detailed_reasoning["_forensic_evidence"] = evidence
-        if product_id:
-            detailed_reasoning["product_id"] = product_id
-        if kwargs:
-            detailed_reasoning["_extra_metadata"] = kwargs
+        thought = ThoughtLogger.build_thought(
+            merchant_id=merchant_id,
+            agent_type=agent_type,
+            thought_type=thought_type,
+            summary=summary,
+            detailed_reasoning=detailed_reasoning,
+            execution_id=execution_id,
+            evidence=evidence,
+            confidence_score=confidence_score,
+            step_number=step_number,
+            product_id=product_id,
+            **kwargs
+        )
 
         async with async_session_maker() as session:
-            thought = AgentThought(
-                merchant_id=merchant_id,
-                agent_type=agent_type,
-                thought_type=thought_type,
-                summary=summary,
-                detailed_reasoning=detailed_reasoning,
-                execution_id=execution_id,
-                confidence_score=Decimal(str(confidence_score)),
-                step_number=step_number,
-                created_at=datetime.utcnow()
-            )
             session.add(thought)
             await session.commit()
             await session.refresh(thought)
@@ -75,6 +70,85 @@ class ThoughtLogger:
             
             return thought
 
+    @staticmethod
+    def build_thought(
+        merchant_id: str,
+        agent_type: str,
+        thought_type: str,
+        summary: str,
+        detailed_reasoning: Optional[Dict[str, Any]] = None,
+        execution_id: Optional[str] = None,
+        evidence: Optional[Dict[str, Any]] = None,
+        confidence_score: float = 1.0,
+        step_number: int = 1,
+        product_id: Optional[str] = None,
+        **kwargs
+    ) -> AgentThought:
+        """
+        Builds an unsaved AgentThought, merging evidence, product_id and any
+        extra metadata into detailed_reasoning. The product reference (argument
+        or detailed_reasoning["product_id"]) is also stored in the indexed
+        product_id column.
+        """
+        detailed_reasoning = dict(detailed_reasoning or {})
+        if evidence:
+            detailed_reasoning["_forensic_evidence"] = evidence
+        if product_id:
+            detailed_reasoning["product_id"] = product_id
+        if kwargs:
+            detailed_reasoning["_extra_metadata"] = kwargs
+
+        # Promote the product reference to an indexed column for memory recall
+        thought_product_id = detailed_reasoning.get("product_id")
+
+        return AgentThought(
+            merchant_id=merchant_id,
+            agent_type=agent_type,
+            thought_type=thought_type,
+            summary=summary,
+            detailed_reasoning=detailed_reasoning,
+            execution_id=execution_id,
+            product_id=str(thought_product_id) if thought_product_id else None,
+            confidence_score=Decimal(str(confidence_score)),
+            step_number=step_number,
+            created_at=datetime.utcnow()
+        )
+
+    @staticmethod
+    async def log_thoughts_bulk(
+        merchant_id: str,
+        agent_type: str,
+        thoughts: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Records a batch of reasoning steps in a single transaction.
+
+        Identity (merchant_id / agent_type) is applied to every row by the
+        caller, never taken from the individual thought payloads.
+
+        Args:
+            merchant_id: ID of the merchant the thoughts relate to.
+            agent_type: The authenticated agent that produced them.
+            thoughts: Dicts accepted by build_thought (thought_type, summary, ...).
+
+        Returns:
+            Number of thoughts written.
+        """
+        if not thoughts:
+            return 0
+
+        rows = [
+            ThoughtLogger.build_thought(merchant_id=merchant_id, agent_type=agent_type, **t)
+            for t in thoughts
+        ]
+
+        async with async_session_maker() as session:
+            session.add_all(rows)
+            await session.commit()
+
+        logger.info(f"AgentThought [{agent_type}] bulk-logged {len(rows)} thoughts for merchant {merchant_id}")
+        return len(rows)
+
     @staticmethod
     async def recall_thoughts(
         merchant_id: str,
@@ -101,6 +175,7 @@ class ThoughtLogger:
             query = (
                 select(AgentThought)
                 .where(AgentThought.merchant_id == merchant_id)
+                .where(AgentThought.created_at >= hot_window_start())
                 .order_by(desc(AgentThought.created_at))
                 .limit(limit)
             )
@@ -0,0 +1,361 @@
+# app/services/thought_retention.py
+"""
+Thought Retention
+=================
+Keeps agent_thoughts bounded.
+
+On Postgres, agent_thoughts is range-partitioned by month on created_at
+(partitions are named agent_thoughts_pYYYY_MM). Maintenance runs daily:
+
+1. Pre-create partitions for the coming months.
+2. Compact: per-product observations older than THOUGHT_COMPACTION_AFTER_DAYS
+   are rolled up into one 'observation_summary' thought per product per month.
+3. Retention: whole partitions older than the longest per-type retention are
+   dropped; shorter per-type retentions are enforced with deletes that only
+   touch the old partitions.
+
+Recall paths use hot_window_start() so they only scan recent partitions.
+On databases without partitioning (SQLite dev/test) the same steps run as
+plain deletes.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, delete, func, desc, text
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import AgentThought
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+PARTITION_PREFIX = "agent_thoughts_p"
+DEFAULT_PARTITION = "agent_thoughts_default"
+_PARTITION_NAME = re.compile(r"^agent_thoughts_p(\d{4})_(\d{2})$")
+
+COMPACTED_THOUGHT_TYPE = "observation"
+SUMMARY_THOUGHT_TYPE = "observation_summary"
+
+
+def hot_window_start(now: Optional[datetime] = None) -> datetime:
+    """Earliest created_at that memory recall should read."""
+    return (now or datetime.utcnow()) - timedelta(days=settings.THOUGHT_HOT_WINDOW_DAYS)
+
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def next_month(dt: datetime) -> datetime:
+    return datetime(dt.year + 1, 1, 1) if dt.month == 12 else datetime(dt.year, dt.month + 1, 1)
+
+
+def iter_months(start: datetime, end: datetime) -> Iterator[datetime]:
+    """Yields month starts from start's month up to (excluding) end."""
+    m = month_start(start)
+    while m < end:
+        yield m
+        m = next_month(m)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}"
+
+
+def parse_partition_month(name: str) -> Optional[datetime]:
+    """Returns the month a partition covers, or None for non-monthly partitions."""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+def build_observation_summary(
+    merchant_id: str,
+    agent_type: str,
+    product_id: str,
+    period: datetime,
+    severity_rows: List[Tuple[Optional[str], int, datetime, datetime, Any]],
+    latest_summary: Optional[str],
+) -> AgentThought:
+    """
+    Builds the monthly roll-up for one product from its per-severity aggregates.
+
+    severity_rows: (severity, count, first_created_at, last_created_at, avg_confidence)
+    """
+    total = sum(r[1] for r in severity_rows)
+    first_seen = min(r[2] for r in severity_rows)
+    last_seen = max(r[3] for r in severity_rows)
+    avg_confidence = sum(float(r[4] or 0) * r[1] for r in severity_rows) / total if total else 1.0
+    severity_counts = {(r[0] or "unknown"): r[1] for r in severity_rows}
+    label = period.strftime("%Y-%m")
+
+    return AgentThought(
+        merchant_id=merchant_id,
+        agent_type=agent_type,
+        thought_type=SUMMARY_THOUGHT_TYPE,
+        product_id=product_id,
+        summary=f"{total} observations in {label}. Latest: {latest_summary or 'n/a'}",
+        detailed_reasoning={
+            "product_id": product_id,
+            "period": label,
+            "observation_count": total,
+            "severity_counts": severity_counts,
+            "first_observed_at": first_seen.isoformat(),
+            "last_observed_at": last_seen.isoformat(),
+            "latest_summary": latest_summary,
+        },
+        confidence_score=Decimal(str(round(avg_confidence, 2))),
+        step_number=1,
+        # Keep the summary in the month (and partition) it describes
+        created_at=last_seen,
+    )
+
+
+class ThoughtRetentionService:
+    """
+    Partition management, compaction and retention for agent_thoughts.
+
+    Usage:
+        stats = await ThoughtRetentionService().run()
+    """
+
+    def __init__(self, now: Optional[datetime] = None):
+        self.now = now or datetime.utcnow()
+        self.retention_days: Dict[str, int] = dict(settings.THOUGHT_RETENTION_DAYS)
+        self.default_retention = self.retention_days.pop("default", 180)
+
+    async def run(self) -> Dict[str, Any]:
+        """Runs every maintenance step; returns counters for logging."""
+        created = await self.ensure_partitions()
+        compacted = await self.compact_observations()
+        dropped = await self.drop_expired_partitions()
+        purged = await self.purge_expired_thoughts()
+
+        stats = {
+            "partitions_created": created,
+            "partitions_dropped": dropped,
+            "observations_compacted": compacted["observations"],
+            "summaries_created": compacted["summaries"],
+            "thoughts_purged": purged,
+        }
+        logger.info(f"🧹 Thought maintenance complete: {stats}")
+        return stats
+
+    # =========================================================================
+    # PARTITIONS
+    # =========================================================================
+
+    async def _is_partitioned(self, session) -> bool:
+        if session.bind.dialect.name != "postgresql":
+            return False
+        result = await session.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = 'agent_thoughts'"
+        ))
+        return result.scalar() is not None
+
+    async def _list_partitions(self, session) -> List[str]:
+        result = await session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'agent_thoughts'"
+        ))
+        return [row[0] for row in result]
+
+    async def ensure_partitions(self, months_ahead: Optional[int] = None) -> int:
+        """
+        Creates monthly partitions from the current month through months_ahead,
+        and the DEFAULT catch-all if it is missing (a table just created from
+        the models has no partitions at all).
+        """
+        months_ahead = settings.THOUGHT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+
+        async with async_session_maker() as session:
+            if not await self._is_partitioned(session):
+                return 0
+
+            existing = set(await self._list_partitions(session))
+            created = 0
+            month = month_start(self.now)
+            for _ in range(months_ahead + 1):
+                name = partition_name(month)
+                if name not in existing:
+                    await session.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF agent_thoughts "
+                        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+                    ))
+                    created += 1
+                month = next_month(month)
+
+            if DEFAULT_PARTITION not in existing:
+                await session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF agent_thoughts DEFAULT"
+                ))
+                created += 1
+
+            await session.commit()
+            if created:
+                logger.info(f"Created {created} agent_thoughts partitions")
+            return created
+
+    async def drop_expired_partitions(self) -> int:
+        """
+        Drops monthly partitions whose entire range is past the longest
+        retention of any thought type.
+        """
+        max_days = max([self.default_retention, *self.retention_days.values()])
+        cutoff = self.now - timedelta(days=max_days)
+
+        async with async_session_maker() as session:
+            if not await self._is_partitioned(session):
+                return 0
+
+            dropped = 0
+            for name in await self._list_partitions(session):
+                month = parse_partition_month(name)
+                if month is not None and next_month(month) <= cutoff:
+                    # Name comes from pg_class and matched _PARTITION_NAME
+                    await session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    dropped += 1
+                    logger.info(f"Dropped expired partition {name}")
+
+            await session.commit()
+            return dropped
+
+    # =========================================================================
+    # RETENTION
+    # =========================================================================
+
+    async def purge_expired_thoughts(self) -> int:
+        """
+        Deletes thoughts past their type's retention. created_at bounds keep
+        each delete on the old partitions only.
+        """
+        purged = 0
+        async with async_session_maker() as session:
+            for thought_type, days in self.retention_days.items():
+                result = await session.execute(
+                    delete(AgentThought).where(
+                        AgentThought.thought_type == thought_type,
+                        AgentThought.created_at < self.now - timedelta(days=days)
+                    )
+                )
+                purged += result.rowcount or 0
+
+            filters = [AgentThought.created_at < self.now - timedelta(days=self.default_retention)]
+            if self.retention_days:
+                filters.append(AgentThought.thought_type.notin_(list(self.retention_days)))
+            result = await session.execute(delete(AgentThought).where(*filters))
+            purged += result.rowcount or 0
+
+            await session.commit()
+
+        if purged:
+            logger.info(f"Purged {purged} expired agent thoughts")
+        return purged
+
+    # =========================================================================
+    # COMPACTION
+    # =========================================================================
+
+    async def compact_observations(self) -> Dict[str, int]:
+        """
+        Rolls per-product observations from fully-cold months into one
+        summary thought per (merchant, agent, product, month).
+        """
+        cutoff = month_start(self.now - timedelta(days=settings.THOUGHT_COMPACTION_AFTER_DAYS))
+        totals = {"observations": 0, "summaries": 0}
+
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(func.min(AgentThought.created_at)).where(
+                    AgentThought.thought_type == COMPACTED_THOUGHT_TYPE,
+                    AgentThought.product_id.isnot(None),
+                    AgentThought.created_at < cutoff
+                )
+            )
+            oldest = result.scalar()
+
+        if oldest is None:
+            return totals
+
+        for month in iter_months(oldest, cutoff):
+            observations, summaries = await self._compact_month(month)
+            totals["observations"] += observations
+            totals["summaries"] += summaries
+
+        if totals["observations"]:
+            logger.info(
+                f"Compacted {totals['observations']} observations into {totals['summaries']} summaries"
+            )
+        return totals
+
+    async def _compact_month(self, month: datetime) -> Tuple[int, int]:
+        window = [
+            AgentThought.thought_type == COMPACTED_THOUGHT_TYPE,
+            AgentThought.product_id.isnot(None),
+            AgentThought.created_at >= month,
+            AgentThought.created_at < next_month(month),
+        ]
+        severity = AgentThought.detailed_reasoning["classification"]["severity"].as_string()
+
+        async with async_session_maker() as session:
+            grouped = await session.execute(
+                select(
+                    AgentThought.merchant_id,
+                    AgentThought.agent_type,
+                    AgentThought.product_id,
+                    severity.label("severity"),
+                    func.count(),
+                    func.min(AgentThought.created_at),
+                    func.max(AgentThought.created_at),
+                    func.avg(AgentThought.confidence_score),
+                )
+                .where(*window)
+                .group_by(AgentThought.merchant_id, AgentThought.agent_type, AgentThought.product_id, severity)
+            )
+            by_product: Dict[Tuple[str, str, str], List[tuple]] = defaultdict(list)
+            for merchant_id, agent_type, product_id, sev, count, first, last, avg_conf in grouped:
+                by_product[(merchant_id, agent_type, product_id)].append((sev, count, first, last, avg_conf))
+
+            if not by_product:
+                return 0, 0
+
+            ranked = (
+                select(
+                    AgentThought.merchant_id,
+                    AgentThought.agent_type,
+                    AgentThought.product_id,
+                    AgentThought.summary,
+                    func.row_number().over(
+                        partition_by=(AgentThought.merchant_id, AgentThought.agent_type, AgentThought.product_id),
+                        order_by=desc(AgentThought.created_at)
+                    ).label("rank")
+                )
+                .where(*window)
+                .subquery()
+            )
+            latest_rows = await session.execute(
+                select(ranked.c.merchant_id, ranked.c.agent_type, ranked.c.product_id, ranked.c.summary)
+                .where(ranked.c.rank == 1)
+            )
+            latest = {(m, a, p): s for m, a, p, s in latest_rows}
+
+            session.add_all([
+                build_observation_summary(*key, month, rows, latest.get(key))
+                for key, rows in by_product.items()
+            ])
+            result = await session.execute(delete(AgentThought).where(*window))
+            await session.commit()
+
+            return result.rowcount or 0, len(by_product)
@@ -0,0 +1,217 @@
+# app/services/thought_sink.py
+"""
+Thought Sink
+============
+Buffered transport for agent thoughts.
+
+Agents used to POST every thought to the Internal API on its own connection,
+which then committed a single AgentThought per request. A sink collects the
+thoughts of one agent identity and writes them in batches through one of two
+transports:
+
+- InProcessThoughtSink: bulk-inserts straight into agent_thoughts (same process
+  as the DB), keeping the identity checks the Internal API would perform.
+- HttpThoughtSink: posts batches to /internal/agents/thoughts/batch through
+  the shared InternalAPIClient, for agents running outside the API process.
+
+Buffers flush when they reach THOUGHT_SINK_BATCH_SIZE, after
+THOUGHT_SINK_FLUSH_INTERVAL_SECONDS, or when the run calls flush(). The timer
+dies with its event loop (each Celery task runs its own asyncio.run), so every
+run must flush before it returns:
+
+    async with agent.thought_sink:
+        await agent.run()
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class ThoughtSink:
+    """
+    Buffers thoughts for a single (merchant, agent_type) identity.
+
+    Subclasses implement _write() for their transport.
+    """
+
+    def __init__(
+        self,
+        merchant_id: str,
+        agent_type: str,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        self.merchant_id = merchant_id
+        self.agent_type = agent_type
+        self.batch_size = batch_size or settings.THOUGHT_SINK_BATCH_SIZE
+        self.flush_interval = (
+            settings.THOUGHT_SINK_FLUSH_INTERVAL_SECONDS if flush_interval is None else flush_interval
+        )
+        self._buffer: List[Dict[str, Any]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._pending_flushes: set = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of thoughts waiting to be written."""
+        return len(self._buffer)
+
+    async def __aenter__(self) -> "ThoughtSink":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.flush()
+        return False
+
+    async def emit(
+        self,
+        thought_type: str = "info",
+        summary: str = "",
+        detailed_reasoning: Optional[Dict[str, Any]] = None,
+        confidence_score: float = 1.0,
+        step_number: int = 1,
+        execution_id: Optional[str] = None,
+        product_id: Optional[str] = None,
+        **kwargs
+    ):
+        """
+        Queues a thought. Accepts the same keywords agents pass to _log_thought;
+        keywords without a column of their own (e.g. customer_id) are kept in
+        detailed_reasoning.
+        """
+        detailed_reasoning = dict(detailed_reasoning or {})
+        for key, value in kwargs.items():
+            detailed_reasoning.setdefault(key, value)
+        self._buffer.append({
+            "thought_type": thought_type,
+            "summary": summary,
+            "detailed_reasoning": detailed_reasoning,
+            "confidence_score": float(confidence_score),
+            "step_number": step_number,
+            "execution_id": execution_id,
+            "product_id": detailed_reasoning.get("product_id") or product_id,
+        })
+
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+        elif self._flush_handle is None and self.flush_interval > 0:
+            self._schedule_flush()
+
+    async def flush(self) -> int:
+        """
+        Writes everything buffered so far. Returns the number of thoughts written.
+        Failures are logged and the batch is dropped, matching the fire-and-forget
+        semantics agents had with per-thought POSTs.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._buffer:
+            return 0
+
+        batch, self._buffer = self._buffer, []
+        try:
+            await self._write(batch)
+            return len(batch)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(batch)} {self.agent_type} thoughts: {e}")
+            return 0
+
+    def _schedule_flush(self):
+        """Arms a one-shot timer so a quiet buffer is still written promptly."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_handle = loop.call_later(self.flush_interval, self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        self._flush_handle = None
+        task = asyncio.ensure_future(self.flush())
+        self._pending_flushes.add(task)
+        task.add_done_callback(self._pending_flushes.discard)
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+
+class InProcessThoughtSink(ThoughtSink):
+    """
+    Writes thoughts directly to the database in one transaction per batch.
+
+    Mirrors the Internal API's guarantees: merchant_id and agent_type come from
+    the sink's identity, and the agent client must exist and be active.
+    """
+
+    def __init__(self, merchant_id: str, agent_type: str, **kwargs):
+        super().__init__(merchant_id, agent_type, **kwargs)
+        self._identity_verified = False
+
+    async def _verify_identity(self) -> bool:
+        """Checks (once per sink) that this agent identity is provisioned and active."""
+        if self._identity_verified:
+            return True
+
+        from app.database import async_session_maker
+        from app.models import AgentClient
+        from app.services.identity import IdentityService
+
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(AgentClient.is_active).where(
+                    AgentClient.merchant_id == self.merchant_id,
+                    AgentClient.agent_type == self.agent_type
+                )
+            )
+            is_active = result.scalar_one_or_none()
+
+            if is_active is None:
+                # Lazy provisioning, same as the credential lookup on the HTTP path
+                await IdentityService(db, self.merchant_id).get_or_create_agent_identity(self.agent_type)
+                is_active = True
+
+        self._identity_verified = bool(is_active)
+        return self._identity_verified
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        if not await self._verify_identity():
+            logger.error(f"Dropping {len(batch)} thoughts: agent {self.agent_type} is not active for merchant {self.merchant_id}")
+            return
+
+        from app.services.thought_logger import ThoughtLogger
+        await ThoughtLogger.log_thoughts_bulk(self.merchant_id, self.agent_type, batch)
+
+
+class HttpThoughtSink(ThoughtSink):
+    """
+    Posts batches of thoughts to the Internal API via the shared pooled client.
+    """
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        from app.services.internal_api_client import get_internal_api_client
+
+        resp = await get_internal_api_client().post(
+            "/internal/agents/thoughts/batch",
+            self.merchant_id,
+            self.agent_type,
+            json={"thoughts": [{"agent_type": self.agent_type, **t} for t in batch]}
+        )
+        if not resp.ok:
+            logger.error(f"Thought batch rejected ({resp.status}): {resp.data}")
+
+
+def create_thought_sink(merchant_id: str, agent_type: str) -> ThoughtSink:
+    """Builds the sink selected by THOUGHT_SINK_TRANSPORT."""
+    if settings.THOUGHT_SINK_TRANSPORT == "http":
+        return HttpThoughtSink(merchant_id, agent_type)
+    return InProcessThoughtSink(merchant_id, agent_type)
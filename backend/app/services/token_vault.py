@@ -278,7 +278,9 @@ class TokenVaultService:
     async def _refresh_shopify_token(self, refresh_token: str) -> str:
         """Refresh Shopify access token using refresh token."""
         import httpx
-        
+
+        from app.services.http_clients import http_client
+
         client_id = os.getenv("SHOPIFY_API_KEY")
         client_secret = os.getenv("SHOPIFY_API_SECRET")
         
@@ -286,7 +288,7 @@ class TokenVaultService:
             raise PermanentRefreshError("Shopify API credentials not configured")
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with http_client() as client:
                 response = await client.post(
                     "https://accounts.shopify.com/oauth/token",
                     data={
@@ -0,0 +1,225 @@
+# app/services/velocity.py
+"""
+Velocity Service
+================
+Deterministic velocity scoring plus the incremental, order-driven update path.
+
+The full picture is still rebuilt by refresh_velocity_metrics (sync) and the
+daily Observer pass. Between those, every order / refund webhook adjusts only
+the products on its line items:
+
+- units_sold_{30,60,90}d, revenue_30d, last_sale_date / days_since_last_sale
+  (sales) or units_refunded_30d (refunds) are bumped in place,
+- velocity_score is recomputed with the Observer's formula,
+- dead-stock severity is only ever *downgraded* here (escalation needs the
+  Observer's reasoning and freshness guards), and pending dead-stock /
+  clearance proposals for products that recovered are downgraded or
+  withdrawn.
+
+Cost is one product query and one proposal query per event, O(line items).
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.models import InboxItem, Product, Refund
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ["none", "low", "moderate", "high", "critical"]
+
+# Proposal types that exist because a product is dead stock
+DEAD_STOCK_PROPOSAL_TYPES = ("dead_stock_alert", "clearance_proposal")
+
+
+def velocity_metrics(net_units_30d: int, inventory: int, days_since_sale: int) -> Dict[str, float]:
+    """Turnover and the 0-100 velocity score (60% turnover, 40% recency)."""
+    avg_inventory = max(inventory, 1)
+    turnover_rate = (net_units_30d / avg_inventory) * 12
+
+    turnover_norm = min(turnover_rate / 12, 1.0) * 100
+    recency_norm = max(0, (180 - days_since_sale) / 180) * 100
+
+    return {
+        "velocity_score": round((turnover_norm * 0.6) + (recency_norm * 0.4), 1),
+        "turnover_rate": round(turnover_rate, 2),
+    }
+
+
+def base_severity(velocity_score: float, days_since_sale: int) -> str:
+    """Threshold-only dead-stock severity, before any LLM adjustment."""
+    if velocity_score < 20 and days_since_sale >= 90:
+        return "critical"
+    if velocity_score < 35:
+        return "high"
+    if velocity_score < 50:
+        return "moderate"
+    if velocity_score < 65:
+        return "low"
+    return "none"
+
+
+@dataclass
+class VelocityUpdate:
+    """Outcome of one incremental update."""
+    downgraded: Dict[str, str] = field(default_factory=dict)                 # product_id -> new severity
+    revised_proposals: List[Tuple[str, str]] = field(default_factory=list)   # (inbox item id, "withdrawn" | "downgraded")
+
+
+LineItems = Iterable[Tuple[str, int, Decimal]]  # (product_id, quantity, unit price)
+
+
+class VelocityService:
+    """Incremental velocity updates for one merchant."""
+
+    def __init__(self, merchant_id: str):
+        self.merchant_id = merchant_id
+
+    async def apply_sale(self, session, line_items: LineItems, sold_at: Optional[datetime] = None) -> VelocityUpdate:
+        """
+        Folds an order's line items into the affected products.
+        The caller commits (and broadcasts revised proposals afterwards).
+        """
+        sold_at = sold_at or datetime.utcnow()
+        age = datetime.utcnow() - sold_at
+        quantities, revenue = self._group(line_items)
+
+        def update(product: Product):
+            qty = quantities[product.id]
+            if age <= timedelta(days=30):
+                product.units_sold_30d = (product.units_sold_30d or 0) + qty
+                product.revenue_30d = (product.revenue_30d or Decimal("0.00")) + revenue[product.id]
+            if age <= timedelta(days=60):
+                product.units_sold_60d = (product.units_sold_60d or 0) + qty
+            if age <= timedelta(days=90):
+                product.units_sold_90d = (product.units_sold_90d or 0) + qty
+            if not product.last_sale_date or sold_at > product.last_sale_date:
+                product.last_sale_date = sold_at
+                product.days_since_last_sale = max(0, age.days)
+
+        return await self._apply(session, quantities.keys(), update)
+
+    async def claim_refund(self, session, platform_refund_id: str, platform_order_id: Optional[str] = None) -> bool:
+        """
+        Records a refund as applied; False if it already was. Call in the same
+        transaction as apply_refund so the record and the counters commit together.
+        """
+        if session.bind.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        result = await session.execute(
+            insert(Refund)
+            .values(
+                merchant_id=self.merchant_id,
+                platform_refund_id=str(platform_refund_id),
+                platform_order_id=platform_order_id,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=["merchant_id", "platform_refund_id"])
+            .returning(Refund.platform_refund_id)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def apply_refund(self, session, line_items: LineItems) -> VelocityUpdate:
+        """Folds refunded quantities into units_refunded_30d. The caller commits."""
+        quantities, _ = self._group(line_items)
+
+        def update(product: Product):
+            product.units_refunded_30d = (product.units_refunded_30d or 0) + quantities[product.id]
+
+        return await self._apply(session, quantities.keys(), update)
+
+    @staticmethod
+    def _group(line_items: LineItems) -> Tuple[Dict[str, int], Dict[str, Decimal]]:
+        quantities: Dict[str, int] = defaultdict(int)
+        revenue: Dict[str, Decimal] = defaultdict(lambda: Decimal("0.00"))
+        for product_id, quantity, price in line_items:
+            if not product_id or not quantity:
+                continue
+            quantities[product_id] += int(quantity)
+            revenue[product_id] += Decimal(str(price or 0)) * int(quantity)
+        return quantities, revenue
+
+    async def _apply(self, session, product_ids, update) -> VelocityUpdate:
+        result = VelocityUpdate()
+        product_ids = list(product_ids)
+        if not product_ids:
+            return result
+
+        products = (await session.execute(
+            select(Product).where(
+                Product.merchant_id == self.merchant_id,
+                Product.id.in_(product_ids)
+            )
+        )).scalars().all()
+
+        for product in products:
+            update(product)
+            new_severity = self._rescore(product)
+            if new_severity is not None:
+                result.downgraded[product.id] = new_severity
+
+        if result.downgraded:
+            result.revised_proposals = await self._revise_proposals(session, result.downgraded)
+        return result
+
+    @staticmethod
+    def _rescore(product: Product) -> Optional[str]:
+        """Recomputes velocity_score. Returns the new severity if it dropped."""
+        days = product.days_since_last_sale if product.days_since_last_sale is not None else 180
+        net_units = max(0, (product.units_sold_30d or 0) - (product.units_refunded_30d or 0))
+        score = velocity_metrics(net_units, product.total_inventory or 0, days)["velocity_score"]
+        product.velocity_score = Decimal(str(score))
+
+        current = product.dead_stock_severity if product.is_dead_stock and product.dead_stock_severity else "none"
+        recomputed = base_severity(score, days)
+        if current not in SEVERITIES or SEVERITIES.index(recomputed) >= SEVERITIES.index(current):
+            return None
+
+        product.is_dead_stock = recomputed != "none"
+        product.dead_stock_severity = recomputed if recomputed != "none" else None
+        return recomputed
+
+    async def _revise_proposals(self, session, downgraded: Dict[str, str]) -> List[Tuple[str, str]]:
+        """Withdraws or downgrades pending proposals of products that recovered."""
+        items = (await session.execute(
+            select(InboxItem).where(
+                InboxItem.merchant_id == self.merchant_id,
+                InboxItem.status == "pending",
+                InboxItem.type.in_(DEAD_STOCK_PROPOSAL_TYPES),
+                InboxItem.proposal_data['product_id'].as_string().in_([str(pid) for pid in downgraded])
+            )
+        )).scalars().all()
+
+        revised = []
+        now = datetime.utcnow()
+        for item in items:
+            severity = downgraded.get(str(item.proposal_data.get("product_id")))
+            if severity is None:
+                continue
+
+            data = dict(item.proposal_data)
+            if severity == "none":
+                item.status = "withdrawn"
+                item.decided_at = now
+                data["withdrawn_reason"] = "Product is selling again"
+                action = "withdrawn"
+            else:
+                action = "downgraded"
+            data["dead_stock_severity"] = severity if severity != "none" else None
+            if "severity" in data:
+                data["severity"] = data["dead_stock_severity"]
+            data["severity_revised_at"] = now.isoformat()
+            item.proposal_data = data
+            revised.append((item.id, action))
+
+        if revised:
+            logger.info(f"Revised {len(revised)} dead-stock proposals for merchant {self.merchant_id} after new sales")
+        return revised
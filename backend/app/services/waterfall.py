@@ -5,40 +5,138 @@ Waterfall Service
 Implements a drip-feed mechanism for high-volume communications.
 Prevents API throttling and protects sender reputation.
 
+Timing is a policy:
+- FixedDrip: batches of `batch_size` every `delay_seconds` (the original drip),
+- RateLimitedDrip: a sliding window of concurrent sends, each paced by the
+  shared per-account token bucket (see SendRateController), which adapts to
+  the provider's 429s and latency.
+
 EXTRACTED FROM: Cephly architecture
 """
 
 import asyncio
 import logging
-from typing import List, Any, Callable
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Union
+
+from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
+Items = Union[Iterable[Any], AsyncIterable[Any]]
+
+
+async def _iterate(items: Items) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _batches(items: Items, size: int) -> AsyncIterator[List[Any]]:
+    batch = []
+    async for item in _iterate(items):
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class FixedDrip:
+    """Fixed-size batches sent concurrently, with a fixed pause between batches."""
+
+    def __init__(self, batch_size: int = 20, delay_seconds: float = 120):
+        self.batch_size = batch_size
+        self.delay_seconds = delay_seconds
+
+    async def run(self, items: Items, dispatch_func: Callable[[Any], Any]) -> int:
+        total = 0
+        async for batch in _batches(items, self.batch_size):
+            if total:
+                logger.debug(f"⏳ Sleeping {self.delay_seconds}s before next batch...")
+                await asyncio.sleep(self.delay_seconds)
+            # Execute batch concurrently
+            await asyncio.gather(*[dispatch_func(item) for item in batch], return_exceptions=True)
+            total += len(batch)
+        return total
+
+
+class RateLimitedDrip:
+    """
+    Sends as fast as the provider account's shared token bucket allows, with at
+    most `concurrency` sends in flight, and counts them toward the campaign's
+    achieved rate.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        account: str,
+        campaign_id: Optional[str] = None,
+        priority: str = "normal",
+        concurrency: Optional[int] = None,
+        controller=None,
+    ):
+        from app.services.send_rate import get_send_rate_controller
+
+        self.provider = provider
+        self.account = account
+        self.campaign_id = campaign_id
+        self.priority = priority
+        self.concurrency = concurrency or settings.SEND_RATE_CONCURRENCY
+        self.controller = controller or get_send_rate_controller()
+
+    async def run(self, items: Items, dispatch_func: Callable[[Any], Any]) -> int:
+        slots = asyncio.Semaphore(self.concurrency)
+        in_flight = set()
+        total = 0
+
+        async def send(item, waited: float):
+            try:
+                await dispatch_func(item)
+            except Exception as e:
+                logger.debug(f"Dispatch failed: {e}")
+            finally:
+                slots.release()
+            if self.campaign_id:
+                await self.controller.record_send(self.campaign_id, waited)
+
+        async for item in _iterate(items):
+            await slots.acquire()
+            waited = await self.controller.acquire(self.provider, self.account, self.priority)
+            task = asyncio.create_task(send(item, waited))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            total += 1
+
+        await asyncio.gather(*in_flight)
+        return total
+
+
 class WaterfallService:
     """
     Manages staggered batch execution.
     """
-    
-    def __init__(self, batch_size: int = 20, delay_seconds: int = 120):
+
+    def __init__(self, batch_size: int = 20, delay_seconds: int = 120, policy=None):
         self.batch_size = batch_size
         self.delay_seconds = delay_seconds
+        self.policy = policy or FixedDrip(batch_size, delay_seconds)
 
-    async def execute_waterfall(self, items: List[Any], dispatch_func: Callable[[Any], Any]):
+    async def execute_waterfall(self, items: Items, dispatch_func: Callable[[Any], Any]) -> int:
         """
-        Executes a waterfall send in batches.
+        Executes a waterfall send under the configured drip policy.
+
+        `items` may be a list or an async generator (e.g. AudienceStream):
+        items are pulled as they are sent, so memory stays flat. Returns the
+        number of items dispatched.
         """
-        total = len(items)
-        logger.info(f"🌊 Starting Waterfall for {total} items. Batch size: {self.batch_size}")
-        
-        for i in range(0, total, self.batch_size):
-            batch = items[i : i + self.batch_size]
-            
-            # Execute batch concurrently
-            tasks = [dispatch_func(item) for item in batch]
-            await asyncio.gather(*tasks, return_exceptions=True)
-            
-            if i + self.batch_size < total:
-                logger.debug(f"⏳ Sleeping {self.delay_seconds}s before next batch...")
-                await asyncio.sleep(self.delay_seconds)
-                
-        logger.info("✅ Waterfall execution complete.")
+        logger.info(f"🌊 Starting Waterfall ({type(self.policy).__name__})")
+        total = await self.policy.run(items, dispatch_func)
+        logger.info(f"✅ Waterfall execution complete: {total} items.")
+        return total
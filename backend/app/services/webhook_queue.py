@@ -0,0 +1,654 @@
+# app/services/webhook_queue.py
+"""
+Webhook Queue
+=============
+Durable ingestion queue between the webhook endpoint and the DB handlers.
+
+The endpoint used to resolve the merchant and run the handler inline, which
+blew through Shopify's 5s delivery timeout during traffic bursts and turned
+every slow commit into a platform retry. Now the endpoint only verifies and
+enqueues; a pool of consumers does the work:
+
+- Events are sharded by (platform, merchant) into WEBHOOK_QUEUE_SHARDS
+  streams. Each shard is processed sequentially by exactly one consumer, so
+  a merchant's events are applied in the order they were received.
+- A failing event is retried in place with exponential backoff (keeping the
+  shard ordered) and dead-lettered after WEBHOOK_MAX_ATTEMPTS.
+- Redeliveries are dropped at the door: the platform's webhook id is
+  remembered for WEBHOOK_DEDUP_TTL_SECONDS.
+- Bursts of updates to one entity (Shopify sends products/update on every
+  inventory change) are coalesced: consumers hold a batch open for
+  WEBHOOK_COALESCE_WINDOW_SECONDS and process only the latest payload per
+  (merchant, entity), acking the superseded ones.
+- Consumers report processed / retried / dead-lettered / coalesced counts,
+  duplicates, queue depth and lag (time from receipt to processing) per shard.
+
+Backends:
+- RedisStreamWebhookQueue: one Redis Stream + consumer group per shard.
+  A per-shard lease keeps two API replicas from consuming the same shard; the
+  owner renews it before every event and stops as soon as it is lost. Each
+  replica reads as its own group consumer, so a new owner only sees a dead
+  owner's unacked entries once they have been idle for a full lease
+  (XAUTOCLAIM), never entries the previous owner is still working on.
+- InMemoryWebhookQueue: single-process stand-in for local development/tests.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+@dataclass
+class QueuedWebhook:
+    """A verified webhook waiting to be processed."""
+    platform: str
+    topic: str
+    event_type: str
+    merchant_key: str               # Platform-specific merchant id (shop domain, store hash, ...)
+    payload: Dict[str, Any]
+    raw_payload: Dict[str, Any]
+    received_at: float = field(default_factory=time.time)
+    webhook_id: Optional[str] = None    # Platform delivery id, used for deduplication
+    attempts: int = 0
+    message_id: Optional[str] = None
+
+    def to_fields(self) -> Dict[str, str]:
+        data = asdict(self)
+        data.pop("message_id")
+        return {"event": json.dumps(data, default=str)}
+
+    @classmethod
+    def from_fields(cls, message_id: str, fields: Dict[str, str]) -> "QueuedWebhook":
+        return cls(message_id=message_id, **json.loads(fields["event"]))
+
+
+# Event types whose handler only needs the entity's latest state, grouped by entity.
+# Anything else touching the same entity (creates of orders, deletes) is a barrier.
+COALESCABLE_EVENTS = {
+    "product.created": "product",
+    "product.updated": "product",
+    "customer.created": "customer",
+    "customer.updated": "customer",
+    "order.updated": "order",
+}
+
+ENTITY_OF_EVENT = {
+    "product.deleted": "product",
+    "order.created": "order",
+}
+
+
+def entity_key(event: QueuedWebhook) -> Optional[tuple]:
+    """(merchant, entity kind, entity id) the event applies to, if known."""
+    kind = COALESCABLE_EVENTS.get(event.event_type) or ENTITY_OF_EVENT.get(event.event_type)
+    entity_id = (event.payload or {}).get("id")
+    if not kind or entity_id in (None, "", "None"):
+        return None
+    return (event.platform, event.merchant_key, kind, str(entity_id))
+
+
+def coalesce(events: List[QueuedWebhook]) -> Tuple[List[QueuedWebhook], List[QueuedWebhook]]:
+    """
+    Collapses consecutive updates of the same entity into the latest one.
+
+    Returns (to_process, superseded). The surviving event keeps the position
+    of the first update in its run, so ordering relative to other entities and
+    to barrier events (deletes, order creates) of the same entity is unchanged.
+    """
+    to_process: List[Optional[QueuedWebhook]] = []
+    superseded: List[QueuedWebhook] = []
+    open_runs: Dict[tuple, int] = {}
+
+    for event in events:
+        key = entity_key(event)
+        if key is None:
+            to_process.append(event)
+            continue
+
+        if event.event_type not in COALESCABLE_EVENTS:
+            open_runs.pop(key, None)
+            to_process.append(event)
+            continue
+
+        if key in open_runs:
+            index = open_runs[key]
+            superseded.append(to_process[index])
+            to_process[index] = event
+        else:
+            open_runs[key] = len(to_process)
+            to_process.append(event)
+
+    return to_process, superseded
+
+
+class ShardLeaseLost(Exception):
+    """The consumer no longer owns the shard it was processing."""
+
+
+def shard_for(platform: str, merchant_key: str, shards: int) -> int:
+    """Stable shard assignment: all events of one merchant land on one shard."""
+    return zlib.crc32(f"{platform}:{merchant_key}".encode("utf-8")) % shards
+
+
+class WebhookQueue(ABC):
+    """Sharded, at-least-once queue of QueuedWebhook."""
+
+    def __init__(self, shards: Optional[int] = None):
+        self.shards = shards or settings.WEBHOOK_QUEUE_SHARDS
+        self.dedup_ttl = settings.WEBHOOK_DEDUP_TTL_SECONDS
+        self.duplicates = 0
+
+    def shard_of(self, event: QueuedWebhook) -> int:
+        return shard_for(event.platform, event.merchant_key, self.shards)
+
+    @abstractmethod
+    async def enqueue(self, event: QueuedWebhook) -> str:
+        """Durably stores the event. Returns its message id."""
+
+    async def enqueue_once(self, event: QueuedWebhook) -> Optional[str]:
+        """
+        Enqueues unless this platform delivery id was seen within the dedup TTL.
+        Returns None for duplicates.
+        """
+        if not event.webhook_id:
+            return await self.enqueue(event)
+
+        dedup_key = f"{event.platform}:{event.webhook_id}"
+        if not await self._mark_seen(dedup_key):
+            self.duplicates += 1
+            return None
+        try:
+            return await self.enqueue(event)
+        except Exception:
+            # Let the platform's redelivery through
+            await self._unmark_seen(dedup_key)
+            raise
+
+    @abstractmethod
+    async def _mark_seen(self, dedup_key: str) -> bool:
+        """Records a delivery id. Returns False if it was already recorded."""
+
+    @abstractmethod
+    async def _unmark_seen(self, dedup_key: str):
+        pass
+
+    @abstractmethod
+    async def read(
+        self,
+        shard: int,
+        count: int = 10,
+        block_ms: int = 1000,
+        new_only: bool = False,
+        consumer: str = "default",
+    ) -> List[QueuedWebhook]:
+        """
+        Next events of a shard in order, starting with unacknowledged ones
+        (unless new_only). block_ms=0 returns immediately. `consumer` names the
+        reading replica.
+        """
+
+    @abstractmethod
+    async def ack(self, shard: int, event: QueuedWebhook):
+        """Marks the event as done."""
+
+    @abstractmethod
+    async def dead_letter(self, event: QueuedWebhook, error: str):
+        """Parks an event that exhausted its retries."""
+
+    @abstractmethod
+    async def depth(self, shard: int) -> int:
+        """Number of events stored for a shard and not yet acknowledged."""
+
+    async def claim_shard(self, shard: int, owner: str) -> bool:
+        """Takes or renews exclusive ownership of a shard."""
+        return True
+
+    async def release_shard(self, shard: int, owner: str):
+        pass
+
+    async def close(self):
+        pass
+
+
+class InMemoryWebhookQueue(WebhookQueue):
+    """Process-local queue. Not durable; for development and tests."""
+
+    def __init__(self, shards: Optional[int] = None):
+        super().__init__(shards)
+        self._queues: Dict[int, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self._unacked: Dict[int, Deque[QueuedWebhook]] = defaultdict(deque)
+        self._seen: Dict[str, float] = {}
+        self.dead_letters: List[Dict[str, Any]] = []
+
+    async def _mark_seen(self, dedup_key: str) -> bool:
+        now = time.monotonic()
+        if len(self._seen) > 100_000:
+            self._seen = {k: exp for k, exp in self._seen.items() if exp > now}
+        if self._seen.get(dedup_key, 0) > now:
+            return False
+        self._seen[dedup_key] = now + self.dedup_ttl
+        return True
+
+    async def _unmark_seen(self, dedup_key: str):
+        self._seen.pop(dedup_key, None)
+
+    async def enqueue(self, event: QueuedWebhook) -> str:
+        event.message_id = event.message_id or uuid.uuid4().hex
+        await self._queues[self.shard_of(event)].put(event)
+        return event.message_id
+
+    async def read(
+        self,
+        shard: int,
+        count: int = 10,
+        block_ms: int = 1000,
+        new_only: bool = False,
+        consumer: str = "default",
+    ) -> List[QueuedWebhook]:
+        if self._unacked[shard] and not new_only:
+            return list(self._unacked[shard])
+
+        queue = self._queues[shard]
+        batch = []
+        if queue.empty() and block_ms > 0:
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=block_ms / 1000))
+            except asyncio.TimeoutError:
+                return []
+
+        while len(batch) < count and not queue.empty():
+            batch.append(queue.get_nowait())
+        self._unacked[shard].extend(batch)
+        return batch
+
+    async def ack(self, shard: int, event: QueuedWebhook):
+        try:
+            self._unacked[shard].remove(event)
+        except ValueError:
+            pass
+
+    async def dead_letter(self, event: QueuedWebhook, error: str):
+        self.dead_letters.append({"event": event, "error": error, "failed_at": time.time()})
+
+    async def depth(self, shard: int) -> int:
+        return self._queues[shard].qsize() + len(self._unacked[shard])
+
+
+class RedisStreamWebhookQueue(WebhookQueue):
+    """Redis Streams backend: stream + consumer group per shard, DLQ stream."""
+
+    GROUP = "webhook-workers"
+
+    def __init__(self, redis_url: Optional[str] = None, shards: Optional[int] = None, prefix: str = "webhooks"):
+        super().__init__(shards)
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.prefix = prefix
+        self.maxlen = settings.WEBHOOK_QUEUE_MAXLEN
+        self.lease_ms = int(settings.WEBHOOK_SHARD_LEASE_SECONDS * 1000)
+        self._redis = None
+        self._groups_ready: set = set()
+
+    @property
+    def dlq_stream(self) -> str:
+        return f"{self.prefix}:dlq"
+
+    def _stream(self, shard: int) -> str:
+        return f"{self.prefix}:{shard}"
+
+    async def _client(self):
+        if self._redis is None:
+            from redis.asyncio import from_url
+            self._redis = from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    async def _ensure_group(self, shard: int):
+        if shard in self._groups_ready:
+            return
+        redis = await self._client()
+        try:
+            await redis.xgroup_create(self._stream(shard), self.GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups_ready.add(shard)
+
+    async def enqueue(self, event: QueuedWebhook) -> str:
+        redis = await self._client()
+        message_id = await redis.xadd(
+            self._stream(self.shard_of(event)), event.to_fields(), maxlen=self.maxlen, approximate=True
+        )
+        event.message_id = message_id
+        return message_id
+
+    async def _mark_seen(self, dedup_key: str) -> bool:
+        redis = await self._client()
+        return bool(await redis.set(f"{self.prefix}:seen:{dedup_key}", 1, nx=True, ex=self.dedup_ttl))
+
+    async def _unmark_seen(self, dedup_key: str):
+        redis = await self._client()
+        await redis.delete(f"{self.prefix}:seen:{dedup_key}")
+
+    async def read(
+        self,
+        shard: int,
+        count: int = 10,
+        block_ms: int = 1000,
+        new_only: bool = False,
+        consumer: str = "default",
+    ) -> List[QueuedWebhook]:
+        await self._ensure_group(shard)
+        redis = await self._client()
+        stream = self._stream(shard)
+
+        entries = []
+        if not new_only:
+            # Our own entries delivered but never acked (batch cut short by a lost lease) come first,
+            # then entries of a previous owner that has been silent for a whole lease.
+            entries = _entries(await redis.xreadgroup(self.GROUP, consumer, {stream: "0"}, count=count))
+            if not entries:
+                claimed = await redis.xautoclaim(
+                    stream, self.GROUP, consumer, min_idle_time=self.lease_ms, start_id="0-0", count=count
+                )
+                entries = [(mid, fields) for mid, fields in claimed[1] if fields]
+        if not entries:
+            entries = _entries(await redis.xreadgroup(
+                self.GROUP, consumer, {stream: ">"}, count=count, block=block_ms or None
+            ))
+        return [QueuedWebhook.from_fields(mid, fields) for mid, fields in entries]
+
+    async def ack(self, shard: int, event: QueuedWebhook):
+        redis = await self._client()
+        await redis.xack(self._stream(shard), self.GROUP, event.message_id)
+        await redis.xdel(self._stream(shard), event.message_id)
+
+    async def dead_letter(self, event: QueuedWebhook, error: str):
+        redis = await self._client()
+        fields = event.to_fields()
+        fields["error"] = error[:1000]
+        fields["source_id"] = event.message_id or ""
+        await redis.xadd(self.dlq_stream, fields, maxlen=self.maxlen, approximate=True)
+
+    async def depth(self, shard: int) -> int:
+        redis = await self._client()
+        return await redis.xlen(self._stream(shard))
+
+    async def claim_shard(self, shard: int, owner: str) -> bool:
+        redis = await self._client()
+        key = f"{self.prefix}:lease:{shard}"
+        if await redis.set(key, owner, nx=True, px=self.lease_ms):
+            return True
+        # Renew only if still ours (atomic: the lease may expire between GET and PEXPIRE)
+        return bool(await redis.eval(_RENEW_LEASE, 1, key, owner, self.lease_ms))
+
+    async def release_shard(self, shard: int, owner: str):
+        redis = await self._client()
+        await redis.eval(_RELEASE_LEASE, 1, f"{self.prefix}:lease:{shard}", owner)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+            self._groups_ready.clear()
+
+
+_RENEW_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _entries(response) -> list:
+    """Flattens an XREADGROUP reply for a single stream into [(id, fields), ...]."""
+    if not response:
+        return []
+    _, entries = response[0]
+    return [(mid, fields) for mid, fields in entries if fields]
+
+
+WebhookHandler = Callable[[QueuedWebhook], Awaitable[Any]]
+
+
+@dataclass
+class ShardStats:
+    processed: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    coalesced: int = 0              # Superseded updates acked without processing
+    lag_seconds: float = 0.0        # Receipt -> processing delay of the last event
+    max_lag_seconds: float = 0.0
+
+
+class WebhookConsumer:
+    """
+    Runs one sequential worker per owned shard.
+
+    Usage:
+        consumer = WebhookConsumer(queue, handler=dispatch_webhook_event)
+        consumer.start()
+        ...
+        await consumer.stop()
+    """
+
+    def __init__(
+        self,
+        queue: WebhookQueue,
+        handler: WebhookHandler,
+        max_attempts: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        coalesce_window: Optional[float] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.max_attempts = max_attempts or settings.WEBHOOK_MAX_ATTEMPTS
+        self.retry_backoff = (
+            settings.WEBHOOK_RETRY_BACKOFF_SECONDS if retry_backoff is None else retry_backoff
+        )
+        self.coalesce_window = (
+            settings.WEBHOOK_COALESCE_WINDOW_SECONDS if coalesce_window is None else coalesce_window
+        )
+        self.batch_size = settings.WEBHOOK_COALESCE_MAX_BATCH
+        self.owner = uuid.uuid4().hex  # Lease holder and stream consumer name of this replica
+        self.shard_stats: Dict[int, ShardStats] = defaultdict(ShardStats)
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._tasks = [
+            asyncio.create_task(self._run_shard(shard), name=f"webhook-shard-{shard}")
+            for shard in range(self.queue.shards)
+        ]
+        logger.info(f"Webhook consumer started on {self.queue.shards} shards")
+
+    async def stop(self):
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for shard in range(self.queue.shards):
+            try:
+                await self.queue.release_shard(shard, self.owner)
+            except Exception:
+                pass
+
+    async def _run_shard(self, shard: int):
+        lease_check_interval = settings.WEBHOOK_SHARD_LEASE_SECONDS / 3
+        while self._running:
+            try:
+                if not await self.queue.claim_shard(shard, self.owner):
+                    await asyncio.sleep(lease_check_interval)
+                    continue
+                await self.process_batch(shard, await self.read_batch(shard))
+            except asyncio.CancelledError:
+                raise
+            except ShardLeaseLost:
+                logger.warning(f"Lost the lease on webhook shard {shard}; leaving the rest of the batch to its new owner")
+            except Exception as e:
+                logger.error(f"Webhook shard {shard} consumer error: {e}")
+                await asyncio.sleep(1)
+
+    async def read_batch(self, shard: int) -> List[QueuedWebhook]:
+        """
+        Reads the next batch. If it holds coalescable updates, keeps it open
+        for the coalescing window so a burst lands in a single batch.
+        """
+        events = await self.queue.read(shard, count=self.batch_size, consumer=self.owner)
+        if (
+            events
+            and self.coalesce_window > 0
+            and len(events) < self.batch_size
+            and any(e.event_type in COALESCABLE_EVENTS for e in events)
+        ):
+            await asyncio.sleep(self.coalesce_window)
+            events += await self.queue.read(
+                shard, count=self.batch_size - len(events), block_ms=0, new_only=True, consumer=self.owner
+            )
+        return events
+
+    async def process_batch(self, shard: int, events: List[QueuedWebhook]):
+        """Processes the latest update per entity and acks the superseded ones."""
+        to_process, superseded = coalesce(events)
+        # Ack superseded first: after a crash only newer payloads are redelivered
+        for event in superseded:
+            await self.queue.ack(shard, event)
+        self.shard_stats[shard].coalesced += len(superseded)
+        for event in to_process:
+            await self._renew_lease(shard)
+            await self.process(shard, event)
+
+    async def _renew_lease(self, shard: int):
+        """Renews the shard lease; raises ShardLeaseLost if another replica took it over."""
+        if not await self.queue.claim_shard(shard, self.owner):
+            raise ShardLeaseLost(shard)
+
+    async def process(self, shard: int, event: QueuedWebhook) -> bool:
+        """
+        Runs the handler with in-place retries. Returns False if the event was
+        dead-lettered. Either way the event is acknowledged.
+        """
+        stats = self.shard_stats[shard]
+        lag = max(0.0, time.time() - event.received_at)
+        stats.lag_seconds = lag
+        stats.max_lag_seconds = max(stats.max_lag_seconds, lag)
+
+        while True:
+            event.attempts += 1
+            try:
+                await self.handler(event)
+                stats.processed += 1
+                await self.queue.ack(shard, event)
+                return True
+            except Exception as e:
+                if event.attempts >= self.max_attempts:
+                    logger.error(
+                        f"Dead-lettering {event.platform} {event.event_type} for {event.merchant_key} "
+                        f"after {event.attempts} attempts: {e}"
+                    )
+                    await self.queue.dead_letter(event, str(e))
+                    stats.dead_lettered += 1
+                    await self.queue.ack(shard, event)
+                    return False
+
+                stats.retried += 1
+                delay = self.retry_backoff * (2 ** (event.attempts - 1))
+                logger.warning(
+                    f"Webhook {event.event_type} for {event.merchant_key} failed "
+                    f"(attempt {event.attempts}/{self.max_attempts}), retrying in {delay:.1f}s: {e}"
+                )
+                await asyncio.sleep(delay)
+                await self._renew_lease(shard)
+
+    async def metrics(self) -> Dict[str, Any]:
+        """Aggregate and per-shard counters, depth and lag."""
+        shards = {}
+        for shard in range(self.queue.shards):
+            stats = self.shard_stats[shard]
+            try:
+                depth = await self.queue.depth(shard)
+            except Exception:
+                depth = None
+            shards[shard] = {**asdict(stats), "depth": depth}
+
+        processed = sum(s["processed"] for s in shards.values())
+        dead_lettered = sum(s["dead_lettered"] for s in shards.values())
+        coalesced = sum(s["coalesced"] for s in shards.values())
+        handled = processed + dead_lettered + coalesced
+
+        return {
+            "running": self._running,
+            "processed": processed,
+            "retried": sum(s["retried"] for s in shards.values()),
+            "dead_lettered": dead_lettered,
+            "coalesced": coalesced,
+            "collapse_ratio": round(coalesced / handled, 4) if handled else 0.0,
+            "duplicates": self.queue.duplicates,
+            "depth": sum(s["depth"] or 0 for s in shards.values()),
+            "max_lag_seconds": max((s["max_lag_seconds"] for s in shards.values()), default=0.0),
+            "shards": shards,
+        }
+
+
+def create_webhook_queue(backend: Optional[str] = None) -> WebhookQueue:
+    backend = backend or settings.WEBHOOK_QUEUE_BACKEND
+    if backend == "memory":
+        return InMemoryWebhookQueue()
+    return RedisStreamWebhookQueue()
+
+
+_queue: Optional[WebhookQueue] = None
+_consumer: Optional[WebhookConsumer] = None
+
+
+def get_webhook_queue() -> WebhookQueue:
+    global _queue
+    if _queue is None:
+        _queue = create_webhook_queue()
+    return _queue
+
+
+def get_webhook_consumer() -> Optional[WebhookConsumer]:
+    return _consumer
+
+
+def start_webhook_consumer(handler: WebhookHandler) -> WebhookConsumer:
+    """Starts the process-wide consumer pool (idempotent)."""
+    global _consumer
+    if _consumer is None:
+        _consumer = WebhookConsumer(get_webhook_queue(), handler)
+    _consumer.start()
+    return _consumer
+
+
+async def stop_webhook_consumer():
+    global _consumer, _queue
+    if _consumer is not None:
+        await _consumer.stop()
+        _consumer = None
+    if _queue is not None:
+        await _queue.close()
+        _queue = None
@@ -13,11 +13,11 @@ from decimal import Decimal
 from typing import Dict, Any, List
 
 from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
 
 from app.database import async_session_maker
 from app.orchestration import background_task, registry
 from app.models import Merchant, Customer, Order
+from app.services.rfm import RFMService
 
 
 from app.agents.matchmaker import MatchmakerAgent as ReasoningMatchmaker
@@ -44,37 +44,8 @@ class MatchmakerAgent:
         return await self._calculate_legacy_rfm()
 
     async def _calculate_legacy_rfm(self) -> Dict[str, Any]:
-        """Legacy RFM math for database population."""
-        async with async_session_maker() as session:
-            # Fetch all customers with orders
-            result = await session.execute(
-                select(Customer)
-                .where(Customer.merchant_id == self.merchant_id)
-                .options(selectinload(Customer.orders))
-            )
-            customers = result.scalars().all()
-            
-            if not customers:
-                return {"status": "no_customers"}
-            
-            all_totals = [float(c.total_spent) for c in customers if c.total_spent]
-            percentiles = self._calculate_percentiles(all_totals)
-            
-            segment_counts = {
-                "champions": 0, "loyal": 0, "at_risk": 0, "lapsed": 0, "lost": 0, "new_customers": 0, "potential": 0,
-            }
-            
-            for customer in customers:
-                r = self._calculate_recency_score(customer)
-                f = self._calculate_frequency_score(customer)
-                m = self._calculate_monetary_score(customer, percentiles)
-                
-                segment = self._assign_segment(r, f, m)
-                customer.rfm_segment = segment
-                segment_counts[segment] += 1
-            
-            await session.commit()
-            return {"status": "completed", "total_customers": len(customers), "segments": segment_counts}
+        """Legacy RFM math for database population (set-based, see app.services.rfm)."""
+        return await RFMService(self.merchant_id).segment_all()
 
     async def get_audience_for_strategy(self, strategy: str) -> List[str]:
         """
@@ -90,133 +61,6 @@ class MatchmakerAgent:
         )
         return matching["target_segments"]
     
-    def _calculate_recency_score(self, customer: Customer) -> int:
-        """
-        Score 1-5 based on days since last order.
-        
-        5: <= 30 days
-        4: 31-60 days
-        3: 61-90 days
-        2: 91-180 days
-        1: > 180 days
-        """
-        if not customer.last_order_date:
-            return 1
-        
-        days_ago = (datetime.utcnow() - customer.last_order_date).days
-        
-        if days_ago <= 30:
-            return 5
-        elif days_ago <= 60:
-            return 4
-        elif days_ago <= 90:
-            return 3
-        elif days_ago <= 180:
-            return 2
-        else:
-            return 1
-    
-    def _calculate_frequency_score(self, customer: Customer) -> int:
-        """
-        Score 1-5 based on total order count.
-        
-        5: 10+ orders
-        4: 5-9 orders
-        3: 3-4 orders
-        2: 2 orders
-        1: 1 order
-        """
-        orders = customer.total_orders or 0
-        
-        if orders >= 10:
-            return 5
-        elif orders >= 5:
-            return 4
-        elif orders >= 3:
-            return 3
-        elif orders >= 2:
-            return 2
-        else:
-            return 1
-    
-    def _calculate_monetary_score(self, customer: Customer, percentiles: Dict[int, float]) -> int:
-        """
-        Score 1-5 based on total spent (percentile-based).
-        
-        5: Top 20%
-        4: 60-80%
-        3: 40-60%
-        2: 20-40%
-        1: Bottom 20%
-        """
-        total_spent = float(customer.total_spent or 0)
-        
-        if total_spent >= percentiles.get(80, 1000):
-            return 5
-        elif total_spent >= percentiles.get(60, 500):
-            return 4
-        elif total_spent >= percentiles.get(40, 250):
-            return 3
-        elif total_spent >= percentiles.get(20, 100):
-            return 2
-        else:
-            return 1
-    
-    def _calculate_percentiles(self, values: List[float]) -> Dict[int, float]:
-        """Calculate percentile thresholds."""
-        if not values:
-            return {20: 100, 40: 250, 60: 500, 80: 1000}
-        
-        sorted_values = sorted(values)
-        n = len(sorted_values)
-        
-        return {
-            20: sorted_values[int(n * 0.20)] if n > 5 else 100,
-            40: sorted_values[int(n * 0.40)] if n > 5 else 250,
-            60: sorted_values[int(n * 0.60)] if n > 5 else 500,
-            80: sorted_values[int(n * 0.80)] if n > 5 else 1000,
-        }
-    
-    def _assign_segment(self, r: int, f: int, m: int) -> str:
-        """
-        Assign customer segment based on RFM scores.
-        
-        Segments:
-        - champions: High R, F, M (best customers)
-        - loyal: Regular buyers
-        - at_risk: Good customers going quiet
-        - lapsed: Haven't bought in a while
-        - lost: Inactive for 180+ days
-        - new_customers: Recent first purchase
-        - potential: Everyone else
-        """
-        # Champions: Best customers (recent, frequent, high-value)
-        if r >= 4 and f >= 4 and m >= 4:
-            return "champions"
-        
-        # Loyal: Regular buyers with decent recency
-        if r >= 3 and f >= 3:
-            return "loyal"
-        
-        # At Risk: Were valuable but going quiet
-        if r <= 2 and f >= 3 and m >= 3:
-            return "at_risk"
-        
-        # Lapsed: Haven't bought recently but have history
-        if r == 1 and f >= 2:
-            return "lapsed"
-        
-        # New: Recent first purchase
-        if r >= 4 and f == 1:
-            return "new_customers"
-        
-        # Lost: Inactive for long time
-        if r == 1 and f == 1:
-            return "lost"
-        
-        # Potential: Everyone else
-        return "potential"
-    
     async def get_audience_for_strategy(self, strategy: str) -> List[str]:
         """
         Get target customer segments for a given clearance strategy.
@@ -284,4 +128,5 @@ def run_segmentation_for_merchant(self, merchant_id: str):
 async def _run_segmentation_single(merchant_id: str):
     """Async implementation for single merchant."""
     agent = MatchmakerAgent(merchant_id)
-    return await agent.run_daily_segmentation()
+    async with agent.reasoning_matchmaker.thought_sink:
+        return await agent.run_daily_segmentation()
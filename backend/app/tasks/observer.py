@@ -26,6 +26,7 @@ from app.models import Merchant, Product, OrderItem, InboxItem
 
 from app.agents.observer import ObserverAgent as ReasoningObserver
 from app.agents.strategy import StrategyAgent
+from app.services.merchant_context import merchant_context_scope
 
 class ObserverAgent:
     """
@@ -56,7 +57,8 @@ class ObserverAgent:
              step_number=1
         )
         
-        async with async_session_maker() as session:
+        # One merchant lookup for the whole run, shared by observer and strategy
+        async with async_session_maker() as session, merchant_context_scope(self.merchant_id, session):
             BATCH_SIZE = 500
             offset = 0
             total_processed = 0
@@ -128,6 +130,7 @@ class ObserverAgent:
                 # Release memory
                 del products, product_dicts, bulk_analysis
             
+            await self.reasoning_observer.thought_sink.flush()
             await session.commit() # Commit needed only if Strategy Agent or Logging did something implicit (though Strategy uses its own logic usually)
             
             return {
@@ -188,7 +191,8 @@ def run_analysis_for_merchant(self, merchant_id: str):
 async def _run_analysis_single(merchant_id: str):
     """Async implementation for single merchant."""
     agent = ObserverAgent(merchant_id)
-    return await agent.run_daily_analysis()
+    async with agent.reasoning_observer.thought_sink:
+        return await agent.run_daily_analysis()
 
 @celery_app.task(
     name="app.tasks.observer.run_analysis_for_product",
@@ -233,19 +237,20 @@ async def _run_analysis_product(merchant_id: str, product_id: str):
     # 3. Analyze (ObserverAgent Logic)
     agent = ObserverAgent(merchant_id)
     
-    # Log Start
-    await agent.reasoning_observer._log_thought(
-        thought_type="trigger",
-        summary=f"⚡ Real-time analysis trigger for '{p_data['title']}'",
-        execution_id=str(uuid4())
-    )
+    async with agent.reasoning_observer.thought_sink:
+        # Log Start
+        await agent.reasoning_observer._log_thought(
+            thought_type="trigger",
+            summary=f"⚡ Real-time analysis trigger for '{p_data['title']}'",
+            execution_id=str(uuid4())
+        )
     
-    async with async_session_maker() as session:
-        analysis = await agent.reasoning_observer.observe_product(p_data, session)
+        async with async_session_maker() as session:
+            analysis = await agent.reasoning_observer.observe_product(p_data, session)
         
-        # 4. Push update via API
-        await agent.reasoning_observer.batch_update_status([analysis])
+            # 4. Push update via API
+            await agent.reasoning_observer.batch_update_status([analysis])
         
-        # 5. Trigger Strategy if needed (Critical only)
-        if analysis["severity"] in ("critical", "high") and analysis["is_dead_stock"]:
-             await agent.strategy_agent.plan_clearance(product_id)
+            # 5. Trigger Strategy if needed (Critical only)
+            if analysis["severity"] in ("critical", "high") and analysis["is_dead_stock"]:
+                 await agent.strategy_agent.plan_clearance(product_id)
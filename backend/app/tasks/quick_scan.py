@@ -1,14 +1,12 @@
 """
 Quick Scan Task - Real-Time Dead Stock Discovery for Onboarding.
 
-Scans first 50 products with live updates via Redis pub/sub.
+Scans first 50 products with live updates via the scan event stream.
 Creates dramatic reveal experience during merchant onboarding.
 
 LOGIC EXTRACTED FROM: ObserverAgent velocity + classification
 """
 
-import asyncio
-import time
 from uuid import uuid4
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -28,7 +26,6 @@ settings = get_settings()
 
 # Scan settings
 QUICK_SCAN_LIMIT = 50
-DELAY_BETWEEN_PRODUCTS = 0.5  # Dramatic reveal timing
 
 
 @background_task(name="start_quick_scan", queue="scan")
@@ -63,19 +60,19 @@ async def _quick_scan_async(merchant_id: str, session_id: str):
             merchant = result.scalar_one_or_none()
             
             if not merchant:
-                broadcaster.publish_error(session_id, "Merchant not found")
+                await broadcaster.publish_error(session_id, "Merchant not found")
                 return
             
             # Fetch products from Shopify (first 50 only)
             products = await _fetch_shopify_products(merchant, limit=QUICK_SCAN_LIMIT)
             
             if not products:
-                broadcaster.publish_error(session_id, "No products found in store")
+                await broadcaster.publish_error(session_id, "No products found in store")
                 return
             
             total_stuck_value = 0.0
             dead_stock_count = 0
-            dead_stock_products = []
+            finds = []  # (shopify product id, product info)
             
             from app.agents.observer import ObserverAgent
             from app.agents.strategy import StrategyAgent
@@ -83,17 +80,22 @@ async def _quick_scan_async(merchant_id: str, session_id: str):
             observer = ObserverAgent(merchant_id)
             strategy_agent = StrategyAgent(merchant_id)
             
-            for i, product_data in enumerate(products):
-                # Analyze using the new Agent (Reasoning + Memory)
-                analysis = await observer.observe_product(
-                    product_data, 
-                    session
-                )
+            memories = await observer.memory.recall_thoughts_for_products(
+                [p.get('id') for p in products], agent_type=observer.agent_type
+            )
+            
+            # Analyze concurrently (Reasoning + Memory); the dramatic reveal
+            # is paced by the SSE endpoint replaying the event log.
+            scanned = 0
+            async for product_data, analysis in observer.observe_products_concurrently(
+                products, session, memories, concurrency=settings.QUICK_SCAN_CONCURRENCY
+            ):
+                scanned += 1
                 
                 # Broadcast progress
-                broadcaster.publish_scan_progress(
+                await broadcaster.publish_scan_progress(
                     session_id,
-                    products_scanned=i + 1,
+                    products_scanned=scanned,
                     total_products=len(products)
                 )
                 
@@ -115,38 +117,38 @@ async def _quick_scan_async(merchant_id: str, session_id: str):
                         "reasoning": analysis["reasoning"] # NEW: Pass reasoning to UI
                     }
                     
-                    dead_stock_products.append(product_info)
-                    
-                    # Create a real proposal via StrategyAgent for the top finds
-                    if dead_stock_count <= 3:
-                        try:
-                            # We use the product data from Shopify to find or create DB product
-                            db_product_result = await session.execute(
-                                select(Product).where(Product.shopify_product_id == product_data['id'])
-                            )
-                            db_p = db_product_result.scalar_one_or_none()
-                            if db_p:
-                                await strategy_agent.plan_clearance(db_p.id)
-                        except Exception as e:
-                            print(f"⚠️ Failed to generate strategy: {e}")
+                    finds.append((product_data['id'], product_info))
                     
                     # Broadcast dead stock find
-                    broadcaster.publish_dead_stock_found(
+                    await broadcaster.publish_dead_stock_found(
                         session_id,
                         product=product_info,
                         running_total={
                             "dead_stock_count": dead_stock_count,
                             "total_stuck_value": round(total_stuck_value, 2),
-                            "products_scanned": i + 1,
+                            "products_scanned": scanned,
                             "total_products": len(products)
                         }
                     )
-                    
-                    # Dramatic delay for visual effect
-                    time.sleep(DELAY_BETWEEN_PRODUCTS)
+            
+            # Create a real proposal via StrategyAgent for the top finds (largest stuck value first)
+            finds.sort(key=lambda find: find[1]["stuck_value"], reverse=True)
+            for shopify_product_id, _ in finds[:3]:
+                try:
+                    db_product_result = await session.execute(
+                        select(Product).where(
+                            Product.merchant_id == merchant_id,
+                            Product.shopify_product_id == shopify_product_id
+                        )
+                    )
+                    db_p = db_product_result.scalar_one_or_none()
+                    if db_p:
+                        await strategy_agent.plan_clearance(db_p.id)
+                except Exception as e:
+                    print(f"⚠️ Failed to generate strategy: {e}")
             
             # Quick scan complete
-            broadcaster.publish_quick_scan_complete(
+            await broadcaster.publish_quick_scan_complete(
                 session_id,
                 summary={
                     "dead_stock_count": dead_stock_count,
@@ -162,7 +164,7 @@ async def _quick_scan_async(merchant_id: str, session_id: str):
     
     except Exception as e:
         print(f"❌ Quick scan error: {e}")
-        broadcaster.publish_error(session_id, str(e))
+        await broadcaster.publish_error(session_id, str(e))
 
 
 async def _fetch_shopify_products(merchant: Merchant, limit: int = 50) -> List[Dict]:
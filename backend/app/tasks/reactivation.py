@@ -51,8 +51,8 @@ async def run_reactivation_for_merchant(merchant_id: str):
 
 async def _run_reactivation_single(merchant_id: str):
     """Execute reactivation agent for one merchant."""
+    agent = ReactivationAgent(merchant_id)
     try:
-        agent = ReactivationAgent(merchant_id)
         # 1. Scan for new candidates
         await agent.scan_for_dormant_customers()
         # 2. Step existing journeys
@@ -60,6 +60,8 @@ async def _run_reactivation_single(merchant_id: str):
     except Exception as e:
         print(f"❌ [Reactivation] Error for merchant {merchant_id}: {e}")
         raise e
+    finally:
+        await agent.thought_sink.flush()
 
 
 # Register tasks
@@ -128,6 +128,8 @@ async def _run_seasonal_scan_async(merchant_id: str) -> dict:
             'error': str(e)
         })
         raise
+    finally:
+        await agent.thought_sink.flush()
 
 
 @shared_task
@@ -17,6 +17,7 @@ from app.models import Merchant, Product, ProductVariant, Customer, Order, Order
 from sqlalchemy import select, func
 from app.adapters.registry import AdapterRegistry
 from app.orchestration import background_task, registry
+from app.services.merchant_cache import invalidate_merchant
 
 settings = get_settings()
 
@@ -54,6 +55,7 @@ async def _initial_sync_async(merchant_id: str):
         # [Day 0 Reliability] Update status to prevent race conditions
         merchant.sync_status = "syncing"
         await session.commit()
+        await invalidate_merchant(merchant_id)
         
         print(f"🔄 Starting initial sync for {merchant.store_name}")
         
@@ -97,12 +99,14 @@ async def _initial_sync_async(merchant_id: str):
             # [Day 0 Reliability] Mark complete
             merchant.sync_status = "completed"
             await session.commit()
+            await invalidate_merchant(merchant_id)
             print(f"✅ Initial sync complete for {merchant.store_name}")
             
         except Exception as e:
             print(f"❌ Initial sync failed for {merchant.store_name}: {e}")
             merchant.sync_status = "failed"
             await session.commit()
+            await invalidate_merchant(merchant_id)
 
 
 
@@ -18,14 +18,21 @@ from temporalio.worker import Worker
 
 from app.config import get_settings
 from app.orchestration import registry, get_temporal_client
+from app.services.internal_api_client import get_internal_api_client
+from app.services.http_clients import close_http_clients
 
 # Import and register workflows
 from app.workflows.campaign import CampaignWorkflow
 from app.workflows.scan import QuickScanWorkflow, SeasonalScanWorkflow
+from app.workflows.maintenance import ThoughtMaintenanceWorkflow, RollupCompactionWorkflow
+from app.workflows.pricing import PriceRevertWorkflow
 
 registry.register_workflow(CampaignWorkflow)
 registry.register_workflow(QuickScanWorkflow)
 registry.register_workflow(SeasonalScanWorkflow)
+registry.register_workflow(ThoughtMaintenanceWorkflow)
+registry.register_workflow(RollupCompactionWorkflow)
+registry.register_workflow(PriceRevertWorkflow)
 
 # Import and register activities
 from app.activities.campaign import (
@@ -35,6 +42,8 @@ from app.activities.campaign import (
     verify_and_update_status
 )
 from app.activities.scan import ScanActivities
+from app.activities.maintenance import run_thought_maintenance, run_rollup_compaction
+from app.activities.pricing import revert_campaign_prices
 
 # Register all activities
 scan_activities = ScanActivities()
@@ -49,6 +58,9 @@ registry.register_activity(send_klaviyo_campaign)
 registry.register_activity(send_twilio_campaign)
 registry.register_activity(verify_and_update_status)
 registry.register_activity(scan_activities.quick_scan_product_batch)
+registry.register_activity(run_thought_maintenance)
+registry.register_activity(run_rollup_compaction)
+registry.register_activity(revert_campaign_prices)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -74,7 +86,11 @@ async def main():
     )
 
     logger.info("Worker started. Waiting for tasks...")
-    await worker.run()
+    try:
+        await worker.run()
+    finally:
+        await get_internal_api_client().close()
+        await close_http_clients()
 
 
 if __name__ == "__main__":
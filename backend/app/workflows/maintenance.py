@@ -0,0 +1,33 @@
+# backend/app/workflows/maintenance.py
+from datetime import timedelta
+from typing import Dict
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+
+@workflow.defn
+class ThoughtMaintenanceWorkflow:
+    @workflow.run
+    async def run(self, input_data: Dict) -> Dict:
+        """
+        Daily agent_thoughts maintenance (partitions, compaction, retention).
+        """
+        return await workflow.execute_activity(
+            "run_thought_maintenance",
+            start_to_close_timeout=timedelta(minutes=30),
+            retry_policy=RetryPolicy(maximum_attempts=3)
+        )
+
+
+@workflow.defn
+class RollupCompactionWorkflow:
+    @workflow.run
+    async def run(self, input_data: Dict) -> Dict:
+        """
+        Nightly daily-rollup compaction (recent facts + customer gauges).
+        """
+        return await workflow.execute_activity(
+            "run_rollup_compaction",
+            input_data.get("days"),
+            start_to_close_timeout=timedelta(minutes=30),
+            retry_policy=RetryPolicy(maximum_attempts=3)
+        )
@@ -0,0 +1,34 @@
+# backend/app/workflows/pricing.py
+import asyncio
+from datetime import timedelta
+from typing import Dict
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+
+
+@workflow.defn
+class PriceRevertWorkflow:
+    @workflow.run
+    async def run(self, input_data: Dict) -> Dict:
+        """
+        Restores a campaign's original prices when it ends.
+
+        Started by ExecutionAgent before the discount is written, so the
+        durable timer survives worker restarts; cancelled if the discount
+        could not be applied.
+
+        Args:
+            input_data: {
+                'merchant_id': str,
+                'changes': [{'platform_product_id', 'platform_variant_id', 'original_price'}],
+                'revert_after_seconds': int
+            }
+        """
+        await asyncio.sleep(input_data['revert_after_seconds'])
+
+        return await workflow.execute_activity(
+            "revert_campaign_prices",
+            args=[input_data['merchant_id'], input_data['changes']],
+            start_to_close_timeout=timedelta(minutes=5),
+            retry_policy=RetryPolicy(maximum_attempts=10, maximum_interval=timedelta(hours=1))
+        )
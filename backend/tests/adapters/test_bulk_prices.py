@@ -0,0 +1,183 @@
+
+import json
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from app.adapters.base import PriceChange, PriceUpdateResult
+from app.adapters.bigcommerce import BigCommercePlatformAdapter
+from app.adapters.shopify import ShopifyPlatformAdapter
+from app.adapters.woocommerce import WooCommercePlatformAdapter
+from app.services.http_clients import HttpClientRegistry
+
+
+def _registry(handler):
+    return HttpClientRegistry(transport_factory=lambda host: httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_shopify_bulk_update_reports_user_errors_per_variant():
+    """Verify one GraphQL call per product batch and per-variant userErrors."""
+    requests = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests.append(body)
+        assert "productVariantsBulkUpdate" in body["query"]
+        assert body["variables"]["p0"] == "gid://shopify/Product/1"
+        return httpx.Response(200, json={"data": {
+            "u0": {
+                "productVariants": [{"id": "gid://shopify/ProductVariant/11"}],
+                "userErrors": [{"field": ["variants", "1", "price"], "message": "Price is invalid"}],
+            },
+            "u1": {"productVariants": [{"id": "gid://shopify/ProductVariant/21"}], "userErrors": []},
+        }})
+
+    changes = [
+        PriceChange("1", "11", Decimal("9.99")),
+        PriceChange("1", "12", Decimal("-1")),
+        PriceChange("2", "21", Decimal("4.50")),
+    ]
+    with patch("app.services.http_clients._registry", _registry(handler)):
+        results = await ShopifyPlatformAdapter().bulk_update_prices(
+            {"shop_id": "test.myshopify.com", "access_token": "tok"}, changes
+        )
+
+    assert len(requests) == 1
+    assert [r.success for r in results] == [True, False, True]
+    assert results[1].error_message == "Price is invalid"
+    assert [r.platform_variant_id for r in results] == ["11", "12", "21"]
+
+
+@pytest.mark.asyncio
+async def test_woocommerce_bulk_update_splits_products_and_variations():
+    """Verify products/batch vs variations/batch and per-item errors."""
+    calls = {}
+
+    def handler(request):
+        body = json.loads(request.content)
+        calls[request.url.path] = body["update"]
+        if request.url.path.endswith("products/5/variations/batch"):
+            return httpx.Response(200, json={"update": [
+                {"id": 51},
+                {"id": 0, "error": {"code": "invalid_id", "message": "Invalid ID."}},
+            ]})
+        return httpx.Response(200, json={"update": [{"id": 7}]})
+
+    changes = [
+        PriceChange("5", "51", Decimal("10.00")),
+        PriceChange("7", "7", Decimal("3.00")),
+        PriceChange("5", "52", Decimal("11.00")),
+    ]
+    context = {"url": "https://shop.example", "consumer_key": "ck", "consumer_secret": "cs"}
+    with patch("app.services.http_clients._registry", _registry(handler)):
+        results = await WooCommercePlatformAdapter().bulk_update_prices(context, changes)
+
+    assert calls["/wp-json/wc/v3/products/batch"] == [{"id": 7, "regular_price": "3.00"}]
+    assert len(calls["/wp-json/wc/v3/products/5/variations/batch"]) == 2
+    assert [r.success for r in results] == [True, True, False]
+    assert results[2].error_message == "Invalid ID."
+
+
+@pytest.mark.asyncio
+async def test_bigcommerce_bulk_update_chunks_variants():
+    """Verify variant batches respect the endpoint limit and a failed chunk fails only its variants."""
+    calls = []
+
+    def handler(request):
+        payload = json.loads(request.content)
+        calls.append(len(payload))
+        if len(calls) == 2:
+            return httpx.Response(422, text="invalid")
+        return httpx.Response(200, json={"data": [{"id": item["id"]} for item in payload]})
+
+    changes = [PriceChange("1", str(100 + n), Decimal("5")) for n in range(60)]
+    with patch("app.services.http_clients._registry", _registry(handler)):
+        results = await BigCommercePlatformAdapter().bulk_update_prices(
+            {"store_hash": "abc", "access_token": "tok"}, changes
+        )
+
+    assert calls == [50, 10]
+    assert all(r.success for r in results[:50])
+    assert not any(r.success for r in results[50:])
+    assert results[50].error_message.startswith("422")
+
+
+@pytest.mark.asyncio
+async def test_default_bulk_update_falls_back_to_update_price():
+    """Verify the base implementation never raises, even if update_price does."""
+    adapter = WooCommercePlatformAdapter()
+
+    async def update_price(context, product_id, variant_id, new_price):
+        if variant_id == "2":
+            raise RuntimeError("boom")
+        return PriceUpdateResult(True, product_id, variant_id, new_price, None)
+
+    adapter.update_price = update_price
+    changes = [PriceChange("1", "1", Decimal("1")), PriceChange("2", "2", Decimal("2"))]
+    results = await super(WooCommercePlatformAdapter, adapter).bulk_update_prices({}, changes)
+
+    assert [r.success for r in results] == [True, False]
+    assert results[1].error_message == "boom"
+
+
+def test_discounted_price_is_rounded_to_cents():
+    """Verify float discounts never leak binary-expansion digits into platform payloads."""
+    from app.agents.execution import discounted_price
+
+    assert discounted_price(Decimal("19.99"), 0.3) == Decimal("13.99")
+    assert str(discounted_price("10", 0.15)) == "8.50"
+
+
+@pytest.mark.asyncio
+async def test_revert_campaign_prices_restores_originals_in_one_call():
+    """Verify the revert activity bulk-writes the captured original prices."""
+    from app.activities.pricing import revert_campaign_prices
+
+    merchant = MagicMock(platform="shopify", platform_context={"shop_id": "s"})
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=merchant)))
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    adapter = MagicMock()
+    adapter.bulk_update_prices = AsyncMock(return_value=[])
+
+    with patch("app.activities.pricing.async_session_maker", return_value=session_cm), \
+            patch("app.activities.pricing.AdapterRegistry.get_adapter", return_value=adapter):
+        await revert_campaign_prices("m1", [
+            {"platform_product_id": "1", "platform_variant_id": "11", "original_price": "20"},
+            {"platform_product_id": "1", "platform_variant_id": "12", "original_price": "24.5"},
+        ])
+
+    context, changes = adapter.bulk_update_prices.await_args.args
+    assert context == {"shop_id": "s"}
+    assert [(c.platform_variant_id, str(c.new_price)) for c in changes] == [("11", "20.00"), ("12", "24.50")]
+
+
+@pytest.mark.asyncio
+async def test_price_revert_is_scheduled_as_a_temporal_workflow():
+    """Verify the revert is a durable workflow, and an unreachable Temporal doesn't block repricing."""
+    from datetime import timedelta
+    from app.agents.execution import ExecutionAgent
+    from app.workflows.pricing import PriceRevertWorkflow
+
+    agent = ExecutionAgent("m1")
+    changes = [{"platform_product_id": "1", "platform_variant_id": "11", "original_price": "20"}]
+    client = MagicMock()
+    client.start_workflow = AsyncMock(return_value="handle")
+
+    with patch("app.orchestration.get_temporal_client", AsyncMock(return_value=client)):
+        assert await agent._schedule_price_revert("p1", changes, timedelta(days=3)) == "handle"
+
+    workflow_run, payload = client.start_workflow.await_args.args
+    assert workflow_run == PriceRevertWorkflow.run
+    assert payload == {"merchant_id": "m1", "changes": changes, "revert_after_seconds": 3 * 86400}
+    assert client.start_workflow.await_args.kwargs["id"] == "price-revert-p1"
+
+    with patch("app.orchestration.get_temporal_client", AsyncMock(side_effect=ConnectionError("refused"))), \
+            patch.object(agent, "_log_thought", AsyncMock()) as log_thought:
+        assert await agent._schedule_price_revert("p2", changes, timedelta(days=3)) is None
+    assert log_thought.await_args.kwargs["thought_type"] == "error"
@@ -0,0 +1,111 @@
+"""
+Unit Tests for Ledger Attribution
+=================================
+
+Verifies:
+1. Orders containing a product promoted by an executed proposal are claimed
+   once, with COGS over all their line items; others stay unattributed
+2. Re-runs only look past the watermark and never double-claim an order
+3. Journey progress is updated once per run, not per order
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import AttributionWatermark, Base, InboxItem, Ledger, Merchant, Order, OrderItem, Product
+from app.services.attribution import AttributionService
+
+
+@pytest_asyncio.fixture
+async def maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'attribution.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(Merchant(
+            id="m1", platform="shopify", shopify_domain="a.myshopify.com", shopify_shop_id="a.myshopify.com",
+            access_token="t", store_name="A", email="a@example.com"
+        ))
+        session.add_all([
+            Product(id=f"p{n}", merchant_id="m1", shopify_product_id=n, title=f"P{n}", handle=f"p{n}",
+                    cost_per_unit=Decimal("10.00"))
+            for n in (1, 2)
+        ])
+        session.add(InboxItem(
+            merchant_id="m1", type="clearance_proposal", agent_type="strategy", status="executed",
+            proposal_data={"product_id": "p1"}
+        ))
+        await session.commit()
+    with patch("app.services.attribution.async_session_maker", maker):
+        yield maker
+    await engine.dispose()
+
+
+def _order(order_id: int, total: str, items, days_ago: int = 1) -> Order:
+    return Order(
+        id=f"o{order_id}", shopify_order_id=order_id, merchant_id="m1", order_number=str(order_id),
+        total_price=Decimal(total), subtotal_price=Decimal(total),
+        created_at=datetime.utcnow() - timedelta(days=days_ago),
+        items=[OrderItem(product_id=pid, quantity=qty, price=Decimal("1.00")) for pid, qty in items],
+    )
+
+
+async def _ledger(maker):
+    async with maker() as session:
+        return {row.order_id: row for row in (await session.execute(select(Ledger))).scalars()}
+
+
+@pytest.mark.asyncio
+async def test_claims_promoted_orders_with_full_cogs(maker):
+    async with maker() as session:
+        session.add_all([
+            _order(1, "100.00", [("p1", 2), ("p2", 3)]),  # promoted: COGS covers both items
+            _order(2, "40.00", [("p2", 1)]),              # nothing promoted
+            _order(3, "15.00", [("p1", 2)]),              # loss: no stake
+            _order(4, "90.00", [("p1", 1)], days_ago=45), # outside the window
+        ])
+        await session.commit()
+
+    with patch("app.services.journey_engine.JourneyService.update_progress", new_callable=AsyncMock) as progress:
+        created = await AttributionService("m1").sync_ledger()
+
+    ledger = await _ledger(maker)
+    assert created == 2
+    assert set(ledger) == {"1", "3"}
+    assert ledger["1"].net_amount == Decimal("50.00")
+    assert ledger["1"].agent_stake == Decimal("12.50")
+    assert ledger["1"].attribution_source == "Agent (strategy)"
+    assert ledger["3"].agent_stake == Decimal("0.00")
+    progress.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_reruns_advance_the_watermark_without_double_claiming(maker):
+    async with maker() as session:
+        session.add(_order(1, "100.00", [("p1", 1)]))
+        await session.commit()
+
+    with patch("app.services.journey_engine.JourneyService.update_progress", new_callable=AsyncMock) as progress:
+        service = AttributionService("m1")
+        assert await service.sync_ledger() == 1
+        assert await service.sync_ledger() == 0
+
+        async with maker() as session:
+            session.add(_order(5, "60.00", [("p1", 1)]))
+            await session.commit()
+        assert await service.sync_ledger() == 1
+
+    async with maker() as session:
+        watermark = (await session.execute(select(AttributionWatermark.watermark))).scalar_one()
+
+    assert set(await _ledger(maker)) == {"1", "5"}
+    assert watermark is not None
+    assert progress.await_count == 2
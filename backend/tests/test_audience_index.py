@@ -0,0 +1,177 @@
+"""
+Unit Tests for the Audience Index
+=================================
+
+Verifies:
+1. Bitmap counts match the SQL the index replaces (segments, opt-in, fatigue)
+2. Committed touches mark customers fatigued; rolled-back ones don't
+3. Indexes are cached per merchant and dropped on invalidation
+4. Single customers move between segments without a rebuild
+5. Ids are packed and ranked compactly; the cache honours its byte budget
+6. An invalidation in another process (Redis version bump) forces a rebuild
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.database  # noqa: F401  (installs the touch hooks)
+from app.models import Base, Customer, Merchant, TouchLog
+from app.services import audience_index
+from app.services.audience_index import AudienceIndexCache, CustomerOrdinals
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+        return int(self.values[key])
+
+
+@pytest.fixture(autouse=True)
+def redis():
+    fake = FakeRedis()
+    with patch.object(audience_index, "_redis", return_value=fake):
+        yield fake
+
+
+@pytest_asyncio.fixture
+async def maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'audience.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(Merchant(
+            id="m1", platform="shopify", shopify_domain="a.myshopify.com", shopify_shop_id="a.myshopify.com",
+            access_token="t", store_name="A", email="a@example.com"
+        ))
+        segments = ["champions", "loyal", "loyal", "at_risk", "lost", None]
+        session.add_all([
+            Customer(
+                id=f"c{n}", merchant_id="m1", shopify_customer_id=n, email=f"c{n}@example.com",
+                rfm_segment=segment, email_optin=n % 2 == 0, sms_optin=n == 1,
+            )
+            for n, segment in enumerate(segments)
+        ])
+        session.add_all([
+            TouchLog(merchant_id="m1", customer_id="c1", channel="email"),
+            TouchLog(merchant_id="m1", customer_id="c3", channel="email",
+                     created_at=datetime.utcnow() - timedelta(days=30)),
+        ])
+        await session.commit()
+    yield maker
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_counts_and_intersections(maker):
+    async with maker() as session:
+        index = await AudienceIndexCache().get("m1", session)
+
+    assert index.segment_counts() == {"champions": 1, "loyal": 1, "at_risk": 1, "lost": 1}
+    assert index.segment_counts(exclude_fatigued=False)["loyal"] == 2
+    assert index.count(["champions", "loyal"], channel="email") == 2  # c0, c2
+    assert index.count(["loyal"], channel="sms") == 1
+    assert index.count(["loyal"], channel="sms", exclude_fatigued=True) == 0
+    assert index.count() == 6
+
+
+@pytest.mark.asyncio
+async def test_committed_touches_mark_fatigue(maker):
+    cache = AudienceIndexCache()
+    with patch("app.services.audience_index.get_audience_index_cache", return_value=cache):
+        async with maker() as session:
+            index = await cache.get("m1", session)
+        assert index.segment_counts()["champions"] == 1
+
+        async with maker() as session:
+            session.add(TouchLog(merchant_id="m1", customer_id="c0", channel="email"))
+            await session.flush()
+            await session.rollback()
+        assert index.segment_counts()["champions"] == 1
+
+        async with maker() as session:
+            session.add(TouchLog(merchant_id="m1", customer_id="c0", channel="email"))
+            await session.commit()
+        assert index.segment_counts()["champions"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_and_invalidation(maker):
+    cache = AudienceIndexCache()
+    async with maker() as session:
+        first = await cache.get("m1", session)
+        assert await cache.get("m1", session) is first
+
+        cache.invalidate("m1")
+        assert await cache.get("m1", session) is not first
+
+    stats = cache.stats()
+    assert (stats["merchants"], stats["builds"], stats["hits"]) == (1, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_reassign_moves_one_customer(maker):
+    async with maker() as session:
+        index = await AudienceIndexCache().get("m1", session)
+
+    index.reassign("c4", "lost", "champions")
+    assert index.segment_counts(exclude_fatigued=False) == {"champions": 2, "loyal": 2, "at_risk": 1, "lost": 0}
+    index.reassign("c5", None, "potential")
+    assert index.count(["potential"]) == 1
+
+
+def test_ordinals_are_ranks_of_packed_ids():
+    ids = sorted(str(uuid.uuid4()) for _ in range(50))
+    ordinals = CustomerOrdinals(ids)
+
+    assert ordinals.uuid_keys and ordinals.nbytes == 50 * 16
+    assert [ordinals.get(customer_id) for customer_id in ids] == list(range(50))
+    assert ordinals.get(str(uuid.uuid4())) is None and ordinals.get("not-a-uuid") is None
+
+    plain = CustomerOrdinals(["c1", "c10", "c2"])
+    assert [plain.get(i) for i in ("c1", "c10", "c2", "c3", "c100")] == [0, 1, 2, None, None]
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_over_byte_budget(maker):
+    async with maker() as session:
+        session.add(Merchant(
+            id="m2", platform="shopify", shopify_domain="b.myshopify.com", shopify_shop_id="b.myshopify.com",
+            access_token="t", store_name="B", email="b@example.com"
+        ))
+        session.add(Customer(id="d0", merchant_id="m2", shopify_customer_id=1, email="d0@example.com"))
+        await session.commit()
+
+        cache = AudienceIndexCache()
+        first = await cache.get("m1", session)
+        cache.max_bytes = first.nbytes
+        await cache.get("m2", session)
+
+    assert cache.peek("m1") is None and cache.peek("m2") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_remote_invalidation_forces_rebuild(maker, redis):
+    cache = AudienceIndexCache()
+    async with maker() as session:
+        first = await cache.get("m1", session)
+        assert await cache.get("m1", session) is first
+
+        # Another process re-segmented the merchant
+        await redis.incr(audience_index.version_key("m1"))
+        rebuilt = await cache.get("m1", session)
+        assert rebuilt is not first and rebuilt.version == "1"
+        assert await cache.get("m1", session) is rebuilt
@@ -0,0 +1,109 @@
+"""
+Unit Tests for Audience Streaming
+=================================
+
+Verifies:
+1. Only opted-in, reachable, non-fatigued customers of the segments stream out
+2. Chunks are read by keyset, each in its own short session
+3. The waterfall consumes async generators batch by batch
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Base, Customer, Merchant, TouchLog
+from app.services.audience_stream import AudienceStream, Recipient
+from app.services.waterfall import WaterfallService
+
+
+@pytest_asyncio.fixture
+async def maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stream.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(Merchant(
+            id="m1", platform="shopify", shopify_domain="a.myshopify.com", shopify_shop_id="a.myshopify.com",
+            access_token="t", store_name="A", email="a@example.com"
+        ))
+        session.add_all([
+            Customer(id="c0", merchant_id="m1", shopify_customer_id=0, email="c0@example.com",
+                     phone="+100", sms_optin=True, rfm_segment="loyal"),
+            Customer(id="c1", merchant_id="m1", shopify_customer_id=1, email="c1@example.com",
+                     phone="+101", sms_optin=True, rfm_segment="loyal"),   # fatigued
+            Customer(id="c2", merchant_id="m1", shopify_customer_id=2, email="c2@example.com",
+                     phone=None, sms_optin=True, rfm_segment="loyal"),     # no phone
+            Customer(id="c3", merchant_id="m1", shopify_customer_id=3, email="c3@example.com",
+                     phone="+103", sms_optin=False, rfm_segment="loyal"),  # opted out
+            Customer(id="c4", merchant_id="m1", shopify_customer_id=4, email="c4@example.com",
+                     phone="+104", sms_optin=True, rfm_segment="lost"),
+            Customer(id="c5", merchant_id="m1", shopify_customer_id=5, email="c5@example.com",
+                     phone="+105", sms_optin=True, rfm_segment="champions"),  # touched long ago
+        ])
+        session.add_all([
+            TouchLog(merchant_id="m1", customer_id="c1", channel="sms"),
+            TouchLog(merchant_id="m1", customer_id="c5", channel="sms",
+                     created_at=datetime.utcnow() - timedelta(days=30)),
+        ])
+        await session.commit()
+    yield maker
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_stream_filters_in_sql(maker):
+    stream = AudienceStream("m1", batch_size=2)
+    recipients = [r async for r in stream.stream(["loyal", "champions"], "sms", session_maker=maker)]
+    everyone = [r.id async for r in stream.stream(["loyal"], "sms", exclude_fatigued=False, session_maker=maker)]
+
+    assert recipients == [
+        Recipient("c0", "c0@example.com", "+100", False, True),
+        Recipient("c5", "c5@example.com", "+105", False, True),
+    ]
+    assert everyone == ["c0", "c1"]
+
+
+@pytest.mark.asyncio
+async def test_stream_reads_keyset_chunks_in_separate_sessions(maker):
+    opened = []
+
+    def counting_maker():
+        opened.append(1)
+        return maker()
+
+    stream = AudienceStream("m1", batch_size=1)
+    ids = []
+    async for recipient in stream.stream(None, "sms", exclude_fatigued=False, session_maker=counting_maker):
+        # The chunk's session is already closed while the recipient is handled
+        ids.append((recipient.id, len(opened)))
+
+    assert ids == [("c0", 1), ("c1", 2), ("c4", 3), ("c5", 4)]
+    assert len(opened) == 5  # Last read comes back empty
+
+
+@pytest.mark.asyncio
+async def test_waterfall_consumes_async_generator():
+    pulled = []
+
+    async def items():
+        for n in range(5):
+            pulled.append(n)
+            yield n
+
+    sent = []
+
+    async def dispatch(item):
+        # Batches are pulled lazily: nothing past the current batch is read yet
+        sent.append((item, len(pulled)))
+
+    with patch("app.services.waterfall.asyncio.sleep", AsyncMock()) as sleep:
+        assert await WaterfallService(batch_size=2, delay_seconds=1).execute_waterfall(items(), dispatch) == 5
+
+    assert sent == [(0, 2), (1, 2), (2, 4), (3, 4), (4, 5)]
+    assert sleep.await_count == 2
@@ -0,0 +1,101 @@
+"""
+Unit Tests for Global Brain Harvesting
+======================================
+
+Verifies:
+1. Quantile sketches stay within their relative error and merge exactly
+2. Harvests fold each settled campaign in once, keyed by industry + strategy,
+   with P50/P90 read off the merged sketch
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Base, Campaign, GlobalStrategyPattern, Merchant, StoreDNA
+from app.services.global_brain import GlobalBrainService
+from app.services.quantile_sketch import QuantileSketch
+
+
+def test_sketch_quantiles_and_merge():
+    rng = random.Random(7)
+    values = [rng.uniform(0.001, 0.3) for _ in range(5000)]
+    left, right, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    left.update(values[:2000])
+    right.update(values[2000:])
+    whole.update(values)
+    left.merge(right)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.9):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(left.quantile(q) - exact) <= 0.011 * exact
+    assert left.to_dict() == whole.to_dict()
+    assert QuantileSketch.from_dict(left.to_dict()).quantile(0.5) == left.quantile(0.5)
+
+
+@pytest_asyncio.fixture
+async def maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'brain.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        for mid in ("m1", "m2"):
+            session.add(Merchant(
+                id=mid, platform="shopify", shopify_domain=f"{mid}.myshopify.com", shopify_shop_id=mid,
+                access_token="t", store_name=mid, email=f"{mid}@example.com"
+            ))
+        session.add(StoreDNA(merchant_id="m1", industry_type="Fashion"))
+        await session.commit()
+    with patch("app.services.global_brain.async_session_maker", maker):
+        yield maker
+    await engine.dispose()
+
+
+def _campaign(merchant_id: str, sent: int, conversions: int, days_ago: int = 10) -> Campaign:
+    return Campaign(
+        merchant_id=merchant_id, name="c", type="flash_sale", emails_sent=sent, conversions=conversions,
+        created_at=datetime.utcnow() - timedelta(days=days_ago)
+    )
+
+
+async def _patterns(maker):
+    async with maker() as session:
+        return {p.pattern_key: p for p in (await session.execute(select(GlobalStrategyPattern))).scalars()}
+
+
+@pytest.mark.asyncio
+async def test_harvest_is_incremental(maker):
+    async with maker() as session:
+        session.add_all([
+            *[_campaign("m1", 100, n) for n in range(10)],
+            _campaign("m2", 100, 10),
+            _campaign("m1", 100, 50, days_ago=1),  # still settling
+        ])
+        await session.commit()
+
+    assert await GlobalBrainService.harvest_patterns() == {"campaigns": 11, "patterns": 2}
+    patterns = await _patterns(maker)
+    fashion = patterns["Fashion_flash_sale"]
+    assert fashion.sample_count == 10
+    assert fashion.recommendation_score == 9
+    assert float(fashion.p50_conversion) == pytest.approx(0.04, rel=0.02)
+    assert float(fashion.p90_conversion) == pytest.approx(0.08, rel=0.02)
+    assert patterns["Unknown_flash_sale"].sample_count == 1
+
+    # Nothing new: the settled campaigns are not counted again
+    assert await GlobalBrainService.harvest_patterns() == {"campaigns": 0, "patterns": 0}
+
+    # Once the settling campaign ages past the delay it is folded in
+    with patch("app.services.global_brain.settings.GLOBAL_BRAIN_HARVEST_DELAY_DAYS", 0):
+        assert await GlobalBrainService.harvest_patterns() == {"campaigns": 1, "patterns": 1}
+    fashion = (await _patterns(maker))["Fashion_flash_sale"]
+    assert fashion.sample_count == 11
+    assert fashion.recommendation_score == 10
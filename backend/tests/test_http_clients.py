@@ -0,0 +1,110 @@
+"""
+Unit Tests for the HTTP Client Registry
+=======================================
+
+Verifies:
+1. One pooled client per upstream host, shared across borrowed views
+2. Views resolve relative URLs and apply default auth / headers
+3. Per-host request, error and latency metrics
+4. Idle hosts beyond the limit are evicted and close() empties the registry
+5. Pooled clients never replay one tenant's cookies on another's requests
+6. Clients are closed when their event loop shuts down
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http_clients import HttpClientRegistry, HttpClientView
+
+
+def _registry(seen, max_hosts=None):
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(503 if request.url.path.endswith("/fail") else 200, json={"ok": True})
+    return HttpClientRegistry(max_hosts=max_hosts, transport_factory=lambda host: httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_views_share_pooled_client_per_host():
+    seen = []
+    registry = _registry(seen)
+    store = HttpClientView(registry, base_url="https://shop.example.com/wp-json/wc/v3/",
+                           auth=("ck", "cs"), headers={"Content-Type": "application/json"})
+
+    async with store as client:
+        await client.get("products?per_page=1")
+        await client.put("products/7", json={"regular_price": "9.99"}, headers={"X-Trace": "1"})
+    async with HttpClientView(registry) as client:
+        await client.post("https://api.example.org/v1/messages")
+
+    assert registry.client("https://shop.example.com/other") is registry.client("https://shop.example.com")
+    assert [str(r.url) for r in seen] == [
+        "https://shop.example.com/wp-json/wc/v3/products?per_page=1",
+        "https://shop.example.com/wp-json/wc/v3/products/7",
+        "https://api.example.org/v1/messages",
+    ]
+    assert seen[0].headers["Authorization"].startswith("Basic ")
+    assert seen[1].headers["X-Trace"] == "1" and seen[1].headers["Content-Type"] == "application/json"
+    assert "Authorization" not in seen[2].headers
+
+    await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_host_metrics():
+    registry = _registry([])
+    view = HttpClientView(registry, base_url="https://api.example.org/")
+    await view.get("ok")
+    await view.get("fail")
+
+    stats = registry.stats()["https://api.example.org"]
+    assert stats["requests"] == 2
+    assert stats["errors"] == 1
+    assert stats["in_flight"] == 0 and stats["peak_in_flight"] == 1
+    assert stats["p95_latency_ms"] is not None
+    await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_hosts_evicted():
+    registry = _registry([], max_hosts=2)
+    first = registry.client("https://a.example.com")
+    registry.client("https://b.example.com")
+    registry.client("https://c.example.com")
+
+    assert registry.client("https://b.example.com") is not None
+    assert len(registry._clients) == 2
+    assert registry.client("https://a.example.com") is not first
+
+    await registry.close()
+    assert registry._clients == {}
+
+
+@pytest.mark.asyncio
+async def test_pooled_clients_ignore_cookies():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, headers={"Set-Cookie": "session=merchant-a; Path=/"})
+
+    registry = HttpClientRegistry(transport_factory=lambda host: httpx.MockTransport(handler))
+    await HttpClientView(registry, base_url="https://store-a.example.com/").get("orders")
+    await HttpClientView(registry, base_url="https://store-a.example.com/").get("orders")
+
+    assert "cookie" not in seen[1].headers
+    await registry.close()
+
+
+def test_clients_closed_when_loop_shuts_down():
+    registry = _registry([])
+
+    async def borrow():
+        return registry.client("https://api.example.org")
+
+    first = asyncio.run(borrow())
+    assert first.is_closed
+    second = asyncio.run(borrow())
+    assert second is not first and second.is_closed
@@ -0,0 +1,125 @@
+"""
+Unit Tests for Inbox Counters
+=============================
+
+Verifies:
+1. Committed InboxItem creates / status transitions become per-status deltas
+2. Rolled-back work produces no deltas
+3. Fresh Redis counts skip the DB; Redis failures fall back to a COUNT query
+4. Deltas are applied before commit() returns (not left to a background task)
+5. Reconciles pass the pre-count snapshot so deltas landing meanwhile survive
+"""
+
+import asyncio
+import json
+import time
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.database  # noqa: F401  (installs the counter hooks)
+from app.models import Base, InboxItem, Merchant
+from app.services import inbox_counts
+
+
+@pytest_asyncio.fixture
+async def maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'inbox.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(Merchant(
+            id="m1", platform="shopify", shopify_domain="a.myshopify.com", shopify_shop_id="a.myshopify.com",
+            access_token="t", store_name="A", email="a@example.com"
+        ))
+        await session.commit()
+    yield maker
+    await engine.dispose()
+
+
+def _item(**kwargs) -> InboxItem:
+    return InboxItem(merchant_id="m1", type="clearance_proposal", agent_type="strategy", proposal_data={}, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_transitions_become_deltas_after_commit(maker):
+    with patch.object(inbox_counts, "apply_deltas", new_callable=AsyncMock) as apply:
+        async with maker() as session:
+            item = _item()
+            session.add_all([item, _item()])
+            await session.commit()
+            await asyncio.sleep(0)
+            assert dict(apply.call_args.args[0]["m1"]) == {"pending": 2}
+
+            item.status = "approved"
+            await session.commit()
+            await asyncio.sleep(0)
+            assert dict(apply.call_args.args[0]["m1"]) == {"pending": -1, "approved": 1}
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_work_is_discarded(maker):
+    with patch.object(inbox_counts, "apply_deltas", new_callable=AsyncMock) as apply:
+        async with maker() as session:
+            session.add(_item())
+            await session.flush()
+            await session.rollback()
+            await asyncio.sleep(0)
+
+    apply.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_reads_use_fresh_counters_and_fall_back_to_db(maker):
+    redis = MagicMock()
+    redis.close = AsyncMock()
+    redis.hgetall = AsyncMock(return_value={"pending": "7", "approved": "0", inbox_counts.RECONCILED_AT: str(time.time())})
+    db = MagicMock()
+    db.execute = AsyncMock()
+
+    with patch.object(inbox_counts, "_redis", return_value=redis):
+        assert await inbox_counts.get_inbox_counts(db, "m1") == {"pending": 7}
+    db.execute.assert_not_called()
+
+    redis.hgetall = AsyncMock(side_effect=ConnectionError("redis down"))
+    with patch.object(inbox_counts, "apply_deltas", new_callable=AsyncMock), \
+         patch.object(inbox_counts, "_redis", return_value=redis):
+        async with maker() as session:
+            session.add_all([_item(), _item(), _item(status="rejected")])
+            await session.commit()
+            assert await inbox_counts.get_inbox_counts(session, "m1") == {"pending": 2, "rejected": 1}
+
+
+@pytest.mark.asyncio
+async def test_deltas_are_applied_inside_commit(maker):
+    with patch.object(inbox_counts, "apply_deltas", new_callable=AsyncMock) as apply:
+        async with maker() as session:
+            session.add(_item())
+            await session.commit()
+            # No event-loop turn needed: commit() awaited the update
+            apply.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_sends_snapshot_taken_before_counting(maker):
+    async with maker() as session:
+        with patch.object(inbox_counts, "apply_deltas", new_callable=AsyncMock):
+            session.add_all([_item(), _item(status="approved")])
+            await session.commit()
+
+        redis = MagicMock()
+        redis.hgetall = AsyncMock(return_value={})
+        redis.eval = AsyncMock(side_effect=[
+            ["pending", "3", inbox_counts.RECONCILED_AT, "0"],
+            json.dumps({"pending": 2, "approved": 1}),
+        ])
+        with patch.object(inbox_counts, "_redis", return_value=redis):
+            assert await inbox_counts.get_inbox_counts(session, "m1") == {"pending": 2, "approved": 1}
+
+    finish = redis.eval.await_args_list[1].args
+    assert json.loads(finish[4]) == {"pending": 1, "approved": 1}   # DB counts
+    assert json.loads(finish[5]) == {"pending": 3}                  # Snapshot before the count
+    assert finish[3] == redis.eval.await_args_list[0].args[3]       # Same reconcile token
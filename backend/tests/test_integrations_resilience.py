@@ -1,34 +1,37 @@
 
 import pytest
-import requests
 import httpx
 from unittest.mock import MagicMock, AsyncMock, patch
 from app.integrations.klaviyo import KlaviyoConnector
 from app.integrations.twilio import TwilioConnector
 
 # ============================================================================
-# KLAVIYO TESTS (Sync requests via Executor)
+# KLAVIYO TESTS (Async httpx, pooled client)
 # ============================================================================
 
+KLAVIYO_POST = "app.services.http_clients.HttpClientView.post"
+
+
+def _klaviyo_error(status: int) -> httpx.HTTPStatusError:
+    req = httpx.Request("POST", "https://a.klaviyo.com/api/campaigns")
+    return httpx.HTTPStatusError("Klaviyo error", request=req, response=httpx.Response(status, request=req))
+
+
+def _klaviyo_created() -> httpx.Response:
+    req = httpx.Request("POST", "https://a.klaviyo.com/api/campaigns")
+    return httpx.Response(202, json={"data": {"id": "123"}}, request=req)
+
+
 @pytest.mark.asyncio
 async def test_klaviyo_rate_limit_retry():
     """Verify Klaviyo connector retries on 429."""
     connector = KlaviyoConnector(api_key="pk_test_123")
     
-    # Mock response to fail twice with 429, then succeed
-    mock_response_fail = MagicMock()
-    mock_response_fail.status_code = 429
-    mock_response_fail.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response_fail)
-    
-    mock_response_success = MagicMock()
-    mock_response_success.status_code = 202
-    mock_response_success.json.return_value = {"data": {"id": "123"}}
-    
-    with patch("requests.post") as mock_post:
+    with patch(KLAVIYO_POST, new_callable=AsyncMock) as mock_post:
         mock_post.side_effect = [
-            requests.exceptions.HTTPError(response=mock_response_fail), # Attempt 1
-            requests.exceptions.HTTPError(response=mock_response_fail), # Attempt 2
-            mock_response_success # Attempt 3
+            _klaviyo_error(429), # Attempt 1
+            _klaviyo_error(429), # Attempt 2
+            _klaviyo_created() # Attempt 3
         ]
         
         result = await connector.create_campaign("Test", "Subject", "Body", ["list_1"])
@@ -41,17 +44,10 @@ async def test_klaviyo_server_error_retry():
     """Verify Klaviyo connector retries on 500."""
     connector = KlaviyoConnector(api_key="pk_test_123")
     
-    mock_response_fail = MagicMock()
-    mock_response_fail.status_code = 503
-    
-    mock_response_success = MagicMock()
-    mock_response_success.status_code = 202
-    mock_response_success.json.return_value = {"data": {"id": "123"}}
-    
-    with patch("requests.post") as mock_post:
+    with patch(KLAVIYO_POST, new_callable=AsyncMock) as mock_post:
         mock_post.side_effect = [
-            requests.exceptions.HTTPError(response=mock_response_fail),
-            mock_response_success
+            _klaviyo_error(503),
+            _klaviyo_created()
         ]
         
         result = await connector.create_campaign("Test", "Subject", "Body", ["list_1"])
@@ -64,15 +60,11 @@ async def test_klaviyo_client_error_no_retry():
     """Verify Klaviyo connector does NOTE retry on 400."""
     connector = KlaviyoConnector(api_key="pk_test_123")
     
-    mock_response_fail = MagicMock()
-    mock_response_fail.status_code = 400
-    mock_response_fail.text = "Bad Request"
-    
-    with patch("requests.post") as mock_post:
+    with patch(KLAVIYO_POST, new_callable=AsyncMock) as mock_post:
         # Should start failing immediately
-        mock_post.side_effect = requests.exceptions.HTTPError(response=mock_response_fail)
+        mock_post.side_effect = _klaviyo_error(400)
         
-        with pytest.raises(requests.exceptions.HTTPError):
+        with pytest.raises(httpx.HTTPStatusError):
             await connector.create_campaign("Test", "Subject", "Body", ["list_1"])
         
         # Should only call once
@@ -0,0 +1,95 @@
+"""
+Unit Tests for the shared Internal API Client
+=============================================
+
+Verifies:
+1. Tokens are cached per (merchant, agent_type)
+2. Concurrent callers trigger a single authentication
+3. Tokens refresh ahead of expiry
+4. A 401 response re-authenticates and retries once
+"""
+
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services.internal_api_client import InternalAPIClient, InternalAPIResponse
+
+CREDS = {"client_id": "agent_observer_1", "client_secret": "s3cret"}
+
+
+def _auth_ok(token: str, expires_in: int = 3600) -> InternalAPIResponse:
+    return InternalAPIResponse(200, {"access_token": token, "token_type": "bearer", "expires_in": expires_in})
+
+
+@pytest.fixture
+def client():
+    c = InternalAPIClient(base_url="http://internal", refresh_margin_seconds=300)
+    c._load_credentials = AsyncMock(return_value=CREDS)
+    return c
+
+
+@pytest.mark.asyncio
+async def test_token_is_cached_per_identity(client):
+    with patch.object(client, "_send", new_callable=AsyncMock, return_value=_auth_ok("tok-1")) as mock_send:
+        assert await client.get_token("m1", "observer") == "tok-1"
+        assert await client.get_token("m1", "observer") == "tok-1"
+
+    assert mock_send.call_count == 1
+    client._load_credentials.assert_called_once()
+    assert client.stats()["tokens"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_authentication(client):
+    async def slow_auth(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return _auth_ok("tok-shared")
+
+    with patch.object(client, "_send", side_effect=slow_auth) as mock_send:
+        tokens = await asyncio.gather(*[client.get_token("m1", "observer") for _ in range(10)])
+
+    assert set(tokens) == {"tok-shared"}
+    assert mock_send.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_token_refreshes_before_expiry(client):
+    responses = [_auth_ok("tok-old", expires_in=3600), _auth_ok("tok-new", expires_in=3600)]
+    with patch.object(client, "_send", new_callable=AsyncMock, side_effect=responses):
+        assert await client.get_token("m1", "observer") == "tok-old"
+
+        # Move the deadline inside the refresh margin
+        client._tokens[("m1", "observer")].expires_at = time.monotonic() + 60
+
+        assert await client.get_token("m1", "observer") == "tok-new"
+
+    # Credentials were only read from the DB once
+    client._load_credentials.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_unauthorized_response_reauthenticates_once(client):
+    responses = [
+        _auth_ok("tok-stale"),
+        InternalAPIResponse(401, {"detail": "Invalid agent credentials"}),
+        _auth_ok("tok-fresh"),
+        InternalAPIResponse(200, {"status": "created", "id": "p-1"}),
+    ]
+    with patch.object(client, "_send", new_callable=AsyncMock, side_effect=responses) as mock_send:
+        resp = await client.post("/internal/agents/proposals", "m1", "strategy", json={"title": "x"})
+
+    assert resp.ok and resp.data["id"] == "p-1"
+    assert mock_send.call_args.kwargs["token"] == "tok-fresh"
+
+
+@pytest.mark.asyncio
+async def test_failed_authentication_returns_401_without_request(client):
+    with patch.object(client, "_send", new_callable=AsyncMock, return_value=InternalAPIResponse(401, "bad secret")) as mock_send:
+        resp = await client.post("/internal/agents/proposals", "m1", "strategy", json={})
+
+    assert resp.status == 401
+    assert mock_send.call_count == 1  # only the /auth attempt
+    assert ("m1", "strategy") not in client._credentials
@@ -0,0 +1,60 @@
+"""
+Unit Tests for Causal Memory Retrieval
+======================================
+
+Verifies that theme filtering and ranking happen in SQL:
+1. Postgres uses the indexed tsvector / trigram predicates and relevance x recency ranking
+2. Other dialects still filter by theme in SQL
+3. No themes means most recent causal memories
+4. LIKE wildcards in themes match literally
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.services.memory_stream import MemoryStreamService, CAUSAL_SEARCH_VECTOR, escape_like
+
+
+def _sql(stmt, dialect):
+    return str(stmt.compile(dialect=dialect))
+
+
+def test_postgres_query_filters_and_ranks_in_sql():
+    service = MemoryStreamService("merchant-1")
+
+    sql = _sql(service._build_history_query(["Winter Coats", "Sandals"], 10, "postgresql"), postgresql.dialect())
+
+    assert f"{CAUSAL_SEARCH_VECTOR} @@" in sql
+    assert sql.count("plainto_tsquery") >= 2
+    assert "ILIKE" in sql
+    assert "ts_rank_cd" in sql and "similarity" in sql
+    assert "agent_thoughts.thought_type =" in sql
+    assert "LIMIT" in sql
+
+
+def test_fallback_query_filters_themes_in_sql():
+    service = MemoryStreamService("merchant-1")
+
+    sql = _sql(service._build_history_query(["Winter Coats"], 5, "sqlite"), sqlite.dialect())
+
+    assert "lower(agent_thoughts.summary) LIKE lower(" in sql
+    assert "to_tsvector" not in sql
+    assert "ORDER BY agent_thoughts.created_at DESC" in sql
+
+
+def test_no_themes_returns_most_recent():
+    service = MemoryStreamService("merchant-1")
+
+    sql = _sql(service._build_history_query([], 10, "postgresql"), postgresql.dialect())
+
+    assert "@@" not in sql and "ILIKE" not in sql
+    assert "ORDER BY agent_thoughts.created_at DESC" in sql
+
+
+def test_themes_escape_like_wildcards():
+    service = MemoryStreamService("merchant-1")
+
+    compiled = service._build_history_query(["50%_off\\sale"], 5, "sqlite").compile(dialect=sqlite.dialect())
+
+    assert escape_like("50%_off\\sale") == "50\\%\\_off\\\\sale"
+    assert "ESCAPE '\\'" in str(compiled)
+    assert "%50\\%\\_off\\\\sale%" in compiled.params.values()
@@ -0,0 +1,117 @@
+"""
+Unit Tests for the Merchant Cache
+=================================
+
+Verifies:
+1. Lookups by id and by (platform, external id) share one DB read
+2. Hits return independent copies; invalidation drops every key of a merchant
+3. The LRU stays bounded and rows read during an invalidation aren't cached
+4. Hits are attached to the caller's session, like misses
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Merchant
+from app.services.merchant_cache import MerchantCache
+
+
+def _merchant(merchant_id: str = "m1", domain: str = "a.myshopify.com") -> Merchant:
+    return Merchant(
+        id=merchant_id,
+        platform="shopify",
+        shopify_domain=domain,
+        shopify_shop_id=domain,
+        access_token="token",
+        store_name="Store A",
+        email="a@example.com",
+        is_active=True,
+    )
+
+
+def _session(*merchants):
+    session = MagicMock()
+    results = []
+    for merchant in merchants:
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = merchant
+        results.append(result)
+    session.execute = AsyncMock(side_effect=results)
+    session.merge = AsyncMock(side_effect=lambda merchant, load: merchant)
+    return session
+
+
+@pytest.mark.asyncio
+async def test_id_and_platform_lookups_share_one_read():
+    cache = MerchantCache(max_size=10, ttl_seconds=60)
+    session = _session(_merchant())
+
+    first = await cache.get_by_platform("shopify", "a.myshopify.com", session=session)
+    by_id = await cache.get_by_id("m1", session=session)
+    by_platform = await cache.get_by_platform("shopify", "a.myshopify.com", session=session)
+
+    assert session.execute.await_count == 1
+    assert by_id.id == first.id == "m1"
+    assert by_platform.store_name == "Store A"
+    assert cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_hits_are_copies_and_invalidation_drops_all_keys():
+    cache = MerchantCache(max_size=10, ttl_seconds=60)
+    session = _session(_merchant(), _merchant())
+
+    await cache.get_by_id("m1", session=session)
+    copy = await cache.get_by_id("m1", session=session)
+    copy.is_active = False
+    assert (await cache.get_by_id("m1", session=session)).is_active is True
+
+    cache.invalidate("m1")
+    assert cache.stats()["size"] == 0
+
+    await cache.get_by_platform("shopify", "a.myshopify.com", session=session)
+    assert session.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_is_bounded_and_skips_rows_read_during_invalidation():
+    cache = MerchantCache(max_size=4, ttl_seconds=60)
+    session = _session(*[_merchant(f"m{i}", f"{i}.myshopify.com") for i in range(3)])
+
+    for i in range(3):
+        await cache.get_by_id(f"m{i}", session=session)
+
+    assert cache.stats()["size"] == 4   # two keys per merchant
+    assert cache.stats()["evictions"] == 2
+
+    racing = MagicMock()
+
+    async def execute_with_invalidation(stmt):
+        cache.invalidate("m9")
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = _merchant("m9", "9.myshopify.com")
+        return result
+
+    racing.execute = execute_with_invalidation
+    assert (await cache.get_by_id("m9", session=racing)).id == "m9"
+    assert ("id", "m9") not in cache._entries
+
+
+@pytest.mark.asyncio
+async def test_hits_are_attached_to_the_callers_session():
+    cache = MerchantCache(max_size=10, ttl_seconds=60)
+    await cache.get_by_id("m1", session=_session(_merchant()))
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with AsyncSession(engine) as db:
+        merchant = await cache.get_by_id("m1", session=db)
+        assert merchant in db and inspect(merchant).persistent
+        assert not db.dirty
+        assert await cache.get_by_id("m1", session=db) is merchant
+    await engine.dispose()
+
+    detached = await cache.get_by_id("m1")
+    assert inspect(detached).detached and detached.store_name == "Store A"
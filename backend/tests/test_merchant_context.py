@@ -0,0 +1,85 @@
+"""
+Unit Tests for the run-scoped Merchant Context
+==============================================
+
+Verifies that:
+1. A run loads the merchant once, however many products consult it
+2. Invalidation forces the next access to reload
+3. Preferences keep the MemoryService shape
+4. An unset or zero max_auto_discount falls back to the caller's default
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from app.services import merchant_context as mc
+
+
+def _context(merchant_id="merchant-1", **overrides):
+    fields = dict(
+        merchant_id=merchant_id,
+        store_name="Test Store",
+        platform="shopify",
+        created_at=datetime.utcnow() - timedelta(days=30),
+        is_active=True,
+        is_paused=False,
+        max_auto_discount=0.3,
+        governor_aggressive_mode=False,
+        governor_calibration_threshold=50,
+        governor_trust_threshold=0.95,
+        enable_multi_plan_strategy=False,
+        external_channels_enabled=True,
+        dna={"brand_tone": "playful", "industry_type": "apparel", "brand_values": ["sustainable"]},
+        floor_priced_products=frozenset({"prod-1"}),
+        version=mc._versions[merchant_id],
+    )
+    fields.update(overrides)
+    return mc.MerchantContext(**fields)
+
+
+@pytest.mark.asyncio
+async def test_scope_loads_merchant_once():
+    loader = AsyncMock(side_effect=lambda merchant_id, session=None: _context(merchant_id))
+
+    with patch.object(mc, "load_merchant_context", loader):
+        async with mc.merchant_context_scope("merchant-1"):
+            contexts = [await mc.get_merchant_context("merchant-1") for _ in range(100)]
+
+    assert loader.call_count == 1
+    assert all(c is contexts[0] for c in contexts)
+    assert contexts[0].has_floor_pricing("prod-1") and not contexts[0].has_floor_pricing("prod-2")
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reloads_on_next_access():
+    loader = AsyncMock(side_effect=lambda merchant_id, session=None: _context(merchant_id))
+
+    with patch.object(mc, "load_merchant_context", loader):
+        async with mc.merchant_context_scope("merchant-2"):
+            await mc.get_merchant_context("merchant-2")
+            mc.invalidate_merchant_context("merchant-2")
+            await mc.get_merchant_context("merchant-2")
+            await mc.get_merchant_context("merchant-2")
+
+    assert loader.call_count == 2
+
+
+def test_preferences_and_new_store_flag():
+    ctx = _context(created_at=datetime.utcnow() - timedelta(days=2))
+
+    prefs = ctx.preferences()
+
+    assert ctx.is_new_store is True
+    assert prefs["brand_tone"] == "playful"
+    assert prefs["max_auto_discount"] == 0.3
+    assert prefs["preferred_strategies"] == ["sustainable"]
+
+
+def test_discount_cap_falls_back_when_unset_or_zero():
+    for stored in (None, 0.0):
+        ctx = _context(max_auto_discount=stored)
+        assert ctx.preferences()["max_auto_discount"] == 0.25
+        assert ctx.discount_cap(0.40) == 0.40
+
+    assert _context(max_auto_discount=0.15).discount_cap(0.40) == 0.15
@@ -9,6 +9,7 @@ Verifies the "Brain + Math" combination:
 3. Combined final classification
 """
 
+import asyncio
 import pytest
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -67,7 +68,8 @@ class TestObserverAgent:
         }
         
         # Mock ThoughtLogger
-        with patch("app.agents.observer.ThoughtLogger.log_thought", new_callable=AsyncMock):
+        with patch("app.agents.observer.ThoughtLogger.log_thought", new_callable=AsyncMock), \
+             patch("app.agents.observer.get_merchant_context", new_callable=AsyncMock, return_value=None):
             result = await agent.observe_product(product_data, MagicMock())
         
         # If score > 65, base_severity = "none"
@@ -84,5 +86,59 @@ class TestObserverAgent:
         classification = agent._finalize_classification(metrics, reasoning)
         assert classification["severity"] == "critical"
 
+    @pytest.mark.asyncio
+    async def test_observe_inventory_prefetches_memories_in_one_query(self, agent):
+        """Verify batch observation recalls product memories once, not per product."""
+        products = [{"id": "prod-1", "title": "A"}, {"id": "prod-2", "title": "B"}]
+        memories = {"prod-1": [{"summary": "seen before"}], "prod-2": []}
+
+        agent.clustering.cluster_inventory = AsyncMock(return_value=[])
+        agent.clustering.generate_llm_prompt_fragment = MagicMock(return_value="")
+        agent.causal_memory.get_relevant_history = AsyncMock(return_value="")
+        agent.router = AsyncMock()
+        agent.router.complete.return_value = {"content": "ok"}
+        agent.thought_sink = AsyncMock()
+        agent.memory.recall_thoughts = AsyncMock()
+        agent.memory.recall_thoughts_for_products = AsyncMock(return_value=memories)
+
+        with patch.object(agent, "observe_product", new_callable=AsyncMock, return_value={}) as mock_observe:
+            await agent.observe_inventory(products, None)
+
+        agent.memory.recall_thoughts_for_products.assert_called_once_with(
+            ["prod-1", "prod-2"], agent_type=agent.agent_type, limit_per_product=2
+        )
+        agent.memory.recall_thoughts.assert_not_called()
+        passed = [c.kwargs["past_thoughts"] for c in mock_observe.call_args_list]
+        assert passed == [memories["prod-1"], memories["prod-2"]]
+
+    @pytest.mark.asyncio
+    async def test_observe_products_concurrently_is_bounded_and_session_free(self, agent):
+        """Verify batch analysis overlaps up to `concurrency` products and never shares the session."""
+        products = [{"id": f"prod-{i}", "title": str(i)} for i in range(6)]
+        in_flight, peak = 0, 0
+
+        async def observe(product_data, session, past_thoughts=None):
+            nonlocal in_flight, peak
+            assert session is None
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # Later products finish first
+            await asyncio.sleep(0.01 * (6 - int(product_data["title"])))
+            in_flight -= 1
+            return {"id": product_data["id"], "past": past_thoughts}
+
+        with patch.object(agent, "observe_product", side_effect=observe), \
+             patch("app.agents.observer.get_merchant_context", new_callable=AsyncMock) as mock_context:
+            results = [
+                (p["id"], a["past"]) async for p, a in agent.observe_products_concurrently(
+                    products, "caller-session", {"prod-0": ["memory"]}, concurrency=3
+                )
+            ]
+
+        mock_context.assert_awaited_once_with("test-merchant", "caller-session")
+        assert peak == 3
+        assert sorted(results) == sorted([(p["id"], ["memory"] if p["id"] == "prod-0" else []) for p in products])
+        assert results[0][0] != "prod-0"
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,128 @@
+"""
+Unit Tests for Keyset Pagination
+================================
+
+Verifies:
+1. Cursors round-trip typed sort values and reject garbage
+2. Paging by (created_at, id) visits every inbox item exactly once, ties included
+3. Nullable sort keys (velocity_score) page NULLs first without gaps
+4. /thoughts returns its next_cursor in the body, like /products and /inbox
+"""
+
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import AgentThought, Base, InboxItem, Merchant, Product
+from app.services.inbox import InboxService
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_desc, next_page
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pages.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(Merchant(
+            id="m1", platform="shopify", shopify_domain="a.myshopify.com", shopify_shop_id="a.myshopify.com",
+            access_token="t", store_name="A", email="a@example.com"
+        ))
+        await session.flush()
+        yield session
+    await engine.dispose()
+
+
+def test_cursor_round_trip():
+    created = datetime(2026, 10, 1, 12, 30)
+    assert decode_cursor(encode_cursor(created, "abc")) == (created, "abc")
+    assert decode_cursor(encode_cursor(Decimal("12.50"), "x")) == (Decimal("12.50"), "x")
+    assert decode_cursor(encode_cursor(None, "y")) == (None, "y")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_inbox_pages_cover_ties_exactly_once(session):
+    same_time = datetime(2026, 10, 1)
+    session.add_all([
+        InboxItem(
+            id=f"i{n:02d}", merchant_id="m1", type="clearance_proposal", agent_type="strategy",
+            created_at=same_time if n < 5 else datetime(2026, 10, 2, n),
+            proposal_data={"title": f"Offer {n}", "reasoning": "x" * 1000}, chat_history=[{"role": "user"}],
+        )
+        for n in range(8)
+    ])
+    await session.flush()
+
+    service = InboxService(session, "m1")
+    seen, cursor = [], None
+    with patch("app.services.inbox.get_inbox_counts", new=AsyncMock(return_value={"pending": 8})):
+        while True:
+            items, pending, cursor = await service.list_proposals(limit=3, cursor=cursor, view="summary")
+            seen += [item["id"] for item in items]
+            if cursor is None:
+                break
+
+    assert pending == 8
+    assert seen == ["i07", "i06", "i05", "i04", "i03", "i02", "i01", "i00"]
+    assert items[-1]["proposal_data"] == {"title": "Offer 0"}
+    assert "chat_history" not in items[-1]
+
+
+@pytest.mark.asyncio
+async def test_nullable_sort_key_pages_without_gaps(session):
+    scores = [None, None, Decimal("5.00"), Decimal("5.00"), Decimal("40.00")]
+    session.add_all([
+        Product(
+            id=f"p{n}", merchant_id="m1", shopify_product_id=n, title=f"P{n}", handle=f"p{n}",
+            velocity_score=score,
+        )
+        for n, score in enumerate(scores)
+    ])
+    await session.flush()
+
+    seen, cursor = [], None
+    while True:
+        query = keyset_desc(select(Product.id, Product.velocity_score), Product.velocity_score, Product.id,
+                            cursor, nullable=True)
+        rows, cursor = next_page((await session.execute(query.limit(3))).all(), 2, "velocity_score")
+        seen += [row.id for row in rows]
+        if cursor is None:
+            break
+
+    assert seen == ["p1", "p0", "p4", "p3", "p2"]
+
+
+@pytest.mark.asyncio
+async def test_thoughts_cursor_is_in_the_body(session):
+    from app.routers.thoughts import get_thoughts
+
+    now = datetime.utcnow()
+    session.add_all([
+        AgentThought(id=f"t{n}", merchant_id="m1", agent_type="observer", thought_type="analysis",
+                     summary=f"thought {n}", created_at=now)
+        for n in range(3)
+    ])
+    await session.flush()
+
+    session_cm = AsyncMock()
+    session_cm.__aenter__.return_value = session
+    seen = []
+    cursor = None
+    with patch("app.routers.thoughts.async_session_maker", return_value=session_cm):
+        while True:
+            page = await get_thoughts(merchant_id="m1", execution_id=None, limit=2, cursor=cursor,
+                                      include_reasoning=False, settings=None)
+            seen += [item["id"] for item in page.items]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+    assert sorted(seen) == ["t0", "t1", "t2"]
@@ -0,0 +1,83 @@
+"""
+Unit Tests for the Pub/Sub Hub
+==============================
+
+Verifies:
+1. Messages fan out only to subscribers of their channel
+2. Slow subscribers drop their oldest messages, counted in metrics
+3. One Redis connection serves all subscribers and reconnects trigger a resync
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.pubsub_hub import RESYNC_MESSAGE, PubSubHub
+
+
+@pytest.mark.asyncio
+async def test_fan_out_by_channel():
+    hub = PubSubHub("inbox_updates:*")
+    with patch.object(hub, "start"):
+        a1 = hub.subscribe("inbox_updates:a")
+        a2 = hub.subscribe("inbox_updates:a")
+        b = hub.subscribe("inbox_updates:b")
+
+    hub.dispatch("inbox_updates:a", "hello")
+
+    assert await a1.get(timeout=0.1) == "hello"
+    assert await a2.get(timeout=0.1) == "hello"
+    assert await b.get(timeout=0.01) is None
+
+    hub.unsubscribe(a1)
+    hub.unsubscribe(a2)
+    assert hub.metrics()["channels"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest():
+    hub = PubSubHub("inbox_updates:*", max_queue=2)
+    with patch.object(hub, "start"):
+        slow = hub.subscribe("inbox_updates:a")
+
+    for n in range(5):
+        hub.dispatch("inbox_updates:a", str(n))
+
+    assert [await slow.get(timeout=0.1), await slow.get(timeout=0.1)] == ["3", "4"]
+    assert slow.dropped == 3
+    assert hub.metrics()["dropped"] == 3
+
+
+def _fake_redis(messages):
+    pubsub = MagicMock()
+    pubsub.psubscribe = AsyncMock()
+    pubsub.close = AsyncMock()
+    pubsub.ping = AsyncMock()
+    pubsub.get_message = AsyncMock(side_effect=messages)
+    redis = MagicMock()
+    redis.pubsub.return_value = pubsub
+    redis.close = AsyncMock()
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_single_connection_and_resync_after_reconnect():
+    first = _fake_redis([
+        {"type": "pmessage", "channel": "inbox_updates:a", "data": "created"},
+        ConnectionError("connection reset"),
+    ])
+    second = _fake_redis([None, asyncio.CancelledError()])
+    hub = PubSubHub("inbox_updates:*", heartbeat_seconds=0.01)
+
+    with patch("redis.asyncio.from_url", side_effect=[first, second]) as from_url, \
+         patch("app.services.pubsub_hub.asyncio.sleep", new=AsyncMock()):
+        subs = [hub.subscribe("inbox_updates:a") for _ in range(3)]
+        with pytest.raises(asyncio.CancelledError):
+            await hub._task
+
+    assert from_url.call_count == 2
+    for sub in subs:
+        assert await sub.get(timeout=0.1) == "created"
+        assert await sub.get(timeout=0.1) == RESYNC_MESSAGE
+    second.pubsub.return_value.ping.assert_awaited()
+    assert hub.metrics()["reconnects"] == 1
@@ -0,0 +1,132 @@
+"""
+Unit Tests for RFM Segmentation
+===============================
+
+Verifies:
+1. The set-based UPDATE scores and segments exactly like the Python rules
+2. Segment counts and percentile breakpoints come back from the run
+3. Small merchants fall back to the default monetary breakpoints
+4. A single order re-scores only its customer against the cached breakpoints
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Base, Customer, Merchant
+from app.services import rfm
+from app.services.rfm import RFMService
+
+
+@pytest_asyncio.fixture
+async def maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rfm.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(Merchant(
+            id="m1", platform="shopify", shopify_domain="a.myshopify.com", shopify_shop_id="a.myshopify.com",
+            access_token="t", store_name="A", email="a@example.com"
+        ))
+        await session.commit()
+    with patch("app.services.rfm.async_session_maker", maker), \
+            patch("app.services.rfm.cache_breakpoints", AsyncMock()):
+        yield maker
+    await engine.dispose()
+
+
+def _customer(n: int, days_ago, orders: int, spent: str) -> Customer:
+    return Customer(
+        merchant_id="m1", shopify_customer_id=n, email=f"c{n}@example.com", total_orders=orders,
+        total_spent=Decimal(spent),
+        last_order_date=datetime.utcnow() - timedelta(days=days_ago) if days_ago is not None else None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_sql_segmentation_matches_python_rules(maker):
+    profiles = [
+        (5, 12, "900"), (20, 6, "400"), (45, 3, "300"), (75, 1, "50"), (120, 4, "700"),
+        (200, 2, "120"), (400, 1, "20"), (None, 0, "0"), (10, 1, "80"), (31, 10, "1500"),
+    ]
+    async with maker() as session:
+        session.add_all([_customer(n, *profile) for n, profile in enumerate(profiles)])
+        await session.commit()
+
+    result = await RFMService("m1").segment_all()
+
+    async with maker() as session:
+        breakpoints = await RFMService("m1").monetary_breakpoints(session)
+        customers = (await session.execute(select(Customer))).scalars().all()
+
+    assert result["status"] == "completed"
+    assert result["total_customers"] == 10
+    assert result["breakpoints"] == [float(b) for b in breakpoints]
+    assert breakpoints == (Decimal("50"), Decimal("120"), Decimal("400"), Decimal("900"))
+
+    expected_counts = {segment: 0 for segment in rfm.SEGMENTS}
+    for customer in customers:
+        r = rfm.recency_score(customer.last_order_date)
+        f = rfm.frequency_score(customer.total_orders)
+        m = rfm.monetary_score(customer.total_spent, breakpoints)
+        assert (customer.recency_score, customer.frequency_score, customer.monetary_score) == (r, f, m)
+        assert customer.rfm_segment == rfm.assign_segment(r, f, m)
+        expected_counts[customer.rfm_segment] += 1
+    assert result["segments"] == expected_counts
+
+
+@pytest.mark.asyncio
+async def test_small_merchants_use_default_breakpoints(maker):
+    async with maker() as session:
+        session.add(_customer(1, 5, 1, "300"))
+        await session.commit()
+        assert await RFMService("m1").monetary_breakpoints(session) == rfm.DEFAULT_BREAKPOINTS
+
+    result = await RFMService("m1").segment_all()
+    assert result["segments"]["new_customers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_customers(maker):
+    assert await RFMService("m1").segment_all() == {"status": "no_customers"}
+
+
+@pytest.mark.asyncio
+async def test_apply_order_rescores_one_customer(maker):
+    async with maker() as session:
+        session.add_all([_customer(1, 400, 1, "20"), _customer(2, 400, 1, "20")])
+        await session.commit()
+
+    cached = (Decimal("10"), Decimal("20"), Decimal("30"), Decimal("40"))
+    with patch("app.services.rfm.get_breakpoints", AsyncMock(return_value=cached)):
+        async with maker() as session:
+            change = await RFMService("m1").apply_order(session, 1, Decimal("30"), datetime.utcnow())
+            assert await RFMService("m1").apply_order(session, 99, Decimal("30"), datetime.utcnow()) is None
+            await session.commit()
+
+    async with maker() as session:
+        customers = {c.shopify_customer_id: c for c in (await session.execute(select(Customer))).scalars()}
+    buyer = customers[1]
+    assert change == (buyer.id, None, "potential")
+    assert (buyer.total_orders, buyer.total_spent, buyer.avg_order_value) == (2, Decimal("50.00"), Decimal("25.00"))
+    assert (buyer.recency_score, buyer.frequency_score, buyer.monetary_score) == (5, 2, 5)
+    assert customers[2].rfm_segment is None
+
+
+@pytest.mark.asyncio
+async def test_breakpoints_cached_by_nightly_run(maker):
+    cache = {}
+
+    async def fake_cache(merchant_id, breakpoints):
+        cache[merchant_id] = breakpoints
+
+    with patch("app.services.rfm.cache_breakpoints", AsyncMock(side_effect=fake_cache)):
+        await RFMService("m1").segment_all()
+    assert cache == {"m1": rfm.DEFAULT_BREAKPOINTS}
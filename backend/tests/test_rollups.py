@@ -0,0 +1,125 @@
+"""
+Unit Tests for Daily Rollups
+============================
+
+Verifies:
+1. Flushed ledger / LLM / engagement facts land in the rollups, and a
+   rollback takes its rollup deltas with it
+2. Compaction recomputes recent facts from the source tables and snapshots
+   the customer gauges
+3. Series fill days without activity with zeros
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.database  # noqa: F401  (installs the rollup hooks)
+from app.models import Base, Campaign, Customer, DailyMerchantRollup, Ledger, LLMUsageLog, Merchant
+from app.services.rollups import RollupService, compact_rollups
+
+
+@pytest_asyncio.fixture
+async def maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rollups.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(Merchant(
+            id="m1", platform="shopify", shopify_domain="a.myshopify.com", shopify_shop_id="a.myshopify.com",
+            access_token="t", store_name="A", email="a@example.com"
+        ))
+        await session.commit()
+    yield maker
+    await engine.dispose()
+
+
+def _ledger(order_id: str, gross: str, **kwargs) -> Ledger:
+    return Ledger(
+        merchant_id="m1", order_id=order_id, gross_amount=Decimal(gross), net_amount=Decimal(gross) / 2,
+        agent_stake=Decimal("1.00"), attribution_source="proposal:p1", **kwargs
+    )
+
+
+def _llm(cost: str, task_type: str = "strategy") -> LLMUsageLog:
+    return LLMUsageLog(
+        merchant_id="m1", provider="anthropic", model="m", task_type=task_type,
+        input_tokens=1, output_tokens=1, cost_usd=Decimal(cost)
+    )
+
+
+@pytest.mark.asyncio
+async def test_flushed_facts_roll_up_and_roll_back(maker):
+    async with maker() as session:
+        campaign = Campaign(merchant_id="m1", name="c", type="flash_sale", emails_opened=0)
+        session.add_all([_ledger("o1", "100.00"), _ledger("o2", "50.00"), _llm("0.25"), _llm("0.75", "chat"), campaign])
+        await session.commit()
+
+        campaign.emails_opened += 3
+        await session.commit()
+
+        session.add(_ledger("o3", "999.00"))
+        await session.flush()
+        await session.rollback()
+
+        rollups = RollupService("m1")
+        totals = await rollups.totals(session)
+        by_task = await rollups.llm_cost_by_task(session)
+
+    assert totals["attributed_orders"] == 2
+    assert Decimal(totals["attributed_revenue"]) == Decimal("150.00")
+    assert Decimal(totals["net_margin"]) == Decimal("75.00")
+    assert totals["llm_calls"] == 2
+    assert Decimal(totals["llm_cost"]) == Decimal("1.00")
+    assert totals["emails_opened"] == 3
+    assert by_task == {"strategy": 0.25, "chat": 0.75}
+
+
+@pytest.mark.asyncio
+async def test_compaction_repairs_drift_and_snapshots_gauges(maker):
+    async with maker() as session:
+        session.add_all([
+            _ledger("o1", "100.00"),
+            Customer(merchant_id="m1", shopify_customer_id=1, email="a@example.com", last_order_date=datetime.utcnow() - timedelta(days=90)),
+            Customer(merchant_id="m1", shopify_customer_id=2, email="b@example.com", last_order_date=datetime.utcnow()),
+        ])
+        await session.commit()
+        # A writer that bypassed the ORM left the rollup wrong
+        await session.execute(update(DailyMerchantRollup).values(attributed_orders=7, attributed_revenue=1))
+        await session.commit()
+
+    with patch("app.database.async_session_maker", maker):
+        stats = await compact_rollups(days=3)
+
+    async with maker() as session:
+        rollups = RollupService("m1")
+        totals = await rollups.totals(session)
+        gauges = await rollups.latest_gauges(session)
+
+    assert stats["ledger_days"] == 1
+    assert totals["attributed_orders"] == 1
+    assert Decimal(totals["attributed_revenue"]) == Decimal("100.00")
+    assert gauges == {"customers_reachable": 2, "customers_at_risk": 1}
+
+
+@pytest.mark.asyncio
+async def test_series_fills_missing_days(maker):
+    today = datetime.utcnow().date()
+    async with maker() as session:
+        session.add(_ledger("o1", "40.00", created_at=datetime.utcnow() - timedelta(days=2)))
+        await session.commit()
+
+        series = await RollupService("m1").series(session, today - timedelta(days=3), today)
+
+    assert [point["date"] for point in series] == [
+        (today - timedelta(days=n)).isoformat() for n in (3, 2, 1, 0)
+    ]
+    assert [point["attributed_revenue"] for point in series] == [0, 40.0, 0, 0]
+    assert series[1]["attributed_orders"] == 1
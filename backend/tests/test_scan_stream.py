@@ -0,0 +1,66 @@
+"""
+Unit Tests for the Scan Event Stream
+====================================
+
+Verifies:
+1. The SSE endpoint replays from Last-Event-ID, tags events with stream ids,
+   pings while idle, paces the reveal and ends on the terminal event
+2. Terminal events shorten the stream's lifetime to the retention window
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.config import get_settings
+from app.routers.scan import stream_scan_events
+from app.services.scan_broadcaster import ScanBroadcaster
+
+settings = get_settings()
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_from_last_event_id_and_ends_on_completion():
+    broadcaster = MagicMock()
+    broadcaster.read = AsyncMock(side_effect=[
+        [],
+        [("5-0", {"type": "scan_progress", "products_scanned": 3, "total_products": 50})],
+        [("6-0", {"type": "quick_scan_complete", "summary": {"dead_stock_count": 1}}),
+         ("7-0", {"type": "scan_progress", "products_scanned": 50, "total_products": 50})],
+    ])
+
+    with patch("app.routers.scan.get_broadcaster", return_value=broadcaster), \
+         patch("app.routers.scan.asyncio.sleep", new=AsyncMock()) as sleep:
+        response = await stream_scan_events("s1", last_event_id="4-0")
+        chunks = [chunk async for chunk in response.body_iterator]
+
+    assert [call.args[1] for call in broadcaster.read.call_args_list] == ["4-0", "4-0", "5-0"]
+    assert chunks[0].startswith("event: connected")
+    assert chunks[1] == ": ping\n\n"
+    assert chunks[2].startswith("id: 5-0\nevent: scan_progress\n")
+    assert chunks[3].startswith("id: 6-0\nevent: quick_scan_complete\n")
+    assert json.loads(chunks[3].split("data: ", 1)[1])["summary"] == {"dead_stock_count": 1}
+    assert len(chunks) == 4
+    sleep.assert_awaited_once_with(settings.SCAN_PROGRESS_INTERVAL_SECONDS)
+
+
+@pytest.mark.asyncio
+async def test_terminal_events_shorten_stream_lifetime():
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=["1-0", True])
+    pipeline = MagicMock()
+    pipeline.__aenter__ = AsyncMock(return_value=pipe)
+    pipeline.__aexit__ = AsyncMock(return_value=False)
+
+    broadcaster = ScanBroadcaster.__new__(ScanBroadcaster)
+    broadcaster.redis = MagicMock()
+    broadcaster.redis.pipeline.return_value = pipeline
+
+    await broadcaster.publish_scan_progress("s1", 1, 50)
+    await broadcaster.publish_quick_scan_complete("s1", {"dead_stock_count": 0})
+
+    assert pipe.xadd.call_args_list[0].args[0] == "scan_events:s1"
+    assert [call.args for call in pipe.expire.call_args_list] == [
+        ("scan_events:s1", settings.SCAN_STREAM_TTL_SECONDS),
+        ("scan_events:s1", settings.SCAN_STREAM_RETENTION_SECONDS),
+    ]
@@ -30,9 +30,14 @@ async def test_calculate_pricing_missing_cost_fallback():
     # We need to patch FloorPricingService where it is defined,
     # because it is locally imported inside the method.
     with patch('app.services.floor_pricing.FloorPricingService') as MockFloor, \
-         patch('app.agents.strategy.async_session_maker') as MockSession:
+         patch('app.agents.strategy.async_session_maker') as MockSession, \
+         patch('app.agents.strategy.get_merchant_context', new_callable=AsyncMock) as MockContext:
         
-        # Setup mocks
+        # Setup mocks: merchant has no floor records, 40% discount cap
+        MockContext.return_value = MagicMock(max_auto_discount=0.40)
+        MockContext.return_value.discount_cap.return_value = 0.40
+        MockContext.return_value.has_floor_pricing.return_value = False
+        MockContext.return_value.can_liquidate.return_value = False
         floor_instance = MockFloor.return_value
         floor_instance.get_floor_price = AsyncMock(return_value=None)
         floor_instance.can_liquidate = AsyncMock(return_value=False)
@@ -0,0 +1,116 @@
+"""
+Unit Tests for agent_thoughts Retention
+=======================================
+
+Verifies:
+1. Monthly partition naming and month arithmetic
+2. Observation roll-ups keep counts, severities and the describing month
+3. Only partitions fully past the longest retention are dropped
+4. A freshly created (partition-less) table gets its monthly and DEFAULT partitions
+5. On Postgres the model itself declares the partitioned table
+"""
+
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.thought_retention import (
+    ThoughtRetentionService,
+    build_observation_summary,
+    iter_months,
+    parse_partition_month,
+    partition_name,
+)
+
+
+def test_partition_names_round_trip():
+    month = datetime(2026, 2, 1)
+
+    assert partition_name(month) == "agent_thoughts_p2026_02"
+    assert parse_partition_month("agent_thoughts_p2026_02") == month
+    assert parse_partition_month("agent_thoughts_default") is None
+    assert list(iter_months(datetime(2025, 11, 20), datetime(2026, 2, 1))) == [
+        datetime(2025, 11, 1), datetime(2025, 12, 1), datetime(2026, 1, 1)
+    ]
+
+
+def test_observation_summary_aggregates_severity_rows():
+    rows = [
+        ("high", 3, datetime(2026, 7, 2), datetime(2026, 7, 20), Decimal("0.90")),
+        ("low", 1, datetime(2026, 7, 5), datetime(2026, 7, 5), Decimal("0.50")),
+    ]
+
+    thought = build_observation_summary("m1", "observer", "prod-1", datetime(2026, 7, 1), rows, "Latest take")
+
+    assert thought.thought_type == "observation_summary"
+    assert thought.product_id == "prod-1"
+    assert thought.created_at == datetime(2026, 7, 20)
+    assert thought.confidence_score == Decimal("0.8")
+    assert thought.detailed_reasoning["observation_count"] == 4
+    assert thought.detailed_reasoning["severity_counts"] == {"high": 3, "low": 1}
+    assert thought.detailed_reasoning["period"] == "2026-07"
+
+
+@pytest.mark.asyncio
+async def test_drop_expired_partitions_respects_longest_retention():
+    service = ThoughtRetentionService(now=datetime(2026, 10, 18))
+    service.retention_days = {"observation": 30, "causal_memory": 365}
+    service.default_retention = 180
+
+    session = MagicMock()
+    session.execute = AsyncMock()
+    session.commit = AsyncMock()
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+
+    partitions = [
+        "agent_thoughts_p2025_09",  # ends 2025-10-01, past the 365-day cutoff
+        "agent_thoughts_p2025_10",  # ends 2025-11-01, still holds causal memories
+        "agent_thoughts_p2026_10",
+        "agent_thoughts_default",
+    ]
+
+    with patch("app.services.thought_retention.async_session_maker", return_value=session_cm), \
+         patch.object(service, "_is_partitioned", new_callable=AsyncMock, return_value=True), \
+         patch.object(service, "_list_partitions", new_callable=AsyncMock, return_value=partitions):
+        dropped = await service.drop_expired_partitions()
+
+    assert dropped == 1
+    statement = str(session.execute.call_args.args[0])
+    assert statement == "DROP TABLE IF EXISTS agent_thoughts_p2025_09"
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_bootstraps_empty_parent():
+    service = ThoughtRetentionService(now=datetime(2026, 10, 18))
+
+    session = MagicMock()
+    session.execute = AsyncMock()
+    session.commit = AsyncMock()
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("app.services.thought_retention.async_session_maker", return_value=session_cm), \
+         patch.object(service, "_is_partitioned", new_callable=AsyncMock, return_value=True), \
+         patch.object(service, "_list_partitions", new_callable=AsyncMock, return_value=[]):
+        created = await service.ensure_partitions(months_ahead=1)
+
+    statements = [str(call.args[0]) for call in session.execute.call_args_list]
+    assert created == 3
+    assert "agent_thoughts_p2026_10 PARTITION OF agent_thoughts" in statements[0]
+    assert "agent_thoughts_p2026_11 PARTITION OF agent_thoughts" in statements[1]
+    assert statements[2].endswith("agent_thoughts_default PARTITION OF agent_thoughts DEFAULT")
+
+
+def test_model_creates_partitioned_table_on_postgres():
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateTable
+    from app.models import AgentThought
+
+    ddl = str(CreateTable(AgentThought.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "PRIMARY KEY (id, created_at)" in ddl
+    assert ddl.rstrip().endswith("PARTITION BY RANGE (created_at)")
@@ -0,0 +1,109 @@
+"""
+Unit Tests for the buffered Thought Sink
+========================================
+
+Verifies that agent thoughts are:
+1. Buffered instead of written one request at a time
+2. Flushed in a single bulk write when the batch fills or on demand
+3. Stamped with the sink's identity, never the payload's
+4. Flushed when an `async with sink:` block exits, even on error, with extra
+   keywords kept in detailed_reasoning
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.thought_sink import InProcessThoughtSink, HttpThoughtSink
+from app.services.internal_api_client import InternalAPIResponse
+
+
+@pytest.fixture
+def sink():
+    s = InProcessThoughtSink("merchant-1", "observer", batch_size=3, flush_interval=0)
+    s._identity_verified = True
+    return s
+
+
+@pytest.mark.asyncio
+async def test_emit_buffers_until_batch_size(sink):
+    with patch("app.services.thought_logger.ThoughtLogger.log_thoughts_bulk", new_callable=AsyncMock) as mock_bulk:
+        await sink.emit(thought_type="observation", summary="one")
+        await sink.emit(thought_type="observation", summary="two")
+
+        assert sink.pending == 2
+        mock_bulk.assert_not_called()
+
+        await sink.emit(thought_type="observation", summary="three")
+
+        assert sink.pending == 0
+        mock_bulk.assert_called_once()
+        merchant_id, agent_type, batch = mock_bulk.call_args.args
+        assert (merchant_id, agent_type) == ("merchant-1", "observer")
+        assert [t["summary"] for t in batch] == ["one", "two", "three"]
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_partial_batch_and_lifts_product_id(sink):
+    with patch("app.services.thought_logger.ThoughtLogger.log_thoughts_bulk", new_callable=AsyncMock) as mock_bulk:
+        await sink.emit(summary="analyzed", detailed_reasoning={"product_id": "prod-9"})
+
+        written = await sink.flush()
+
+        assert written == 1
+        batch = mock_bulk.call_args.args[2]
+        assert batch[0]["product_id"] == "prod-9"
+        assert batch[0]["thought_type"] == "info"
+
+
+@pytest.mark.asyncio
+async def test_flush_failure_is_logged_not_raised(sink):
+    with patch("app.services.thought_logger.ThoughtLogger.log_thoughts_bulk", new_callable=AsyncMock) as mock_bulk:
+        mock_bulk.side_effect = RuntimeError("db down")
+        await sink.emit(summary="lost")
+
+        assert await sink.flush() == 0
+        assert sink.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_inactive_identity_drops_batch():
+    sink = InProcessThoughtSink("merchant-1", "observer", batch_size=10, flush_interval=0)
+    with patch.object(sink, "_verify_identity", new_callable=AsyncMock, return_value=False), \
+         patch("app.services.thought_logger.ThoughtLogger.log_thoughts_bulk", new_callable=AsyncMock) as mock_bulk:
+        await sink.emit(summary="blocked")
+        await sink.flush()
+
+        mock_bulk.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_http_sink_posts_single_batch():
+    sink = HttpThoughtSink("merchant-1", "matchmaker", batch_size=10, flush_interval=0)
+
+    api = MagicMock()
+    api.post = AsyncMock(return_value=InternalAPIResponse(200, {"status": "logged", "count": 2}))
+
+    with patch("app.services.internal_api_client.get_internal_api_client", return_value=api):
+        await sink.emit(summary="a")
+        await sink.emit(summary="b")
+        await sink.flush()
+
+    api.post.assert_called_once()
+    path, merchant_id, agent_type = api.post.call_args.args
+    assert path == "/internal/agents/thoughts/batch"
+    assert (merchant_id, agent_type) == ("merchant-1", "matchmaker")
+    body = api.post.call_args.kwargs["json"]
+    assert [t["summary"] for t in body["thoughts"]] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_context_manager_flushes_and_keeps_extra_keywords(sink):
+    with patch("app.services.thought_logger.ThoughtLogger.log_thoughts_bulk", new_callable=AsyncMock) as mock_bulk:
+        with pytest.raises(RuntimeError):
+            async with sink:
+                await sink.emit(summary="converted", customer_id="cust-1")
+                raise RuntimeError("run failed")
+
+        assert sink.pending == 0
+        batch = mock_bulk.call_args.args[2]
+        assert batch[0]["detailed_reasoning"] == {"customer_id": "cust-1"}
@@ -0,0 +1,106 @@
+"""
+Unit Tests for Incremental Velocity Updates
+===========================================
+
+Verifies:
+1. The shared deterministic score / severity thresholds
+2. A sale bumps counters, rescores and withdraws proposals of recovered products
+3. Refunds and partial recoveries never escalate, only downgrade
+4. A refund id is claimed once, however late it is redelivered
+"""
+
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Base, InboxItem, Merchant, Product
+from app.services.velocity import VelocityService, base_severity, velocity_metrics
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'velocity.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(Merchant(
+            id="m1", platform="shopify", shopify_domain="a.myshopify.com", shopify_shop_id="a.myshopify.com",
+            access_token="t", store_name="A", email="a@example.com"
+        ))
+        await session.flush()
+        yield session
+    await engine.dispose()
+
+
+def _product(product_id: str, severity: str, inventory: int = 20, days: int = 120) -> Product:
+    return Product(
+        id=product_id, merchant_id="m1", shopify_product_id=int(product_id[1:]), title=product_id,
+        handle=product_id, total_inventory=inventory, units_sold_30d=0, units_refunded_30d=0,
+        units_sold_60d=0, units_sold_90d=0, days_since_last_sale=days,
+        last_sale_date=datetime.utcnow() - timedelta(days=days),
+        velocity_score=Decimal("0"), is_dead_stock=True, dead_stock_severity=severity,
+    )
+
+
+def _proposal(product_id: str, severity: str) -> InboxItem:
+    return InboxItem(
+        merchant_id="m1", type="clearance_proposal", status="pending", agent_type="strategy",
+        proposal_data={"product_id": product_id, "dead_stock_severity": severity},
+    )
+
+
+def test_score_and_thresholds_match_observer():
+    assert velocity_metrics(0, 10, 180) == {"velocity_score": 0.0, "turnover_rate": 0.0}
+    assert velocity_metrics(10, 10, 0)["velocity_score"] == 100.0
+    assert base_severity(10, 120) == "critical"
+    assert base_severity(10, 30) == "high"
+    assert base_severity(70, 0) == "none"
+
+
+@pytest.mark.asyncio
+async def test_sale_withdraws_proposals_of_recovered_products(session):
+    session.add_all([_product("p1", "critical"), _product("p2", "critical"), _proposal("p1", "critical")])
+    await session.flush()
+
+    update = await VelocityService("m1").apply_sale(
+        session, [("p1", 20, Decimal("15.00"))], sold_at=datetime.utcnow()
+    )
+
+    p1 = await session.get(Product, "p1")
+    p2 = await session.get(Product, "p2")
+    assert p1.units_sold_30d == 20 and p1.days_since_last_sale == 0
+    assert p1.revenue_30d == Decimal("300.00")
+    assert p1.is_dead_stock is False and p1.dead_stock_severity is None
+    assert p2.dead_stock_severity == "critical"   # untouched: not on the order
+    assert update.downgraded == {"p1": "none"}
+    assert [action for _, action in update.revised_proposals] == ["withdrawn"]
+
+
+@pytest.mark.asyncio
+async def test_refunds_and_small_sales_only_downgrade(session):
+    session.add_all([_product("p3", "low", inventory=100, days=10), _product("p4", "critical", inventory=100)])
+    session.add(_proposal("p4", "critical"))
+    await session.flush()
+
+    service = VelocityService("m1")
+    refund = await service.apply_refund(session, [("p3", 5, Decimal("10"))])
+    sale = await service.apply_sale(session, [("p4", 1, Decimal("10"))])
+
+    p3 = await session.get(Product, "p3")
+    p4 = await session.get(Product, "p4")
+    assert refund.downgraded == {} and p3.dead_stock_severity == "low"
+    assert p4.dead_stock_severity == "moderate"   # sold today: recency alone lifts the score
+    assert [action for _, action in sale.revised_proposals] == ["downgraded"]
+
+
+@pytest.mark.asyncio
+async def test_refund_is_claimed_once(session):
+    service = VelocityService("m1")
+
+    assert await service.claim_refund(session, "r1", "o1") is True
+    assert await service.claim_refund(session, "r1", "o1") is False
+    assert await service.claim_refund(session, "r2", "o1") is True
@@ -0,0 +1,203 @@
+"""
+Unit Tests for the Webhook Ingestion Queue
+==========================================
+
+Verifies:
+1. The endpoint acknowledges after enqueueing, without touching the DB
+2. A merchant's events are processed in receipt order
+3. Failing events are retried, then dead-lettered, and show up in metrics
+4. Redeliveries of the same webhook id are dropped
+5. Bursts of updates to one entity collapse into the latest payload
+6. A consumer that loses its shard lease stops before the next event, and a
+   new owner only claims entries idle for a whole lease
+"""
+
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.adapters.base import WebhookEvent
+from app.services.webhook_queue import (
+    InMemoryWebhookQueue,
+    QueuedWebhook,
+    RedisStreamWebhookQueue,
+    ShardLeaseLost,
+    WebhookConsumer,
+)
+
+
+def _queued(merchant_key: str, product_id: str, event_type: str = "product.updated", **kwargs) -> QueuedWebhook:
+    return QueuedWebhook(
+        platform="shopify",
+        topic="products-update",
+        event_type=event_type,
+        merchant_key=merchant_key,
+        payload={"id": product_id},
+        raw_payload={"id": product_id},
+        **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_handle_webhook_enqueues_and_acks_fast():
+    from app.routers import webhooks
+
+    queue = InMemoryWebhookQueue(shards=2)
+    adapter = MagicMock()
+    adapter.parse_webhook.return_value = WebhookEvent(
+        event_type="product.updated",
+        merchant_id="store.myshopify.com",
+        payload={"id": "42"},
+        raw_payload={"id": 42},
+        received_at=datetime.utcnow(),
+    )
+    request = MagicMock()
+    request.body = AsyncMock(return_value=json.dumps({"id": 42}).encode())
+    request.headers = {}
+
+    with patch.object(webhooks.AdapterRegistry, "get_adapter", return_value=adapter), \
+         patch.object(webhooks, "get_webhook_queue", return_value=queue), \
+         patch.object(webhooks, "get_merchant", new_callable=AsyncMock) as get_merchant:
+        response = await webhooks.handle_webhook(request, "shopify", "products-update")
+
+    assert response == {"status": "queued", "event": "product.updated"}
+    get_merchant.assert_not_called()
+
+    shard = queue.shard_of(_queued("store.myshopify.com", "42"))
+    [queued] = await queue.read(shard, block_ms=10)
+    assert queued.merchant_key == "store.myshopify.com"
+    assert queued.payload == {"id": "42"}
+
+
+@pytest.mark.asyncio
+async def test_consumer_preserves_per_merchant_order():
+    queue = InMemoryWebhookQueue(shards=4)
+    seen = []
+
+    async def handler(event):
+        seen.append((event.merchant_key, event.payload["id"]))
+
+    consumer = WebhookConsumer(queue, handler, retry_backoff=0)
+    for i in range(5):
+        await queue.enqueue(_queued("a.myshopify.com", f"a{i}"))
+        await queue.enqueue(_queued("b.myshopify.com", f"b{i}"))
+
+    for shard in range(queue.shards):
+        for event in await queue.read(shard, count=100, block_ms=10):
+            await consumer.process(shard, event)
+
+    assert [p for m, p in seen if m == "a.myshopify.com"] == [f"a{i}" for i in range(5)]
+    assert [p for m, p in seen if m == "b.myshopify.com"] == [f"b{i}" for i in range(5)]
+    assert (await consumer.metrics())["processed"] == 10
+
+
+@pytest.mark.asyncio
+async def test_consumer_retries_then_dead_letters():
+    queue = InMemoryWebhookQueue(shards=1)
+    calls = {"flaky": 0}
+
+    async def handler(event):
+        if event.payload["id"] == "flaky":
+            calls["flaky"] += 1
+            if calls["flaky"] < 2:
+                raise RuntimeError("deadlock detected")
+            return
+        raise RuntimeError("bad payload")
+
+    consumer = WebhookConsumer(queue, handler, max_attempts=3, retry_backoff=0)
+    await queue.enqueue(_queued("a.myshopify.com", "flaky"))
+    await queue.enqueue(_queued("a.myshopify.com", "poison"))
+
+    results = [await consumer.process(0, event) for event in await queue.read(0, count=10, block_ms=10)]
+
+    assert results == [True, False]
+    assert len(queue.dead_letters) == 1
+    assert queue.dead_letters[0]["event"].attempts == 3
+    assert await queue.depth(0) == 0
+
+    metrics = await consumer.metrics()
+    assert metrics["retried"] == 3
+    assert metrics["dead_lettered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_deliveries_are_dropped():
+    queue = InMemoryWebhookQueue(shards=1)
+
+    first = await queue.enqueue_once(_queued("a.myshopify.com", "1", webhook_id="wh-1"))
+    again = await queue.enqueue_once(_queued("a.myshopify.com", "1", webhook_id="wh-1"))
+
+    assert first is not None
+    assert again is None
+    assert queue.duplicates == 1
+    assert await queue.depth(0) == 1
+
+
+@pytest.mark.asyncio
+async def test_burst_of_updates_collapses_to_latest_payload():
+    queue = InMemoryWebhookQueue(shards=1)
+    seen = []
+
+    async def handler(event):
+        seen.append((event.event_type, event.payload["id"], event.raw_payload.get("version")))
+
+    consumer = WebhookConsumer(queue, handler, coalesce_window=0)
+    events = [_queued("a.myshopify.com", "p1") for _ in range(4)]
+    for version, event in enumerate(events):
+        event.raw_payload["version"] = version
+    events.insert(2, _queued("a.myshopify.com", "p2"))
+    events.append(_queued("a.myshopify.com", "p1", event_type="product.deleted"))
+    for event in events:
+        await queue.enqueue(event)
+
+    await consumer.process_batch(0, await consumer.read_batch(0))
+
+    assert seen == [
+        ("product.updated", "p1", 3),
+        ("product.updated", "p2", None),
+        ("product.deleted", "p1", None),
+    ]
+    metrics = await consumer.metrics()
+    assert metrics["coalesced"] == 3
+    assert metrics["collapse_ratio"] == 0.5
+    assert await queue.depth(0) == 0
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_stops_the_batch():
+    queue = InMemoryWebhookQueue(shards=1)
+    queue.claim_shard = AsyncMock(side_effect=[True, True, False])
+    seen = []
+
+    async def handler(event):
+        seen.append(event.payload["id"])
+
+    consumer = WebhookConsumer(queue, handler, coalesce_window=0)
+    for n in range(4):
+        await queue.enqueue(_queued("a.myshopify.com", f"p{n}", event_type="order.created"))
+
+    with pytest.raises(ShardLeaseLost):
+        await consumer.process_batch(0, await consumer.read_batch(0))
+
+    assert seen == ["p0", "p1"]
+    # The rest stays unacked for the new owner
+    assert await queue.depth(0) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_read_claims_only_idle_entries_of_other_consumers():
+    queue = RedisStreamWebhookQueue(shards=1)
+    queue._groups_ready.add(0)
+    event = _queued("a.myshopify.com", "p1")
+    redis = MagicMock()
+    redis.xreadgroup = AsyncMock(return_value=[])
+    redis.xautoclaim = AsyncMock(return_value=["0-0", [("1-0", event.to_fields())], []])
+    queue._redis = redis
+
+    [claimed] = await queue.read(0, consumer="replica-b")
+
+    assert claimed.message_id == "1-0"
+    assert redis.xreadgroup.await_args.args[1] == "replica-b"
+    assert redis.xautoclaim.await_args.kwargs["min_idle_time"] == queue.lease_ms
+    assert redis.xautoclaim.await_args.args[2] == "replica-b"
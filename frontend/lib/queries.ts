@@ -202,7 +202,7 @@ export const useThoughts = () => {
     queryKey: ['thoughts'],
     queryFn: async () => {
       const { data } = await api.get('/thoughts');
-      return (data || []) as Thought[];
+      return (data?.items || []) as Thought[];
     },
     enabled: isAuthenticated,
     refetchInterval: 5000,
@@ -221,7 +221,7 @@ export const useThoughtsByExecution = (executionId?: string) => {
       const { data } = await api.get('/thoughts', {
         params: { execution_id: executionId }
       });
-      return (data || []) as Thought[];
+      return (data?.items || []) as Thought[];
     },
     enabled: isAuthenticated && !!executionId,
   });